@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Acquisition DAG - Adquisición dirigida por hipótesis (CAPA 0 → CAPA 1)
+======================================================================
+
+Convierte la estrategia instrumental del TCP en un grafo de dependencias
+explícito en lugar de "TCP completo → ETP mide todo":
+
+    contexto:hidrografía ──► H_SETTLEMENT_WATER ──► onda de instrumentos
+    contexto:sitios      ──► H_<TIPO>_EXTERNAL   ──► onda de instrumentos
+    contexto:trazas      ──► H_TRANSIT_ROUTES    ──► onda de instrumentos
+    TCP completo         ──► estrategia ──► instrumentos restantes / omitidos
+
+- Cada hipótesis depende de UNA fuente de contexto: en cuanto esa fuente
+  responde, sus instrumentos empiezan a medirse mientras la geología y el
+  resto del contexto siguen resolviéndose
+- Un instrumento se mide una sola vez aunque lo pidan varias hipótesis
+- Modo hypothesis-driven: los instrumentos del ETP que ninguna hipótesis
+  activa recomienda no se miden (quedan reportados como omitidos)
+- Las ondas son batches del integrador: comparten los presupuestos por
+  fuente del scheduler adaptativo
+
+Uso (TerritorialInferentialTomographyEngine):
+    dag = AcquisitionDAG(etp_generator, bounds)
+    tcp = await tcp_system.generate_tcp(..., on_hypothesis=dag.on_hypothesis,
+                                        on_context=dag.on_context)
+    prefetched = await dag.finalize(tcp)
+    etp = await etp_generator.generate_etp(bounds, resolution_m, prefetched=prefetched)
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from etp_core import BoundingBox
+from etp_generator import ETProfileGenerator, PrefetchedAcquisition
+
+logger = logging.getLogger(__name__)
+
+
+class AcquisitionDAG:
+    """Plan de adquisición que arranca instrumentos a medida que se confirman hipótesis"""
+
+    def __init__(self, etp_generator: ETProfileGenerator, bounds: BoundingBox, prune: bool = True):
+        """
+        Args:
+            etp_generator: Generador ETP (define el universo de instrumentos y mide)
+            bounds: Región a medir
+            prune: True = omitir instrumentos no relevantes para las hipótesis
+                (modo hypothesis-driven); False = medir todo el universo ETP
+        """
+        self.etp_generator = etp_generator
+        self.bounds = bounds
+        self.prune = prune
+
+        # Universo: instrumentos distintos del ETP (sin deshabilitados), orden estable
+        self.universe: List[str] = list(etp_generator.plan_instruments()[0])
+
+        self.results: Dict[str, Any] = {}
+        self.triggers: Dict[str, str] = {}      # instrumento → nodo que lo lanzó
+        self.waves: List[Dict[str, Any]] = []
+        self.skipped: Dict[str, str] = {}
+        self.context_timings: Dict[str, float] = {}
+        self.context_resolved_at: Dict[str, float] = {}
+        self.tcp_resolved_at: Optional[float] = None
+
+        self._tasks: List[asyncio.Task] = []
+        self._started = time.perf_counter()
+
+    def _elapsed(self) -> float:
+        return round(time.perf_counter() - self._started, 3)
+
+    # ------------------------------------------------------------------
+    # Nodos (callbacks del TCP)
+    # ------------------------------------------------------------------
+
+    def on_context(self, name: str, duration_s: float):
+        """Fuente de contexto resuelta"""
+        self.context_timings[name] = duration_s
+        self.context_resolved_at[name] = self._elapsed()
+
+    def on_hypothesis(self, hypothesis: Any):
+        """Hipótesis confirmada: lanzar ya los instrumentos que recomienda"""
+        self._launch(hypothesis.hypothesis_id, hypothesis.recommended_instruments)
+
+    def _launch(self, trigger: str, instruments: Iterable[str]):
+        wanted = set(instruments)
+        pending = [i for i in self.universe if i in wanted and i not in self.triggers]
+        if not pending:
+            return
+        for instrument in pending:
+            self.triggers[instrument] = trigger
+
+        wave = {'trigger': trigger, 'instruments': pending, 'started_at_s': self._elapsed()}
+        self.waves.append(wave)
+        logger.info(f"  🛰️ Onda de adquisición [{trigger}] t={wave['started_at_s']:.2f}s: {', '.join(pending)}")
+        self._tasks.append(asyncio.get_running_loop().create_task(self._run_wave(wave)))
+
+    async def _run_wave(self, wave: Dict[str, Any]):
+        wave['scheduling'] = await self.etp_generator.fetch_instruments(
+            self.bounds, wave['instruments'],
+            on_result=lambda result: self.results.__setitem__(result.instrument_name, result)
+        )
+        wave['finished_at_s'] = self._elapsed()
+
+    # ------------------------------------------------------------------
+    # Cierre
+    # ------------------------------------------------------------------
+
+    async def finalize(self, tcp: Any) -> PrefetchedAcquisition:
+        """
+        TCP completo: lanzar lo que falte según la estrategia, omitir lo no
+        relevante y esperar todas las ondas.
+        """
+        self.tcp_resolved_at = self._elapsed()
+        hypotheses = tcp.territorial_hypotheses or []
+
+        # Hipótesis que solo se conocen al final (p. ej. la exploratoria por defecto)
+        for hypothesis in hypotheses:
+            self._launch(hypothesis.hypothesis_id, hypothesis.recommended_instruments)
+
+        if self.prune:
+            types = sorted({h.hypothesis_type for h in hypotheses})
+            reason = f"no relevante para las hipótesis activas ({', '.join(types) or 'ninguna'})"
+            self.skipped = {i: reason for i in self.universe if i not in self.triggers}
+        else:
+            self._launch('sensor_driven', self._by_strategy_priority(tcp, self.universe))
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+        first_start = min((w['started_at_s'] for w in self.waves), default=self._elapsed())
+        last_finish = max((w.get('finished_at_s', 0.0) for w in self.waves), default=first_start)
+        logger.info(f"  ✅ Plan de adquisición: {len(self.triggers)} medidos en {len(self.waves)} ondas, "
+                    f"{len(self.skipped)} omitidos")
+
+        return PrefetchedAcquisition(
+            results=dict(self.results),
+            skipped=dict(self.skipped),
+            wall_time_s=round(last_finish - first_start, 3),
+            scheduling={'waves': [self._wave_summary(w) for w in self.waves]}
+        )
+
+    def cancel(self):
+        """Cancelar ondas en curso (p. ej. si el TCP falló)"""
+        for task in self._tasks:
+            task.cancel()
+
+    def _by_strategy_priority(self, tcp: Any, instruments: List[str]) -> List[str]:
+        strategy = tcp.instrumental_strategy
+        ranked = (strategy.priority_instruments + strategy.secondary_instruments) if strategy else []
+        order = {name: i for i, name in enumerate(ranked)}
+        return sorted(instruments, key=lambda name: order.get(name, len(order)))
+
+    def _wave_summary(self, wave: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: wave.get(key) for key in ('trigger', 'instruments', 'started_at_s', 'finished_at_s')}
+
+    # ------------------------------------------------------------------
+    # Reporte
+    # ------------------------------------------------------------------
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Resumen para SystemTransparencyReport.
+
+        time_saved_s compara el camino crítico real con el flujo secuencial
+        anterior, estimado como suma de fuentes de contexto + un batch con
+        todos los instrumentos medidos (≈ el más lento).
+        """
+        tcp_done = self.tcp_resolved_at if self.tcp_resolved_at is not None else self._elapsed()
+        acquisition_done = max((w.get('finished_at_s') or 0.0 for w in self.waves), default=0.0)
+        critical_path_s = max(tcp_done, acquisition_done)
+
+        slowest_instrument_s = max(
+            (getattr(r, 'processing_time_s', None) or 0.0 for r in self.results.values()), default=0.0
+        )
+        sequential_estimate_s = sum(self.context_timings.values()) + slowest_instrument_s
+
+        return {
+            'mode': 'hypothesis_driven' if self.prune else 'sensor_driven',
+            'instruments_planned': len(self.universe),
+            'instruments_fetched': list(self.triggers),
+            'instruments_skipped': dict(self.skipped),
+            'triggers': dict(self.triggers),
+            'waves': [self._wave_summary(w) for w in self.waves],
+            'context_timings_s': dict(self.context_timings),
+            'tcp_context_s': round(tcp_done, 3),
+            'acquisition_done_s': round(acquisition_done, 3),
+            'critical_path_s': round(critical_path_s, 3),
+            'sequential_estimate_s': round(sequential_estimate_s, 3),
+            'time_saved_s': round(max(0.0, sequential_estimate_s - critical_path_s), 3)
+        }
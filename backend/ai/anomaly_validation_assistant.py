@@ -69,10 +69,10 @@ class AnomalyValidationAssistant:
     6. Genera reportes explicables
     """
     
-    def __init__(self):
+    def __init__(self, base_assistant: Optional[ArchaeologicalAssistant] = None):
         """Inicializar asistente de validación."""
         # Usar el asistente arqueológico base existente
-        self.base_assistant = ArchaeologicalAssistant()
+        self.base_assistant = base_assistant or ArchaeologicalAssistant()
         
         # Configuración específica para validación
         self.validation_threshold = 0.6  # Umbral para validación positiva
@@ -87,7 +87,7 @@ class AnomalyValidationAssistant:
         """Verificar si el asistente está disponible."""
         return self.base_assistant.is_available
     
-    def validate_anomaly(self, 
+    async def validate_anomaly(self, 
                         instrumental_features: InstrumentalFeatures,
                         raw_measurements: List[Dict[str, Any]],
                         current_score: float,
@@ -115,7 +115,7 @@ class AnomalyValidationAssistant:
             )
             
             # 2. Llamar al modelo IA
-            ai_response = self.base_assistant._call_ai_model(validation_prompt)
+            ai_response = await self.base_assistant._call_ai_model(validation_prompt)
             
             # 3. Parsear respuesta y generar resultado
             return self._parse_validation_response(
@@ -351,15 +351,35 @@ RAZONAMIENTO: [explicación breve]"""
             methodological_notes="Validación básica sin asistente IA"
         )
     
-    def batch_validate_anomalies(self,
+    async def batch_validate_anomalies(self,
                                 anomalies: List[Tuple[InstrumentalFeatures, float]],
                                 context: Dict[str, Any]) -> List[AnomalyValidationResult]:
-        """Validar múltiples anomalías en lote."""
+        """
+        Validar múltiples anomalías en lote.
+        
+        Todos los prompts se envían juntos al gateway (concurrencia acotada,
+        prompts repetidos una sola vez); cada anomalía cae a la validación
+        determinista si su llamada falla.
+        """
+        
+        if not self.is_available:
+            return [self._fallback_validation(features, score) for features, score in anomalies]
+        
+        prompts = [
+            self._build_validation_prompt(features, [], score, context)
+            for features, score in anomalies
+        ]
+        responses = await self.base_assistant._call_ai_models(prompts)
         
         results = []
-        for features, score in anomalies:
-            result = self.validate_anomaly(features, [], score, context)
-            results.append(result)
+        for (features, score), response in zip(anomalies, responses):
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                results.append(self._parse_validation_response(response, features, score, context))
+            except Exception as e:
+                logger.error(f"Error en validación IA: {e}")
+                results.append(self._fallback_validation(features, score))
         
         return results
     
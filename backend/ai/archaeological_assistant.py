@@ -6,9 +6,10 @@ Especializado en explicar anomalías espaciales desde perspectiva arqueológica
 con razonamiento científico riguroso.
 """
 
+import asyncio
 import requests
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 import logging
 from dataclasses import dataclass
 from datetime import datetime
@@ -20,6 +21,8 @@ from pathlib import Path
 env_path = Path(__file__).parent.parent.parent / '.env'
 load_dotenv(env_path)
 
+from .llm_gateway import LLMGateway, OPENROUTER_CHAT_URL, llm_gateway
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -39,9 +42,13 @@ class ArchaeologicalAssistant:
     
     Usa OpenRouter (Gemini 3 Preview) o Ollama para generar explicaciones 
     científicamente rigurosas de anomalías espaciales desde perspectiva arqueológica.
+    
+    Las generaciones pasan por el LLM gateway compartido (async, pool de
+    conexiones, concurrencia acotada y caché de respuestas): no bloquean
+    el event loop.
     """
     
-    def __init__(self):
+    def __init__(self, gateway: Optional[LLMGateway] = None):
         """Inicializar asistente arqueológico con configuración desde .env"""
         
         # Leer configuración desde .env - asegurar carga explícita
@@ -55,6 +62,7 @@ class ArchaeologicalAssistant:
         # Configuración OpenRouter
         self.openrouter_api_key = os.getenv('OPENROUTER_API_KEY')
         self.openrouter_model = os.getenv('OPENROUTER_MODEL', 'qwen/qwen3-coder:free')
+        self.openrouter_url = os.getenv('OPENROUTER_API_URL', OPENROUTER_CHAT_URL)
         
         # Configuración Ollama (fallback) - USAR MODELO2 (qwen2.5)
         self.ollama_model = os.getenv('OLLAMA_MODEL2', os.getenv('OLLAMA_MODEL1', os.getenv('OLLAMA_MODEL', 'qwen2.5:3b-instruct')))
@@ -65,6 +73,9 @@ class ArchaeologicalAssistant:
         self.ai_timeout = int(os.getenv('AI_TIMEOUT_SECONDS', '30'))
         self.max_tokens = int(os.getenv('AI_MAX_TOKENS', '300'))
         
+        # Gateway LLM compartido
+        self.gateway = gateway or llm_gateway
+        
         # Verificar disponibilidad
         self.is_available = self._check_availability()
         
@@ -128,7 +139,7 @@ FORMATO DE RESPUESTA:
                 }
                 
                 response = requests.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
+                    self.openrouter_url,
                     headers=headers,
                     json=test_payload,
                     timeout=10
@@ -195,7 +206,7 @@ FORMATO DE RESPUESTA:
         logger.error("   4. O inicia Ollama con: ollama run phi4-mini-reasoning")
         return False
     
-    def explain_archaeological_anomalies(self, 
+    async def explain_archaeological_anomalies(self, 
                                        anomalies: List[Dict[str, Any]], 
                                        rule_evaluations: Dict[str, Any],
                                        context: Dict[str, Any]) -> ArchaeologicalExplanation:
@@ -219,7 +230,7 @@ FORMATO DE RESPUESTA:
         
         try:
             # Llamar al modelo
-            response = self._call_ai_model(prompt)
+            response = await self._call_ai_model(prompt)
             
             # Parsear respuesta
             return self._parse_archaeological_response(response, anomalies, context)
@@ -263,20 +274,14 @@ Sé breve y científico."""
         
         return full_prompt
     
-    def _call_ai_model(self, prompt: str) -> str:
+    async def _call_ai_model(self, prompt: str) -> str:
         """Llamar al modelo de IA (OpenRouter primero, luego Ollama)."""
         
         # Prioridad 1: OpenRouter
         if self.openrouter_enabled and self.openrouter_api_key:
             try:
-                headers = {
-                    "Authorization": f"Bearer {self.openrouter_api_key}",
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "model": self.openrouter_model,
-                    "messages": [
+                content = await self.gateway.openrouter_chat(
+                    messages=[
                         {
                             "role": "system", 
                             "content": "Eres un arqueólogo experto especializado en teledetección arqueológica. Proporciona análisis científicos rigurosos y explicaciones claras sobre anomalías espaciales."
@@ -286,25 +291,16 @@ Sé breve y científico."""
                             "content": prompt
                         }
                     ],
-                    "max_tokens": self.max_tokens,
-                    "temperature": 0.3,  # Más determinista para análisis científico
-                    "top_p": 0.9
-                }
-                
-                response = requests.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers=headers,
-                    json=payload,
-                    timeout=self.ai_timeout
+                    model=self.openrouter_model,
+                    api_key=self.openrouter_api_key,
+                    max_tokens=self.max_tokens,
+                    temperature=0.3,  # Más determinista para análisis científico
+                    top_p=0.9,
+                    timeout=self.ai_timeout,
+                    url=self.openrouter_url
                 )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    content = result['choices'][0]['message']['content']
-                    logger.info(f"✅ Respuesta de OpenRouter ({self.openrouter_model})")
-                    return content
-                else:
-                    logger.warning(f"OpenRouter error: {response.status_code}")
+                logger.info(f"✅ Respuesta de OpenRouter ({self.openrouter_model})")
+                return content
                     
             except Exception as e:
                 logger.warning(f"Error con OpenRouter: {e}")
@@ -312,35 +308,34 @@ Sé breve y científico."""
         # Prioridad 2: Ollama (fallback)
         if self.ollama_enabled:
             try:
-                payload = {
-                    "model": self.ollama_model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
+                content = await self.gateway.ollama_generate(
+                    self.ollama_url,
+                    self.ollama_model,
+                    prompt,
+                    options={
                         "temperature": 0.2,  # Más determinista
                         "top_p": 0.8,        # Reducido
                         "num_predict": 100   # Reducido a 100 tokens
-                    }
-                }
-                
-                response = requests.post(
-                    f"{self.ollama_url}/api/generate",
-                    json=payload,
+                    },
                     timeout=30  # Reducido de 120 a 30 segundos
                 )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(f"✅ Respuesta de Ollama ({self.ollama_model})")
-                    return result.get('response', '')
-                else:
-                    raise Exception(f"Ollama error: {response.status_code} - {response.text}")
+                logger.info(f"✅ Respuesta de Ollama ({self.ollama_model})")
+                return content
                     
             except Exception as e:
                 logger.warning(f"Error con Ollama: {e}")
         
         raise Exception("Ningún proveedor de IA disponible")
     
+    async def _call_ai_models(self, prompts: List[str]) -> List[Union[str, Exception]]:
+        """
+        Llamar al modelo con varios prompts en paralelo.
+        
+        La concurrencia real la acota el gateway; prompts repetidos comparten
+        una única generación. Devuelve el texto o la excepción de cada prompt.
+        """
+        return await asyncio.gather(*[self._call_ai_model(p) for p in prompts], return_exceptions=True)
+    
     def _parse_archaeological_response(self, 
                                      response: str, 
                                      anomalies: List[Dict[str, Any]], 
@@ -489,7 +484,7 @@ Sé breve y científico."""
             scientific_reasoning="Basado en criterios de persistencia espacial y coherencia geométrica"
         )
     
-    def explain_batch_archaeological_analysis(self, 
+    async def explain_batch_archaeological_analysis(self, 
                                             spatial_anomalies: List[Dict[str, Any]], 
                                             rule_contradictions: List[Dict[str, Any]], 
                                             context: Dict[str, Any]) -> ArchaeologicalExplanation:
@@ -528,4 +523,4 @@ Sé breve y científico."""
             for i, anomaly in enumerate(all_anomalies)
         }
         
-        return self.explain_archaeological_anomalies(all_anomalies, mock_evaluations, context)
\ No newline at end of file
+        return await self.explain_archaeological_anomalies(all_anomalies, mock_evaluations, context)
\ No newline at end of file
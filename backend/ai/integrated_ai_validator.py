@@ -151,7 +151,7 @@ class IntegratedAIValidator:
                 
                 try:
                     # Intentar validación IA con timeout
-                    ai_validation = self.ai_validator.validate_anomaly(
+                    ai_validation = await self.ai_validator.validate_anomaly(
                         instrumental_features=instrumental_features,
                         raw_measurements=[
                             {
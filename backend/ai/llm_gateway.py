@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+LLM Gateway - Acceso asíncrono compartido a OpenRouter / Ollama / OpenCode
+
+Problema:
+- Los asistentes llamaban a los modelos con requests.post bloqueante desde
+  handlers async: el event loop de FastAPI quedaba detenido durante toda la
+  generación (hasta 30 s por prompt)
+- Los lotes se procesaban de a un prompt
+- Cada validador tenía su propia caché ad-hoc (JSON reescrito completo)
+
+Solución:
+- Pool de conexiones keep-alive por host (ConnectorTransport dedicado, con
+  políticas propias para proveedores LLM)
+- Concurrencia global acotada (semáforo) + límite por host
+- Prompts idénticos en vuelo comparten una única generación
+- Caché de respuestas direccionada por contenido: sha256(URL + payload),
+  el payload incluye modelo, prompt y parámetros de generación
+  (SQLite WAL, TTL y número máximo de entradas con desalojo LRU)
+
+Uso:
+    from ai.llm_gateway import llm_gateway
+    text = await llm_gateway.ollama_generate(url, model, prompt)
+    texts = await asyncio.gather(*[llm_gateway.openrouter_chat(...) for ...])
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from satellite_connectors.http_transport import ConnectorTransport, HostPolicy
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_CHAT_URL = 'https://openrouter.ai/api/v1/chat/completions'
+
+# Proveedores LLM: pocas conexiones, sin reintentar generaciones con respuesta
+LLM_DEFAULT_POLICY = HostPolicy(max_concurrency=2, max_connections=4, max_retries=1)
+
+LLM_HOST_POLICIES: Dict[str, HostPolicy] = {
+    "openrouter.ai": HostPolicy(max_concurrency=4, max_connections=4, max_retries=1),
+    # Ollama procesa las generaciones de a una por defecto (OLLAMA_NUM_PARALLEL)
+    "localhost": HostPolicy(max_concurrency=1, max_connections=2, max_retries=1),
+    "127.0.0.1": HostPolicy(max_concurrency=1, max_connections=2, max_retries=1),
+}
+
+
+class LLMGatewayError(Exception):
+    """Respuesta no válida de un proveedor LLM"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def response_key(url: str, payload: Dict[str, Any]) -> str:
+    """Clave de caché: hash del endpoint y del payload canónico (modelo + prompt + parámetros)"""
+    canonical = json.dumps({'url': url, 'payload': payload}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Caché persistente de respuestas LLM (SQLite WAL, una conexión por hilo)
+
+    - TTL por entrada (ttl_seconds <= 0 desactiva la caché)
+    - Como máximo max_entries: se desalojan las de acceso más antiguo
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access);
+    """
+
+    def __init__(
+        self,
+        path: str = "cache/llm_responses.sqlite",
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = float(os.getenv('LLM_CACHE_TTL_SECONDS', str(7 * 24 * 3600))) \
+            if ttl_seconds is None else float(ttl_seconds)
+        self.max_entries = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000')) \
+            if max_entries is None else int(max_entries)
+        self._local = threading.local()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0, 'stores': 0}
+        try:
+            self._connect().executescript(self.SCHEMA)
+        except Exception as e:
+            logger.error(f"Error initializing LLM response cache: {e}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Obtener conexión SQLite del hilo actual"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Respuesta cacheada vigente o None"""
+        if not self.enabled:
+            return None
+        conn = self._connect()
+        row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+        now = time.time()
+        if now - row[1] > self.ttl_seconds:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return None
+        conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self.stats['hits'] += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        """Guardar respuesta y aplicar el límite de tamaño"""
+        if not self.enabled:
+            return
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), now, now)
+        )
+        self.stats['stores'] += 1
+
+        count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            expired = conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+            excess = count - expired - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)", (excess,)
+                )
+                self.stats['evicted'] += excess
+
+    def clear(self):
+        self._connect().execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'entries': len(self),
+            'path': str(self.path),
+            'ttl_seconds': self.ttl_seconds,
+            'max_entries': self.max_entries
+        }
+
+
+class LLMGateway:
+    """
+    Gateway asíncrono compartido para proveedores LLM
+
+    Estado ligado al event loop activo, igual que ConnectorTransport.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[LLMResponseCache] = None,
+        max_concurrency: Optional[int] = None,
+        transport: Optional[ConnectorTransport] = None
+    ):
+        self.cache = cache if cache is not None else LLMResponseCache()
+        self.max_concurrency = max_concurrency or int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+        self.transport = transport or ConnectorTransport(
+            default_policy=LLM_DEFAULT_POLICY, host_policies=LLM_HOST_POLICIES
+        )
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.stats = {
+            'requests': 0,
+            'cache_hits': 0,
+            'coalesced': 0,
+            'generations': 0,
+            'failures': 0
+        }
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    async def post_json(self, url: str, payload: Dict[str, Any], *,
+                        headers: Optional[Dict[str, str]] = None,
+                        timeout: float = 30.0,
+                        use_cache: bool = True) -> Any:
+        """
+        POST JSON a un proveedor LLM con caché, coalescencia y concurrencia acotada
+
+        Returns:
+            JSON de la respuesta (HTTP 200)
+
+        Raises:
+            LLMGatewayError: HTTP != 200 o respuesta no JSON
+            httpx.HTTPError: error de red tras agotar reintentos
+        """
+        self._bind_loop()
+        self.stats['requests'] += 1
+        key = response_key(url, payload)
+
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats['cache_hits'] += 1
+                return cached
+
+        existing = self._inflight.get(key)
+        if existing is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(existing)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._generate(url, payload, headers, timeout)
+            if use_cache:
+                self.cache.put(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            if not future.done():
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+                    # Evitar "exception was never retrieved" si nadie más esperaba
+                    future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def openrouter_chat(self, messages: List[Dict[str, str]], model: str, api_key: str, *,
+                              max_tokens: int = 300, temperature: float = 0.3,
+                              top_p: Optional[float] = None, timeout: float = 30.0,
+                              url: str = OPENROUTER_CHAT_URL, use_cache: bool = True) -> str:
+        """Chat completion de OpenRouter → texto de la primera opción"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if top_p is not None:
+            payload["top_p"] = top_p
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://archeoscope.app",
+            "X-Title": "ArcheoScope"
+        }
+        result = await self.post_json(url, payload, headers=headers,
+                                      timeout=timeout, use_cache=use_cache)
+        try:
+            return result['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError):
+            raise LLMGatewayError(f"Respuesta OpenRouter inesperada: {str(result)[:200]}")
+
+    async def ollama_generate(self, base_url: str, model: str, prompt: str, *,
+                              options: Optional[Dict[str, Any]] = None,
+                              timeout: float = 30.0, use_cache: bool = True) -> str:
+        """Generación de Ollama (sin streaming) → texto"""
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        if options:
+            payload["options"] = options
+        result = await self.post_json(f"{base_url.rstrip('/')}/api/generate", payload,
+                                      timeout=timeout, use_cache=use_cache)
+        return result.get('response', '') if isinstance(result, dict) else ''
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del gateway, la caché y el transporte"""
+        return {
+            **self.stats,
+            'max_concurrency': self.max_concurrency,
+            'inflight': len(self._inflight),
+            'cache': self.cache.get_stats(),
+            'transport': self.transport.get_stats()
+        }
+
+    async def aclose(self):
+        """Cerrar pools HTTP (shutdown de la aplicación)"""
+        await self.transport.aclose()
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _bind_loop(self):
+        """Recrear estado ligado al loop si el loop activo cambió"""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._inflight = {}
+
+    async def _generate(self, url: str, payload: Dict[str, Any],
+                        headers: Optional[Dict[str, str]], timeout: float) -> Any:
+        async with self._semaphore:
+            self.stats['generations'] += 1
+            try:
+                response = await self.transport.post(url, json=payload, headers=headers, timeout=timeout)
+            except Exception:
+                self.stats['failures'] += 1
+                raise
+
+        if response.status_code != 200:
+            self.stats['failures'] += 1
+            raise LLMGatewayError(f"HTTP {response.status_code}: {response.text[:200]}",
+                                  status_code=response.status_code)
+        try:
+            return response.json()
+        except ValueError:
+            self.stats['failures'] += 1
+            raise LLMGatewayError(f"Respuesta no JSON: {response.text[:200]}",
+                                  status_code=response.status_code)
+
+
+# Instancia global compartida por los asistentes IA
+llm_gateway = LLMGateway()
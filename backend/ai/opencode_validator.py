@@ -12,12 +12,11 @@ FILOSOFÍA:
 - Se ejecuta DESPUÉS del scoring determinista
 - Es OPCIONAL y puede fallar sin afectar el análisis
 - Nunca en loops críticos
-- Siempre cacheable (determinista)
+- Siempre cacheable (determinista): las respuestas se guardan en la caché
+  direccionada por contenido del LLM gateway (payload → respuesta, con TTL)
 """
 
 import requests
-import json
-import hashlib
 import logging
 import os
 from typing import Dict, List, Any, Optional
@@ -30,6 +29,8 @@ from dotenv import load_dotenv
 env_path = Path(__file__).parent.parent.parent / '.env'
 load_dotenv(env_path)
 
+from .llm_gateway import LLMGateway, llm_gateway
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -54,7 +55,7 @@ class OpenCodeValidator:
                                     OPCIONAL
     """
     
-    def __init__(self):
+    def __init__(self, gateway: Optional[LLMGateway] = None):
         """Inicializar validador OpenCode."""
         
         # Configuración desde .env
@@ -64,12 +65,8 @@ class OpenCodeValidator:
         self.min_score = float(os.getenv('OPENCODE_MIN_SCORE', '0.75'))
         self.max_tokens = int(os.getenv('OPENCODE_MAX_TOKENS', '500'))
         
-        # Caché en memoria
-        self.cache = {}
-        
-        # Caché persistente
-        self.cache_file = Path(__file__).parent.parent.parent / 'cache' / 'opencode_validations.json'
-        self._load_cache()
+        # Gateway LLM compartido (pool HTTP + caché de respuestas)
+        self.gateway = gateway or llm_gateway
         
         # Verificar disponibilidad
         self.is_available = self._check_availability()
@@ -79,7 +76,7 @@ class OpenCodeValidator:
         logger.info(f"  - API URL: {self.api_url}")
         logger.info(f"  - Min score: {self.min_score}")
         logger.info(f"  - Available: {'✅' if self.is_available else '❌'}")
-        logger.info(f"  - Cache: {len(self.cache)} entradas")
+        logger.info(f"  - Cache: {len(self.gateway.cache)} entradas (gateway)")
     
     def _check_availability(self) -> bool:
         """Verificar si OpenCode está disponible."""
@@ -119,7 +116,8 @@ class OpenCodeValidator:
         Criterios:
         - Score > threshold configurado
         - OpenCode habilitado y disponible
-        - No está en caché
+        
+        Los candidatos ya validados se resuelven desde la caché del gateway.
         """
         if not self.enabled or not self.is_available:
             return False
@@ -128,15 +126,9 @@ class OpenCodeValidator:
         if score < self.min_score:
             return False
         
-        # Verificar caché
-        cache_key = self._hash_candidate(candidate)
-        if cache_key in self.cache:
-            logger.debug(f"Candidato ya validado (caché): {cache_key[:8]}")
-            return False
-        
         return True
     
-    def validate_candidate(self, candidate: Dict[str, Any]) -> Optional[OpenCodeValidation]:
+    async def validate_candidate(self, candidate: Dict[str, Any]) -> Optional[OpenCodeValidation]:
         """
         Validar coherencia lógica de un candidato arqueológico.
         
@@ -150,20 +142,14 @@ class OpenCodeValidator:
         if not self.should_validate(candidate):
             return None
         
-        # Verificar caché primero
-        cache_key = self._hash_candidate(candidate)
-        if cache_key in self.cache:
-            logger.info(f"✅ Validación desde caché: {cache_key[:8]}")
-            return self._deserialize_validation(self.cache[cache_key])
-        
         try:
             logger.info(f"🧠 Validando candidato con OpenCode...")
             
             # Preparar datos para OpenCode
             validation_data = self._prepare_validation_data(candidate)
             
-            # Llamar a OpenCode
-            result = self._call_opencode(
+            # Llamar a OpenCode (caché del gateway por payload)
+            result = await self._call_opencode(
                 task="validate_coherence",
                 data=validation_data
             )
@@ -171,10 +157,6 @@ class OpenCodeValidator:
             # Parsear resultado
             validation = self._parse_validation_result(result, candidate)
             
-            # Guardar en caché
-            self.cache[cache_key] = self._serialize_validation(validation)
-            self._save_cache()
-            
             logger.info(f"✅ Validación completada: coherente={'✅' if validation.is_coherent else '❌'}")
             
             return validation
@@ -183,7 +165,7 @@ class OpenCodeValidator:
             logger.error(f"❌ Error en validación OpenCode: {e}")
             return None
     
-    def explain_evidence(self, candidate: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def explain_evidence(self, candidate: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Generar explicación estructurada de evidencia arqueológica.
         
@@ -204,7 +186,7 @@ class OpenCodeValidator:
             explanation_data = self._prepare_explanation_data(candidate)
             
             # Llamar a OpenCode
-            result = self._call_opencode(
+            result = await self._call_opencode(
                 task="explain_archaeological",
                 data=explanation_data
             )
@@ -217,7 +199,7 @@ class OpenCodeValidator:
             logger.error(f"❌ Error generando explicación: {e}")
             return None
     
-    def classify_pattern(self, candidate: Dict[str, Any]) -> Optional[str]:
+    async def classify_pattern(self, candidate: Dict[str, Any]) -> Optional[str]:
         """
         Clasificar tipo de patrón arqueológico.
         
@@ -238,7 +220,7 @@ class OpenCodeValidator:
             pattern_data = self._prepare_pattern_data(candidate)
             
             # Llamar a OpenCode
-            result = self._call_opencode(
+            result = await self._call_opencode(
                 task="classify_pattern",
                 data=pattern_data
             )
@@ -252,7 +234,7 @@ class OpenCodeValidator:
             logger.error(f"❌ Error clasificando patrón: {e}")
             return None
     
-    def _call_opencode(self, task: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _call_opencode(self, task: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Llamar a OpenCode API.
         
@@ -271,16 +253,11 @@ class OpenCodeValidator:
             "temperature": 0.1  # Muy determinista
         }
         
-        response = requests.post(
+        return await self.gateway.post_json(
             f"{self.api_url}/analyze",
-            json=payload,
+            payload,
             timeout=self.timeout
         )
-        
-        if response.status_code != 200:
-            raise Exception(f"OpenCode error: HTTP {response.status_code}")
-        
-        return response.json()
     
     def _prepare_validation_data(self, candidate: Dict[str, Any]) -> Dict[str, Any]:
         """Preparar datos para validación de coherencia."""
@@ -334,72 +311,14 @@ class OpenCodeValidator:
             timestamp=datetime.now().isoformat()
         )
     
-    def _hash_candidate(self, candidate: Dict[str, Any]) -> str:
-        """Generar hash determinista del candidato para caché."""
-        
-        key_data = {
-            "coords": candidate.get('spatial_context', {}),
-            "score": round(candidate.get('archaeological_probability', 0.0), 3),
-            "instruments": sorted([
-                inst.get('type', 'unknown') 
-                for inst in candidate.get('evidence_layers', [])
-            ])
-        }
-        
-        key_str = json.dumps(key_data, sort_keys=True)
-        return hashlib.sha256(key_str.encode()).hexdigest()
-    
-    def _serialize_validation(self, validation: OpenCodeValidation) -> Dict[str, Any]:
-        """Serializar validación para caché."""
-        
-        return {
-            "is_coherent": validation.is_coherent,
-            "confidence_score": validation.confidence_score,
-            "validation_reasoning": validation.validation_reasoning,
-            "detected_inconsistencies": validation.detected_inconsistencies,
-            "pattern_classification": validation.pattern_classification,
-            "recommended_actions": validation.recommended_actions,
-            "false_positive_risk": validation.false_positive_risk,
-            "timestamp": validation.timestamp
-        }
-    
-    def _deserialize_validation(self, data: Dict[str, Any]) -> OpenCodeValidation:
-        """Deserializar validación desde caché."""
-        
-        return OpenCodeValidation(**data)
-    
-    def _load_cache(self):
-        """Cargar caché desde disco."""
-        
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, 'r') as f:
-                    self.cache = json.load(f)
-                logger.info(f"✅ Caché cargado: {len(self.cache)} entradas")
-            except Exception as e:
-                logger.warning(f"⚠️ Error cargando caché: {e}")
-                self.cache = {}
-        else:
-            self.cache = {}
-    
-    def _save_cache(self):
-        """Guardar caché a disco."""
-        
-        try:
-            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
-            logger.debug(f"💾 Caché guardado: {len(self.cache)} entradas")
-        except Exception as e:
-            logger.warning(f"⚠️ Error guardando caché: {e}")
-    
     def get_cache_stats(self) -> Dict[str, Any]:
         """Obtener estadísticas de caché."""
         
+        cache_stats = self.gateway.cache.get_stats()
         return {
-            "total_entries": len(self.cache),
-            "cache_file": str(self.cache_file),
-            "cache_exists": self.cache_file.exists(),
+            "total_entries": cache_stats['entries'],
+            "cache_file": cache_stats['path'],
+            "cache_exists": Path(cache_stats['path']).exists(),
             "enabled": self.enabled,
             "available": self.is_available
         }
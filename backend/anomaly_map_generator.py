@@ -59,6 +59,45 @@ class AnomalyMap:
     metadata: Dict[str, Any]
 
 
+def colorize_anomaly_map(data: np.ndarray, geometric_features: np.ndarray) -> np.ndarray:
+    """
+    Colormap científico (RGB uint8) compartido por el PNG completo y los tiles.
+    
+    🔵 azul: fondo natural
+    🟡 amarillo: anomalía débil
+    🔴 rojo: convergencia multifuente fuerte
+    ⚪ blanco: features geométricas
+    """
+    # NaN (sin dato) se pinta como fondo
+    data = np.nan_to_num(np.clip(data, 0.0, 1.0), nan=0.0)
+    
+    # Normalizar a 0-255
+    data_norm = (data * 255).astype(np.uint8)
+    
+    # Aplicar colormap: azul → amarillo → rojo
+    rgb = np.zeros((*data.shape, 3), dtype=np.uint8)
+    
+    # Azul (bajo)
+    rgb[:, :, 2] = 255 - data_norm  # B
+    
+    # Amarillo (medio)
+    mask_medium = (data > 0.3) & (data < 0.7)
+    rgb[mask_medium, 0] = 255  # R
+    rgb[mask_medium, 1] = 255  # G
+    
+    # Rojo (alto)
+    mask_high = data >= 0.7
+    rgb[mask_high, 0] = 255  # R
+    rgb[mask_high, 1] = 0    # G
+    rgb[mask_high, 2] = 0    # B
+    
+    # Overlay geometric features (blanco)
+    geometric_mask = np.nan_to_num(geometric_features, nan=0.0) > 0.5
+    rgb[geometric_mask] = [255, 255, 255]
+    
+    return rgb
+
+
 class AnomalyMapGenerator:
     """
     Generador de mapas de anomalía multifuente.
@@ -505,32 +544,7 @@ class AnomalyMapGenerator:
         try:
             from PIL import Image
             
-            # Crear colormap personalizado
-            data = anomaly_map.anomaly_map
-            
-            # Normalizar a 0-255
-            data_norm = (data * 255).astype(np.uint8)
-            
-            # Aplicar colormap: azul → amarillo → rojo
-            rgb = np.zeros((*data.shape, 3), dtype=np.uint8)
-            
-            # Azul (bajo)
-            rgb[:, :, 2] = 255 - data_norm  # B
-            
-            # Amarillo (medio)
-            mask_medium = (data > 0.3) & (data < 0.7)
-            rgb[mask_medium, 0] = 255  # R
-            rgb[mask_medium, 1] = 255  # G
-            
-            # Rojo (alto)
-            mask_high = data >= 0.7
-            rgb[mask_high, 0] = 255  # R
-            rgb[mask_high, 1] = 0    # G
-            rgb[mask_high, 2] = 0    # B
-            
-            # Overlay geometric features (blanco)
-            geometric_mask = anomaly_map.geometric_features > 0.5
-            rgb[geometric_mask] = [255, 255, 255]
+            rgb = colorize_anomaly_map(anomaly_map.anomaly_map, anomaly_map.geometric_features)
             
             # Guardar
             img = Image.fromarray(rgb)
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Anomaly Raster Store - Entrega compacta de mapas de anomalía
+============================================================
+
+Cada análisis guarda sus capas UNA vez, cuantizadas y en tiles comprimidos,
+en lugar de viajar como base64 float64 dentro del JSON de respuesta:
+
+    anomaly_maps/rasters/{analysis_id}/
+        manifest.json   # shape, bounds, cuantización por capa, índice de tiles
+        tiles.pack      # tiles zlib concatenados (offset/length en el índice)
+        png/            # PNG renderizados bajo demanda (caché)
+
+- Cuantización: uint8 (scale/offset por capa, 255 = sin dato) o float16
+- Pirámide: z = max_zoom es la resolución nativa, cada nivel inferior
+  reduce 2x (media para anomalía, máximo para features geométricas)
+- Tiles de TILE_SIZE px; x = columna, y = fila
+- ETag por tile = hash del contenido comprimido
+- PNG: se renderiza al primer request y queda cacheado (sin PIL/matplotlib)
+
+Servido por api/anomaly_tiles_endpoint.py en /anomaly-map/{id}/tiles/{z}/{x}/{y}
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import struct
+import threading
+import warnings
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from anomaly_map_generator import AnomalyMap, colorize_anomaly_map
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+TILE_SIZE = 256
+UINT8_NODATA = 255
+# Subir si cambia colorize_anomaly_map: invalida ETags de PNG ya servidos
+PNG_RENDER_VERSION = 1
+
+# Cuantización y reductor de pirámide por capa
+LAYER_DEFAULTS = {
+    'anomaly_map': {'dtype': 'uint8', 'reducer': 'mean'},
+    'geometric_features': {'dtype': 'uint8', 'reducer': 'max'},
+}
+
+_SAFE_ID = re.compile(r'^[A-Za-z0-9_.\-]+$')
+
+
+class RasterNotFound(KeyError):
+    """Análisis, capa o tile inexistente"""
+
+
+def _etag(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=10).hexdigest()
+
+
+def _downsample(array: np.ndarray, reducer: str) -> np.ndarray:
+    """Reducir 2x por bloques (NaN = sin dato)"""
+    h, w = array.shape
+    padded = np.full((h + h % 2, w + w % 2), np.nan, dtype=np.float64)
+    padded[:h, :w] = array
+    blocks = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+    with warnings.catch_warnings():
+        # Bloques todo-NaN → NaN, sin warning
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if reducer == 'max':
+            return np.nanmax(blocks, axis=(1, 3))
+        return np.nanmean(blocks, axis=(1, 3))
+
+
+def _quantize(array: np.ndarray, dtype: str) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Parámetros de cuantización de la capa (calculados sobre el nivel nativo)"""
+    if dtype == 'float16':
+        return array.astype(np.float16), {'dtype': 'float16', 'scale': 1.0, 'offset': 0.0, 'nodata': None}
+
+    finite = array[np.isfinite(array)]
+    lo = float(finite.min()) if finite.size else 0.0
+    hi = float(finite.max()) if finite.size else 0.0
+    scale = (hi - lo) / (UINT8_NODATA - 1) if hi > lo else 1.0
+    params = {'dtype': 'uint8', 'scale': scale, 'offset': lo, 'nodata': UINT8_NODATA}
+    return _apply_uint8(array, params), params
+
+
+def _apply_uint8(array: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
+    valid = np.isfinite(array)
+    q = np.full(array.shape, UINT8_NODATA, dtype=np.uint8)
+    q[valid] = np.clip(np.rint((array[valid] - params['offset']) / params['scale']), 0, UINT8_NODATA - 1)
+    return q
+
+
+def dequantize(tile: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
+    """Tile cuantizado → float32 (NaN donde no hay dato)"""
+    if params['dtype'] == 'float16':
+        return tile.astype(np.float32)
+    values = tile.astype(np.float32) * np.float32(params['scale']) + np.float32(params['offset'])
+    values[tile == UINT8_NODATA] = np.nan
+    return values
+
+
+def encode_png(rgb: np.ndarray) -> bytes:
+    """PNG RGB 8-bit mínimo (solo zlib; Pillow es opcional en este repo)"""
+    h, w, _ = rgb.shape
+    # Filtro 0 (None) al inicio de cada fila
+    raw = np.concatenate([np.zeros((h, 1), dtype=np.uint8), rgb.reshape(h, w * 3)], axis=1).tobytes()
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 6))
+            + chunk(b'IEND', b''))
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class AnomalyRasterStore:
+    """
+    Almacén de rasters de anomalía por analysis_id (tiles cuantizados + PNG lazy)
+    """
+
+    def __init__(self, root_dir: str = "anomaly_maps/rasters",
+                 legacy_png_dir: str = "anomaly_maps",
+                 tile_size: int = TILE_SIZE,
+                 manifest_cache_size: int = 64):
+        self.root_dir = Path(root_dir)
+        self.legacy_png_dir = Path(legacy_png_dir)
+        self.tile_size = tile_size
+        self._manifests: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._manifest_cache_size = manifest_cache_size
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def save_anomaly_map(self, analysis_id: str, anomaly_map: AnomalyMap) -> Dict[str, Any]:
+        """Guardar anomaly_map + geometric_features de un AnomalyMap"""
+        return self.save(
+            analysis_id,
+            layers={
+                'anomaly_map': anomaly_map.anomaly_map,
+                'geometric_features': anomaly_map.geometric_features,
+            },
+            bounds=anomaly_map.bounds,
+            resolution_m=anomaly_map.resolution_m
+        )
+
+    def save(self, analysis_id: str, layers: Dict[str, np.ndarray],
+             bounds: Optional[Tuple[float, float, float, float]] = None,
+             resolution_m: Optional[float] = None,
+             quantization: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Cuantizar, teselar y guardar las capas de un análisis.
+
+        Args:
+            layers: nombre → array 2D (todas con el mismo shape)
+            quantization: nombre → 'uint8' | 'float16' (por defecto LAYER_DEFAULTS)
+
+        Returns:
+            Manifest (sin el índice de tiles)
+        """
+        directory = self._analysis_dir(analysis_id)
+        shapes = {np.shape(array) for array in layers.values()}
+        if len(shapes) != 1 or len(next(iter(shapes))) != 2:
+            raise ValueError(f"Las capas deben ser 2D y del mismo shape: {shapes}")
+        height, width = next(iter(shapes))
+        max_zoom = max(0, math.ceil(math.log2(max(height, width) / self.tile_size)))
+
+        directory.mkdir(parents=True, exist_ok=True)
+        pack = bytearray()
+        index: Dict[str, list] = {}
+        layer_params: Dict[str, Dict[str, Any]] = {}
+
+        for name, array in layers.items():
+            defaults = LAYER_DEFAULTS.get(name, {'dtype': 'uint8', 'reducer': 'mean'})
+            dtype = (quantization or {}).get(name, defaults['dtype'])
+            level = np.asarray(array, dtype=np.float64)
+            quantized, params = _quantize(level, dtype)
+            params['reducer'] = defaults['reducer']
+            layer_params[name] = params
+
+            for z in range(max_zoom, -1, -1):
+                if z != max_zoom:
+                    level = _downsample(level, params['reducer'])
+                    quantized = (level.astype(np.float16) if dtype == 'float16'
+                                 else _apply_uint8(level, params))
+                rows, cols = quantized.shape
+                for y in range(math.ceil(rows / self.tile_size)):
+                    for x in range(math.ceil(cols / self.tile_size)):
+                        tile = np.ascontiguousarray(quantized[y * self.tile_size:(y + 1) * self.tile_size,
+                                                              x * self.tile_size:(x + 1) * self.tile_size])
+                        blob = zlib.compress(tile.tobytes(), 6)
+                        index[f"{name}/{z}/{x}/{y}"] = [len(pack), len(blob), tile.shape[0], tile.shape[1], _etag(blob)]
+                        pack += blob
+
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'analysis_id': analysis_id,
+            'shape': [height, width],
+            'bounds': list(bounds) if bounds is not None else None,
+            'resolution_m': resolution_m,
+            'tile_size': self.tile_size,
+            'max_zoom': max_zoom,
+            'layers': layer_params,
+            'created_at': datetime.now().isoformat(),
+            'tiles': index,
+        }
+
+        # Pack primero, manifest al final: un manifest visible siempre tiene su pack
+        _write_atomic(directory / "tiles.pack", bytes(pack))
+        _write_atomic(directory / "manifest.json", json.dumps(manifest).encode('utf-8'))
+        with self._lock:
+            self._manifests.pop(analysis_id, None)
+
+        raw_bytes = sum(np.asarray(a).nbytes for a in layers.values())
+        logger.info(f"   💾 Raster {analysis_id}: {len(index)} tiles, "
+                    f"{len(pack) / 1024:.1f} KB (float64: {raw_bytes / 1024:.1f} KB)")
+        return self.describe(manifest)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def exists(self, analysis_id: str) -> bool:
+        try:
+            return (self._analysis_dir(analysis_id) / "manifest.json").exists()
+        except RasterNotFound:
+            return False
+
+    def get_manifest(self, analysis_id: str) -> Dict[str, Any]:
+        with self._lock:
+            manifest = self._manifests.get(analysis_id)
+            if manifest is not None:
+                self._manifests.move_to_end(analysis_id)
+                return manifest
+
+        path = self._analysis_dir(analysis_id) / "manifest.json"
+        try:
+            manifest = json.loads(path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            raise RasterNotFound(analysis_id)
+
+        with self._lock:
+            self._manifests[analysis_id] = manifest
+            while len(self._manifests) > self._manifest_cache_size:
+                self._manifests.popitem(last=False)
+        return manifest
+
+    def describe(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """Manifest público (sin índice de tiles)"""
+        return {key: value for key, value in manifest.items() if key != 'tiles'}
+
+    def read_tile(self, analysis_id: str, layer: str, z: int, x: int, y: int) -> Tuple[bytes, Dict[str, Any]]:
+        """
+        Tile comprimido tal como está en disco.
+
+        Returns:
+            (zlib bytes, {'shape', 'dtype', 'etag'})
+        """
+        manifest = self.get_manifest(analysis_id)
+        entry = manifest['tiles'].get(f"{layer}/{z}/{x}/{y}")
+        if entry is None:
+            raise RasterNotFound(f"{analysis_id}/{layer}/{z}/{x}/{y}")
+        offset, length, rows, cols, etag = entry
+
+        with open(self._analysis_dir(analysis_id) / "tiles.pack", 'rb') as pack:
+            pack.seek(offset)
+            blob = pack.read(length)
+        return blob, {'shape': (rows, cols), 'dtype': manifest['layers'][layer]['dtype'], 'etag': etag}
+
+    def read_tile_array(self, analysis_id: str, layer: str, z: int, x: int, y: int) -> np.ndarray:
+        """Tile decodificado y descuantizado (float32)"""
+        blob, meta = self.read_tile(analysis_id, layer, z, x, y)
+        tile = np.frombuffer(zlib.decompress(blob), dtype=meta['dtype']).reshape(meta['shape'])
+        return dequantize(tile, self.get_manifest(analysis_id)['layers'][layer])
+
+    def read_level(self, analysis_id: str, layer: str, z: Optional[int] = None) -> np.ndarray:
+        """Capa completa de un nivel (por defecto el nativo) reensamblada desde los tiles"""
+        manifest = self.get_manifest(analysis_id)
+        z = manifest['max_zoom'] if z is None else z
+        tiles = {}
+        for key in manifest['tiles']:
+            name, tz, tx, ty = key.split('/')
+            if name == layer and int(tz) == z:
+                tiles[(int(tx), int(ty))] = self.read_tile_array(analysis_id, layer, z, int(tx), int(ty))
+        if not tiles:
+            raise RasterNotFound(f"{analysis_id}/{layer}/{z}")
+
+        n_x = max(tx for tx, _ in tiles) + 1
+        n_y = max(ty for _, ty in tiles) + 1
+        rows = [np.concatenate([tiles[(tx, ty)] for tx in range(n_x)], axis=1) for ty in range(n_y)]
+        return np.concatenate(rows, axis=0)
+
+    # ------------------------------------------------------------------
+    # PNG (lazy + caché)
+    # ------------------------------------------------------------------
+
+    def png_tile_etag(self, analysis_id: str, z: int, x: int, y: int) -> str:
+        """ETag del PNG derivado de los tiles fuente (permite 304 sin renderizar)"""
+        manifest = self.get_manifest(analysis_id)
+        parts = [f"v{PNG_RENDER_VERSION}"]
+        for layer in ('anomaly_map', 'geometric_features'):
+            entry = manifest['tiles'].get(f"{layer}/{z}/{x}/{y}")
+            if entry is None:
+                raise RasterNotFound(f"{analysis_id}/{layer}/{z}/{x}/{y}")
+            parts.append(entry[4])
+        return _etag("|".join(parts).encode('ascii'))
+
+    def render_png_tile(self, analysis_id: str, z: int, x: int, y: int) -> bytes:
+        """PNG del tile (renderizado en el primer request y cacheado en disco)"""
+        etag = self.png_tile_etag(analysis_id, z, x, y)
+        path = self._analysis_dir(analysis_id) / "png" / str(z) / f"{x}_{y}.{etag}.png"
+        if path.exists():
+            return path.read_bytes()
+
+        rgb = colorize_anomaly_map(
+            self.read_tile_array(analysis_id, 'anomaly_map', z, x, y),
+            self.read_tile_array(analysis_id, 'geometric_features', z, x, y)
+        )
+        png = encode_png(rgb)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(path, png)
+        return png
+
+    def render_full_png(self, analysis_id: str) -> Path:
+        """
+        PNG completo en la ruta histórica anomaly_maps/anomaly_map_{id}.png
+        (renderizado al primer request; antes se escribía en cada análisis)
+        """
+        path = self.legacy_png_dir / f"anomaly_map_{analysis_id}.png"
+        if path.exists():
+            return path
+
+        rgb = colorize_anomaly_map(self.read_level(analysis_id, 'anomaly_map'),
+                                   self.read_level(analysis_id, 'geometric_features'))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(path, encode_png(rgb))
+        logger.info(f"   💾 Mapa exportado (lazy): {path}")
+        return path
+
+    def _analysis_dir(self, analysis_id: str) -> Path:
+        if not _SAFE_ID.match(analysis_id) or analysis_id in ('.', '..'):
+            raise RasterNotFound(analysis_id)
+        return self.root_dir / analysis_id
+
+
+# Instancia global
+anomaly_raster_store = AnomalyRasterStore()
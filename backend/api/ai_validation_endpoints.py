@@ -326,7 +326,7 @@ async def batch_analyze_with_ai_validation(request: BatchValidationRequest):
         logger.info(f"🔍 Iniciando análisis en lote: {len(request.regions)} regiones")
         
         # Ejecutar análisis en lote
-        results = validator.batch_analyze_with_validation(
+        results = await validator.batch_analyze_with_validation(
             regions=request.regions,
             context=request.context
         )
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+API Endpoint - Tiles de Mapas de Anomalía
+=========================================
+
+Sirve los rasters guardados por anomaly_raster_store:
+
+- GET /anomaly-map/{analysis_id}/manifest           → shape, bounds, cuantización
+- GET /anomaly-map/{analysis_id}/tiles/{z}/{x}/{y}  → tile cuantizado (zlib)
+      ?layer=anomaly_map | geometric_features
+- GET /anomaly-map/{analysis_id}/tiles/{z}/{x}/{y}.png → tile coloreado (lazy)
+
+Todas las respuestas llevan ETag (If-None-Match → 304) y los tiles aceptan
+Range (206 / 416).
+"""
+
+import asyncio
+import logging
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+# Agregar backend al path
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from anomaly_raster_store import anomaly_raster_store, RasterNotFound
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/anomaly-map", tags=["Anomaly Maps"])
+
+CACHE_CONTROL = "public, max-age=86400"
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [c.strip() for c in header.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def _conditional_response(request: Request, body: bytes, etag: str, media_type: str,
+                          headers: Optional[Dict[str, str]] = None) -> Response:
+    """Respuesta con ETag, 304 si el cliente ya la tiene y soporte de Range"""
+    quoted = f'"{etag}"'
+    base_headers = {"ETag": quoted, "Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes", **(headers or {})}
+
+    if _etag_matches(request, quoted):
+        return Response(status_code=304, headers=base_headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == quoted):
+        match = _RANGE.match(range_header.strip())
+        # Rangos múltiples o mal formados: se ignoran y va el cuerpo completo
+        if match and (match.group(1) or match.group(2)):
+            size = len(body)
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start, end = max(0, size - int(match.group(2))), size - 1
+            if start >= size or start > end:
+                return Response(status_code=416, headers={**base_headers, "Content-Range": f"bytes */{size}"})
+            return Response(
+                content=body[start:end + 1],
+                status_code=206,
+                media_type=media_type,
+                headers={**base_headers, "Content-Range": f"bytes {start}-{end}/{size}"}
+            )
+
+    return Response(content=body, media_type=media_type, headers=base_headers)
+
+
+@router.get("/{analysis_id}/manifest")
+async def get_raster_manifest(analysis_id: str, request: Request):
+    """Manifest del raster (shape, bounds, niveles, cuantización por capa)."""
+    try:
+        manifest = anomaly_raster_store.get_manifest(analysis_id)
+    except RasterNotFound:
+        raise HTTPException(status_code=404, detail="Raster no encontrado")
+
+    etag = f'"{manifest["created_at"]}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(anomaly_raster_store.describe(manifest),
+                        headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+@router.get("/{analysis_id}/tiles/{z}/{x}/{y}")
+async def get_raster_tile(analysis_id: str, z: int, x: int, y: str, request: Request,
+                          layer: str = "anomaly_map"):
+    """
+    Tile del raster.
+
+    - `{y}`: array cuantizado comprimido con zlib (dtype/escala en el manifest,
+      shape en X-Tile-Shape)
+    - `{y}.png`: tile coloreado, renderizado en el primer request y cacheado
+    """
+    as_png = y.endswith(".png")
+    y_str = y[:-4] if as_png else y
+    if not y_str.isdigit():
+        raise HTTPException(status_code=404, detail="Tile no encontrado")
+    y_idx = int(y_str)
+
+    try:
+        if as_png:
+            etag = anomaly_raster_store.png_tile_etag(analysis_id, z, x, y_idx)
+            if _etag_matches(request, f'"{etag}"'):
+                return _conditional_response(request, b"", etag, "image/png")
+            png = await asyncio.to_thread(anomaly_raster_store.render_png_tile, analysis_id, z, x, y_idx)
+            return _conditional_response(request, png, etag, "image/png")
+
+        blob, meta = anomaly_raster_store.read_tile(analysis_id, layer, z, x, y_idx)
+    except RasterNotFound:
+        raise HTTPException(status_code=404, detail="Tile no encontrado")
+
+    return _conditional_response(
+        request, blob, meta['etag'], "application/octet-stream",
+        headers={
+            "X-Tile-Shape": f"{meta['shape'][0]},{meta['shape'][1]}",
+            "X-Tile-Dtype": meta['dtype'],
+            "X-Tile-Encoding": "zlib"
+        }
+    )
@@ -18,14 +18,20 @@ from pathlib import Path
 backend_path = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_path))
 
-from culturally_constrained_mig import CulturallyConstrainedMIG
+from component_registry import components
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Instancia global del MIG
-mig = CulturallyConstrainedMIG(output_dir="geometric_models")
+
+def _create_mig():
+    # trimesh/matplotlib se importan recién al construir el MIG
+    from culturally_constrained_mig import CulturallyConstrainedMIG
+    return CulturallyConstrainedMIG(output_dir="geometric_models")
+
+# Instancia global del MIG (construcción diferida)
+components.register('mig', _create_mig)
 
 
 class GeometricInferenceRequest(BaseModel):
@@ -52,6 +58,10 @@ async def generate_3d_representation(request: GeometricInferenceRequest):
     Si no se proveen datos de ArcheoScope, se ejecuta análisis completo.
     """
     
+    mig = await components.aget('mig')
+    if mig is None:
+        raise HTTPException(status_code=503, detail="Motor de inferencia geométrica no disponible")
+    
     try:
         logger.info(f"🧬 Solicitud de representación 3D: {request.lat}, {request.lon}")
         
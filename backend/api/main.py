@@ -4,14 +4,18 @@ API principal para ArcheoScope - Archaeological Remote Sensing Engine.
 VERSIÓN LIMPIA - Solo endpoints funcionales y críticos.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import Dict, List, Any, Optional
 import sys
 from pathlib import Path
+import asyncio
+import json
 import logging
+import time
 import numpy as np
 from datetime import datetime
 import os
@@ -40,14 +44,10 @@ def convert_numpy_types(obj):
     else:
         return obj
 
-from rules.archaeological_rules import ArchaeologicalRulesEngine
-from ai.archaeological_assistant import ArchaeologicalAssistant
-from explainability.scientific_explainer import ScientificExplainer
-from volumetric.geometric_inference_engine import GeometricInferenceEngine
-from environment_classifier import EnvironmentClassifier
-from core_anomaly_detector import CoreAnomalyDetector
-from validation.data_source_transparency import DataSourceTransparency
 from database import db as database_connection
+from pipeline_tracing import tracer, is_debug_trace_requested
+from component_registry import components
+from hrm.hrm_server import hrm_inference_server
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -110,8 +110,79 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+def _observe_request(request: Request, start: float, error: bool = False):
+    # Plantilla de ruta (no la URL concreta) para acotar la cardinalidad
+    route = request.scope.get("route")
+    tracer.observe("http_request", f"{request.method} {getattr(route, 'path', 'unmatched')}",
+                   time.perf_counter() - start, error=error)
+
+async def _observe_at_body_end(body_iterator, request: Request, start: float):
+    """Reenviar el cuerpo y registrar la latencia tras el último chunk."""
+    error = False
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    except Exception:
+        error = True
+        raise
+    finally:
+        _observe_request(request, start, error)
+
+async def trace_requests(request: Request, call_next):
+    """
+    Latencia por endpoint en /metrics y resumen flame opcional.
+    
+    La latencia se registra al terminar el cuerpo: en respuestas streaming
+    (SSE /analyze/stream, NDJSON /analyze/batch) cubre la respuesta completa,
+    no solo el tiempo hasta los headers.
+    
+    Con el header `X-ArcheoScope-Debug: trace`, las respuestas JSON incluyen
+    `debug_trace` (árbol de spans, stacks colapsados y top por tiempo propio)
+    y todas las respuestas un header `Server-Timing`. En respuestas streaming
+    la traza solo reporta lo ocurrido hasta el primer byte.
+    """
+    debug = is_debug_trace_requested(request.headers)
+    if debug:
+        trace, tokens = tracer.start_request_trace()
+    
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        _observe_request(request, start, error=True)
+        raise
+    finally:
+        if debug:
+            tracer.end_request_trace(tokens)
+    
+    if debug and response.headers.get("content-type", "").startswith("application/json"):
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        _observe_request(request, start)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict):
+            payload["debug_trace"] = trace.flame_summary()
+            body = json.dumps(payload).encode("utf-8")
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+        response = Response(content=body, status_code=response.status_code, headers=headers)
+    else:
+        response.body_iterator = _observe_at_body_end(response.body_iterator, request, start)
+    
+    if debug:
+        server_timing = trace.server_timing()
+        if server_timing:
+            response.headers["Server-Timing"] = server_timing
+    return response
+
+# Sin tracing (ARCHEOSCOPE_TRACING=0) la API no paga el middleware
+if tracer.enabled:
+    app.middleware("http")(trace_requests)
+
 # Modelos
 class RegionRequest(BaseModel):
     """Solicitud de análisis arqueológico"""
@@ -128,95 +199,164 @@ class SystemStatus(BaseModel):
     ai_status: str
     available_rules: List[str]
 
-# Estado global
-system_components = {
-    'rules_engine': None,
-    'ai_assistant': None,
-    'explainer': None,
-    'geometric_engine': None,
-    'environment_classifier': None,
-    'core_anomaly_detector': None,
-    'transparency': None
-}
+# Componentes del sistema: se construyen en el primer uso o en el warm-up
+# de background (los imports pesados quedan dentro de cada fábrica)
+def _create_rules_engine():
+    from rules.archaeological_rules import ArchaeologicalRulesEngine
+    return ArchaeologicalRulesEngine()
+
+def _create_explainer():
+    from explainability.scientific_explainer import ScientificExplainer
+    return ScientificExplainer()
+
+def _create_geometric_engine():
+    from volumetric.geometric_inference_engine import GeometricInferenceEngine
+    return GeometricInferenceEngine()
+
+def _create_environment_classifier():
+    from environment_classifier import EnvironmentClassifier
+    return EnvironmentClassifier()
+
+def _create_transparency():
+    from validation.data_source_transparency import DataSourceTransparency
+    return DataSourceTransparency()
+
+components.register('rules_engine', _create_rules_engine)
+# AI Assistant deshabilitado temporalmente - causaba bloqueo en startup
+components.register('ai_assistant', None)
+components.register('explainer', _create_explainer)
+components.register('geometric_engine', _create_geometric_engine)
+components.register('environment_classifier', _create_environment_classifier)
+# CoreAnomalyDetector necesita real_validator y data_loader
+# Temporalmente deshabilitado para evitar dependencias circulares
+components.register('core_anomaly_detector', None)
+components.register('transparency', _create_transparency)
+
+SYSTEM_COMPONENTS = (
+    'rules_engine', 'ai_assistant', 'explainer', 'geometric_engine',
+    'environment_classifier', 'core_anomaly_detector', 'transparency'
+)
+
+# Vista de compatibilidad: system_components.get('x') construye bajo demanda
+system_components = components
+
+# Segundos tras el startup antes del warm-up (uvicorn abre el puerto primero)
+WARM_UP_DELAY_S = float(os.getenv("ARCHEOSCOPE_WARM_UP_DELAY_S", "0.5"))
+
+def _backend_status() -> str:
+    """operational sólo si todos los componentes ya están construidos (no los construye)."""
+    return "operational" if all(components.peek(name) for name in SYSTEM_COMPONENTS) else "limited"
 
 def initialize_system():
-    """Inicializar componentes del sistema."""
+    """Construir ya todos los componentes (síncrono; la API usa el warm-up en background)."""
     try:
-        system_components['rules_engine'] = ArchaeologicalRulesEngine()
-        
-        # AI Assistant deshabilitado temporalmente - causaba bloqueo en startup
-        # system_components['ai_assistant'] = ArchaeologicalAssistant()
-        system_components['ai_assistant'] = None
-        logger.info("⚠️ AI Assistant deshabilitado temporalmente")
-        
-        system_components['explainer'] = ScientificExplainer()
-        system_components['geometric_engine'] = GeometricInferenceEngine()
-        system_components['environment_classifier'] = EnvironmentClassifier()
-        
-        # CoreAnomalyDetector necesita real_validator y data_loader
-        # Temporalmente deshabilitado para evitar dependencias circulares
-        system_components['core_anomaly_detector'] = None
-        logger.info("⚠️ CoreAnomalyDetector deshabilitado temporalmente")
-        
-        system_components['transparency'] = DataSourceTransparency()
-        
+        status = components.warm_up()
         logger.info("✅ Sistema ArcheoScope inicializado correctamente")
-        return True
+        return all(entry['state'] != 'failed' for entry in status.values())
     except Exception as e:
         logger.error(f"❌ Error inicializando ArcheoScope: {e}")
         return False
 
-@app.on_event("startup")
-async def startup_event():
-    """Inicializar sistema al arrancar."""
-    logger.info("🚀 Iniciando ArcheoScope...")
-    
-    # Inicializar componentes básicos
+async def _initialize_database():
+    """Pool compartido, índice espacial de sitios y cola write-behind."""
     try:
-        initialize_system()
-    except Exception as e:
-        logger.error(f"❌ Error en initialize_system: {e}")
-    
-    # Inicializar BD
-    try:
-        if database_connection is not None:
-            await database_connection.connect()
-            site_count = await database_connection.count_sites()
-            logger.info(f"✅ Base de datos conectada - {site_count:,} sitios disponibles")
+        from database.pool import get_shared_pool
+        pool = await get_shared_pool()
+        if pool is not None:
+            # Índice espacial compartido de sitios conocidos (k-NN / radio en memoria)
+            from spatial_site_index import load_sites_from_db
+            from validation.real_archaeological_validator import ArchaeologicalSite
+            site_count = await load_sites_from_db(pool, site_factory=ArchaeologicalSite.from_db_row)
+            logger.info(f"✅ Base de datos conectada - {site_count:,} sitios indexados")
         else:
-            logger.warning("⚠️ Database connection no disponible")
+            logger.warning("⚠️ Pool de BD no disponible: índice de sitios solo con calibración")
     except Exception as e:
         logger.warning(f"⚠️ BD no disponible (continuando sin BD): {e}")
     
-    # Inicializar pool para endpoint científico
+    # Endpoint científico y TIMT usan el mismo pool compartido
     try:
-        from api.scientific_endpoint import init_db_pool, initialize_timt_engine as init_scientific_timt
+        from api.scientific_endpoint import init_db_pool
         await init_db_pool()
-        init_scientific_timt() # NUEVO: Inicializar motor TIMT para el endpoint científico
-        logger.info("✅ Pool y Motor Científico inicializados")
+        logger.info("✅ Pool científico inicializado")
     except Exception as e:
         logger.warning(f"⚠️ Pool científico no disponible: {e}")
-        
-    # Inicializar pool para TIMT (NUEVO)
+    
     try:
-        from api.timt_endpoints import init_timt_db_pool
-        await init_timt_db_pool()
+        from api import timt_endpoints
+        timt_pool = await timt_endpoints.init_timt_db_pool()
         logger.info("✅ Pool TIMT inicializado")
+        
+        # Cola write-behind: reanudar escrituras pendientes del journal
+        if timt_pool:
+            from api.timt_db_saver import timt_write_queue
+            timt_write_queue.attach(timt_pool)
     except Exception as e:
         logger.warning(f"⚠️ Pool TIMT no disponible: {e}")
-    
-    logger.info("✅ ArcheoScope iniciado completamente")
+
+async def _warm_up_system():
+    """Warm-up en background: BD y componentes, sin retrasar la apertura del puerto."""
+    await asyncio.sleep(WARM_UP_DELAY_S)
+    started = time.perf_counter()
+    await _initialize_database()
+    await components.start_warm_up()
+    logger.info(f"✅ ArcheoScope listo (warm-up {time.perf_counter() - started:.1f}s)")
+
+@app.on_event("startup")
+async def startup_event():
+    """Arrancar sin construir componentes: el warm-up corre en background."""
+    logger.info("🚀 Iniciando ArcheoScope...")
+    app.state.warm_up_task = asyncio.create_task(_warm_up_system(), name="archeoscope-warm-up")
+    logger.info("✅ ArcheoScope iniciado (componentes bajo demanda, warm-up en background)")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cerrar conexiones."""
+    warm_up_task = getattr(app.state, "warm_up_task", None)
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+    
+    try:
+        from api.timt_db_saver import timt_write_queue
+        await timt_write_queue.close(timeout=10.0)
+        logger.info("✅ Cola write-behind TIMT vaciada")
+    except Exception as e:
+        logger.warning(f"⚠️ Error vaciando cola write-behind: {e}")
+
+    try:
+        from database.measurements_logger import close_measurements_loggers
+        await close_measurements_loggers()
+        logger.info("✅ Mediciones pendientes vaciadas")
+    except Exception as e:
+        logger.warning(f"⚠️ Error vaciando mediciones: {e}")
+
     try:
         if database_connection is not None:
             await database_connection.close()
-            logger.info("✅ Conexión a BD cerrada")
+        from database.pool import close_shared_pool
+        await close_shared_pool()
+        logger.info("✅ Conexión a BD cerrada")
     except Exception as e:
         logger.warning(f"⚠️ Error cerrando BD: {e}")
 
+    try:
+        from satellite_connectors.http_transport import connector_transport
+        await connector_transport.aclose()
+        logger.info("✅ Pools HTTP de conectores cerrados")
+    except Exception as e:
+        logger.warning(f"⚠️ Error cerrando pools HTTP: {e}")
+
+    try:
+        await asyncio.to_thread(hrm_inference_server.close)
+    except Exception as e:
+        logger.warning(f"⚠️ Error deteniendo HRM server: {e}")
+
+    try:
+        from ai.llm_gateway import llm_gateway
+        await llm_gateway.aclose()
+        logger.info("✅ Pool HTTP del LLM gateway cerrado")
+    except Exception as e:
+        logger.warning(f"⚠️ Error cerrando LLM gateway: {e}")
+
 # ============================================================================
 # ENDPOINTS FUNCIONALES
 # ============================================================================
@@ -231,13 +371,21 @@ async def root():
         "paradigm": "spatial_persistence_detection"
     }
 
+@app.get("/metrics", tags=["Status"], response_class=PlainTextResponse)
+async def get_metrics():
+    """Histogramas de latencia (fases, instrumentos, HTTP, BD) en formato Prometheus."""
+    return PlainTextResponse(
+        tracer.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 @app.get("/status", response_model=SystemStatus, tags=["Status"])
 async def get_system_status():
     """Estado operacional del sistema."""
-    backend_status = "operational" if all(system_components.values()) else "limited"
+    backend_status = _backend_status()
     ai_assistant = system_components.get('ai_assistant')
     ai_status = "available" if ai_assistant and ai_assistant.is_available else "offline"
-    rules_engine = system_components.get('rules_engine')
+    rules_engine = await system_components.aget('rules_engine')
     available_rules = [rule.name for rule in rules_engine.rules] if rules_engine else []
     
     return SystemStatus(
@@ -248,23 +396,20 @@ async def get_system_status():
 
 @app.get("/status/detailed", tags=["Status"])
 async def get_detailed_system_status():
-    """Estado detallado del sistema con todos los componentes."""
-    ai_assistant = system_components.get('ai_assistant')
+    """Estado detallado del sistema con todos los componentes (sin construirlos)."""
+    ai_assistant = system_components.peek('ai_assistant')
     
     return {
-        "backend_status": "operational" if all(system_components.values()) else "limited",
+        "backend_status": _backend_status(),
         "ai_status": "available" if ai_assistant and ai_assistant.is_available else "offline",
         "ai_model": (ai_assistant.openrouter_model if ai_assistant.openrouter_enabled 
                     else ai_assistant.ollama_model) if ai_assistant else "none",
         "system_components": {
-            "rules_engine": "operational" if system_components.get('rules_engine') else "offline",
-            "ai_assistant": "operational" if system_components.get('ai_assistant') else "offline",
-            "explainer": "operational" if system_components.get('explainer') else "offline",
-            "geometric_engine": "operational" if system_components.get('geometric_engine') else "offline",
-            "environment_classifier": "operational" if system_components.get('environment_classifier') else "offline",
-            "core_anomaly_detector": "operational" if system_components.get('core_anomaly_detector') else "offline",
-            "transparency": "operational" if system_components.get('transparency') else "offline"
-        }
+            name: "operational" if system_components.peek(name) else "offline"
+            for name in SYSTEM_COMPONENTS
+        },
+        "component_loading": components.status(),
+        "hrm_server": hrm_inference_server.get_stats()
     }
 
 @app.get("/anomaly-map/{filename}", tags=["Anomaly Maps"])
@@ -276,7 +421,14 @@ async def get_anomaly_map(filename: str):
     map_path = Path("anomaly_maps") / filename
     
     if not map_path.exists():
-        raise HTTPException(status_code=404, detail="Mapa no encontrado")
+        # anomaly_map_{id}.png ya no se escribe en cada análisis: se renderiza
+        # desde los tiles guardados la primera vez que se pide
+        from anomaly_raster_store import anomaly_raster_store
+        analysis_id = filename[len("anomaly_map_"):-len(".png")]
+        if not (filename.startswith("anomaly_map_") and filename.endswith(".png")
+                and anomaly_raster_store.exists(analysis_id)):
+            raise HTTPException(status_code=404, detail="Mapa no encontrado")
+        map_path = await asyncio.to_thread(anomaly_raster_store.render_full_png, analysis_id)
     
     return FileResponse(
         path=str(map_path),
@@ -287,7 +439,7 @@ async def get_anomaly_map(filename: str):
 @app.get("/data-sources", tags=["Data"])
 async def get_data_sources():
     """Información sobre fuentes de datos utilizadas."""
-    transparency = system_components.get('transparency')
+    transparency = await system_components.aget('transparency')
     if not transparency:
         # Retornar datos básicos si el componente no está disponible
         return {
@@ -449,10 +601,8 @@ try:
     if str(backend_path) not in sys.path:
         sys.path.insert(0, str(backend_path))
     
-    from api.timt_endpoints import timt_router, initialize_timt_engine
-    
-    # Inicializar motor TIMT
-    initialize_timt_engine()
+    # El motor TIMT se construye en el warm-up / primer uso (component_registry)
+    from api.timt_endpoints import timt_router
     
     app.include_router(
         timt_router,
@@ -529,6 +679,21 @@ except ImportError as e:
 except Exception as e:
     logger.error(f"❌ Error inicializando router de Credenciales: {e}")
 
+# ============================================================================
+# INCLUIR ROUTER TILES DE MAPAS DE ANOMALÍA
+# ============================================================================
+
+# Debe ir antes del montaje estático de /anomaly-map
+try:
+    from api.anomaly_tiles_endpoint import router as anomaly_tiles_router
+    
+    app.include_router(anomaly_tiles_router)
+    logger.info("✅ Router de tiles incluido en /anomaly-map/{id}/tiles")
+except ImportError as e:
+    logger.error(f"❌ No se pudo cargar router de tiles: {e}")
+except Exception as e:
+    logger.error(f"❌ Error inicializando router de tiles: {e}")
+
 # ============================================================================
 # SERVIR ARCHIVOS ESTÁTICOS (ANOMALISM)
 # ============================================================================
@@ -6,9 +6,12 @@ Endpoint Científico de Análisis - ArcheoScope
 Implementa el pipeline científico completo de 7 fases (0, A-F, G).
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, List, Any, Optional
+import asyncio
+import json
 import sys
 from pathlib import Path
 import os
@@ -20,8 +23,6 @@ logger = logging.getLogger(__name__)
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scientific_pipeline import ScientificPipeline
-from satellite_connectors.real_data_integrator import RealDataIntegrator
-from environment_classifier import EnvironmentClassifier
 from validation.real_archaeological_validator import RealArchaeologicalValidator
 from territorial_inferential_tomography import (
     TerritorialInferentialTomographyEngine,
@@ -30,51 +31,64 @@ from territorial_inferential_tomography import (
 )
 from satellite_connectors.real_data_integrator_v2 import RealDataIntegratorV2
 from pipeline.universal_classifier_v2 import UniversalClassifierV2, UniversalMetrics, estimate_msf
-import asyncpg
+from batch_analysis import (
+    BatchCell,
+    DEFAULT_BATCH_INSTRUMENTS,
+    MAX_BATCH_CELLS,
+    batch_runner,
+    build_grid_cells,
+    instrument_batch_to_raw_measurements,
+    to_jsonable
+)
+from postgis_sites import (
+    has_site_geometry, bbox_clause, estimate_row_count,
+    fetch_sites_within_radius, fetch_nearest_sites
+)
+from component_registry import components
+from database.pool import get_shared_pool
+from api.timt_endpoints import get_timt_engine
 
 router = APIRouter()
 
-# Inicializar componentes
-integrator = RealDataIntegrator()
-classifier = EnvironmentClassifier()
-validator = RealArchaeologicalValidator()
-
-# Motor TIMT (se inicializa en startup)
-timt_engine: Optional[TerritorialInferentialTomographyEngine] = None
+# Componentes (construcción diferida al primer uso / warm-up en background)
+components.register('real_validator', RealArchaeologicalValidator)
 
-# Pool de conexiones a BD (se inicializa en startup)
-db_pool = None
+# archaeological_sites con columna geom + GiST (ver postgis_sites.py)
+sites_have_geometry = False
+# Pool sobre el que se detectó sites_have_geometry
+_geometry_checked_pool = None
 
-async def init_db_pool():
-    """Inicializar pool de conexiones a BD."""
-    global db_pool
-    database_url = os.getenv("DATABASE_URL")
-    if database_url:
+async def get_db_pool():
+    """
+    Pool de BD compartido para los handlers (None si la BD no está accesible).
+    
+    Se pide en cada request en lugar de leer un global del warm-up: antes de
+    que éste corra, o si su primer intento falló, get_shared_pool() conecta
+    (o reintenta pasado su backoff).
+    """
+    global sites_have_geometry, _geometry_checked_pool
+    pool = await get_shared_pool()
+    if pool is not None and pool is not _geometry_checked_pool:
         try:
-            db_pool = await asyncpg.create_pool(database_url, min_size=2, max_size=10)
-            print("[SCIENTIFIC_ENDPOINT] Pool de BD inicializado", flush=True)
+            async with pool.acquire() as conn:
+                sites_have_geometry = await has_site_geometry(conn)
+            _geometry_checked_pool = pool
+            print(f"[SCIENTIFIC_ENDPOINT] Pool de BD inicializado (PostGIS: {sites_have_geometry})", flush=True)
         except Exception as e:
-            print(f"[SCIENTIFIC_ENDPOINT] Error inicializando pool: {e}", flush=True)
-            db_pool = None
-    else:
-        print("[SCIENTIFIC_ENDPOINT] DATABASE_URL no configurada", flush=True)
+            print(f"[SCIENTIFIC_ENDPOINT] Error detectando PostGIS: {e}", flush=True)
+    return pool
+
+async def init_db_pool():
+    """Warm-up: conectar el pool compartido y detectar PostGIS."""
+    if await get_db_pool() is None:
+        print("[SCIENTIFIC_ENDPOINT] Pool de BD no disponible", flush=True)
 
 def initialize_timt_engine():
-    """Inicializar motor TIMT para fusión transparente."""
-    global timt_engine
-    
-    try:
-        # Inicializar integrador V2 con 15 instrumentos
-        integrator_v2 = RealDataIntegratorV2()
-        
-        # Inicializar motor TIMT
-        timt_engine = TerritorialInferentialTomographyEngine(integrator_v2)
-        
+    """Construir ya el motor TIMT compartido (normalmente lo hace el warm-up)."""
+    if components.get('timt_engine'):
         print("[SCIENTIFIC_ENDPOINT] 🚀 TIMT Engine inicializado para fusión transparente", flush=True)
-        
-    except Exception as e:
-        print(f"[SCIENTIFIC_ENDPOINT] ⚠️ Error inicializando TIMT Engine: {e}", flush=True)
-        timt_engine = None
+    else:
+        print("[SCIENTIFIC_ENDPOINT] ⚠️ Error inicializando TIMT Engine", flush=True)
 
 class ScientificAnalysisRequest(BaseModel):
     """Solicitud de análisis científico."""
@@ -164,6 +178,11 @@ async def analyze_scientific(request: ScientificAnalysisRequest):
     if temp_bbox.area_km2 > 5000:
         raise HTTPException(status_code=400, detail=f"Area too large: {temp_bbox.area_km2:.1f} km². Max allowed is 5000 km²")
     
+    # Componentes compartidos (ya construidos por el warm-up, o en este primer uso)
+    timt_engine = await get_timt_engine()
+    validator = await components.aget('real_validator')
+    db_pool = await get_db_pool()
+    
     try:
         # Calcular centro
         center_lat = (request.lat_min + request.lat_max) / 2
@@ -414,7 +433,9 @@ async def analyze_scientific(request: ScientificAnalysisRequest):
                     'hypotheses_rejected': timt_result.transparency_report.hypotheses_rejected,
                     'can_infer': timt_result.transparency_report.can_infer,
                     'cannot_affirm': timt_result.transparency_report.cannot_affirm,
-                    'analysis_process_steps': len(timt_result.transparency_report.analysis_process)
+                    'analysis_process_steps': len(timt_result.transparency_report.analysis_process),
+                    'instruments_skipped': timt_result.transparency_report.instruments_skipped,
+                    'acquisition_time_saved_s': timt_result.transparency_report.acquisition_time_saved_s
                 },
                 
                 'technical_summary': timt_result.technical_summary,
@@ -472,26 +493,7 @@ async def analyze_scientific(request: ScientificAnalysisRequest):
             )
             
             # Convertir InstrumentBatch a diccionario compatible con pipeline
-            raw_measurements = {
-                'instrumental_measurements': {},
-                'metadata': {
-                    'coverage_score': instrument_batch.get_coverage_score(),
-                    'status_summary': instrument_batch.get_status_summary()
-                }
-            }
-            
-            # Agregar cada medición al diccionario
-            for result in instrument_batch.results:
-                raw_measurements['instrumental_measurements'][result.instrument_name] = {
-                    'value': result.value,
-                    'confidence': result.confidence,
-                    'status': result.status.value,
-                    'unit': result.unit,
-                    'quality_ratio': result.quality_ratio,
-                    'source': result.source,
-                    'acquisition_date': result.acquisition_date,
-                    'reason': result.reason
-                }
+            raw_measurements = instrument_batch_to_raw_measurements(instrument_batch)
             
             print(f"[MEDICIONES] Obtenidas {len(raw_measurements['instrumental_measurements'])} mediciones", flush=True)
             print(f"[MEDICIONES] Coverage score: {raw_measurements['metadata']['coverage_score']:.2f}", flush=True)
@@ -579,7 +581,7 @@ async def analyze_scientific(request: ScientificAnalysisRequest):
                 print("\n[BD] Guardando resultados TIMT en base de datos...", flush=True)
                 
                 # Importar guardador TIMT
-                from api.timt_db_saver import save_timt_result_to_db
+                from api.timt_db_saver import enqueue_timt_result
                 
                 request_dict = {
                     'region_name': detected_region,
@@ -587,10 +589,11 @@ async def analyze_scientific(request: ScientificAnalysisRequest):
                     'resolution_m': etp.resolution_m
                 }
                 
-                timt_db_id = await save_timt_result_to_db(db_pool, timt_result, request_dict)
+                # Write-behind: no bloquear la respuesta esperando a la BD
+                job_id = await enqueue_timt_result(db_pool, timt_result, request_dict)
                 
-                if timt_db_id:
-                    print(f"[BD] ✅ Resultado TIMT guardado con ID: {timt_db_id}", flush=True)
+                if job_id:
+                    print(f"[BD] ✅ Resultado TIMT encolado para guardado (job {job_id})", flush=True)
                 else:
                     print("[BD] ⚠️ Resultado TIMT no guardado", flush=True)
                     
@@ -611,6 +614,281 @@ async def analyze_scientific(request: ScientificAnalysisRequest):
         raise HTTPException(status_code=500, detail=f"Error en análisis científico: {str(e)}")
 
 
+# ============================================================================
+# ANÁLISIS POR LOTES (/analyze/batch)
+# ============================================================================
+
+class BatchCellRequest(BaseModel):
+    """Celda explícita de un lote."""
+    lat_min: float
+    lat_max: float
+    lon_min: float
+    lon_max: float
+
+class BatchGridSpec(BaseModel):
+    """Grilla regular sobre un bbox."""
+    lat_min: float
+    lat_max: float
+    lon_min: float
+    lon_max: float
+    cell_size_deg: float = 0.01
+
+class BatchAnalysisRequest(BaseModel):
+    """Solicitud de análisis por lotes: lista de celdas o especificación de grilla."""
+    cells: Optional[List[BatchCellRequest]] = None
+    grid: Optional[BatchGridSpec] = None
+    instruments: Optional[List[str]] = None
+    max_concurrency: int = 4
+    region_name: str = "Batch Survey"
+
+# Integrador compartido por jobs por lotes y análisis en streaming (se crea al primer uso)
+batch_integrator: Optional[RealDataIntegratorV2] = None
+
+def _validate_bounds(lat_min: float, lat_max: float, lon_min: float, lon_max: float, label: str):
+    if not (-90 <= lat_min < lat_max <= 90):
+        raise HTTPException(status_code=400, detail=f"{label}: invalid latitude range")
+    if not (-180 <= lon_min < lon_max <= 180):
+        raise HTTPException(status_code=400, detail=f"{label}: invalid longitude range")
+
+def _ndjson_response(job, after_seq: int = -1) -> StreamingResponse:
+    return StreamingResponse(
+        job.stream(after_seq),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Job-Id": job.job_id, "Cache-Control": "no-cache"}
+    )
+
+@router.post("/analyze/batch")
+async def analyze_batch(request: BatchAnalysisRequest):
+    """
+    # Análisis Científico por Lotes
+    
+    Ejecuta muchas celdas a través de `ScientificPipeline.analyze` con
+    concurrencia acotada y mediciones deduplicadas entre celdas.
+    
+    ## Parámetros
+    
+    - `cells`: lista de bboxes, **o**
+    - `grid`: bbox + `cell_size_deg` (se divide en celdas regulares)
+    - `instruments` (opcional): instrumentos a medir
+    - `max_concurrency` (opcional): celdas simultáneas (1-16)
+    
+    ## Respuesta
+    
+    Stream NDJSON (`application/x-ndjson`), una línea por evento:
+    - `{"type": "job", "job_id": ..., "seq": 0, ...}`
+    - `{"type": "cell", "cell_index": i, "status": "success", ...}` por celda terminada
+    - `{"type": "done", "instrument_fetches": ..., "deduplicated_fetches": ...}`
+    
+    El job sigue corriendo si el cliente se desconecta. Para retomar:
+    `GET /analyze/batch/{job_id}/stream?after_seq=<último seq recibido>`.
+    """
+    global batch_integrator
+    
+    if (request.cells is None) == (request.grid is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'cells' or 'grid'")
+    
+    if not 1 <= request.max_concurrency <= 16:
+        raise HTTPException(status_code=400, detail="max_concurrency must be between 1 and 16")
+    
+    if request.grid is not None:
+        g = request.grid
+        _validate_bounds(g.lat_min, g.lat_max, g.lon_min, g.lon_max, "grid")
+        try:
+            cells = build_grid_cells(g.lat_min, g.lat_max, g.lon_min, g.lon_max, g.cell_size_deg)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        if not request.cells:
+            raise HTTPException(status_code=400, detail="'cells' must not be empty")
+        if len(request.cells) > MAX_BATCH_CELLS:
+            raise HTTPException(status_code=400, detail=f"Too many cells (max {MAX_BATCH_CELLS})")
+        cells = []
+        for i, c in enumerate(request.cells):
+            _validate_bounds(c.lat_min, c.lat_max, c.lon_min, c.lon_max, f"cells[{i}]")
+            cells.append(BatchCell(i, c.lat_min, c.lat_max, c.lon_min, c.lon_max))
+    
+    if batch_integrator is None:
+        batch_integrator = RealDataIntegratorV2()
+    validator = await components.aget('real_validator')
+    db_pool = await get_db_pool()
+    
+    try:
+        job = batch_runner.start_job(
+            cells=cells,
+            integrator=batch_integrator,
+            pipeline_factory=lambda: ScientificPipeline(db_pool=db_pool, validator=validator),
+            instruments=request.instruments,
+            max_concurrency=request.max_concurrency,
+            region_name=request.region_name
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return _ndjson_response(job)
+
+@router.get("/analyze/batch/{job_id}")
+async def get_batch_job(job_id: str):
+    """Estado de un job por lotes (celdas completadas, fallidas, pendientes)."""
+    job = batch_runner.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Batch job {job_id} not found")
+    return job.summary()
+
+@router.get("/analyze/batch/{job_id}/stream")
+async def resume_batch_job(job_id: str, after_seq: int = -1):
+    """Retomar el stream NDJSON de un job desde el evento siguiente a `after_seq`."""
+    job = batch_runner.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Batch job {job_id} not found")
+    return _ndjson_response(job, after_seq)
+
+
+# ============================================================================
+# ANÁLISIS EN STREAMING (/analyze/stream SSE, /analyze/ws WebSocket)
+# ============================================================================
+
+class StreamAnalysisRequest(BaseModel):
+    """Solicitud de análisis con resultados fase por fase."""
+    lat_min: float
+    lat_max: float
+    lon_min: float
+    lon_max: float
+    region_name: str = "Interactive Analysis"
+    instruments: Optional[List[str]] = None
+    coverage_target: Optional[float] = None
+
+async def _stream_scientific_analysis(request: StreamAnalysisRequest):
+    """
+    Generador de eventos `{'phase': ..., 'data': ...}` de un análisis completo.
+    
+    1. `instrument`: cada medición apenas llega del integrador
+    2. `measurements`: resumen del lote (coverage, scheduling)
+    3. Fases de `ScientificPipeline.analyze_stream` (A/B llegan antes de que
+       terminen inferencia, validación, narrativa y mapa)
+    4. `complete` o `error`
+    """
+    global batch_integrator
+    if batch_integrator is None:
+        batch_integrator = RealDataIntegratorV2()
+    
+    instrument_events: asyncio.Queue = asyncio.Queue()
+    
+    def on_result(result):
+        instrument_events.put_nowait({'phase': 'instrument', 'data': result.to_dict()})
+    
+    measurement_task = asyncio.ensure_future(batch_integrator.get_batch_measurements(
+        instrument_names=list(request.instruments or DEFAULT_BATCH_INSTRUMENTS),
+        lat_min=request.lat_min,
+        lat_max=request.lat_max,
+        lon_min=request.lon_min,
+        lon_max=request.lon_max,
+        coverage_target=request.coverage_target,
+        on_result=on_result
+    ))
+    
+    try:
+        # Mediciones en vivo hasta que el lote termine
+        while not measurement_task.done() or not instrument_events.empty():
+            getter = asyncio.ensure_future(instrument_events.get())
+            await asyncio.wait({getter, measurement_task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+        
+        instrument_batch = measurement_task.result()
+        raw_measurements = instrument_batch_to_raw_measurements(instrument_batch)
+        raw_measurements['region_name'] = request.region_name
+        yield {'phase': 'measurements', 'data': {
+            'instruments_measured': len(raw_measurements['instrumental_measurements']),
+            'coverage_score': raw_measurements['metadata']['coverage_score'],
+            'scheduling': instrument_batch.scheduling
+        }}
+        
+        pipeline = ScientificPipeline(db_pool=await get_db_pool(), validator=await components.aget('real_validator'))
+        async for event in pipeline.analyze_stream(
+            raw_measurements=raw_measurements,
+            lat_min=request.lat_min,
+            lat_max=request.lat_max,
+            lon_min=request.lon_min,
+            lon_max=request.lon_max
+        ):
+            yield event
+    except Exception as e:
+        print(f"\n[ERROR] Error en análisis en streaming: {e}", flush=True)
+        yield {'phase': 'error', 'data': {'detail': str(e)}}
+    finally:
+        if not measurement_task.done():
+            measurement_task.cancel()
+
+def _sse_event(event: Dict[str, Any]) -> str:
+    payload = json.dumps(to_jsonable(event['data']), ensure_ascii=False)
+    return f"event: {event['phase']}\ndata: {payload}\n\n"
+
+@router.post("/analyze/stream")
+async def analyze_stream(request: StreamAnalysisRequest):
+    """
+    # Análisis Científico en Streaming (SSE)
+    
+    Mismo pipeline que `/analyze` (modo básico), pero cada medición y cada
+    fase se envía apenas termina como Server-Sent Event (`text/event-stream`):
+    
+    ```
+    event: phase_b_anomaly
+    data: {"anomaly_score": 0.42, ...}
+    ```
+    
+    Orden de eventos: `instrument`*, `measurements`, `phase_0_enrichment`,
+    `phase_a_normalized`, `coverage_assessment`, `phase_b_anomaly`,
+    `phase_c_morphology`, `phase_d_anthropic`, `phase_e_anti_pattern`,
+    `phase_f_known_sites`, `phase_g_output`, `scientific_narrative`,
+    `anomaly_map`, `complete` (o `error`).
+    
+    `coverage_target` (opcional, 0-1) permite empezar el pipeline sin esperar
+    a los instrumentos más lentos.
+    """
+    _validate_bounds(request.lat_min, request.lat_max, request.lon_min, request.lon_max, "bounds")
+    
+    async def event_source():
+        async for event in _stream_scientific_analysis(request):
+            yield _sse_event(event)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/analyze/ws")
+async def analyze_websocket(websocket: WebSocket):
+    """
+    Análisis en streaming por WebSocket.
+    
+    El cliente envía un JSON con los campos de `StreamAnalysisRequest` y recibe
+    un mensaje `{"phase": ..., "data": ...}` por evento (mismo orden que
+    `/analyze/stream`). El servidor cierra la conexión tras `complete`/`error`.
+    """
+    await websocket.accept()
+    try:
+        try:
+            request = StreamAnalysisRequest(**(await websocket.receive_json()))
+            _validate_bounds(request.lat_min, request.lat_max, request.lon_min, request.lon_max, "bounds")
+        except HTTPException as e:
+            await websocket.send_json({'phase': 'error', 'data': {'detail': e.detail}})
+            await websocket.close(code=1008)
+            return
+        except Exception as e:
+            await websocket.send_json({'phase': 'error', 'data': {'detail': f"Invalid request: {e}"}})
+            await websocket.close(code=1008)
+            return
+        
+        async for event in _stream_scientific_analysis(request):
+            await websocket.send_json(to_jsonable(event))
+        await websocket.close()
+    except WebSocketDisconnect:
+        print("[STREAM] Cliente WebSocket desconectado", flush=True)
+
+
 @router.get("/analyses/recent", summary="Obtener análisis recientes")
 async def get_recent_analyses(limit: int = 10):
     """
@@ -643,6 +921,7 @@ async def get_recent_analyses(limit: int = 10):
     - Monitorear actividad del sistema
     - Identificar patrones en resultados
     """
+    db_pool = await get_db_pool()
     if not db_pool:
         raise HTTPException(status_code=503, detail="Base de datos no disponible")
     
@@ -729,6 +1008,7 @@ async def get_analysis_by_id(analysis_id: int):
     - `404`: Análisis no encontrado
     - `503`: Base de datos no disponible
     """
+    db_pool = await get_db_pool()
     if not db_pool:
         raise HTTPException(status_code=503, detail="Base de datos no disponible")
     
@@ -885,6 +1165,7 @@ async def get_analyses_by_region(region_name: str, limit: int = 10):
     GET /api/scientific/analyses/by-region/Groenlandia%20Test?limit=5
     ```
     """
+    db_pool = await get_db_pool()
     if not db_pool:
         raise HTTPException(status_code=503, detail="Base de datos no disponible")
     
@@ -975,6 +1256,7 @@ async def get_all_archaeological_sites(
     ```
     """
     
+    db_pool = await get_db_pool()
     if not db_pool:
         raise HTTPException(status_code=503, detail="Base de datos no disponible")
     
@@ -1122,6 +1404,7 @@ async def get_sites_statistics():
     - `recent_additions`: Sitios agregados en los últimos 7 días
     """
     
+    db_pool = await get_db_pool()
     if not db_pool:
         raise HTTPException(status_code=503, detail="Base de datos no disponible")
     
@@ -1230,6 +1513,7 @@ async def get_sites_layer(
         GeoJSON FeatureCollection con sitios filtrados
     """
     
+    db_pool = await get_db_pool()
     if not db_pool:
         raise HTTPException(status_code=500, detail="Database not available")
     
@@ -1264,25 +1548,23 @@ async def get_sites_layer(
             if bbox:
                 try:
                     lat_min, lon_min, lat_max, lon_max = map(float, bbox.split(','))
-                    where_clauses.append(f'latitude BETWEEN ${param_count} AND ${param_count + 1}')
-                    where_clauses.append(f'longitude BETWEEN ${param_count + 2} AND ${param_count + 3}')
-                    params.extend([lat_min, lat_max, lon_min, lon_max])
-                    param_count += 4
+                    if sites_have_geometry:
+                        # geom && envelope (índice GiST)
+                        clause, bbox_params = bbox_clause(param_count, lat_min, lon_min, lat_max, lon_max)
+                        where_clauses.append(clause)
+                        params.extend(bbox_params)
+                        param_count += len(bbox_params)
+                    else:
+                        where_clauses.append(f'latitude BETWEEN ${param_count} AND ${param_count + 1}')
+                        where_clauses.append(f'longitude BETWEEN ${param_count + 2} AND ${param_count + 3}')
+                        params.extend([lat_min, lat_max, lon_min, lon_max])
+                        param_count += 4
                     print(f"📍 Spatial filter applied: bbox={bbox}")
                 except ValueError:
                     print(f"⚠️ WARNING: Invalid bbox format '{bbox}', ignoring spatial filter")
             
             where_sql = " AND ".join(where_clauses) if where_clauses else "TRUE"
             
-            # Contar total antes de limitar
-            count_query = f"""
-                SELECT COUNT(*) as total
-                FROM archaeological_sites
-                WHERE {where_sql}
-            """
-            
-            total_count = await conn.fetchval(count_query, *params)
-            
             query = f"""
                 SELECT 
                     id,
@@ -1302,13 +1584,20 @@ async def get_sites_layer(
                 ORDER BY "confidenceLevel" DESC, "createdAt" DESC
                 LIMIT ${param_count}
             """
-            params.append(limit)
-            
-            sites = await conn.fetch(query, *params)
-            
-            # FASE 1: Warning si se trunca
-            if total_count > limit:
-                print(f"⚠️ WARNING: Results truncated - showing {limit} of {total_count} sites")
+            # Pedir limit + 1: si sobra una fila el resultado está truncado.
+            # Sin COUNT(*) aparte (segundo barrido del bbox en cada pan del mapa)
+            sites = await conn.fetch(query, *params, limit + 1)
+            truncated = len(sites) > limit
+            total_is_estimate = False
+            if truncated:
+                sites = sites[:limit]
+                count_query = f"SELECT 1 FROM archaeological_sites WHERE {where_sql}"
+                estimate = await estimate_row_count(conn, count_query, *params)
+                total_count = max(estimate or 0, limit + 1)
+                total_is_estimate = True
+                print(f"⚠️ WARNING: Results truncated - showing {limit} of ~{total_count} sites")
+            else:
+                total_count = len(sites)
             
             # Convertir a GeoJSON
             features = []
@@ -1340,7 +1629,8 @@ async def get_sites_layer(
                 "metadata": {
                     "total": len(features),
                     "total_available": total_count,  # NUEVO: total sin límite
-                    "truncated": total_count > limit,  # NUEVO: indica si se truncó
+                    "total_is_estimate": total_is_estimate,  # estimación del planner si se truncó
+                    "truncated": truncated,  # NUEVO: indica si se truncó
                     "spatial_filtered": bbox is not None,  # NUEVO: indica si hay filtro espacial
                     "filters": {
                         "confidence_level": confidence_level,
@@ -1359,6 +1649,88 @@ async def get_sites_layer(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _validate_point(lat: float, lon: float):
+    if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+        raise HTTPException(status_code=400, detail="lat must be in [-90, 90] and lon in [-180, 180]")
+
+
+@router.get("/sites/nearby")
+async def get_sites_nearby(lat: float, lon: float, radius_km: float = 50.0, limit: int = 100):
+    """
+    Sitios conocidos a menos de `radius_km` de un punto, por distancia.
+
+    Con PostGIS usa `ST_DWithin` sobre el índice GiST geography (distancia
+    geodésica exacta); sin migrar, prefiltro lat/lon + haversine.
+
+    Parámetros:
+    - lat, lon: Punto de consulta
+    - radius_km: Radio (default 50, max 500)
+    - limit: Máximo de sitios (default 100, max 1000)
+    """
+    _validate_point(lat, lon)
+    if not 0 < radius_km <= 500:
+        raise HTTPException(status_code=400, detail="radius_km must be in (0, 500]")
+    limit = max(1, min(limit, 1000))
+
+    db_pool = await get_db_pool()
+    if not db_pool:
+        raise HTTPException(status_code=503, detail="Base de datos no disponible")
+
+    try:
+        async with db_pool.acquire() as conn:
+            sites = await fetch_sites_within_radius(conn, lat, lon, radius_km, limit, sites_have_geometry)
+    except Exception as e:
+        print(f"[ERROR] Error buscando sitios por radio: {e}", flush=True)
+        raise HTTPException(status_code=500, detail=f"Error buscando sitios: {str(e)}")
+
+    return {
+        "center": {"latitude": lat, "longitude": lon},
+        "radius_km": radius_km,
+        "postgis": sites_have_geometry,
+        "count": len(sites),
+        "sites": sites
+    }
+
+
+@router.get("/sites/nearest")
+async def get_sites_nearest(lat: float, lon: float, k: int = 10, max_distance_km: Optional[float] = None):
+    """
+    Los k sitios conocidos más cercanos a un punto.
+
+    Con PostGIS es un k-NN indexado (`ORDER BY geom::geography <-> punto`):
+    no calcula la distancia a toda la tabla.
+
+    Parámetros:
+    - lat, lon: Punto de consulta
+    - k: Número de vecinos (default 10, max 100)
+    - max_distance_km: Distancia máxima opcional
+    """
+    _validate_point(lat, lon)
+    if max_distance_km is not None and max_distance_km <= 0:
+        raise HTTPException(status_code=400, detail="max_distance_km must be > 0")
+    k = max(1, min(k, 100))
+
+    db_pool = await get_db_pool()
+    if not db_pool:
+        raise HTTPException(status_code=503, detail="Base de datos no disponible")
+
+    try:
+        async with db_pool.acquire() as conn:
+            sites = await fetch_nearest_sites(conn, lat, lon, k, max_distance_km, sites_have_geometry)
+    except Exception as e:
+        print(f"[ERROR] Error buscando sitios más cercanos: {e}", flush=True)
+        raise HTTPException(status_code=500, detail=f"Error buscando sitios: {str(e)}")
+
+    return {
+        "center": {"latitude": lat, "longitude": lon},
+        "k": k,
+        "max_distance_km": max_distance_km,
+        "postgis": sites_have_geometry,
+        "count": len(sites),
+        "sites": sites
+    }
+
+
 @router.post("/sites/candidate")
 async def add_candidate_site(request: dict):
     """
@@ -1381,6 +1753,7 @@ async def add_candidate_site(request: dict):
     }
     """
     
+    db_pool = await get_db_pool()
     if not db_pool:
         raise HTTPException(status_code=500, detail="Database not available")
     
@@ -1466,6 +1839,7 @@ async def get_candidates_only(limit: int = 1000):
         Lista de candidatos con métricas extraídas
     """
     
+    db_pool = await get_db_pool()
     if not db_pool:
         raise HTTPException(status_code=500, detail="Database not available")
     
@@ -1,16 +1,98 @@
 #!/usr/bin/env python3
 """
 Guardado de resultados TIMT en base de datos.
+
+El resultado se traduce primero a un plan serializable (filas por tabla) y
+luego se escribe:
+- Tablas padre (timt_analyses, tcp_profiles, etp_profiles) con INSERT ... RETURNING
+- Tablas hijas (hipótesis, anomalías volumétricas) con COPY en una sola
+  operación por tabla, en lugar de un INSERT por fila
+- Todo el bloque TIMT en una transacción; la tabla legacy por separado
+
+enqueue_timt_result() delega la escritura a una cola write-behind durable:
+el endpoint responde sin esperar a la BD y la escritura se reintenta si la
+BD no está disponible.
 """
 
 import logging
 import json
 import math
-from typing import Any
+from typing import Any, Dict, List, Optional
 from territorial_inferential_tomography import TerritorialInferentialTomographyResult
+from pipeline_tracing import tracer
+from database.write_behind import WriteBehindQueue
 
 logger = logging.getLogger(__name__)
 
+# Columnas por tabla (el id del padre va primero en las tablas hijas)
+TIMT_ANALYSIS_COLUMNS = (
+    'analysis_id', 'lat_min', 'lat_max', 'lon_min', 'lon_max',
+    'center_lat', 'center_lon', 'region_name', 'analysis_objective',
+    'analysis_radius_km', 'resolution_m',
+    'territorial_coherence_score', 'scientific_rigor_score',
+    'analysis_timestamp', 'scientific_output'
+)
+TCP_PROFILE_COLUMNS = (
+    'timt_analysis_id', 'tcp_id',
+    'dominant_lithology', 'geological_age', 'tectonic_context',
+    'hydrographic_features_count', 'water_availability',
+    'external_sites_count', 'nearest_site_distance_km',
+    'human_traces_count',
+    'preservation_potential', 'historical_biome',
+    'priority_instruments', 'recommended_resolution_m'
+)
+HYPOTHESIS_COLUMNS = (
+    'tcp_profile_id', 'hypothesis_type', 'hypothesis_explanation',
+    'plausibility_score', 'recommended_instruments',
+    'validation_status', 'supporting_evidence_score',
+    'contradicting_evidence_score', 'validation_confidence',
+    'validation_explanation'
+)
+ETP_PROFILE_COLUMNS = (
+    'timt_analysis_id', 'territory_id', 'resolution_m',
+    'ess_superficial', 'ess_subsuperficial', 'ess_volumetrico', 'ess_temporal',
+    'coherencia_3d', 'persistencia_temporal', 'densidad_arqueologica_m3',
+    'geological_compatibility_score', 'water_availability_score',
+    'external_consistency_score',
+    'confidence_level', 'recommended_action', 'narrative_explanation'
+)
+VOLUMETRIC_ANOMALY_COLUMNS = (
+    'etp_profile_id', 'center_x', 'center_y', 'center_z',
+    'volume_m3', 'depth_min_m', 'depth_max_m',
+    'anomaly_type', 'archaeological_type',
+    'temporal_range_start', 'temporal_range_end',
+    'confidence', 'instruments_supporting'
+)
+TRANSPARENCY_REPORT_COLUMNS = (
+    'timt_analysis_id', 'analysis_process', 'key_decisions',
+    'known_limitations', 'system_boundaries',
+    'hypotheses_evaluated', 'hypotheses_validated',
+    'hypotheses_rejected', 'hypotheses_uncertain', 'hypotheses_discarded',
+    'validation_recommendations', 'future_work_suggestions'
+)
+MULTILEVEL_COMMUNICATION_COLUMNS = (
+    'timt_analysis_id',
+    'level1_what_measured', 'level2_why_measured',
+    'level3_what_inferred', 'level4_what_cannot_affirm',
+    'executive_summary', 'technical_summary',
+    'academic_summary', 'educational_summary'
+)
+LEGACY_CANDIDATE_COLUMNS = (
+    'candidate_id', 'candidate_name', 'region',
+    'archaeological_probability', 'anomaly_score',
+    'result_type', 'recommended_action',
+    'environment_type', 'confidence_level',
+    'latitude', 'longitude',
+    'lat_min', 'lat_max', 'lon_min', 'lon_max',
+    'scientific_explanation', 'explanation_type'
+)
+
+
+def _insert_sql(table: str, columns: tuple, returning: Optional[str] = None) -> str:
+    placeholders = ', '.join(f'${i}' for i in range(1, len(columns) + 1))
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    return f"{sql} RETURNING {returning}" if returning else sql
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     """Calcular distancia en km entre dos puntos (Haversine)."""
     R = 6371.0
@@ -20,9 +102,244 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
     return R * c
 
+def build_timt_persistence_plan(result: TerritorialInferentialTomographyResult, request_data: dict) -> Dict[str, Any]:
+    """
+    Traducir un resultado TIMT a filas por tabla (serializable, sin ids de BD).
+    
+    Las filas de tablas hijas no incluyen el id del padre: se antepone al escribir.
+    """
+    
+    center_lat = (result.territory_bounds.lat_min + result.territory_bounds.lat_max) / 2
+    center_lon = (result.territory_bounds.lon_min + result.territory_bounds.lon_max) / 2
+    
+    # 1. Análisis TIMT principal
+    timt_analysis = [
+        result.analysis_id,
+        result.territory_bounds.lat_min,
+        result.territory_bounds.lat_max,
+        result.territory_bounds.lon_min,
+        result.territory_bounds.lon_max,
+        center_lat,
+        center_lon,
+        request_data.get('region_name', 'Unknown'),
+        result.territorial_context.analysis_objective.value,
+        float(request_data.get('analysis_radius_km', 5.0)),
+        float(request_data.get('resolution_m') or 30),
+        float(result.territorial_coherence_score),
+        float(result.scientific_rigor_score),
+        result.analysis_timestamp,
+        json.dumps(result.scientific_output)
+    ]
+    
+    # 2. TCP (Territorial Context Profile)
+    tcp = result.territorial_context
+    tcp_profile = [
+        tcp.tcp_id,
+        tcp.geological_context.dominant_lithology.value if tcp.geological_context else 'unknown',
+        tcp.geological_context.geological_age.value if tcp.geological_context else 'unknown',
+        f"fault_density_{tcp.geological_context.fault_density:.1f}" if tcp.geological_context else 'unknown',  # Usar fault_density en lugar de tectonic_context
+        len(tcp.hydrographic_features),
+        f"{result.tomographic_profile.water_availability.settlement_viability:.2f}" if result.tomographic_profile.water_availability else 'unknown',
+        len(tcp.external_archaeological_sites),
+        min([calculate_distance((request_data.get('center_lat') or center_lat),
+                                (request_data.get('center_lon') or center_lon),
+                                s.latitude, s.longitude) for s in tcp.external_archaeological_sites]) if tcp.external_archaeological_sites else None,
+        len(tcp.known_human_traces),
+        tcp.preservation_potential.value,
+        tcp.historical_biome.value,
+        tcp.instrumental_strategy.priority_instruments if tcp.instrumental_strategy else [],
+        float(tcp.instrumental_strategy.recommended_resolution_m) if tcp.instrumental_strategy and tcp.instrumental_strategy.recommended_resolution_m else None
+    ]
+    
+    # 3. Hipótesis territoriales (con su validación correspondiente)
+    validations = {v.hypothesis_id: v for v in result.hypothesis_validations}
+    hypotheses = []
+    for hypothesis in tcp.territorial_hypotheses:
+        validation = validations.get(hypothesis.hypothesis_id)
+        hypotheses.append([
+            hypothesis.hypothesis_type,  # Ya es string, no .value
+            hypothesis.hypothesis_explanation,
+            float(hypothesis.plausibility_score),
+            hypothesis.recommended_instruments,
+            validation.overall_evidence_level.value if validation else 'insufficient',  # Usar overall_evidence_level
+            # Calcular scores de evidencia desde los atributos reales
+            float((validation.sensorial_evidence + validation.geological_evidence + 
+             validation.hydrographic_evidence + validation.archaeological_evidence + 
+             validation.human_traces_evidence) / 5.0) if validation else 0.0,  # Promedio como supporting
+            float(len(validation.contradictions) / 10.0) if validation else 0.0,  # Contradicciones normalizadas
+            float(validation.confidence_score) if validation else 0.0,  # Usar confidence_score
+            validation.validation_explanation if validation else ''
+        ])
+    
+    # 4. ETP (Environmental Tomographic Profile)
+    etp = result.tomographic_profile
+    etp_profile = [
+        etp.territory_id,
+        float(etp.resolution_m),
+        float(etp.ess_superficial),
+        0.0,  # ess_subsuperficial no existe en ETP
+        float(etp.ess_volumetrico),
+        float(etp.ess_temporal),
+        float(etp.coherencia_3d),
+        float(etp.persistencia_temporal),
+        float(etp.densidad_arqueologica_m3),
+        float(etp.geological_compatibility.gcs_score) if etp.geological_compatibility else None,
+        float(etp.water_availability.settlement_viability) if etp.water_availability else None,
+        float(etp.external_consistency.ecs_score) if etp.external_consistency else None,
+        etp.get_confidence_level(),
+        etp.get_archaeological_recommendation(),  # Usar método correcto
+        etp.narrative_explanation
+    ]
+    
+    # 5. Anomalías volumétricas
+    volumetric_anomalies = []
+    for anomaly in getattr(etp, 'volumetric_anomalies', None) or []:
+        # Calcular volumen desde extent_3d
+        volume_m3 = anomaly.extent_3d[0] * anomaly.extent_3d[1] * anomaly.extent_3d[2]
+        depth_min = anomaly.center_3d[2] - anomaly.extent_3d[2] / 2
+        depth_max = anomaly.center_3d[2] + anomaly.extent_3d[2] / 2
+        volumetric_anomalies.append([
+            float(anomaly.center_3d[0]),
+            float(anomaly.center_3d[1]),
+            float(anomaly.center_3d[2]),
+            float(volume_m3),
+            float(depth_min),
+            float(depth_max),
+            'volumetric',  # Tipo genérico
+            anomaly.archaeological_type,
+            int(anomaly.temporal_range[0]),
+            int(anomaly.temporal_range[1]),
+            float(anomaly.confidence),
+            list(anomaly.instruments_supporting)
+        ])
+    
+    # 6. Reporte de transparencia (conteos de hipótesis por nivel de evidencia)
+    tr = result.transparency_report
+    levels = [h.overall_evidence_level.value for h in result.hypothesis_validations]
+    transparency_report = [
+        tr.analysis_process,
+        tr.decisions_made,
+        tr.system_limitations,
+        tr.cannot_affirm,  # Usar cannot_affirm en lugar de system_boundaries
+        len(result.hypothesis_validations),
+        levels.count('strong'),  # Evidencia fuerte como "validadas"
+        levels.count('weak') + levels.count('insufficient'),  # Evidencia débil/insuficiente como "rechazadas"
+        levels.count('moderate'),  # Evidencia moderada como "inciertas"
+        len(tr.hypotheses_discarded),
+        tr.validation_recommendations,
+        tr.future_work_suggestions
+    ]
+    
+    # 7. Comunicación multinivel
+    multilevel_communication = [
+        result.general_summary[:1000] if result.general_summary else '',  # Level 1
+        result.technical_summary[:1000] if result.technical_summary else '',  # Level 2
+        result.academic_summary[:1000] if result.academic_summary else '',  # Level 3
+        ', '.join(tr.cannot_affirm[:5]),  # Level 4
+        result.institutional_summary if result.institutional_summary else '',
+        result.technical_summary if result.technical_summary else '',
+        result.academic_summary if result.academic_summary else '',
+        result.general_summary if result.general_summary else ''
+    ]
+    
+    # 8. Tabla antigua (compatibilidad)
+    legacy_candidate = [
+        f"TIMT_{result.analysis_id}",
+        request_data.get('region_name', 'Unknown'),
+        f"TIMT Analysis {result.analysis_id}",
+        float(etp.densidad_arqueologica_m3),
+        float(etp.ess_superficial),
+        'positive_candidate' if etp.densidad_arqueologica_m3 > 0.5 else 'uncertain',
+        etp.get_archaeological_recommendation(),
+        result.territorial_context.historical_biome.value,
+        float(result.scientific_rigor_score),
+        float(center_lat),
+        float(center_lon),
+        float(result.territory_bounds.lat_min),
+        float(result.territory_bounds.lat_max),
+        float(result.territory_bounds.lon_min),
+        float(result.territory_bounds.lon_max),
+        (result.academic_summary[:1000] if result.academic_summary else ''),
+        'timt_analysis'
+    ]
+    
+    return {
+        'analysis_id': result.analysis_id,
+        'timt_analysis': timt_analysis,
+        'tcp_profile': tcp_profile,
+        'hypotheses': hypotheses,
+        'etp_profile': etp_profile,
+        'volumetric_anomalies': volumetric_anomalies,
+        'transparency_report': transparency_report,
+        'multilevel_communication': multilevel_communication,
+        'legacy_candidate': legacy_candidate
+    }
+
+async def write_timt_plan(db_pool, plan: Dict[str, Any]) -> int:
+    """
+    Escribir las tablas TIMT de un plan en una transacción.
+    
+    Round trips constantes: 3 INSERT ... RETURNING (padres), un COPY por
+    tabla hija y 2 INSERT de fila única, sin importar cuántas hipótesis o
+    anomalías tenga el análisis.
+    
+    Returns:
+        id de timt_analyses
+    """
+    
+    async with db_pool.acquire() as conn:
+        async with conn.transaction():
+            timt_id = await conn.fetchval(
+                _insert_sql('timt_analyses', TIMT_ANALYSIS_COLUMNS, returning='id'),
+                *plan['timt_analysis']
+            )
+            tcp_id = await conn.fetchval(
+                _insert_sql('tcp_profiles', TCP_PROFILE_COLUMNS, returning='id'),
+                timt_id, *plan['tcp_profile']
+            )
+            if plan['hypotheses']:
+                await conn.copy_records_to_table(
+                    'territorial_hypotheses',
+                    records=[(tcp_id, *row) for row in plan['hypotheses']],
+                    columns=HYPOTHESIS_COLUMNS
+                )
+            etp_id = await conn.fetchval(
+                _insert_sql('etp_profiles', ETP_PROFILE_COLUMNS, returning='id'),
+                timt_id, *plan['etp_profile']
+            )
+            if plan['volumetric_anomalies']:
+                await conn.copy_records_to_table(
+                    'volumetric_anomalies',
+                    records=[(etp_id, *row) for row in plan['volumetric_anomalies']],
+                    columns=VOLUMETRIC_ANOMALY_COLUMNS
+                )
+            await conn.execute(
+                _insert_sql('transparency_reports', TRANSPARENCY_REPORT_COLUMNS),
+                timt_id, *plan['transparency_report']
+            )
+            await conn.execute(
+                _insert_sql('multilevel_communications', MULTILEVEL_COMMUNICATION_COLUMNS),
+                timt_id, *plan['multilevel_communication']
+            )
+    
+    logger.info(f"✅ TIMT result saved: ID={timt_id} ({len(plan['hypotheses'])} hypotheses, "
+                f"{len(plan['volumetric_anomalies'])} volumetric anomalies)")
+    return timt_id
+
+async def write_legacy_candidate(db_pool, plan: Dict[str, Any]):
+    """Guardar el resumen en archaeological_candidate_analyses (compatibilidad)."""
+    
+    async with db_pool.acquire() as conn:
+        await conn.execute(
+            _insert_sql('archaeological_candidate_analyses', LEGACY_CANDIDATE_COLUMNS),
+            *plan['legacy_candidate']
+        )
+    logger.info(f"✅ Saved to legacy table for compatibility: {plan['legacy_candidate'][0]}")
+
+@tracer.traced("db", "save_timt_result_to_db")
 async def save_timt_result_to_db(db_pool, result: TerritorialInferentialTomographyResult, request_data: dict):
     """
-    Guardar resultado TIMT completo en base de datos.
+    Guardar resultado TIMT completo en base de datos (esperando la escritura).
     
     Args:
         db_pool: Pool de conexiones asyncpg
@@ -34,279 +351,46 @@ async def save_timt_result_to_db(db_pool, result: TerritorialInferentialTomograp
         logger.warning("⚠️ DB pool not available, skipping save")
         return None
     
+    plan = build_timt_persistence_plan(result, request_data)
+    
     try:
-        async with db_pool.acquire() as conn:
-            async with conn.transaction():
-                
-                # 1. Guardar análisis TIMT principal
-                timt_id = await conn.fetchval("""
-                    INSERT INTO timt_analyses (
-                        analysis_id, lat_min, lat_max, lon_min, lon_max,
-                        center_lat, center_lon, region_name, analysis_objective,
-                        analysis_radius_km, resolution_m,
-                        territorial_coherence_score, scientific_rigor_score,
-                        analysis_timestamp, scientific_output
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
-                    RETURNING id
-                """,
-                    result.analysis_id,
-                    result.territory_bounds.lat_min,
-                    result.territory_bounds.lat_max,
-                    result.territory_bounds.lon_min,
-                    result.territory_bounds.lon_max,
-                    (result.territory_bounds.lat_min + result.territory_bounds.lat_max) / 2,
-                    (result.territory_bounds.lon_min + result.territory_bounds.lon_max) / 2,
-                    request_data.get('region_name', 'Unknown'),
-                    result.territorial_context.analysis_objective.value,
-                    float(request_data.get('analysis_radius_km', 5.0)),
-                    float(request_data.get('resolution_m') or 30),
-                    float(result.territorial_coherence_score),
-                    float(result.scientific_rigor_score),
-                    result.analysis_timestamp,
-                    json.dumps(result.scientific_output)
-                )
-                
-                logger.info(f"✅ TIMT analysis saved: ID={timt_id}")
-                
-                # 2. Guardar TCP (Territorial Context Profile)
-                tcp = result.territorial_context
-                tcp_id = await conn.fetchval("""
-                    INSERT INTO tcp_profiles (
-                        timt_analysis_id, tcp_id,
-                        dominant_lithology, geological_age, tectonic_context,
-                        hydrographic_features_count, water_availability,
-                        external_sites_count, nearest_site_distance_km,
-                        human_traces_count,
-                        preservation_potential, historical_biome,
-                        priority_instruments, recommended_resolution_m
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14)
-                    RETURNING id
-                """,
-                    timt_id,
-                    tcp.tcp_id,
-                    tcp.geological_context.dominant_lithology.value if tcp.geological_context else 'unknown',
-                    tcp.geological_context.geological_age.value if tcp.geological_context else 'unknown',
-                    f"fault_density_{tcp.geological_context.fault_density:.1f}" if tcp.geological_context else 'unknown',  # Usar fault_density en lugar de tectonic_context
-                    len(tcp.hydrographic_features),
-                    f"{result.tomographic_profile.water_availability.settlement_viability:.2f}" if result.tomographic_profile.water_availability else 'unknown',
-                    len(tcp.external_archaeological_sites),
-                    min([calculate_distance((request_data.get('center_lat') or (result.territory_bounds.lat_min + result.territory_bounds.lat_max)/2),
-                                          (request_data.get('center_lon') or (result.territory_bounds.lon_min + result.territory_bounds.lon_max)/2),
-                                          s.latitude, s.longitude) for s in tcp.external_archaeological_sites]) if tcp.external_archaeological_sites else None,
-                    len(tcp.known_human_traces),
-                    tcp.preservation_potential.value,
-                    tcp.historical_biome.value,
-                    tcp.instrumental_strategy.priority_instruments if tcp.instrumental_strategy else [],
-                    float(tcp.instrumental_strategy.recommended_resolution_m) if tcp.instrumental_strategy and tcp.instrumental_strategy.recommended_resolution_m else None
-                )
-                
-                logger.info(f"✅ TCP saved: ID={tcp_id}")
-                
-                # 3. Guardar hipótesis territoriales
-                for hypothesis in tcp.territorial_hypotheses:
-                    # Buscar validación correspondiente
-                    validation = next(
-                        (v for v in result.hypothesis_validations if v.hypothesis_id == hypothesis.hypothesis_id),
-                        None
-                    )
-                    
-                    await conn.execute("""
-                        INSERT INTO territorial_hypotheses (
-                            tcp_profile_id, hypothesis_type, hypothesis_explanation,
-                            plausibility_score, recommended_instruments,
-                            validation_status, supporting_evidence_score,
-                            contradicting_evidence_score, validation_confidence,
-                            validation_explanation
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-                    """,
-                        tcp_id,
-                        hypothesis.hypothesis_type,  # Ya es string, no .value
-                        hypothesis.hypothesis_explanation,
-                        float(hypothesis.plausibility_score),
-                        hypothesis.recommended_instruments,
-                        validation.overall_evidence_level.value if validation else 'insufficient',  # Usar overall_evidence_level
-                        # Calcular scores de evidencia desde los atributos reales
-                        float((validation.sensorial_evidence + validation.geological_evidence + 
-                         validation.hydrographic_evidence + validation.archaeological_evidence + 
-                         validation.human_traces_evidence) / 5.0) if validation else 0.0,  # Promedio como supporting
-                        float(len(validation.contradictions) / 10.0) if validation else 0.0,  # Contradicciones normalizadas
-                        float(validation.confidence_score) if validation else 0.0,  # Usar confidence_score
-                        validation.validation_explanation if validation else ''
-                    )
-                
-                logger.info(f"✅ {len(tcp.territorial_hypotheses)} hypotheses saved")
-                
-                # 4. Guardar ETP (Environmental Tomographic Profile)
-                etp = result.tomographic_profile
-                etp_id = await conn.fetchval("""
-                    INSERT INTO etp_profiles (
-                        timt_analysis_id, territory_id, resolution_m,
-                        ess_superficial, ess_subsuperficial, ess_volumetrico, ess_temporal,
-                        coherencia_3d, persistencia_temporal, densidad_arqueologica_m3,
-                        geological_compatibility_score, water_availability_score,
-                        external_consistency_score,
-                        confidence_level, recommended_action, narrative_explanation
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16)
-                    RETURNING id
-                """,
-                    timt_id,
-                    etp.territory_id,
-                    float(etp.resolution_m),
-                    float(etp.ess_superficial),
-                    0.0,  # ess_subsuperficial no existe en ETP
-                    float(etp.ess_volumetrico),
-                    float(etp.ess_temporal),
-                    float(etp.coherencia_3d),
-                    float(etp.persistencia_temporal),
-                    float(etp.densidad_arqueologica_m3),
-                    float(etp.geological_compatibility.gcs_score) if etp.geological_compatibility else None,
-                    float(etp.water_availability.settlement_viability) if etp.water_availability else None,
-                    float(etp.external_consistency.ecs_score) if etp.external_consistency else None,
-                    etp.get_confidence_level(),
-                    etp.get_archaeological_recommendation(),  # Usar método correcto
-                    etp.narrative_explanation
-                )
-                
-                logger.info(f"✅ ETP saved: ID={etp_id}")
-                
-                # 5. Guardar anomalías volumétricas (si existen)
-                if hasattr(etp, 'volumetric_anomalies') and etp.volumetric_anomalies:
-                    for anomaly in etp.volumetric_anomalies:
-                        # Calcular volumen desde extent_3d
-                        volume_m3 = anomaly.extent_3d[0] * anomaly.extent_3d[1] * anomaly.extent_3d[2]
-                        depth_min = anomaly.center_3d[2] - anomaly.extent_3d[2] / 2
-                        depth_max = anomaly.center_3d[2] + anomaly.extent_3d[2] / 2
-                        
-                        await conn.execute("""
-                            INSERT INTO volumetric_anomalies (
-                                etp_profile_id, center_x, center_y, center_z,
-                                volume_m3, depth_min_m, depth_max_m,
-                                anomaly_type, archaeological_type,
-                                temporal_range_start, temporal_range_end,
-                                confidence, instruments_supporting
-                            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
-                        """,
-                            etp_id,
-                            float(anomaly.center_3d[0]),
-                            float(anomaly.center_3d[1]),
-                            float(anomaly.center_3d[2]),
-                            float(volume_m3),
-                            float(depth_min),
-                            float(depth_max),
-                            'volumetric',  # Tipo genérico
-                            anomaly.archaeological_type,
-                            int(anomaly.temporal_range[0]),
-                            int(anomaly.temporal_range[1]),
-                            float(anomaly.confidence),
-                            anomaly.instruments_supporting
-                        )
-                    
-                    logger.info(f"✅ {len(etp.volumetric_anomalies)} volumetric anomalies saved")
-                
-                # 6. Guardar reporte de transparencia
-                tr = result.transparency_report
-                
-                # Calcular conteos de hipótesis por nivel de evidencia
-                strong_evidence = len([h for h in result.hypothesis_validations if h.overall_evidence_level.value == 'strong'])
-                moderate_evidence = len([h for h in result.hypothesis_validations if h.overall_evidence_level.value == 'moderate'])
-                weak_evidence = len([h for h in result.hypothesis_validations if h.overall_evidence_level.value == 'weak'])
-                insufficient_evidence = len([h for h in result.hypothesis_validations if h.overall_evidence_level.value == 'insufficient'])
-                
-                await conn.execute("""
-                    INSERT INTO transparency_reports (
-                        timt_analysis_id, analysis_process, key_decisions,
-                        known_limitations, system_boundaries,
-                        hypotheses_evaluated, hypotheses_validated,
-                        hypotheses_rejected, hypotheses_uncertain, hypotheses_discarded,
-                        validation_recommendations, future_work_suggestions
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-                """,
-                    timt_id,
-                    tr.analysis_process,
-                    tr.decisions_made,
-                    tr.system_limitations,
-                    tr.cannot_affirm,  # Usar cannot_affirm en lugar de system_boundaries
-                    len(result.hypothesis_validations),
-                    strong_evidence,  # Evidencia fuerte como "validadas"
-                    weak_evidence + insufficient_evidence,  # Evidencia débil/insuficiente como "rechazadas"
-                    moderate_evidence,  # Evidencia moderada como "inciertas"
-                    len(tr.hypotheses_discarded),
-                    tr.validation_recommendations,
-                    tr.future_work_suggestions
-                )
-                
-                logger.info(f"✅ Transparency report saved")
-                
-                # 7. Guardar comunicación multinivel
-                await conn.execute("""
-                    INSERT INTO multilevel_communications (
-                        timt_analysis_id,
-                        level1_what_measured, level2_why_measured,
-                        level3_what_inferred, level4_what_cannot_affirm,
-                        executive_summary, technical_summary,
-                        academic_summary, educational_summary
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                """,
-                    timt_id,
-                    result.general_summary[:1000] if result.general_summary else '',  # Level 1
-                    result.technical_summary[:1000] if result.technical_summary else '',  # Level 2
-                    result.academic_summary[:1000] if result.academic_summary else '',  # Level 3
-                    ', '.join(tr.cannot_affirm[:5]),  # Level 4
-                    result.institutional_summary if result.institutional_summary else '',
-                    result.technical_summary if result.technical_summary else '',
-                    result.academic_summary if result.academic_summary else '',
-                    result.general_summary if result.general_summary else ''
-                )
-                
-                logger.info(f"✅ Multilevel communication saved")
-                
-                logger.info(f"🎉 TIMT result completely saved to database: {result.analysis_id}")
-                
+        await write_timt_plan(db_pool, plan)
+        logger.info(f"🎉 TIMT result completely saved to database: {result.analysis_id}")
     except Exception as e:
         logger.error(f"❌ Error saving TIMT specific tables: {e}", exc_info=True)
     
-    # 8. Guardar TAMBIÉN en tabla antigua para compatibilidad (FUERA DE LA TRANSACCIÓN ANTERIOR)
+    # Guardar TAMBIÉN en tabla antigua para compatibilidad (FUERA DE LA TRANSACCIÓN ANTERIOR)
     try:
-        async with db_pool.acquire() as conn:
-            logger.info("[BD] Guardando en tabla antigua para compatibilidad...")
-            
-            # Generar candidate_id único basado en el analysis_id
-            candidate_id = f"TIMT_{result.analysis_id}"
-            center_lat = (result.territory_bounds.lat_min + result.territory_bounds.lat_max) / 2
-            center_lon = (result.territory_bounds.lon_min + result.territory_bounds.lon_max) / 2
-            
-            await conn.execute("""
-                INSERT INTO archaeological_candidate_analyses (
-                    candidate_id, candidate_name, region,
-                    archaeological_probability, anomaly_score,
-                    result_type, recommended_action,
-                    environment_type, confidence_level,
-                    latitude, longitude,
-                    lat_min, lat_max, lon_min, lon_max,
-                    scientific_explanation, explanation_type
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17)
-            """,
-                candidate_id,
-                request_data.get('region_name', 'Unknown'),
-                f"TIMT Analysis {result.analysis_id}",
-                float(result.tomographic_profile.densidad_arqueologica_m3),
-                float(result.tomographic_profile.ess_superficial),
-                'positive_candidate' if result.tomographic_profile.densidad_arqueologica_m3 > 0.5 else 'uncertain',
-                result.tomographic_profile.get_archaeological_recommendation(),
-                result.territorial_context.historical_biome.value,
-                float(result.scientific_rigor_score),
-                float(center_lat),
-                float(center_lon),
-                float(result.territory_bounds.lat_min),
-                float(result.territory_bounds.lat_max),
-                float(result.territory_bounds.lon_min),
-                float(result.territory_bounds.lon_max),
-                (result.academic_summary[:1000] if result.academic_summary else ''),
-                'timt_analysis'
-            )
-            logger.info(f"✅ Saved to legacy table for compatibility: {candidate_id}")
-            return True
-                
+        await write_legacy_candidate(db_pool, plan)
+        return True
     except Exception as e:
         logger.error(f"❌ Error saving to legacy table: {e}", exc_info=True)
         return False
+
+async def enqueue_timt_result(db_pool, result: TerritorialInferentialTomographyResult, request_data: dict) -> Optional[str]:
+    """
+    Encolar el guardado de un resultado TIMT (write-behind, no espera a la BD).
+    
+    El plan queda en el journal antes de volver; las tablas TIMT y la tabla
+    legacy son trabajos independientes (cada uno en su transacción).
+    
+    Returns:
+        id del trabajo TIMT encolado, o None sin pool
+    """
+    
+    if not db_pool:
+        logger.warning("⚠️ DB pool not available, skipping save")
+        return None
+    
+    timt_write_queue.attach(db_pool)
+    plan = build_timt_persistence_plan(result, request_data)
+    job_id = await timt_write_queue.submit('timt_result', plan)
+    await timt_write_queue.submit('timt_legacy_candidate', {'legacy_candidate': plan['legacy_candidate']})
+    logger.info(f"📝 TIMT result queued for persistence: {result.analysis_id} (job {job_id[:8]})")
+    return job_id
+
+
+# Instancia global
+timt_write_queue = WriteBehindQueue("timt", "cache/write_behind/timt.jsonl")
+timt_write_queue.register('timt_result', write_timt_plan)
+timt_write_queue.register('timt_legacy_candidate', write_legacy_candidate)
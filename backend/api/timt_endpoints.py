@@ -31,51 +31,42 @@ from territorial_inferential_tomography import (
 )
 from territorial_context_profile import TerritorialContextProfile
 from satellite_connectors.real_data_integrator_v2 import RealDataIntegratorV2
-import asyncpg
-import os
+from component_registry import components
+from database.pool import get_shared_pool
 
 logger = logging.getLogger(__name__)
 
 # Router para endpoints TIMT
 timt_router = APIRouter(prefix="/timt", tags=["Territorial Inferential Tomography"])
 
-# Inicializar motor TIMT (se hará en startup)
-timt_engine: Optional[TerritorialInferentialTomographyEngine] = None
+def _create_timt_engine() -> TerritorialInferentialTomographyEngine:
+    """Construir motor TIMT con integrador de 15 instrumentos."""
+    # Inicializar integrador con 15 instrumentos
+    integrator = RealDataIntegratorV2()
+    
+    # Inicializar motor TIMT
+    engine = TerritorialInferentialTomographyEngine(integrator)
+    logger.info("🚀 TIMT Engine initialized successfully")
+    return engine
 
-# Pool de conexiones a BD
-db_pool = None
+# Motor TIMT compartido con el endpoint científico (construcción diferida)
+components.register('timt_engine', _create_timt_engine)
+
+async def get_timt_engine() -> Optional[TerritorialInferentialTomographyEngine]:
+    """Motor TIMT (lo construye en un hilo si el warm-up aún no lo hizo)."""
+    return await components.aget('timt_engine')
 
 async def init_timt_db_pool():
-    """Inicializar pool de conexiones a BD para TIMT."""
-    global db_pool
-    database_url = os.getenv("DATABASE_URL")
-    if database_url:
-        database_url = database_url.strip('"').strip("'")
-        try:
-            db_pool = await asyncpg.create_pool(database_url, min_size=2, max_size=10)
-            logger.info("✅ TIMT DB Pool initialized")
-        except Exception as e:
-            logger.error(f"❌ Error initializing TIMT DB pool: {e}")
-            db_pool = None
-    else:
-        logger.warning("⚠️ DATABASE_URL not configured for TIMT")
+    """Warm-up: conectar el pool de BD compartido (los handlers lo piden por request)."""
+    db_pool = await get_shared_pool()
+    if db_pool:
+        logger.info("✅ TIMT DB Pool initialized")
+    return db_pool
 
 def initialize_timt_engine():
-    """Inicializar motor TIMT con integrador de 15 instrumentos."""
-    global timt_engine
-    
-    try:
-        # Inicializar integrador con 15 instrumentos
-        integrator = RealDataIntegratorV2()
-        
-        # Inicializar motor TIMT
-        timt_engine = TerritorialInferentialTomographyEngine(integrator)
-        
-        logger.info("🚀 TIMT Engine initialized successfully")
-        
-    except Exception as e:
-        logger.error(f"Failed to initialize TIMT Engine: {e}")
-        raise
+    """Construir ya el motor TIMT (normalmente lo hace el warm-up en background)."""
+    if components.get('timt_engine') is None:
+        raise RuntimeError(f"Failed to initialize TIMT Engine: {components.status()['timt_engine'].get('error')}")
 
 # Modelos Pydantic para requests/responses
 
@@ -193,6 +184,7 @@ async def analyze_territory_complete(request: TIMTAnalysisRequest):
         Resultado completo con análisis territorial, validación de hipótesis y transparencia.
     """
     
+    timt_engine = await get_timt_engine()
     if not timt_engine:
         raise HTTPException(status_code=500, detail="TIMT Engine not initialized")
     
@@ -276,7 +268,10 @@ async def analyze_territory_complete(request: TIMTAnalysisRequest):
                 "system_limitations_count": len(result.transparency_report.system_limitations),
                 "validation_recommendations_count": len(result.transparency_report.validation_recommendations),
                 "cannot_affirm": result.transparency_report.cannot_affirm[:3],  # Primeros 3
-                "can_infer": result.transparency_report.can_infer[:3]  # Primeros 3
+                "can_infer": result.transparency_report.can_infer[:3],  # Primeros 3
+                "instruments_skipped": result.transparency_report.instruments_skipped,
+                "acquisition_time_saved_s": result.transparency_report.acquisition_time_saved_s,
+                "acquisition_plan": result.transparency_report.acquisition_plan
             },
             scientific_output=result.scientific_output
         )
@@ -285,7 +280,7 @@ async def analyze_territory_complete(request: TIMTAnalysisRequest):
         
         # Guardar en base de datos
         try:
-            from api.timt_db_saver import save_timt_result_to_db
+            from api.timt_db_saver import enqueue_timt_result
             
             request_dict = {
                 'region_name': request.region_name,
@@ -293,9 +288,10 @@ async def analyze_territory_complete(request: TIMTAnalysisRequest):
                 'resolution_m': request.resolution_m
             }
             
-            timt_db_id = await save_timt_result_to_db(db_pool, result, request_dict)
-            if timt_db_id:
-                logger.info(f"✅ TIMT result saved to DB with ID: {timt_db_id}")
+            # Write-behind: el plan queda en el journal y se escribe en segundo plano
+            job_id = await enqueue_timt_result(await get_shared_pool(), result, request_dict)
+            if job_id:
+                logger.info(f"✅ TIMT result queued for DB persistence (job {job_id})")
             else:
                 logger.warning("⚠️ TIMT result not saved to DB")
         except Exception as e:
@@ -322,6 +318,7 @@ async def generate_territorial_context(request: TCPRequest):
         Contexto territorial con hipótesis y estrategia instrumental.
     """
     
+    timt_engine = await get_timt_engine()
     if not timt_engine:
         raise HTTPException(status_code=500, detail="TIMT Engine not initialized")
     
@@ -441,6 +438,9 @@ async def get_timt_status():
         Estado del motor TIMT y sistemas componentes.
     """
     
+    # El estado no fuerza la construcción del motor
+    timt_engine = components.peek('timt_engine')
+    
     try:
         status = {
             "timt_engine_initialized": timt_engine is not None,
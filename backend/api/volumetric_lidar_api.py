@@ -31,11 +31,14 @@ Endpoints para el Modelado Volumétrico Arqueológico (LIDAR + ArcheoScope)
 """
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Any
+from collections import OrderedDict
 import numpy as np
 import json
 import logging
+import uuid
 from pathlib import Path
 
 def convert_numpy_types(obj):
@@ -70,6 +73,24 @@ volumetric_router = APIRouter(prefix="/volumetric", tags=["Volumetric LIDAR"])
 # Instancia global del motor de fusión
 fusion_engine = None
 
+# Modelos 3D recientes (la geometría se descarga en binario por URL)
+MAX_STORED_MODELS = 16
+MODEL_MEDIA_TYPES = {'glb': 'model/gltf-binary', 'ply': 'application/octet-stream'}
+_stored_models: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _store_model(model_3d: Dict[str, Any]) -> Dict[str, Any]:
+    """Guardar el modelo y devolver su resumen JSON con URLs de descarga binaria"""
+    model_id = uuid.uuid4().hex
+    _stored_models[model_id] = model_3d
+    while len(_stored_models) > MAX_STORED_MODELS:
+        _stored_models.popitem(last=False)
+    return {
+        'model_id': model_id,
+        'urls': {fmt: f"{volumetric_router.prefix}/models/{model_id}.{fmt}" for fmt in MODEL_MEDIA_TYPES},
+        **convert_numpy_types(fusion_engine.describe_3d_model(model_3d))
+    }
+
 class VolumetricAnalysisRequest(BaseModel):
     """Request para análisis volumétrico"""
     site_id: str = Field(..., description="ID del sitio en el catálogo LIDAR")
@@ -289,7 +310,7 @@ async def perform_volumetric_analysis(request: VolumetricAnalysisRequest):
             },
             "archeoscope_results": _serialize_archeoscope_results(archeoscope_results) if archeoscope_results else None,
             "fusion_results": _serialize_fusion_results(fusion_results) if fusion_results else None,
-            "model_3d": convert_numpy_types(model_3d) if model_3d else None,
+            "model_3d": _store_model(model_3d) if model_3d else None,
             "processing_metadata": {
                 "analysis_timestamp": np.datetime64('now').astype(str),
                 "include_archeoscope": request.include_archeoscope,
@@ -307,6 +328,25 @@ async def perform_volumetric_analysis(request: VolumetricAnalysisRequest):
         logger.error(f"❌ Error en análisis volumétrico: {e}")
         raise HTTPException(status_code=500, detail=f"Error en análisis volumétrico: {str(e)}")
 
+@volumetric_router.get("/models/{model_id}.{binary_format}")
+async def download_3d_model(model_id: str, binary_format: str):
+    """
+    Descargar la geometría de un modelo 3D generado por /analyze
+    
+    GLB (glTF 2.0 binario) o PLY binario, transmitido en chunks.
+    """
+    if binary_format not in MODEL_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Formato no soportado: {binary_format} (glb, ply)")
+    model_3d = _stored_models.get(model_id)
+    if model_3d is None:
+        raise HTTPException(status_code=404, detail=f"Modelo {model_id} no encontrado o expirado")
+    
+    return StreamingResponse(
+        fusion_engine.stream_3d_model(model_3d, binary_format),
+        media_type=MODEL_MEDIA_TYPES[binary_format],
+        headers={'Content-Disposition': f'attachment; filename="{model_id}.{binary_format}"'}
+    )
+
 @volumetric_router.get("/sites/{site_id}/preview")
 async def get_site_preview(site_id: str):
     """
@@ -16,13 +16,37 @@ MÉTODO:
 - Analizar jerarquías de asentamientos
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Tuple, Optional
 from enum import Enum
 import logging
 
+import numpy as np
+from scipy.sparse import csr_matrix, triu
+from scipy.sparse.csgraph import connected_components, shortest_path
+from scipy.spatial import cKDTree
+
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_KM = 6371.0
+
+# Umbrales de conexión improbable
+WATER_THRESHOLD = 0.3           # agua < umbral
+SLOPE_THRESHOLD = 0.6           # pendiente > umbral
+VISIBILITY_THRESHOLD = 0.4      # visibilidad < umbral
+ACCESSIBILITY_THRESHOLD = 0.5   # accesibilidad > umbral
+ACCESSIBILITY_SCALE_KM = 10.0   # accesibilidad = 1 / (1 + d / escala)
+
+# accesibilidad > umbral  ⟺  d < escala * (1/umbral - 1): ningún par más
+# lejano puede ser conexión, así que el índice espacial poda sin pérdida
+MAX_CONNECTION_KM = ACCESSIBILITY_SCALE_KM * (1.0 / ACCESSIBILITY_THRESHOLD - 1.0)
+
+# Longitud media de caminos: BFS desde todos los nodos mientras el trabajo
+# (fuentes x arcos) quepa en el presupuesto; si no, muestra fija de fuentes
+PATH_LENGTH_ARC_BUDGET = 250_000_000
+PATH_LENGTH_MIN_SOURCES = 64
+PATH_LENGTH_CHUNK = 64
+
 
 class ConnectionType(Enum):
     """Tipos de conexión entre sitios."""
@@ -59,12 +83,36 @@ class ArchaeologicalEdge:
     accessibility: float       # Accesibilidad (costo de distancia)
 
 
+@dataclass
+class ArchaeologicalEdgeArrays:
+    """Aristas en forma columnar (una posición por arista, índices de nodo)."""
+    node_a: np.ndarray           # int32, índice en nodes
+    node_b: np.ndarray           # int32, índice en nodes (node_a < node_b)
+    strength: np.ndarray
+    distance_km: np.ndarray
+    water_gradient: np.ndarray
+    slope_gradient: np.ndarray
+    visibility: np.ndarray
+    accessibility: np.ndarray
+    connection_type: ConnectionType = ConnectionType.IMPROBABLE
+    
+    def __len__(self) -> int:
+        return len(self.node_a)
+    
+    @classmethod
+    def empty(cls) -> 'ArchaeologicalEdgeArrays':
+        index = np.empty(0, dtype=np.int32)
+        value = np.empty(0, dtype=np.float64)
+        return cls(index, index, value, value, value, value, value, value)
+
+
 @dataclass
 class ArchaeologicalGradientNetwork:
     """Red de gradientes arqueológicos."""
     network_id: str
     nodes: List[ArchaeologicalNode]
-    edges: List[ArchaeologicalEdge]
+    edge_arrays: ArchaeologicalEdgeArrays
+    adjacency: csr_matrix            # Simétrica (n x n), peso = strength
     
     # Métricas de red
     network_density: float           # Densidad de conexiones
@@ -74,6 +122,37 @@ class ArchaeologicalGradientNetwork:
     # Interpretación
     network_type: str               # Tipo de red (dispersa, concentrada, jerárquica)
     interpretation: str
+    
+    connected_components: int = 0
+    
+    @property
+    def edges(self) -> List[ArchaeologicalEdge]:
+        """Aristas como objetos (se materializan bajo demanda)."""
+        arrays = self.edge_arrays
+        return [
+            ArchaeologicalEdge(
+                node_a_id=self.nodes[a].node_id,
+                node_b_id=self.nodes[b].node_id,
+                connection_type=arrays.connection_type,
+                strength=float(strength),
+                distance_km=float(distance),
+                water_gradient=float(water),
+                slope_gradient=float(slope),
+                visibility=float(visibility),
+                accessibility=float(accessibility)
+            )
+            for a, b, strength, distance, water, slope, visibility, accessibility in zip(
+                arrays.node_a.tolist(), arrays.node_b.tolist(), arrays.strength.tolist(),
+                arrays.distance_km.tolist(), arrays.water_gradient.tolist(),
+                arrays.slope_gradient.tolist(), arrays.visibility.tolist(),
+                arrays.accessibility.tolist()
+            )
+        ]
+    
+    def neighbors(self, node_index: int) -> np.ndarray:
+        """Índices de los nodos conectados a node_index (fila CSR)."""
+        start, end = self.adjacency.indptr[node_index], self.adjacency.indptr[node_index + 1]
+        return self.adjacency.indices[start:end]
 
 
 class ArchaeologicalGradientNetworkEngine:
@@ -89,6 +168,10 @@ class ArchaeologicalGradientNetworkEngine:
         """
         Construir red de gradientes arqueológicos.
         
+        Sólo se evalúan los pares a menos de MAX_CONNECTION_KM (KD-tree sobre
+        la esfera); los factores se calculan como arrays sobre esos pares y
+        el grafo se guarda en CSR.
+        
         Args:
             sites: Lista de sitios con coordenadas y características
             
@@ -110,108 +193,126 @@ class ArchaeologicalGradientNetworkEngine:
             )
             nodes.append(node)
         
-        # Crear aristas (conexiones improbables)
-        edges = []
-        for i, node_a in enumerate(nodes):
-            for j, node_b in enumerate(nodes):
-                if i >= j:
-                    continue
-                
-                # Calcular factores de conexión
-                distance_km = self._calculate_distance(node_a, node_b)
-                water_gradient = self._calculate_water_gradient(node_a, node_b)
-                slope_gradient = self._calculate_slope_gradient(node_a, node_b)
-                visibility = self._calculate_visibility(node_a, node_b)
-                accessibility = self._calculate_accessibility(node_a, node_b, distance_km)
-                
-                # Detectar conexión improbable
-                if self._is_improbable_connection(water_gradient, slope_gradient, visibility, accessibility):
-                    connection_type = ConnectionType.IMPROBABLE
-                    strength = self._calculate_connection_strength(water_gradient, slope_gradient, visibility, accessibility)
-                    
-                    edge = ArchaeologicalEdge(
-                        node_a_id=node_a.node_id,
-                        node_b_id=node_b.node_id,
-                        connection_type=connection_type,
-                        strength=strength,
-                        distance_km=distance_km,
-                        water_gradient=water_gradient,
-                        slope_gradient=slope_gradient,
-                        visibility=visibility,
-                        accessibility=accessibility
-                    )
-                    edges.append(edge)
+        n = len(nodes)
+        lat = np.fromiter((node.lat for node in nodes), dtype=np.float64, count=n)
+        lon = np.fromiter((node.lon for node in nodes), dtype=np.float64, count=n)
+        
+        # Pares candidatos (índice espacial) y factores vectorizados
+        node_a, node_b = self._candidate_pairs(lat, lon, MAX_CONNECTION_KM)
+        distance_km = self._calculate_distance(lat, lon, node_a, node_b)
+        water_gradient = self._calculate_water_gradient(lat, lon, node_a, node_b)
+        slope_gradient = self._calculate_slope_gradient(lat, lon, node_a, node_b)
+        visibility = self._calculate_visibility(lat, lon, node_a, node_b)
+        accessibility = self._calculate_accessibility(distance_km)
+        
+        # Detectar conexiones improbables
+        mask = self._is_improbable_connection(water_gradient, slope_gradient, visibility, accessibility)
+        edge_arrays = ArchaeologicalEdgeArrays(
+            node_a=node_a[mask],
+            node_b=node_b[mask],
+            strength=self._calculate_connection_strength(
+                water_gradient[mask], slope_gradient[mask], visibility[mask], accessibility[mask]
+            ),
+            distance_km=distance_km[mask],
+            water_gradient=water_gradient[mask],
+            slope_gradient=slope_gradient[mask],
+            visibility=visibility[mask],
+            accessibility=accessibility[mask]
+        ) if mask.any() else ArchaeologicalEdgeArrays.empty()
+        adjacency = self._build_adjacency(n, edge_arrays)
         
         # Calcular métricas de red
-        network_density = len(edges) / (len(nodes) * (len(nodes) - 1) / 2) if len(nodes) > 1 else 0.0
-        clustering_coefficient = self._calculate_clustering_coefficient(nodes, edges)
-        average_path_length = self._calculate_average_path_length(nodes, edges)
+        network_density = len(edge_arrays) / (n * (n - 1) / 2) if n > 1 else 0.0
+        clustering_coefficient = self._calculate_clustering_coefficient(adjacency)
+        average_path_length = self._calculate_average_path_length(adjacency)
+        n_components = int(connected_components(adjacency, directed=False)[0]) if n else 0
         
         # Determinar tipo de red
         network_type = self._determine_network_type(network_density, clustering_coefficient)
         
         # Interpretación
-        interpretation = self._interpret_network(network_type, len(nodes), len(edges), network_density)
+        interpretation = self._interpret_network(network_type, n, len(edge_arrays), network_density)
         
         # Crear red
         network = ArchaeologicalGradientNetwork(
-            network_id=f"agn_{len(nodes)}_nodes",
+            network_id=f"agn_{n}_nodes",
             nodes=nodes,
-            edges=edges,
+            edge_arrays=edge_arrays,
+            adjacency=adjacency,
             network_density=network_density,
             clustering_coefficient=clustering_coefficient,
             average_path_length=average_path_length,
             network_type=network_type,
-            interpretation=interpretation
+            interpretation=interpretation,
+            connected_components=n_components
         )
         
         logger.info(f"✅ Red AGN construida:")
-        logger.info(f"   📊 Nodos: {len(nodes)}")
-        logger.info(f"   🔗 Aristas: {len(edges)}")
+        logger.info(f"   📊 Nodos: {n}")
+        logger.info(f"   🔍 Pares evaluados: {len(node_a)} (de {n * (n - 1) // 2})")
+        logger.info(f"   🔗 Aristas: {len(edge_arrays)}")
         logger.info(f"   📊 Densidad: {network_density:.3f}")
         logger.info(f"   🕸️ Tipo: {network_type}")
         
         return network
     
-    def _calculate_distance(self, node_a: ArchaeologicalNode, node_b: ArchaeologicalNode) -> float:
-        """Calcular distancia entre nodos (km)."""
-        import math
+    def _candidate_pairs(self, lat: np.ndarray, lon: np.ndarray, max_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Pares (i < j) a menos de max_km, vía KD-tree sobre vectores unitarios."""
+        if len(lat) < 2:
+            empty = np.empty(0, dtype=np.int32)
+            return empty, empty
         
-        lat1, lon1 = math.radians(node_a.lat), math.radians(node_a.lon)
-        lat2, lon2 = math.radians(node_b.lat), math.radians(node_b.lon)
+        lat_r, lon_r = np.radians(lat), np.radians(lon)
+        points = np.column_stack((
+            np.cos(lat_r) * np.cos(lon_r),
+            np.cos(lat_r) * np.sin(lon_r),
+            np.sin(lat_r)
+        ))
+        # Cuerda equivalente al arco max_km (margen por redondeo; se filtra después)
+        chord = 2.0 * np.sin(min(np.pi, max_km / EARTH_RADIUS_KM) / 2.0) * (1.0 + 1e-9)
+        pairs = cKDTree(points).query_pairs(chord, output_type='ndarray')
+        if len(pairs) == 0:
+            empty = np.empty(0, dtype=np.int32)
+            return empty, empty
+        
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))].astype(np.int32)
+        return pairs[:, 0], pairs[:, 1]
+    
+    def _calculate_distance(self, lat: np.ndarray, lon: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Calcular distancia entre pares de nodos (km, haversine)."""
+        lat1, lon1 = np.radians(lat[a]), np.radians(lon[a])
+        lat2, lon2 = np.radians(lat[b]), np.radians(lon[b])
         
         dlat = lat2 - lat1
         dlon = lon2 - lon1
         
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        return 6371 * c  # Radio de la Tierra en km
+        h = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+        return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
     
-    def _calculate_water_gradient(self, node_a: ArchaeologicalNode, node_b: ArchaeologicalNode) -> float:
-        """Calcular gradiente de agua entre nodos (0-1)."""
-        # Simplificado: retornar valor aleatorio
+    def _calculate_water_gradient(self, lat: np.ndarray, lon: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Calcular gradiente de agua entre pares de nodos (0-1)."""
+        # Simplificado: valor constante
         # En producción: consultar datos hidrográficos reales
-        return 0.3
+        return np.full(len(a), 0.3)
     
-    def _calculate_slope_gradient(self, node_a: ArchaeologicalNode, node_b: ArchaeologicalNode) -> float:
-        """Calcular gradiente de pendiente entre nodos (0-1)."""
-        # Simplificado: retornar valor aleatorio
+    def _calculate_slope_gradient(self, lat: np.ndarray, lon: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Calcular gradiente de pendiente entre pares de nodos (0-1)."""
+        # Simplificado: valor constante
         # En producción: consultar DEM real
-        return 0.4
+        return np.full(len(a), 0.4)
     
-    def _calculate_visibility(self, node_a: ArchaeologicalNode, node_b: ArchaeologicalNode) -> float:
-        """Calcular visibilidad entre nodos (0-1)."""
-        # Simplificado: retornar valor aleatorio
+    def _calculate_visibility(self, lat: np.ndarray, lon: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Calcular visibilidad entre pares de nodos (0-1)."""
+        # Simplificado: valor constante
         # En producción: análisis de línea de vista con DEM
-        return 0.2
+        return np.full(len(a), 0.2)
     
-    def _calculate_accessibility(self, node_a: ArchaeologicalNode, node_b: ArchaeologicalNode, distance_km: float) -> float:
+    def _calculate_accessibility(self, distance_km: np.ndarray) -> np.ndarray:
         """Calcular accesibilidad entre nodos (0-1)."""
         # Simplificado: inverso de la distancia
-        return 1.0 / (1.0 + distance_km / 10.0)
+        return 1.0 / (1.0 + distance_km / ACCESSIBILITY_SCALE_KM)
     
-    def _is_improbable_connection(self, water: float, slope: float, visibility: float, accessibility: float) -> bool:
+    def _is_improbable_connection(self, water: np.ndarray, slope: np.ndarray, visibility: np.ndarray, accessibility: np.ndarray) -> np.ndarray:
         """
         Detectar conexión improbable (humana intencional).
         
@@ -220,33 +321,82 @@ class ArchaeologicalGradientNetworkEngine:
         - Pendiente alta
         - No visibles entre sí
         - Pero accesibles (camino)
+        
+        Returns:
+            Máscara booleana por par
         """
         
         improbable = (
-            water < 0.3 and      # Sin agua
-            slope > 0.6 and      # Pendiente alta
-            visibility < 0.4 and # No visibles
-            accessibility > 0.5  # Pero accesibles
+            (water < WATER_THRESHOLD) &               # Sin agua
+            (slope > SLOPE_THRESHOLD) &               # Pendiente alta
+            (visibility < VISIBILITY_THRESHOLD) &     # No visibles
+            (accessibility > ACCESSIBILITY_THRESHOLD) # Pero accesibles
         )
         
         return improbable
     
-    def _calculate_connection_strength(self, water: float, slope: float, visibility: float, accessibility: float) -> float:
+    def _calculate_connection_strength(self, water: np.ndarray, slope: np.ndarray, visibility: np.ndarray, accessibility: np.ndarray) -> np.ndarray:
         """Calcular fuerza de conexión."""
         # Fuerza = accesibilidad / (agua + pendiente + visibilidad)
         denominator = water + slope + visibility + 0.1
         strength = accessibility / denominator
-        return min(1.0, strength)
+        return np.minimum(1.0, strength)
     
-    def _calculate_clustering_coefficient(self, nodes: List, edges: List) -> float:
-        """Calcular coeficiente de agrupamiento."""
-        # Simplificado
-        return 0.5
+    def _build_adjacency(self, n: int, edges: ArchaeologicalEdgeArrays) -> csr_matrix:
+        """Matriz de adyacencia simétrica en CSR (peso = fuerza)."""
+        rows = np.concatenate((edges.node_a, edges.node_b))
+        cols = np.concatenate((edges.node_b, edges.node_a))
+        weights = np.concatenate((edges.strength, edges.strength))
+        return csr_matrix((weights, (rows, cols)), shape=(n, n))
     
-    def _calculate_average_path_length(self, nodes: List, edges: List) -> float:
-        """Calcular longitud promedio de caminos."""
-        # Simplificado
-        return 2.5
+    def _calculate_clustering_coefficient(self, adjacency: csr_matrix) -> float:
+        """
+        Calcular coeficiente de agrupamiento medio (local, sin pesos).
+        
+        Triángulos por nodo t_i = sum_k ((A·U) ∘ A)_ik con U = triu(A): cada
+        triángulo {i, j, k} aparece una vez (j < k), mitad de trabajo que
+        diag(A³) / 2. Nodos con grado < 2 aportan 0.
+        """
+        n = adjacency.shape[0]
+        if n == 0 or adjacency.nnz == 0:
+            return 0.0
+        
+        binary = csr_matrix((np.ones(adjacency.nnz), adjacency.indices, adjacency.indptr),
+                            shape=adjacency.shape)
+        degree = np.asarray(binary.sum(axis=1)).ravel()
+        upper = triu(binary, k=1, format='csr')
+        triangles = np.asarray((binary @ upper).multiply(binary).sum(axis=1)).ravel()
+        
+        possible = degree * (degree - 1) / 2.0
+        local = np.divide(triangles, possible, out=np.zeros(n), where=possible > 0)
+        return float(local.mean())
+    
+    def _calculate_average_path_length(self, adjacency: csr_matrix) -> float:
+        """
+        Calcular longitud promedio de caminos (saltos, pares conectados).
+        
+        Exacta (BFS desde todos los nodos con aristas) salvo en redes grandes,
+        donde se estima desde una muestra fija (semilla 0) de fuentes.
+        """
+        if adjacency.nnz == 0:
+            return 0.0
+        
+        sources = np.flatnonzero(np.diff(adjacency.indptr) > 0)
+        max_sources = max(PATH_LENGTH_MIN_SOURCES, PATH_LENGTH_ARC_BUDGET // adjacency.nnz)
+        if len(sources) > max_sources:
+            rng = np.random.default_rng(0)
+            sources = np.sort(rng.choice(sources, max_sources, replace=False))
+        
+        total, pairs = 0.0, 0
+        for start in range(0, len(sources), PATH_LENGTH_CHUNK):
+            # La matriz ya es simétrica: directed=True evita simetrizarla en cada llamada
+            hops = shortest_path(adjacency, directed=True, unweighted=True,
+                                 indices=sources[start:start + PATH_LENGTH_CHUNK])
+            reachable = np.isfinite(hops) & (hops > 0)
+            total += float(hops[reachable].sum())
+            pairs += int(reachable.sum())
+        
+        return total / pairs if pairs else 0.0
     
     def _determine_network_type(self, density: float, clustering: float) -> str:
         """Determinar tipo de red."""
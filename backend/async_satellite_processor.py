@@ -10,7 +10,6 @@ from typing import Dict, Any, Optional, List
 from dataclasses import asdict
 
 from satellite_connectors import PlanetaryComputerConnector, SatelliteData
-from satellite_cache import satellite_cache
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +19,8 @@ class AsyncSatelliteProcessor:
     Procesador asíncrono optimizado para datos satelitales
     
     Estrategia de optimización:
-    1. Caché primero (< 1 segundo si existe)
+    1. Caché por teselas en el conector (< 1 segundo si el sitio ya se vio,
+       aunque el bbox difiera en algunos metros)
     2. Procesamiento paralelo de múltiples fuentes
     3. Timeout para evitar bloqueos
     4. Fallback a simulación si falla
@@ -59,92 +59,49 @@ class AsyncSatelliteProcessor:
         
         start_time = asyncio.get_event_loop().time()
         
-        # Intentar caché primero
-        cached_results = {}
-        if self.use_cache:
-            cached_results = await self._try_cache(
-                lat_min, lat_max, lon_min, lon_max, start_date
-            )
-        
-        # Determinar qué datos faltan
-        tasks = {}
-        
-        if 'multispectral' not in cached_results:
-            tasks['multispectral'] = self._fetch_with_timeout(
+        # El conector ensambla cada tipo desde teselas cacheadas y descarga
+        # solo las teselas faltantes (ver satellite_tile_cache)
+        tasks = {
+            'multispectral': self._fetch_with_timeout(
                 self.connector.get_multispectral_data,
                 lat_min, lat_max, lon_min, lon_max,
                 start_date, end_date, max_cloud_cover
-            )
-        
-        if 'sar' not in cached_results:
-            tasks['sar'] = self._fetch_with_timeout(
+            ),
+            'sar': self._fetch_with_timeout(
                 self.connector.get_sar_data,
                 lat_min, lat_max, lon_min, lon_max,
                 start_date, end_date
-            )
-        
-        if 'thermal' not in cached_results:
-            tasks['thermal'] = self._fetch_with_timeout(
+            ),
+            'thermal': self._fetch_with_timeout(
                 self.connector.get_thermal_data,
                 lat_min, lat_max, lon_min, lon_max,
                 start_date, end_date
             )
+        }
         
         # Ejecutar en paralelo
-        if tasks:
-            logger.info(f"⚡ Fetching {len(tasks)} data types in parallel...")
-            results = await asyncio.gather(*tasks.values(), return_exceptions=True)
-            
-            # Combinar resultados
-            for i, (data_type, _) in enumerate(tasks.items()):
-                result = results[i]
-                
-                if isinstance(result, Exception):
-                    logger.error(f"Error fetching {data_type}: {result}")
-                    cached_results[data_type] = None
-                else:
-                    cached_results[data_type] = result
-                    
-                    # Cachear si es exitoso
-                    if result and self.use_cache:
-                        satellite_cache.set(
-                            lat_min, lat_max, lon_min, lon_max,
-                            data_type, result, result.acquisition_date
-                        )
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        
+        all_data = {}
+        for data_type, result in zip(tasks.keys(), results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching {data_type}: {result}")
+                all_data[data_type] = None
+            else:
+                all_data[data_type] = result
         
         total_time = asyncio.get_event_loop().time() - start_time
         
         # Contar éxitos
-        successful = sum(1 for v in cached_results.values() if v is not None)
+        successful = sum(1 for v in all_data.values() if v is not None)
+        from_cache = sum(1 for v in all_data.values() if v is not None and v.cached)
         
         logger.info(
-            f"✅ Satellite data fetched: {successful}/3 successful in {total_time:.2f}s"
+            f"✅ Satellite data fetched: {successful}/3 successful "
+            f"({from_cache} from tile cache) in {total_time:.2f}s"
         )
         
-        return cached_results
-    
-    async def _try_cache(
-        self,
-        lat_min: float,
-        lat_max: float,
-        lon_min: float,
-        lon_max: float,
-        date: Optional[datetime] = None
-    ) -> Dict[str, Optional[SatelliteData]]:
-        """Intentar obtener datos de caché"""
-        results = {}
-        
-        for data_type in ['multispectral', 'sar', 'thermal']:
-            cached = satellite_cache.get(
-                lat_min, lat_max, lon_min, lon_max,
-                data_type, date
-            )
-            
-            if cached:
-                results[data_type] = cached
-                logger.info(f"✅ Cache HIT: {data_type}")
-        
-        return results
+        return all_data
     
     async def _fetch_with_timeout(self, fetch_func, *args, **kwargs):
         """Ejecutar fetch con timeout"""
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Análisis por Lotes de Regiones - ArcheoScope
+============================================
+
+Ejecuta muchas celdas (bboxes) a través de ScientificPipeline con
+concurrencia acotada, en lugar de N peticiones HTTP secuenciales.
+
+OPTIMIZACIONES:
+1. Deduplicación de mediciones entre celdas: instrumentos de resolución
+   gruesa (ERA5, CHIRPS, MODIS, ...) se miden una sola vez por píxel nativo
+   y el resultado se comparte entre todas las celdas que caen dentro.
+2. Coalescencia: celdas concurrentes que piden la misma medición esperan
+   la misma tarea en vuelo.
+3. Streaming NDJSON: cada celda se emite en cuanto termina; el job sigue
+   corriendo aunque el cliente se desconecte y puede retomarse por job_id.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from instrument_status import InstrumentBatch, InstrumentResult
+
+logger = logging.getLogger(__name__)
+
+
+# Instrumentos por defecto (mismos que el pipeline científico básico)
+DEFAULT_BATCH_INSTRUMENTS = [
+    'sentinel2',
+    'sentinel_1_sar',
+    'landsat_thermal',
+    'icesat2',
+    'srtm_dem',
+    'modis_lst',
+    'era5_climate',
+    'chirps_precipitation',
+    'copernicus_sst',
+    'viirs_thermal',
+    'opentopography',
+    'palsar_backscatter'
+]
+
+# Resolución nativa aproximada (grados) de instrumentos gruesos.
+# Celdas más chicas que un píxel nativo reciben el mismo valor, así que
+# la medición se comparte por píxel. Prefijo de nombre → resolución.
+COARSE_INSTRUMENT_RESOLUTION_DEG = {
+    'era5': 0.25,
+    'climate_context': 0.25,
+    'preservation_conditions': 0.25,
+    'nsidc': 0.25,
+    'copernicus': 1.0 / 12.0,
+    'chirps': 0.05,
+    'precipitation_history': 0.05,
+    'drought_analysis': 0.05,
+    'modis': 0.01,
+    'viirs': 0.005,
+}
+
+MAX_BATCH_CELLS = 2000
+
+
+def coarse_resolution_for(instrument_name: str) -> Optional[float]:
+    """Resolución nativa en grados si el instrumento es grueso, None si no"""
+    name = instrument_name.lower()
+    for prefix, resolution in COARSE_INSTRUMENT_RESOLUTION_DEG.items():
+        if name.startswith(prefix):
+            return resolution
+    return None
+
+
+def instrument_batch_to_raw_measurements(batch: InstrumentBatch) -> Dict[str, Any]:
+    """Convertir InstrumentBatch al formato raw_measurements de ScientificPipeline"""
+    raw_measurements = {
+        'instrumental_measurements': {},
+        'metadata': {
+            'coverage_score': batch.get_coverage_score(),
+            'status_summary': batch.get_status_summary()
+        }
+    }
+
+    for result in batch.results:
+        raw_measurements['instrumental_measurements'][result.instrument_name] = {
+            'value': result.value,
+            'confidence': result.confidence,
+            'status': result.status.value,
+            'unit': result.unit,
+            'quality_ratio': result.quality_ratio,
+            'source': result.source,
+            'acquisition_date': result.acquisition_date,
+            'reason': result.reason
+        }
+
+    return raw_measurements
+
+
+def to_jsonable(obj: Any) -> Any:
+    """Convertir tipos numpy/datetime/enum a tipos JSON (NaN/inf → None)"""
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    if isinstance(obj, (bool, np.bool_)):
+        return bool(obj)
+    if isinstance(obj, (int, np.integer)):
+        return int(obj)
+    if isinstance(obj, (float, np.floating)):
+        value = float(obj)
+        return value if math.isfinite(value) else None
+    if isinstance(obj, np.ndarray):
+        return to_jsonable(obj.tolist())
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    return obj
+
+
+@dataclass
+class BatchCell:
+    """Celda de un lote"""
+    index: int
+    lat_min: float
+    lat_max: float
+    lon_min: float
+    lon_max: float
+
+    def bounds(self) -> Dict[str, float]:
+        return {
+            'lat_min': self.lat_min,
+            'lat_max': self.lat_max,
+            'lon_min': self.lon_min,
+            'lon_max': self.lon_max
+        }
+
+
+def build_grid_cells(lat_min: float, lat_max: float,
+                     lon_min: float, lon_max: float,
+                     cell_size_deg: float) -> List[BatchCell]:
+    """Dividir un bbox en celdas regulares de cell_size_deg (fila 0 = sur)"""
+    if cell_size_deg <= 0:
+        raise ValueError("cell_size_deg must be positive")
+
+    rows = max(1, math.ceil((lat_max - lat_min) / cell_size_deg - 1e-9))
+    cols = max(1, math.ceil((lon_max - lon_min) / cell_size_deg - 1e-9))
+
+    if rows * cols > MAX_BATCH_CELLS:
+        raise ValueError(f"Grid produces {rows * cols} cells (max {MAX_BATCH_CELLS})")
+
+    cells = []
+    for r in range(rows):
+        for c in range(cols):
+            cells.append(BatchCell(
+                index=len(cells),
+                lat_min=lat_min + r * cell_size_deg,
+                lat_max=min(lat_max, lat_min + (r + 1) * cell_size_deg),
+                lon_min=lon_min + c * cell_size_deg,
+                lon_max=min(lon_max, lon_min + (c + 1) * cell_size_deg)
+            ))
+    return cells
+
+
+class SharedMeasurementCache:
+    """
+    Memo de mediciones compartido por las celdas de un job
+
+    La key de instrumentos gruesos es el píxel nativo que contiene el centro
+    de la celda (si la celda es menor que el píxel); para el resto, el bbox
+    exacto. Se guardan tareas, no resultados, para coalescer peticiones
+    concurrentes.
+    """
+
+    def __init__(self, integrator):
+        self.integrator = integrator
+        self._tasks: Dict[Tuple, asyncio.Task] = {}
+        self.fetches = 0
+        self.reused = 0
+
+    @staticmethod
+    def _key(instrument_name: str, cell: BatchCell) -> Tuple:
+        resolution = coarse_resolution_for(instrument_name)
+        span = max(cell.lat_max - cell.lat_min, cell.lon_max - cell.lon_min)
+
+        if resolution is not None and span <= resolution:
+            center_lat = (cell.lat_min + cell.lat_max) / 2
+            center_lon = (cell.lon_min + cell.lon_max) / 2
+            return (
+                instrument_name,
+                'pixel',
+                math.floor((center_lat + 90.0) / resolution),
+                math.floor((center_lon + 180.0) / resolution)
+            )
+
+        return (
+            instrument_name,
+            'bbox',
+            round(cell.lat_min, 6), round(cell.lat_max, 6),
+            round(cell.lon_min, 6), round(cell.lon_max, 6)
+        )
+
+    async def get(self, instrument_name: str, cell: BatchCell) -> InstrumentResult:
+        key = self._key(instrument_name, cell)
+        task = self._tasks.get(key)
+
+        if task is None:
+            self.fetches += 1
+            task = asyncio.ensure_future(
+                self.integrator.get_instrument_measurement_robust(
+                    instrument_name, cell.lat_min, cell.lat_max, cell.lon_min, cell.lon_max
+                )
+            )
+            self._tasks[key] = task
+        else:
+            self.reused += 1
+
+        return await asyncio.shield(task)
+
+
+class BatchJobStatus(Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class BatchJob:
+    """Estado de un job de análisis por lotes"""
+    job_id: str
+    cells: List[BatchCell]
+    instruments: List[str]
+    max_concurrency: int
+    region_name: str
+    status: BatchJobStatus = BatchJobStatus.RUNNING
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    # Eventos NDJSON en orden de finalización; seq = posición en la lista
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    completed: int = 0
+    failed: int = 0
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = None
+    _changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def emit(self, event: Dict[str, Any]):
+        event['seq'] = len(self.events)
+        self.events.append(event)
+        # Despertar lectores y preparar el siguiente aviso
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'status': self.status.value,
+            'region_name': self.region_name,
+            'total_cells': len(self.cells),
+            'completed': self.completed,
+            'failed': self.failed,
+            'pending': len(self.cells) - self.completed - self.failed,
+            'instruments': self.instruments,
+            'max_concurrency': self.max_concurrency,
+            'created_at': datetime.fromtimestamp(self.created_at).isoformat(),
+            'elapsed_s': round((self.finished_at or time.time()) - self.created_at, 3),
+            'error': self.error
+        }
+
+    async def stream(self, after_seq: int = -1) -> AsyncIterator[str]:
+        """
+        Emitir eventos NDJSON con seq > after_seq y seguir en vivo hasta el final
+
+        Permite retomar un stream interrumpido pasando el último seq recibido.
+        """
+        next_seq = after_seq + 1
+        while True:
+            changed = self._changed
+            while next_seq < len(self.events):
+                yield json.dumps(self.events[next_seq], ensure_ascii=False) + "\n"
+                next_seq += 1
+
+            if self.status != BatchJobStatus.RUNNING:
+                return
+
+            await changed.wait()
+
+
+class BatchAnalysisRunner:
+    """
+    Orquestador de jobs de análisis por lotes
+
+    Cada celda: mediciones (vía SharedMeasurementCache) → ScientificPipeline.analyze.
+    Los jobs viven en memoria del worker que los creó y expiran tras job_ttl_s.
+    """
+
+    def __init__(self, job_ttl_s: float = 3600.0, max_jobs: int = 50):
+        self.jobs: Dict[str, BatchJob] = {}
+        self.job_ttl_s = job_ttl_s
+        self.max_jobs = max_jobs
+
+    def _evict_expired(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished_at and now - job.finished_at > self.job_ttl_s
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[BatchJob]:
+        self._evict_expired()
+        return self.jobs.get(job_id)
+
+    def start_job(self,
+                  cells: List[BatchCell],
+                  integrator,
+                  pipeline_factory,
+                  instruments: Optional[List[str]] = None,
+                  max_concurrency: int = 4,
+                  region_name: str = "Batch Survey") -> BatchJob:
+        """
+        Crear y lanzar un job en segundo plano
+
+        Args:
+            cells: celdas a analizar
+            integrator: RealDataIntegratorV2 compartido por todas las celdas
+            pipeline_factory: callable que devuelve un ScientificPipeline
+            instruments: instrumentos a medir (default: DEFAULT_BATCH_INSTRUMENTS)
+            max_concurrency: celdas simultáneas
+        """
+        self._evict_expired()
+
+        running = sum(1 for j in self.jobs.values() if j.status == BatchJobStatus.RUNNING)
+        if running >= self.max_jobs:
+            raise RuntimeError(f"Too many running batch jobs ({running})")
+
+        job = BatchJob(
+            job_id=uuid.uuid4().hex,
+            cells=cells,
+            instruments=list(instruments or DEFAULT_BATCH_INSTRUMENTS),
+            max_concurrency=max(1, max_concurrency),
+            region_name=region_name
+        )
+        self.jobs[job.job_id] = job
+
+        job.emit({'type': 'job', **job.summary()})
+        job.task = asyncio.ensure_future(self._run(job, integrator, pipeline_factory))
+
+        logger.info(f"🧮 Batch job {job.job_id}: {len(cells)} cells, concurrency {job.max_concurrency}")
+        return job
+
+    async def _run(self, job: BatchJob, integrator, pipeline_factory):
+        shared = SharedMeasurementCache(integrator)
+        semaphore = asyncio.Semaphore(job.max_concurrency)
+        pipeline = pipeline_factory()
+
+        async def run_cell(cell: BatchCell):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    result = await self._analyze_cell(cell, job.instruments, shared, pipeline)
+                    job.completed += 1
+                    job.emit({
+                        'type': 'cell',
+                        'cell_index': cell.index,
+                        'bounds': cell.bounds(),
+                        'status': 'success',
+                        'elapsed_s': round(time.perf_counter() - start, 3),
+                        **result
+                    })
+                except Exception as e:
+                    job.failed += 1
+                    logger.error(f"Batch job {job.job_id} cell {cell.index} failed: {e}")
+                    job.emit({
+                        'type': 'cell',
+                        'cell_index': cell.index,
+                        'bounds': cell.bounds(),
+                        'status': 'error',
+                        'elapsed_s': round(time.perf_counter() - start, 3),
+                        'error': str(e)[:500]
+                    })
+
+        try:
+            await asyncio.gather(*(run_cell(cell) for cell in job.cells))
+            job.status = BatchJobStatus.COMPLETED
+        except Exception as e:
+            job.status = BatchJobStatus.FAILED
+            job.error = str(e)[:500]
+            logger.error(f"Batch job {job.job_id} aborted: {e}")
+        finally:
+            job.finished_at = time.time()
+            job.emit({
+                'type': 'done',
+                **job.summary(),
+                'instrument_fetches': shared.fetches,
+                'deduplicated_fetches': shared.reused
+            })
+            logger.info(
+                f"✅ Batch job {job.job_id} finished: {job.completed} ok, {job.failed} failed, "
+                f"{shared.fetches} fetches ({shared.reused} reused)"
+            )
+
+    @staticmethod
+    async def _analyze_cell(cell: BatchCell,
+                            instruments: List[str],
+                            shared: SharedMeasurementCache,
+                            pipeline) -> Dict[str, Any]:
+        """Medir instrumentos (deduplicados) y ejecutar el pipeline para una celda"""
+        results = await asyncio.gather(*(shared.get(name, cell) for name in instruments))
+
+        batch = InstrumentBatch()
+        for result in results:
+            batch.results.append(result)
+
+        raw_measurements = instrument_batch_to_raw_measurements(batch)
+
+        analysis = await pipeline.analyze(
+            raw_measurements=raw_measurements,
+            lat_min=cell.lat_min,
+            lat_max=cell.lat_max,
+            lon_min=cell.lon_min,
+            lon_max=cell.lon_max
+        )
+
+        return to_jsonable({
+            'scientific_output': analysis.get('scientific_output', {}),
+            'coverage_score': raw_measurements['metadata']['coverage_score'],
+            'measurements': [
+                {
+                    'instrument_name': name,
+                    'value': data.get('value'),
+                    'confidence': data.get('confidence', 0),
+                    'status': data.get('status', 'UNKNOWN'),
+                    'unit': data.get('unit', '')
+                }
+                for name, data in raw_measurements['instrumental_measurements'].items()
+            ]
+        })
+
+
+# Instancia global
+batch_runner = BatchAnalysisRunner()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Component Registry - Carga diferida de componentes pesados
+==========================================================
+
+Los componentes (motores, clasificadores, validadores) se registran como
+fábricas y se construyen en el primer uso, no al importar la API:
+
+- Inicialización thread-safe: un lock por componente, una sola construcción
+  aunque varios hilos/requests lo pidan a la vez
+- Los imports pesados van dentro de la fábrica (rasterio, torch, trimesh...)
+- warm_up() construye en background los componentes marcados warm=True
+  después de abrir el puerto
+- Un fallo queda registrado (status) y el componente vale None, como en el
+  lazy loading anterior; reset() permite reintentar
+
+Uso:
+    components.register('rules_engine', lambda: ArchaeologicalRulesEngine())
+    engine = components.get('rules_engine')            # sync (bloquea)
+    engine = await components.aget('rules_engine')     # async (en hilo)
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Factory = Callable[[], Any]
+
+_MISSING = object()
+
+
+@dataclass
+class _Slot:
+    """Estado de un componente registrado"""
+    factory: Optional[Factory]
+    warm: bool
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    instance: Any = _MISSING
+    error: Optional[str] = None
+    load_ms: float = 0.0
+
+
+class ComponentRegistry(Mapping):
+    """
+    Registro de componentes con inicialización diferida
+
+    Es un Mapping de solo lectura: components['x'] y components.get('x')
+    construyen el componente si hace falta; peek('x') nunca lo construye.
+    """
+
+    def __init__(self):
+        self._slots: Dict[str, _Slot] = {}
+        self._lock = threading.Lock()
+        self._warm_up_task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------------
+
+    def register(self, name: str, factory: Optional[Factory], warm: bool = True, replace: bool = False):
+        """
+        Registrar una fábrica (None = componente deshabilitado)
+
+        Si el nombre ya existe se conserva el registro previo (varios módulos
+        pueden declarar el mismo componente compartido) salvo replace=True.
+        """
+        with self._lock:
+            if name in self._slots and not replace:
+                return
+            self._slots[name] = _Slot(factory=factory, warm=warm)
+
+    def reset(self, name: Optional[str] = None):
+        """Descartar instancias (todas o una) para reconstruirlas en el próximo uso"""
+        with self._lock:
+            names = [name] if name is not None else list(self._slots)
+            for key in names:
+                slot = self._slots[key]
+                self._slots[key] = _Slot(factory=slot.factory, warm=slot.warm)
+
+    # ------------------------------------------------------------------
+    # Acceso
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, name: str) -> Any:
+        slot = self._slots.get(name)
+        if slot is None:
+            raise KeyError(name)
+        return self._load(name, slot)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._slots))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Componente (construyéndolo si hace falta) o default si no está registrado"""
+        if name not in self._slots:
+            return default
+        return self[name]
+
+    async def aget(self, name: str, default: Any = None) -> Any:
+        """Como get(), pero la construcción corre en un hilo (no bloquea el event loop)"""
+        slot = self._slots.get(name)
+        if slot is None:
+            return default
+        if slot.instance is not _MISSING:
+            return slot.instance
+        return await asyncio.to_thread(self._load, name, slot)
+
+    def peek(self, name: str) -> Any:
+        """Componente ya construido, o None (nunca dispara la construcción)"""
+        slot = self._slots.get(name)
+        if slot is None or slot.instance is _MISSING:
+            return None
+        return slot.instance
+
+    def is_loaded(self, name: str) -> bool:
+        slot = self._slots.get(name)
+        return slot is not None and slot.instance is not _MISSING
+
+    def _load(self, name: str, slot: _Slot) -> Any:
+        if slot.instance is not _MISSING:
+            return slot.instance
+        with slot.lock:
+            if slot.instance is not _MISSING:
+                return slot.instance
+            if slot.factory is None:
+                slot.instance = None
+                return None
+            started = time.perf_counter()
+            try:
+                instance = slot.factory()
+                slot.error = None
+                logger.info(f"✅ {name} cargado ({(time.perf_counter() - started) * 1000:.0f} ms)")
+            except Exception as e:
+                instance = None
+                slot.error = f"{type(e).__name__}: {e}"
+                logger.error(f"❌ Error cargando {name}: {e}")
+            slot.load_ms = (time.perf_counter() - started) * 1000
+            slot.instance = instance
+            return instance
+
+    # ------------------------------------------------------------------
+    # Warm-up
+    # ------------------------------------------------------------------
+
+    def warm_up(self, names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Construir ya los componentes indicados (por defecto los warm=True)"""
+        targets = names if names is not None else [n for n, s in self._slots.items() if s.warm]
+        started = time.perf_counter()
+        for name in targets:
+            self.get(name)
+        logger.info(f"🔥 Warm-up de {len(targets)} componentes en {time.perf_counter() - started:.2f}s")
+        return self.status()
+
+    def start_warm_up(self, names: Optional[List[str]] = None) -> asyncio.Task:
+        """Lanzar warm_up() en un hilo como tarea de background (idempotente)"""
+        if self._warm_up_task is None or self._warm_up_task.done():
+            self._warm_up_task = asyncio.get_running_loop().create_task(
+                asyncio.to_thread(self.warm_up, names), name="component-warm-up"
+            )
+        return self._warm_up_task
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Estado por componente: loaded / failed / disabled / pending"""
+        result = {}
+        for name, slot in list(self._slots.items()):
+            if slot.factory is None:
+                state = 'disabled'
+            elif slot.instance is _MISSING:
+                state = 'pending'
+            elif slot.instance is None:
+                state = 'failed'
+            else:
+                state = 'loaded'
+            entry: Dict[str, Any] = {'state': state}
+            if state in ('loaded', 'failed'):
+                entry['load_ms'] = round(slot.load_ms, 1)
+            if slot.error:
+                entry['error'] = slot.error
+            result[name] = entry
+        return result
+
+
+# Instancia global
+components = ComponentRegistry()
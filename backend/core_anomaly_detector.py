@@ -70,6 +70,48 @@ class AnomalyDetectionResult:
     # Recomendaciones
     recommended_validation: List[str]
 
+@dataclass
+class GridDetectionResult:
+    """Resultado de escaneo vectorizado sobre un raster N×M (fila 0 = norte)"""
+    probability: np.ndarray  # float32 0.0 - 1.0
+    anomaly: np.ndarray  # bool
+    convergence_score: np.ndarray  # float32
+    instruments_exceeding: np.ndarray  # int16
+    confidence_level: np.ndarray  # int8, índice en GRID_CONFIDENCE_LEVELS
+    
+    environment_type: str
+    eco_region: Optional[str]
+    minimum_required: int
+    instruments_used: List[str]
+    bounds: Tuple[float, float, float, float]  # lat_min, lat_max, lon_min, lon_max
+    
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.probability.shape
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializar a JSON (rasters como listas anidadas)"""
+        return {
+            'shape': list(self.shape),
+            'bounds': list(self.bounds),
+            'environment_type': self.environment_type,
+            'eco_region': self.eco_region,
+            'minimum_required': self.minimum_required,
+            'instruments_used': self.instruments_used,
+            'confidence_levels': list(GRID_CONFIDENCE_LEVELS),
+            'anomalous_cells': int(self.anomaly.sum()),
+            'max_probability': float(self.probability.max()) if self.probability.size else 0.0,
+            'probability': np.round(self.probability, 4).tolist(),
+            'anomaly': self.anomaly.astype(np.uint8).tolist(),
+            'convergence_score': np.round(self.convergence_score, 4).tolist(),
+            'instruments_exceeding': self.instruments_exceeding.tolist(),
+            'confidence_level': self.confidence_level.tolist()
+        }
+
+# Códigos de confianza en rasters (mismo orden que los strings de InstrumentMeasurement)
+GRID_CONFIDENCE_LEVELS = ("none", "low", "moderate", "high")
+_CONF_NONE, _CONF_LOW, _CONF_MODERATE, _CONF_HIGH = range(4)
+
 class CoreAnomalyDetector:
     """
     Detector CORE de anomalias arqueologicas
@@ -700,6 +742,14 @@ class CoreAnomalyDetector:
                 'confidence_level': None
             }
     
+    @staticmethod
+    def _site_lat_lon(site) -> Tuple[float, float]:
+        """(lat, lon) de un ArchaeologicalSite (tupla coordinates) u objeto con latitude/longitude"""
+        coordinates = getattr(site, 'coordinates', None)
+        if coordinates:
+            return float(coordinates[0]), float(coordinates[1])
+        return getattr(site, 'latitude', 0.0), getattr(site, 'longitude', 0.0)
+    
     def _get_nearby_sites_for_adjustment(self, lat_min: float, lat_max: float,
                                         lon_min: float, lon_max: float) -> List[Dict[str, Any]]:
         """
@@ -723,8 +773,8 @@ class CoreAnomalyDetector:
             nearby_sites.append({
                 'id': getattr(site, 'id', 'unknown'),
                 'name': getattr(site, 'name', 'Unknown Site'),
-                'latitude': getattr(site, 'latitude', 0.0),
-                'longitude': getattr(site, 'longitude', 0.0),
+                'latitude': self._site_lat_lon(site)[0],
+                'longitude': self._site_lat_lon(site)[1],
                 'source': self._map_confidence_to_source(getattr(site, 'confidence_level', 'MODERATE')),
                 'site_type': getattr(site, 'site_type', 'unknown'),
                 'distance_km': 0.0,
@@ -740,8 +790,8 @@ class CoreAnomalyDetector:
             nearby_sites.append({
                 'id': getattr(site, 'id', 'unknown'),
                 'name': getattr(site, 'name', 'Unknown Site'),
-                'latitude': getattr(site, 'latitude', 0.0),
-                'longitude': getattr(site, 'longitude', 0.0),
+                'latitude': self._site_lat_lon(site)[0],
+                'longitude': self._site_lat_lon(site)[1],
                 'source': self._map_confidence_to_source(getattr(site, 'confidence_level', 'MODERATE')),
                 'site_type': getattr(site, 'site_type', 'unknown'),
                 'distance_km': distance,
@@ -943,6 +993,351 @@ class CoreAnomalyDetector:
         
         return min(base_factor, 1.0)
     
+    # =========================================================================
+    # MODO GRID VECTORIZADO
+    # =========================================================================
+    
+    def detect_grid(self, lat_min: float, lat_max: float,
+                    lon_min: float, lon_max: float,
+                    instrument_rasters: Dict[str, np.ndarray],
+                    api_confidence: Optional[Dict[str, Any]] = None,
+                    env_context=None,
+                    region_name: str = "Unknown Region") -> GridDetectionResult:
+        """
+        Escanear un área completa como raster N×M en una sola pasada NumPy
+        
+        Equivale a llamar detect_anomaly celda por celda (pasos 4 y 6) pero
+        evaluando umbrales, convergencia y probabilidad como operaciones de
+        arrays. Un área de 100 km² a 100 m (10.000 celdas) se resuelve en
+        milisegundos en lugar de horas de llamadas individuales.
+        
+        Args:
+            lat_min, lat_max, lon_min, lon_max: Bounding box del raster
+            instrument_rasters: {indicador: array N×M} con valores REALES por
+                celda (fila 0 = lat_max). NaN = sin dato (NO se simula).
+            api_confidence: {indicador: float o array N×M} confianza de la API
+                (por defecto 0.8, igual que el flujo por celda)
+            env_context: Contexto ambiental ya clasificado (opcional)
+            region_name: Nombre de la region
+        
+        Returns:
+            GridDetectionResult con rasters de probabilidad y anomalía
+        """
+        shape = self._validate_grid_rasters(instrument_rasters)
+        center_lat = (lat_min + lat_max) / 2
+        center_lon = (lon_min + lon_max) / 2
+        bounds = (lat_min, lat_max, lon_min, lon_max)
+        
+        print(f"[GRID] Escaneo vectorizado: {region_name} {shape[0]}x{shape[1]} celdas", flush=True)
+        
+        # PASO 1: Clasificar terreno (una vez por raster)
+        if env_context is None:
+            env_context = self.environment_classifier.classify(center_lat, center_lon)
+        env_type = env_context.environment_type.value
+        
+        if env_type == 'shallow_sea':
+            # Mismo early exit que detect_anomaly
+            return self._constant_grid_result(shape, bounds, env_type, 0.05, _CONF_LOW)
+        
+        # PASO 2: Firmas y calibración regional
+        env_signatures = self._get_signatures_for_environment(env_type)
+        eco_region = self.regional_calibration.detect_eco_region(center_lat, center_lon, env_type)
+        
+        if not env_signatures:
+            print(f"   [WARN] No hay firmas definidas para {env_type}", flush=True)
+            return self._constant_grid_result(shape, bounds, env_type, 0.0, _CONF_NONE, eco_region)
+        
+        # PASO 3: Mediciones vs umbrales (solo indicadores con umbral y raster)
+        grid = self._grid_measurements(instrument_rasters, env_signatures, api_confidence or {})
+        
+        # PASO 4: Análisis vectorizado
+        anomaly_analysis = self._analyze_grid_vs_thresholds(grid, env_signatures, shape)
+        sensor_weights = self._grid_sensor_weights(grid, env_context, eco_region)
+        convergence = self._grid_convergence_score(grid, sensor_weights, eco_region, shape)
+        
+        # PASO 5-6: Probabilidad con ajuste por sitios conocidos
+        nearby_sites = self._get_nearby_sites_for_adjustment(lat_min, lat_max, lon_min, lon_max)
+        probability = self._calculate_grid_probability(
+            convergence, env_context, eco_region, nearby_sites, bounds, shape
+        )
+        
+        # PASO 7: Rasters finales (mismas reglas que _generate_final_result)
+        convergence_met = anomaly_analysis['convergence_met']
+        anomaly = convergence_met & (probability > 0.5)
+        confidence_level = np.full(shape, _CONF_NONE, dtype=np.int8)
+        confidence_level[probability > 0.3] = _CONF_LOW
+        confidence_level[(probability > 0.5) & convergence_met] = _CONF_MODERATE
+        confidence_level[(probability > 0.7) & (anomaly_analysis['high_confidence_count'] >= 2)] = _CONF_HIGH
+        
+        print(f"   [OK] Celdas anómalas: {int(anomaly.sum())}/{anomaly.size} "
+              f"(prob. máx {float(probability.max()):.2%})", flush=True)
+        
+        return GridDetectionResult(
+            probability=probability.astype(np.float32),
+            anomaly=anomaly,
+            convergence_score=convergence['total_score'].astype(np.float32),
+            instruments_exceeding=anomaly_analysis['instruments_exceeding'].astype(np.int16),
+            confidence_level=confidence_level,
+            environment_type=env_type,
+            eco_region=eco_region.value if eco_region else None,
+            minimum_required=anomaly_analysis['minimum_required'],
+            instruments_used=[m['instrument_name'] for m in grid],
+            bounds=bounds
+        )
+    
+    def _validate_grid_rasters(self, instrument_rasters: Dict[str, np.ndarray]) -> Tuple[int, int]:
+        """Verificar que todos los rasters sean 2D y compartan forma"""
+        if not instrument_rasters:
+            raise ValueError("detect_grid requiere al menos un raster instrumental")
+        
+        shapes = {np.shape(r) for r in instrument_rasters.values()}
+        if len(shapes) != 1:
+            raise ValueError(f"Rasters con formas distintas: {sorted(shapes)}")
+        
+        shape = shapes.pop()
+        if len(shape) != 2:
+            raise ValueError(f"Se esperaban rasters N×M, recibido {shape}")
+        return shape
+    
+    def _constant_grid_result(self, shape: Tuple[int, int], bounds, env_type: str,
+                              probability: float, confidence_code: int,
+                              eco_region=None) -> GridDetectionResult:
+        """Resultado uniforme para ambientes sin análisis instrumental"""
+        return GridDetectionResult(
+            probability=np.full(shape, probability, dtype=np.float32),
+            anomaly=np.zeros(shape, dtype=bool),
+            convergence_score=np.zeros(shape, dtype=np.float32),
+            instruments_exceeding=np.zeros(shape, dtype=np.int16),
+            confidence_level=np.full(shape, confidence_code, dtype=np.int8),
+            environment_type=env_type,
+            eco_region=eco_region.value if eco_region else None,
+            minimum_required=2,
+            instruments_used=[],
+            bounds=bounds
+        )
+    
+    def _grid_measurements(self, instrument_rasters: Dict[str, np.ndarray],
+                           env_signatures: Dict[str, Any],
+                           api_confidence: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Equivalente vectorizado de las mediciones por celda
+        
+        Aplica la misma regla de umbral y de confianza (ratio > 1.8 / 1.4)
+        que _get_real_instrument_measurement, pero sobre arrays completos.
+        """
+        indicators = env_signatures.get('archaeological_indicators', {})
+        grid = []
+        
+        for indicator_name, indicator_config in indicators.items():
+            if indicator_name not in instrument_rasters:
+                continue
+            
+            threshold_key = [k for k in indicator_config.keys() if 'threshold' in k]
+            if not threshold_key:
+                continue
+            threshold = float(indicator_config[threshold_key[0]])
+            
+            values = np.asarray(instrument_rasters[indicator_name], dtype=np.float64)
+            valid = np.isfinite(values)
+            api_conf = np.asarray(api_confidence.get(indicator_name, 0.8), dtype=np.float64)
+            
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratio = values / threshold
+            exceeds = valid & (values > threshold)
+            
+            confidence = np.full(values.shape, _CONF_NONE, dtype=np.int8)
+            confidence[exceeds] = _CONF_LOW
+            confidence[exceeds & (ratio > 1.4) & (api_conf > 0.6)] = _CONF_MODERATE
+            confidence[exceeds & (ratio > 1.8) & (api_conf > 0.8)] = _CONF_HIGH
+            
+            grid.append({
+                'instrument_name': indicator_name,
+                'threshold': threshold,
+                'valid': valid,
+                'exceeds': exceeds,
+                'ratio': np.where(exceeds, ratio, 0.0),
+                'confidence': confidence
+            })
+        
+        return grid
+    
+    def _analyze_grid_vs_thresholds(self, grid: List[Dict[str, Any]],
+                                    env_signatures: Dict[str, Any],
+                                    shape: Tuple[int, int]) -> Dict[str, Any]:
+        """Versión raster de _analyze_measurements_vs_thresholds"""
+        instruments_exceeding = np.zeros(shape, dtype=np.int32)
+        high_confidence_count = np.zeros(shape, dtype=np.int32)
+        moderate_confidence_count = np.zeros(shape, dtype=np.int32)
+        total_measurements = np.zeros(shape, dtype=np.int32)
+        
+        for m in grid:
+            instruments_exceeding += m['exceeds']
+            high_confidence_count += m['confidence'] == _CONF_HIGH
+            moderate_confidence_count += m['confidence'] == _CONF_MODERATE
+            total_measurements += m['valid']
+        
+        minimum_required = env_signatures.get('minimum_convergence', 2)
+        
+        return {
+            'instruments_exceeding': instruments_exceeding,
+            'high_confidence_count': high_confidence_count,
+            'moderate_confidence_count': moderate_confidence_count,
+            'minimum_required': minimum_required,
+            'convergence_met': instruments_exceeding >= minimum_required,
+            'total_measurements': total_measurements
+        }
+    
+    def _grid_sensor_weights(self, grid: List[Dict[str, Any]], env_context,
+                             eco_region) -> Dict[str, Any]:
+        """Versión raster de RegionalCalibrationSystem.calculate_weighted_sensor_matrix"""
+        from regional_calibration_system import EcoRegion
+        
+        env_type = env_context.environment_type.value
+        calibration = self.regional_calibration.get_regional_calibration(eco_region)
+        base_weights = self.regional_calibration._get_base_sensor_weights(env_type)
+        
+        adjusted = {
+            sensor: base_weight * calibration.sensor_weight_adjustments.get(sensor, 1.0)
+            for sensor, base_weight in base_weights.items()
+        }
+        
+        # Ajustes por condiciones actuales (por celda, solo donde hay medición)
+        for m in grid:
+            sensor_name = m['instrument_name']
+            if sensor_name not in adjusted:
+                continue
+            
+            if env_type == "forest" and "sentinel2" in sensor_name:
+                factor = np.where(m['valid'] & (m['confidence'] == _CONF_HIGH), 1.3, 1.0)
+            elif (env_type == "forest" and "sar" in sensor_name and
+                  eco_region in [EcoRegion.AMAZON_HUMID, EcoRegion.CONGO_HUMID]):
+                factor = np.where(m['valid'], 1.4, 1.0)
+            elif env_type == "desert" and "thermal" in sensor_name:
+                factor = np.where(m['valid'] & (m['confidence'] == _CONF_HIGH), 1.2, 1.0)
+            else:
+                continue
+            adjusted[sensor_name] = adjusted[sensor_name] * factor
+        
+        # Normalizar pesos (escalares o rasters)
+        total_weight = sum(adjusted.values())
+        if np.isscalar(total_weight):
+            if total_weight > 0:
+                adjusted = {k: v / total_weight for k, v in adjusted.items()}
+            return adjusted
+        
+        safe_total = np.where(total_weight > 0, total_weight, 1.0)
+        return {k: v / safe_total for k, v in adjusted.items()}
+    
+    def _grid_convergence_score(self, grid: List[Dict[str, Any]],
+                                sensor_weights: Dict[str, Any], eco_region,
+                                shape: Tuple[int, int]) -> Dict[str, np.ndarray]:
+        """Versión raster de RegionalCalibrationSystem.calculate_convergence_score"""
+        # Multiplicador por nivel de confianza indexado por código
+        confidence_multiplier = np.array([
+            self.regional_calibration._get_confidence_multiplier(level)
+            for level in GRID_CONFIDENCE_LEVELS
+        ])
+        
+        components = {
+            'forma': np.zeros(shape),
+            'compactacion': np.zeros(shape),
+            'termico': np.zeros(shape),
+            'espectral': np.zeros(shape)
+        }
+        component_keywords = [
+            ('forma', ['lidar', 'icesat2', 'dem', 'elevation']),
+            ('compactacion', ['sar', 'coherence', 'backscatter']),
+            ('termico', ['thermal', 'lst', 'temperature']),
+            ('espectral', ['ndvi', 'sentinel2', 'landsat', 'spectral'])
+        ]
+        
+        for m in grid:
+            instrument = m['instrument_name'].lower()
+            component = next(
+                (name for name, keywords in component_keywords
+                 if any(keyword in instrument for keyword in keywords)),
+                None
+            )
+            if component is None:
+                continue
+            
+            weight = sensor_weights.get(m['instrument_name'], 0.0)
+            # ratio ya es 0 donde no se excede el umbral
+            components[component] += weight * confidence_multiplier[m['confidence']] * m['ratio']
+        
+        for name in components:
+            np.minimum(components[name], 1.0, out=components[name])
+        
+        weights = self.regional_calibration._get_analysis_weights(eco_region)
+        components['total_score'] = sum(weights[name] * components[name] for name, _ in component_keywords)
+        return components
+    
+    def _calculate_grid_probability(self, convergence: Dict[str, np.ndarray], env_context,
+                                    eco_region, nearby_sites: List[Dict[str, Any]],
+                                    bounds: Tuple[float, float, float, float],
+                                    shape: Tuple[int, int]) -> np.ndarray:
+        """Versión raster de _calculate_archaeological_probability_enhanced"""
+        forma = convergence['forma']
+        compactacion = convergence['compactacion']
+        termico = convergence['termico']
+        espectral = convergence['espectral']
+        
+        evidence_quality = np.where(forma > 0.5, 0.4, 0.0)
+        evidence_quality += np.where((compactacion > 0.4) & (termico > 0.4), 0.3, 0.0)
+        
+        active_components = ((forma > 0.3).astype(np.int8) + (compactacion > 0.3) +
+                             (termico > 0.3) + (espectral > 0.3))
+        evidence_quality += np.select([active_components >= 3, active_components >= 2], [0.3, 0.2], 0.0)
+        evidence_quality = np.minimum(evidence_quality, 1.0)
+        
+        env_factor = self._get_environmental_factor_enhanced(env_context, eco_region)
+        
+        probability = (
+            convergence['total_score'] * 0.6 +
+            evidence_quality * 0.25 +
+            env_factor * 0.15
+        )
+        
+        if nearby_sites:
+            probability = np.maximum(
+                0.0, probability - self._grid_site_adjustment(nearby_sites, bounds, shape)
+            )
+        
+        return np.minimum(probability, 1.0)
+    
+    def _grid_site_adjustment(self, nearby_sites: List[Dict[str, Any]],
+                              bounds: Tuple[float, float, float, float],
+                              shape: Tuple[int, int]) -> np.ndarray:
+        """
+        Ajuste por sitios conocidos con distancia real celda-sitio
+        
+        Misma fórmula que SiteConfidenceSystem.adjust_anomaly_score
+        (confianza * max(0, 1 - d/5km) * 0.2, tope 0.3), pero midiendo la
+        distancia desde el centro de cada celda en lugar del bbox completo.
+        """
+        lat_min, lat_max, lon_min, lon_max = bounds
+        rows, cols = shape
+        cell_lat = lat_max - (np.arange(rows) + 0.5) * (lat_max - lat_min) / rows
+        cell_lon = lon_min + (np.arange(cols) + 0.5) * (lon_max - lon_min) / cols
+        lat_rad = np.radians(cell_lat)[:, None]
+        lon_rad = np.radians(cell_lon)[None, :]
+        
+        total_adjustment = np.zeros(shape)
+        for site in nearby_sites:
+            site_conf = self.site_confidence_system.calculate_site_confidence(site)
+            site_lat = np.radians(site.get('latitude', 0.0))
+            site_lon = np.radians(site.get('longitude', 0.0))
+            
+            # Haversine (km)
+            a = (np.sin((lat_rad - site_lat) / 2) ** 2 +
+                 np.cos(lat_rad) * np.cos(site_lat) * np.sin((lon_rad - site_lon) / 2) ** 2)
+            distance_km = 2 * 6371.0 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+            
+            distance_factor = np.maximum(0.0, 1.0 - distance_km / 5.0)
+            total_adjustment += site_conf.final_confidence * distance_factor * 0.2
+        
+        return np.minimum(total_adjustment, 0.3)
+    
     def _generate_final_result(self, env_context, env_signatures: Dict[str, Any],
                                measurements: List[InstrumentMeasurement],
                                anomaly_analysis: Dict[str, Any],
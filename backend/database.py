@@ -9,6 +9,13 @@ import asyncpg
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 
+from pipeline_tracing import tracer
+from database.pool import get_shared_pool, close_shared_pool
+from postgis_sites import (
+    SITE_DETAIL_COLUMNS, has_site_geometry, bbox_clause,
+    fetch_sites_within_radius, fetch_nearest_sites
+)
+
 load_dotenv()
 
 DATABASE_URL = os.getenv('DATABASE_URL')
@@ -18,16 +25,26 @@ class ArcheoScopeDB:
     
     def __init__(self):
         self.pool = None
+        # True si archaeological_sites tiene geom + índices GiST (postgis_sites.py)
+        self.has_geometry = False
     
     async def connect(self):
-        """Crear pool de conexiones"""
+        """Tomar el pool compartido (database/pool.py)"""
         if not self.pool:
-            self.pool = await asyncpg.create_pool(DATABASE_URL, min_size=2, max_size=10)
+            self.pool = await get_shared_pool()
+            if self.pool is None:
+                raise ConnectionError("Pool de BD compartido no disponible (DATABASE_URL / conexión)")
+            async with self.pool.acquire() as conn:
+                self.has_geometry = await has_site_geometry(conn)
+            if not self.has_geometry:
+                print("⚠️ archaeological_sites sin columna geom - ejecutar postgis_sites.py "
+                      "(búsquedas espaciales en modo lat/lon)")
     
     async def close(self):
-        """Cerrar pool"""
+        """Cerrar pool (compartido: cerrar sólo al apagar la API)"""
         if self.pool:
-            await self.pool.close()
+            self.pool = None
+            await close_shared_pool()
     
     async def search_sites(
         self, 
@@ -49,50 +66,60 @@ class ArcheoScopeDB:
             Lista de sitios encontrados
         """
         async with self.pool.acquire() as conn:
-            # Calcular distancia usando fórmula de Haversine
-            # 111.32 km por grado de latitud aproximadamente
-            lat_delta = radius_km / 111.32
-            lon_delta = radius_km / (111.32 * abs(math.cos(math.radians(lat))))
+            return await fetch_sites_within_radius(conn, lat, lon, radius_km, limit, self.has_geometry)
+    
+    async def get_sites_in_bbox(
+        self,
+        lat_min: float,
+        lon_min: float,
+        lat_max: float,
+        lon_max: float,
+        limit: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        Sitios dentro de un bounding box (`geom && envelope`)
+        
+        Si lon_min > lon_max el bbox cruza el antimeridiano.
+        """
+        async with self.pool.acquire() as conn:
+            if self.has_geometry:
+                where_sql, params = bbox_clause(1, lat_min, lon_min, lat_max, lon_max)
+            else:
+                lon_op = 'AND' if lon_min <= lon_max else 'OR'
+                where_sql = f'latitude BETWEEN $2 AND $4 AND (longitude >= $1 {lon_op} longitude <= $3)'
+                params = [lon_min, lat_min, lon_max, lat_max]
             
-            query = '''
-                SELECT 
-                    id,
-                    name,
-                    slug,
-                    "environmentType" as environment_type,
-                    "siteType" as site_type,
-                    "confidenceLevel" as confidence_level,
-                    latitude,
-                    longitude,
-                    country,
-                    region,
-                    period,
-                    "dateRangeStart" as date_range_start,
-                    "dateRangeEnd" as date_range_end,
-                    "unescoId" as unesco_id,
-                    description,
-                    "isReferencesite" as is_reference,
-                    "isControlSite" as is_control,
-                    -- Calcular distancia aproximada
-                    (
-                        6371 * acos(
-                            cos(radians($1)) * cos(radians(latitude)) *
-                            cos(radians(longitude) - radians($2)) +
-                            sin(radians($1)) * sin(radians(latitude))
-                        )
-                    ) as distance_km
+            rows = await conn.fetch(
+                f'''
+                SELECT {SITE_DETAIL_COLUMNS}
                 FROM archaeological_sites
-                WHERE 
-                    latitude BETWEEN $1 - $3 AND $1 + $3
-                    AND longitude BETWEEN $2 - $4 AND $2 + $4
-                ORDER BY distance_km
-                LIMIT $5
-            '''
-            
-            rows = await conn.fetch(query, lat, lon, lat_delta, lon_delta, limit)
-            
+                WHERE {where_sql}
+                ORDER BY "confidenceLevel" DESC, name
+                LIMIT ${len(params) + 1}
+                ''',
+                *params, limit
+            )
             return [dict(row) for row in rows]
     
+    async def get_nearest_sites(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 10,
+        max_distance_km: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Los k sitios más cercanos (k-NN indexado con `<->`)
+        
+        Args:
+            lat: Latitud
+            lon: Longitud
+            k: Número de vecinos
+            max_distance_km: Distancia máxima opcional
+        """
+        async with self.pool.acquire() as conn:
+            return await fetch_nearest_sites(conn, lat, lon, k, max_distance_km, self.has_geometry)
+    
     async def get_site_by_id(self, site_id: str) -> Optional[Dict[str, Any]]:
         """Obtener un sitio por ID"""
         async with self.pool.acquire() as conn:
@@ -587,5 +614,8 @@ class ArcheoScopeDB:
             )
             return dict(row) if row else None
 
+# Spans por query (kind="db") en todos los métodos async públicos
+tracer.instrument_methods(ArcheoScopeDB, "db")
+
 # Instancia global
 db = ArcheoScopeDB()
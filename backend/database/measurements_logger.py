@@ -6,16 +6,68 @@ REGLA CRÍTICA: CADA medición de CADA instrumento DEBE registrarse en la BD
 para trazabilidad científica completa.
 
 NO omitir NINGUNA medición, exitosa o fallida.
+
+ESCRITURA DIFERIDA (write-behind):
+- log_measurement encola la fila en memoria y vuelve sin esperar a la BD
+- Un flusher en background escribe por lotes (COPY) cuando se junta
+  batch_size filas o pasa flush_interval segundos
+- Buffer acotado (max_buffered): si se llena, log_measurement espera
+  (backpressure, medido en get_stats)
+- Si PostgreSQL no está accesible los lotes van a un spill file local
+  append-only y se re-escriben cuando vuelve la conexión (también tras
+  reiniciar el proceso). El spill es por proceso (ver WriteJournal); los de
+  workers muertos se adoptan al arrancar y en cada replay
+- get_measurements_for_region incluye las filas aún no escritas
+- measurement_timestamp en UTC (timezone-aware), asignado al encolar
+- close_measurements_loggers() vacía todos los loggers al apagar la API
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime
+import time
+import uuid
+import weakref
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timezone
 import json
 from decimal import Decimal
 
+from .write_behind import WriteJournal, is_transient_error
+
 logger = logging.getLogger(__name__)
 
+# Loggers vivos del proceso (close_measurements_loggers al apagar)
+_live_loggers: "weakref.WeakSet[MeasurementsLogger]" = weakref.WeakSet()
+
+# Columnas escritas por el logger (id y timestamp se asignan al encolar)
+MEASUREMENT_COLUMNS = (
+    'id',
+    'measurement_timestamp',
+    'analysis_id',
+    'latitude',
+    'longitude',
+    'lat_min',
+    'lat_max',
+    'lon_min',
+    'lon_max',
+    'region_name',
+    'instrument_name',
+    'measurement_type',
+    'value',
+    'unit',
+    'source',
+    'acquisition_date',
+    'resolution_m',
+    'confidence',
+    'data_mode',
+    'environment_type',
+    'environment_confidence',
+    'threshold',
+    'exceeds_threshold',
+    'anomaly_detected',
+    'additional_data'
+)
+
 
 class MeasurementsLogger:
     """
@@ -29,15 +81,63 @@ class MeasurementsLogger:
     - Reproducibilidad
     """
     
-    def __init__(self, database_connection):
+    def __init__(
+        self,
+        database_connection,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_buffered: int = 5000,
+        spill_path: str = "cache/write_behind/measurements_spill.jsonl",
+        replay_interval: float = 30.0
+    ):
         """
         Inicializar logger de mediciones
         
         Args:
-            database_connection: Conexión a PostgreSQL
+            database_connection: Pool asyncpg de PostgreSQL
+            batch_size: Filas por lote (flush por tamaño)
+            flush_interval: Segundos máximos que una fila espera en memoria
+            max_buffered: Filas en memoria antes de aplicar backpressure
+            spill_path: Archivo local para lotes no escritos (BD caída)
+            replay_interval: Segundos entre intentos de re-escribir el spill
         """
         self.db = database_connection
-        logger.info("✅ MeasurementsLogger inicializado")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.replay_interval = replay_interval
+        self.spill = WriteJournal(spill_path)
+        self.spill.adopt_orphans()
+        
+        # Filas aceptadas y aún no escritas (id → fila), en orden de llegada
+        self._pending: Dict[uuid.UUID, Dict[str, Any]] = {}
+        self._buffer: List[Dict[str, Any]] = []
+        self._spilled_batches = len(self.spill.pending())
+        self._db_down_until = 0.0
+        
+        # Estado ligado al event loop (se crea con el primer log)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        
+        self.stats = {
+            'logged': 0,
+            'written': 0,
+            'batches': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'dropped': 0,
+            'backpressure_waits': 0,
+            'backpressure_wait_ms': 0.0,
+            'max_buffered_seen': 0,
+            'last_flush_ms': 0.0
+        }
+        _live_loggers.add(self)
+        
+        logger.info(f"✅ MeasurementsLogger inicializado (write-behind, lote {batch_size}, "
+                    f"{flush_interval}s, {self._spilled_batches} lotes pendientes en spill)")
     
     async def log_measurement(
         self,
@@ -99,68 +199,37 @@ class MeasurementsLogger:
                 else:
                     acq_timestamp = acquisition_date
             
-            # Insertar en base de datos
-            query = """
-                INSERT INTO measurements (
-                    measurement_timestamp,
-                    analysis_id,
-                    latitude,
-                    longitude,
-                    lat_min,
-                    lat_max,
-                    lon_min,
-                    lon_max,
-                    region_name,
-                    instrument_name,
-                    measurement_type,
-                    value,
-                    unit,
-                    source,
-                    acquisition_date,
-                    resolution_m,
-                    confidence,
-                    data_mode,
-                    environment_type,
-                    environment_confidence,
-                    threshold,
-                    exceeds_threshold,
-                    anomaly_detected,
-                    additional_data
-                ) VALUES (
-                    NOW(),
-                    $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21, $22, $23
-                )
-                RETURNING id
-            """
+            # El id y el timestamp se asignan aquí: la fila se escribe después
+            row = {
+                'id': uuid.uuid4(),
+                'measurement_timestamp': datetime.now(timezone.utc),
+                'analysis_id': analysis_id,
+                'latitude': latitude,
+                'longitude': longitude,
+                'lat_min': lat_min,
+                'lat_max': lat_max,
+                'lon_min': lon_min,
+                'lon_max': lon_max,
+                'region_name': region_name,
+                'instrument_name': instrument_name,
+                'measurement_type': measurement_type,
+                'value': value,
+                'unit': unit,
+                'source': source,
+                'acquisition_date': acq_timestamp,
+                'resolution_m': resolution_m,
+                'confidence': confidence,
+                'data_mode': data_mode,
+                'environment_type': environment_type,
+                'environment_confidence': environment_confidence,
+                'threshold': threshold,
+                'exceeds_threshold': exceeds_threshold,
+                'anomaly_detected': anomaly_detected,
+                'additional_data': additional_json
+            }
             
-            result = await self.db.fetchrow(
-                query,
-                analysis_id,
-                latitude,
-                longitude,
-                lat_min,
-                lat_max,
-                lon_min,
-                lon_max,
-                region_name,
-                instrument_name,
-                measurement_type,
-                value,
-                unit,
-                source,
-                acq_timestamp,
-                resolution_m,
-                confidence,
-                data_mode,
-                environment_type,
-                environment_confidence,
-                threshold,
-                exceeds_threshold,
-                anomaly_detected,
-                additional_json
-            )
-            
-            measurement_id = str(result['id'])
+            await self._enqueue(row)
+            measurement_id = str(row['id'])
             
             logger.info(f"✅ Medición registrada: {instrument_name} = {value} {unit}")
             logger.debug(f"   ID: {measurement_id}")
@@ -282,8 +351,17 @@ class MeasurementsLogger:
         - Análisis temporal
         - Validación de consistencia
         - Detección de cambios
+        
+        Incluye las mediciones aceptadas que aún no llegaron a la BD
+        (buffer en memoria y spill file).
         """
         
+        unflushed = [
+            row for row in await self._unflushed_rows()
+            if lat_min <= row['latitude'] <= lat_max and lon_min <= row['longitude'] <= lon_max
+        ]
+        
+        stored = []
         try:
             query = """
                 SELECT *
@@ -295,12 +373,18 @@ class MeasurementsLogger:
             """
             
             results = await self.db.fetch(query, lat_min, lat_max, lon_min, lon_max, limit)
-            
-            return [dict(row) for row in results]
+            stored = [dict(row) for row in results]
         
         except Exception as e:
             logger.error(f"❌ Error obteniendo mediciones históricas: {e}")
-            return []
+            if not unflushed:
+                return []
+        
+        # Una fila puede estar ya confirmada y aún no retirada del buffer
+        stored_ids = {row.get('id') for row in stored}
+        merged = stored + [row for row in unflushed if row['id'] not in stored_ids]
+        merged.sort(key=lambda row: _utc(row['measurement_timestamp']), reverse=True)
+        return merged[:limit]
     
     async def get_measurement_statistics(self) -> Dict[str, Any]:
         """
@@ -310,6 +394,9 @@ class MeasurementsLogger:
             Dict con estadísticas generales
         """
         
+        # Las estadísticas cuentan sólo lo escrito: vaciar el buffer antes
+        await self.flush()
+        
         try:
             query = """
                 SELECT
@@ -331,3 +418,180 @@ class MeasurementsLogger:
         except Exception as e:
             logger.error(f"❌ Error obteniendo estadísticas: {e}")
             return {}
+    
+    # ------------------------------------------------------------------
+    # Write-behind
+    # ------------------------------------------------------------------
+    
+    async def flush(self):
+        """Escribir ya todo lo que haya en memoria (o enviarlo al spill)"""
+        if self._loop is None:
+            return
+        async with self._flush_lock:
+            await self._flush_buffer()
+    
+    async def close(self):
+        """Vaciar el buffer y detener el flusher; lo no escrito queda en el spill"""
+        if self._flusher is None:
+            return
+        self._flusher.cancel()
+        await asyncio.gather(self._flusher, return_exceptions=True)
+        self._flusher = None
+        await self.flush()
+        logger.info(f"✅ MeasurementsLogger cerrado ({self._spilled_batches} lotes pendientes en spill)")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas del write-behind (incluye backpressure)"""
+        return {
+            **self.stats,
+            'buffered': len(self._buffer),
+            'unflushed': len(self._pending),
+            'spilled_batches_pending': self._spilled_batches,
+            'db_available': time.monotonic() >= self._db_down_until,
+            'spill_file': str(self.spill.path)
+        }
+    
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._space = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._flusher = None
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._flush_loop(), name="measurements-flusher")
+    
+    async def _enqueue(self, row: Dict[str, Any]):
+        self._ensure_started()
+        
+        # Backpressure: esperar a que el flusher libere espacio
+        if len(self._buffer) >= self.max_buffered:
+            started = time.perf_counter()
+            self.stats['backpressure_waits'] += 1
+            while len(self._buffer) >= self.max_buffered:
+                self._space.clear()
+                self._wakeup.set()
+                await self._space.wait()
+            self.stats['backpressure_wait_ms'] += (time.perf_counter() - started) * 1000
+        
+        self._pending[row['id']] = row
+        self._buffer.append(row)
+        self.stats['logged'] += 1
+        self.stats['max_buffered_seen'] = max(self.stats['max_buffered_seen'], len(self._buffer))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+    
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                async with self._flush_lock:
+                    await self._flush_buffer()
+                    if self._spilled_batches and time.monotonic() >= self._db_down_until:
+                        await self._replay_spill()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Error en flush de mediciones: {e}", exc_info=True)
+    
+    async def _flush_buffer(self):
+        while self._buffer:
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:len(batch)]
+            self._space.set()
+            
+            started = time.perf_counter()
+            if time.monotonic() < self._db_down_until or not await self._write_batch(batch):
+                await self._spill_batch(batch)
+            self.stats['last_flush_ms'] = (time.perf_counter() - started) * 1000
+            for row in batch:
+                self._pending.pop(row['id'], None)
+    
+    async def _write_batch(self, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Escribir filas con COPY en un solo round trip.
+        
+        Returns:
+            False si la BD no está accesible (el lote debe ir al spill)
+        """
+        if self.db is None:
+            self._db_down_until = time.monotonic() + self.replay_interval
+            return False
+        try:
+            await self._copy_rows(rows)
+            self.stats['written'] += len(rows)
+            self.stats['batches'] += 1
+            return True
+        except Exception as e:
+            if is_transient_error(e):
+                logger.warning(f"⚠️ BD no accesible ({type(e).__name__}), mediciones al spill file")
+                self._db_down_until = time.monotonic() + self.replay_interval
+                return False
+            # Error de datos: aislar las filas inválidas para no perder el lote
+            logger.error(f"❌ Error escribiendo lote de {len(rows)} mediciones: {e}")
+            for row in rows:
+                try:
+                    await self._copy_rows([row])
+                    self.stats['written'] += 1
+                except Exception as row_error:
+                    if is_transient_error(row_error):
+                        self._db_down_until = time.monotonic() + self.replay_interval
+                        return False
+                    self.stats['dropped'] += 1
+                    logger.error(f"❌ Error registrando medición de {row['instrument_name']}: {row_error}")
+            self.stats['batches'] += 1
+            return True
+    
+    async def _copy_rows(self, rows: List[Dict[str, Any]]):
+        async with self.db.acquire() as conn:
+            await conn.copy_records_to_table(
+                'measurements',
+                records=[tuple(row[column] for column in MEASUREMENT_COLUMNS) for row in rows],
+                columns=MEASUREMENT_COLUMNS
+            )
+    
+    async def _spill_batch(self, rows: List[Dict[str, Any]]):
+        await asyncio.to_thread(self.spill.put, uuid.uuid4().hex, 'measurements', {'rows': rows})
+        self._spilled_batches += 1
+        self.stats['spilled'] += len(rows)
+    
+    async def _replay_spill(self):
+        """Re-escribir los lotes del spill file (BD de nuevo accesible)"""
+        await asyncio.to_thread(self.spill.adopt_orphans)
+        for job_id, _, payload in await asyncio.to_thread(self.spill.pending):
+            rows = payload['rows']
+            if not await self._write_batch(rows):
+                return
+            await asyncio.to_thread(self.spill.done, job_id)
+            self._spilled_batches -= 1
+            self.stats['replayed'] += len(rows)
+        await asyncio.to_thread(self.spill.compact)
+        logger.info("🔁 Spill de mediciones re-escrito en la BD")
+    
+    async def _unflushed_rows(self) -> List[Dict[str, Any]]:
+        rows = list(self._pending.values())
+        if self._spilled_batches:
+            for _, _, payload in await asyncio.to_thread(self.spill.pending):
+                rows.extend(payload['rows'])
+        return rows
+
+
+def _utc(timestamp: datetime) -> datetime:
+    """Timestamps naive (columna sin zona) se interpretan como UTC"""
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+async def close_measurements_loggers():
+    """Vaciar y detener todos los loggers del proceso (shutdown de la API)"""
+    for measurements_logger in list(_live_loggers):
+        try:
+            await measurements_logger.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Error cerrando MeasurementsLogger: {e}")
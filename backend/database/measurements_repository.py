@@ -14,7 +14,7 @@ Propósito:
 import asyncpg
 import json
 from typing import List, Dict, Any, Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 from datetime import datetime
 import logging
 
@@ -107,6 +107,11 @@ class MeasurementsRepository:
         """
         Guardar múltiples mediciones en batch.
         
+        Un único INSERT ... SELECT FROM unnest(...) (un round trip por lote,
+        no uno por medición). Los ids se generan aquí: el orden de RETURNING
+        no está garantizado, así que el resultado sigue el orden de entrada
+        por construcción (inserción ordenada por la ordinalidad).
+        
         Args:
             site_id: ID del sitio
             measurements: Lista de mediciones
@@ -115,25 +120,46 @@ class MeasurementsRepository:
             Lista de UUIDs guardados
         """
         
-        measurement_ids = []
-        
-        async with self.db.acquire() as conn:
-            async with conn.transaction():
-                for measurement in measurements:
-                    measurement_id = await self.save_measurement(
-                        site_id=site_id,
-                        instrument_name=measurement['instrument_name'],
-                        measurement_type=measurement['measurement_type'],
-                        value=measurement['value'],
-                        unit=measurement['unit'],
-                        confidence=measurement['confidence'],
-                        quality_flags=measurement.get('quality_flags', {}),
-                        raw_measurements=measurement.get('raw_measurements', {}),
-                        acquisition_date=measurement.get('acquisition_date'),
-                        source=measurement.get('source'),
-                        processing_notes=measurement.get('processing_notes')
-                    )
-                    measurement_ids.append(measurement_id)
+        if not measurements:
+            return []
+        
+        query = """
+        INSERT INTO instrument_measurements (
+            id, site_id, instrument_name, measurement_type,
+            value, unit, confidence, quality_flags, raw_measurements,
+            acquisition_date, source, processing_notes
+        )
+        SELECT m.id, $1::uuid, m.instrument_name, m.measurement_type,
+               m.value, m.unit, m.confidence, m.quality_flags::jsonb, m.raw_measurements::jsonb,
+               m.acquisition_date, m.source, m.processing_notes
+        FROM unnest(
+            $2::text[], $3::text[], $4::float8[], $5::text[], $6::float8[],
+            $7::text[], $8::text[], $9::timestamp[], $10::text[], $11::text[], $12::uuid[]
+        ) WITH ORDINALITY AS m(instrument_name, measurement_type, value, unit, confidence,
+               quality_flags, raw_measurements, acquisition_date, source, processing_notes, id, ord)
+        ORDER BY m.ord
+        """
+        
+        measurement_ids = [uuid4() for _ in measurements]
+        try:
+            await self.db.execute(
+                query,
+                site_id,
+                [m['instrument_name'] for m in measurements],
+                [m['measurement_type'] for m in measurements],
+                [m['value'] for m in measurements],
+                [m['unit'] for m in measurements],
+                [m['confidence'] for m in measurements],
+                [json.dumps(m.get('quality_flags', {})) for m in measurements],
+                [json.dumps(m.get('raw_measurements', {})) for m in measurements],
+                [m.get('acquisition_date') for m in measurements],
+                [m.get('source') for m in measurements],
+                [m.get('processing_notes') for m in measurements],
+                measurement_ids
+            )
+        except Exception as e:
+            logger.error(f"❌ Error guardando batch de mediciones: {e}")
+            raise
         
         logger.info(f"✅ Batch guardado: {len(measurement_ids)} mediciones para sitio {site_id}")
         return measurement_ids
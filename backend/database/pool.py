@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Pool asyncpg compartido
+=======================
+
+Un único pool para toda la API (ArcheoScopeDB, endpoint científico, TIMT,
+write-behind) en lugar de un pool por módulo: menos conexiones abiertas y
+un solo handshake al arrancar.
+
+Tamaño configurable con DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Tras un fallo de conexión no reintentar en cada llamada
+RETRY_AFTER_S = 30.0
+
+_pool: Optional[asyncpg.Pool] = None
+_lock: Optional[asyncio.Lock] = None
+_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+_failed_at = 0.0
+
+
+def _database_url() -> Optional[str]:
+    url = os.getenv("DATABASE_URL")
+    return url.strip('"').strip("'") if url else None
+
+
+def _get_lock() -> asyncio.Lock:
+    global _lock, _lock_loop
+    loop = asyncio.get_running_loop()
+    if _lock is None or _lock_loop is not loop:
+        _lock, _lock_loop = asyncio.Lock(), loop
+    return _lock
+
+
+async def get_shared_pool() -> Optional[asyncpg.Pool]:
+    """
+    Pool compartido (se crea en la primera llamada)
+
+    Returns:
+        asyncpg.Pool, o None sin DATABASE_URL o si la BD no está accesible
+    """
+    global _pool, _failed_at
+    if _pool is not None:
+        return _pool
+
+    database_url = _database_url()
+    if not database_url:
+        logger.warning("⚠️ DATABASE_URL no configurada")
+        return None
+
+    async with _get_lock():
+        if _pool is not None:
+            return _pool
+        if time.monotonic() - _failed_at < RETRY_AFTER_S:
+            return None
+        try:
+            _pool = await asyncpg.create_pool(
+                database_url,
+                min_size=int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+                max_size=int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+            )
+            logger.info("✅ Pool de BD compartido inicializado")
+        except Exception as e:
+            _failed_at = time.monotonic()
+            logger.error(f"❌ Error inicializando pool de BD: {e}")
+    return _pool
+
+
+def peek_shared_pool() -> Optional[asyncpg.Pool]:
+    """Pool ya creado o None (sin conectar)"""
+    return _pool
+
+
+async def close_shared_pool():
+    """Cerrar el pool compartido (idempotente)"""
+    global _pool, _failed_at
+    pool, _pool, _failed_at = _pool, None, 0.0
+    if pool is not None:
+        await pool.close()
+        logger.info("✅ Pool de BD compartido cerrado")
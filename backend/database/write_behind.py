@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Write-Behind Queue - Persistencia diferida y durable en PostgreSQL
+==================================================================
+
+Los endpoints encolan el trabajo de persistencia y responden sin esperar a
+la base de datos; un worker en background lo ejecuta contra el pool asyncpg.
+
+DURABILIDAD:
+- Cada trabajo se escribe primero en un journal local append-only (JSONL)
+  y sólo se marca como hecho cuando la transacción confirmó
+- Errores transitorios (conexión caída, BD reiniciando, demasiadas
+  conexiones) se reintentan con backoff exponencial; si se agotan los
+  intentos el trabajo queda en el journal y se reintenta al reconectar
+  o en el próximo arranque (replay)
+- Errores permanentes (datos inválidos, esquema) van a un archivo
+  dead-letter ({journal}.failed.jsonl) para inspección manual
+
+Semántica at-least-once: un corte entre el COMMIT y la marca "done"
+repite el trabajo en el replay.
+
+MULTI-PROCESO (uvicorn --workers N):
+- Cada proceso escribe su propio journal ({journal}.{pid}.jsonl) y lo
+  marca como vivo con un flock sobre {journal}.{pid}.lock; compactar o
+  re-encolar nunca toca trabajos de otro proceso vivo
+- Los journals de procesos muertos (lock libre) y el journal sin sufijo de
+  versiones anteriores se adoptan en el replay, bajo {journal}.adopt.lock
+
+Uso:
+    queue.register("timt_result", write_timt_plan)   # async (pool, payload)
+    queue.attach(db_pool)                            # arranca worker + replay
+    job_id = await queue.submit("timt_result", payload)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import asyncpg
+
+try:
+    import fcntl
+except ImportError:  # Windows: un solo proceso, sin adopción de journals
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Any, Dict[str, Any]], Awaitable[Any]]
+
+# Errores que indican BD no disponible (no problema del trabajo)
+TRANSIENT_DB_ERRORS = (
+    OSError,
+    ConnectionError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.TooManyConnectionsError,
+    asyncpg.AdminShutdownError,
+    asyncpg.exceptions.ConnectionDoesNotExistError,
+)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """¿El error es de disponibilidad de la BD (reintentable)?"""
+    if isinstance(error, TRANSIENT_DB_ERRORS):
+        return True
+    # Pool cerrado / conexión perdida durante la operación
+    return isinstance(error, asyncpg.InterfaceError) and 'closed' in str(error).lower()
+
+
+# ============================================================================
+# SERIALIZACIÓN (tipos que asyncpg acepta y JSON no)
+# ============================================================================
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, date):
+        return {'$date': value.isoformat()}
+    if isinstance(value, UUID):
+        return {'$uuid': str(value)}
+    if isinstance(value, Decimal):
+        return {'$decimal': str(value)}
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Tipo no serializable en journal: {type(value).__name__}")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        (key, value), = obj.items()
+        if key == '$datetime':
+            return datetime.fromisoformat(value)
+        if key == '$date':
+            return date.fromisoformat(value)
+        if key == '$uuid':
+            return UUID(value)
+        if key == '$decimal':
+            return Decimal(value)
+    return obj
+
+
+def dumps(entry: Dict[str, Any]) -> str:
+    return json.dumps(entry, default=_encode, ensure_ascii=False)
+
+
+def loads(line: str) -> Dict[str, Any]:
+    return json.loads(line, object_hook=_decode)
+
+
+# ============================================================================
+# JOURNAL
+# ============================================================================
+
+class WriteJournal:
+    """
+    Journal append-only de trabajos pendientes (uno por proceso)
+
+    Líneas: {"op": "put", "id", "kind", "payload"} y {"op": "done", "id"}.
+    Se compacta (reescribe sólo lo pendiente) cuando no queda nada en vuelo.
+    El archivo real es {path}.{pid}.jsonl; el dead-letter es compartido.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.base_path = Path(path)
+        self.base_path.parent.mkdir(parents=True, exist_ok=True)
+        self.failed_path = self.base_path.with_name(self.base_path.stem + '.failed.jsonl')
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._path: Optional[Path] = None
+        self._owner_lock = None
+
+        self.stats = {'adopted_journals': 0, 'adopted_jobs': 0}
+
+    @property
+    def path(self) -> Path:
+        """Journal de este proceso (se re-liga tras un fork)"""
+        if self._pid != os.getpid():
+            self._bind_process()
+        return self._path
+
+    def _sibling(self, tag: str, suffix: str) -> Path:
+        return self.base_path.with_name(f"{self.base_path.stem}.{tag}{suffix}")
+
+    def _bind_process(self):
+        self._pid = os.getpid()
+        self._path = self._sibling(str(self._pid), self.base_path.suffix)
+        # Lock heredado del padre: el fd es suyo, no lo cerramos
+        self._owner_lock = None
+        if fcntl is None:
+            return
+        lock = open(self._sibling(str(self._pid), '.lock'), 'a+')
+        try:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.warning(f"⚠️ Lock de journal {lock.name} tomado por otro proceso")
+        self._owner_lock = lock
+
+    def _append(self, path: Path, line: str):
+        with self._lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def put(self, job_id: str, kind: str, payload: Dict[str, Any]):
+        self._append(self.path, dumps({'op': 'put', 'id': job_id, 'kind': kind, 'payload': payload}))
+
+    def done(self, job_id: str):
+        self._append(self.path, dumps({'op': 'done', 'id': job_id}))
+
+    def dead_letter(self, job_id: str, kind: str, payload: Dict[str, Any], error: str):
+        self._append(self.failed_path, dumps({
+            'id': job_id, 'kind': kind, 'payload': payload,
+            'error': error, 'failed_at': datetime.now().isoformat()
+        }))
+        self.done(job_id)
+
+    def pending(self) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Trabajos escritos y no confirmados de este proceso, en orden de llegada"""
+        path = self.path
+        with self._lock:
+            return self._read_pending(path)
+
+    def _read_pending(self, path: Path) -> List[Tuple[str, str, Dict[str, Any]]]:
+        if not path.exists():
+            return []
+        jobs: Dict[str, Tuple[str, str, Dict[str, Any]]] = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = loads(line)
+                except ValueError:
+                    # Línea truncada por un corte durante la escritura
+                    logger.warning(f"⚠️ Línea de journal corrupta ignorada en {path.name}")
+                    continue
+                if entry.get('op') == 'put':
+                    jobs[entry['id']] = (entry['id'], entry['kind'], entry['payload'])
+                elif entry.get('op') == 'done':
+                    jobs.pop(entry['id'], None)
+        return list(jobs.values())
+
+    def _write_pending(self, path: Path, pending: List[Tuple[str, str, Dict[str, Any]]]):
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for job_id, kind, payload in pending:
+                f.write(dumps({'op': 'put', 'id': job_id, 'kind': kind, 'payload': payload}) + '\n')
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def compact(self):
+        """Reescribir el journal de este proceso con sólo los trabajos pendientes"""
+        path = self.path
+        with self._lock:
+            self._write_pending(path, self._read_pending(path))
+
+    def adopt_orphans(self) -> int:
+        """
+        Pasar a este journal los pendientes de procesos muertos
+
+        Candidatos: {path}.{pid}.jsonl cuyo lock nadie tiene y el journal sin
+        sufijo de versiones anteriores. Devuelve los trabajos adoptados.
+        """
+        if fcntl is None:
+            return 0
+        own = self.path
+        stem, suffix = self.base_path.stem, self.base_path.suffix
+        adopted = 0
+        with self._lock, open(self._sibling('adopt', '.lock'), 'a+') as guard:
+            fcntl.flock(guard.fileno(), fcntl.LOCK_EX)
+            candidates = [self.base_path] + sorted(self.base_path.parent.glob(f"{stem}.*{suffix}"))
+            for candidate in candidates:
+                tag = candidate.name[len(stem) + 1:-len(suffix)] if candidate != self.base_path else ''
+                if candidate == own or not candidate.exists() or (tag and not tag.isdigit()):
+                    continue
+                owner_path = self._sibling(tag, '.lock') if tag else None
+                owner = open(owner_path, 'a+') if owner_path else None
+                try:
+                    if owner is not None:
+                        try:
+                            fcntl.flock(owner.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        except BlockingIOError:
+                            continue  # proceso vivo
+                    jobs = self._read_pending(candidate)
+                    if jobs:
+                        self._write_pending(own, self._read_pending(own) + jobs)
+                    candidate.unlink()
+                    if owner_path is not None:
+                        owner_path.unlink(missing_ok=True)
+                finally:
+                    if owner is not None:
+                        owner.close()
+                adopted += len(jobs)
+                self.stats['adopted_journals'] += 1
+                self.stats['adopted_jobs'] += len(jobs)
+                if jobs:
+                    logger.info(f"🔁 Journal {candidate.name}: {len(jobs)} trabajos adoptados por {own.name}")
+        return adopted
+
+
+# ============================================================================
+# COLA
+# ============================================================================
+
+class WriteBehindQueue:
+    """
+    Cola de persistencia diferida con journal durable y reintentos
+
+    Estado ligado al event loop en el que se llamó attach().
+    """
+
+    def __init__(
+        self,
+        name: str,
+        journal_path: str,
+        max_pending: int = 1000,
+        workers: int = 2,
+        max_attempts: int = 6,
+        retry_base: float = 0.5,
+        retry_max: float = 30.0,
+        fsync: bool = True
+    ):
+        self.name = name
+        self.journal = WriteJournal(journal_path, fsync=fsync)
+        self.max_pending = max_pending
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+        self._handlers: Dict[str, Handler] = {}
+        self._pool = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._queued_ids: set = set()
+        self._replay_timer: Optional[asyncio.TimerHandle] = None
+
+        self.stats = {
+            'submitted': 0,
+            'written': 0,
+            'retries': 0,
+            'parked': 0,
+            'dead_lettered': 0,
+            'replayed': 0
+        }
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def register(self, kind: str, handler: Handler):
+        """Registrar la corrutina que persiste un tipo de trabajo: handler(pool, payload)"""
+        self._handlers[kind] = handler
+
+    def attach(self, pool) -> bool:
+        """
+        Asociar el pool asyncpg y arrancar los workers (idempotente)
+
+        Encola además los trabajos pendientes del journal (replay).
+        Debe llamarse dentro del event loop.
+        """
+        if pool is None:
+            return False
+        loop = asyncio.get_running_loop()
+        pool_changed = pool is not self._pool
+        self._pool = pool
+        if loop is not self._loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._tasks = []
+            self._queued_ids = set()
+        if not self._tasks or all(t.done() for t in self._tasks):
+            self._tasks = [
+                loop.create_task(self._worker(i), name=f"{self.name}-writer-{i}")
+                for i in range(self.workers)
+            ]
+            pool_changed = True
+        if pool_changed:
+            self._replay()
+        return True
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> str:
+        """
+        Encolar un trabajo; vuelve cuando está en el journal (durable)
+
+        Backpressure: con max_pending trabajos en cola espera a que baje.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Tipo de trabajo no registrado: {kind}")
+        if self._queue is None:
+            raise RuntimeError(f"WriteBehindQueue '{self.name}' sin pool (llamar attach)")
+
+        while self._queue.qsize() >= self.max_pending:
+            await asyncio.sleep(0.05)
+
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self.journal.put, job_id, kind, payload)
+        self._enqueue(job_id, kind, payload)
+        self.stats['submitted'] += 1
+        return job_id
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Esperar a que se vacíe la cola (True si terminó a tiempo)"""
+        if self._queue is None:
+            return True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self, timeout: float = 10.0):
+        """Drenar (con límite) y detener los workers; lo no escrito queda en el journal"""
+        drained = await self.drain(timeout)
+        if self._replay_timer is not None:
+            self._replay_timer.cancel()
+            self._replay_timer = None
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(self.journal.compact)
+        logger.info(f"✅ Write-behind '{self.name}' detenido ({'vacío' if drained else 'pendientes en journal'})")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'name': self.name,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'attached': self._pool is not None,
+            'journal': str(self.journal.path)
+        }
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _enqueue(self, job_id: str, kind: str, payload: Dict[str, Any]):
+        self._queued_ids.add(job_id)
+        self._queue.put_nowait((job_id, kind, payload))
+
+    def _replay(self):
+        """Encolar trabajos del journal que no estén ya en cola"""
+        self._replay_timer = None
+        self.journal.adopt_orphans()
+        replayed = 0
+        for job_id, kind, payload in self.journal.pending():
+            if job_id in self._queued_ids:
+                continue
+            self._enqueue(job_id, kind, payload)
+            replayed += 1
+        if replayed:
+            self.stats['replayed'] += replayed
+            logger.info(f"🔁 Write-behind '{self.name}': {replayed} trabajos pendientes re-encolados")
+
+    async def _worker(self, index: int):
+        while True:
+            job_id, kind, payload = await self._queue.get()
+            try:
+                await self._run(job_id, kind, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Write-behind '{self.name}': error inesperado en {kind}: {e}", exc_info=True)
+            finally:
+                self._queued_ids.discard(job_id)
+                self._queue.task_done()
+                if not self._queued_ids:
+                    await asyncio.to_thread(self.journal.compact)
+
+    async def _run(self, job_id: str, kind: str, payload: Dict[str, Any]):
+        handler = self._handlers.get(kind)
+        if handler is None:
+            await asyncio.to_thread(self.journal.dead_letter, job_id, kind, payload, "handler no registrado")
+            self.stats['dead_lettered'] += 1
+            return
+
+        for attempt in range(self.max_attempts):
+            started = time.perf_counter()
+            try:
+                await handler(self._pool, payload)
+            except Exception as e:
+                if not is_transient_error(e):
+                    logger.error(f"❌ Write-behind '{self.name}': {kind} descartado a dead-letter: {e}")
+                    await asyncio.to_thread(self.journal.dead_letter, job_id, kind, payload, repr(e))
+                    self.stats['dead_lettered'] += 1
+                    return
+                if attempt + 1 >= self.max_attempts:
+                    break
+                delay = random.uniform(0, min(self.retry_max, self.retry_base * (2 ** attempt)))
+                self.stats['retries'] += 1
+                logger.warning(f"⚠️ Write-behind '{self.name}': BD no disponible ({type(e).__name__}), "
+                               f"reintento {attempt + 1} en {delay:.1f}s")
+                await asyncio.sleep(delay)
+            else:
+                await asyncio.to_thread(self.journal.done, job_id)
+                self.stats['written'] += 1
+                logger.debug(f"💾 Write-behind '{self.name}': {kind} escrito en "
+                             f"{(time.perf_counter() - started) * 1000:.0f} ms")
+                return
+
+        # Reintentos agotados: queda en el journal y se re-encola más tarde
+        self.stats['parked'] += 1
+        logger.error(f"❌ Write-behind '{self.name}': {kind} sin escribir tras {self.max_attempts} "
+                     f"intentos, queda en journal (replay en {self.retry_max:.0f}s)")
+        if self._replay_timer is None:
+            self._replay_timer = asyncio.get_running_loop().call_later(self.retry_max, self._replay)
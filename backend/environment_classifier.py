@@ -12,13 +12,21 @@ CRÍTICO: Este módulo determina qué herramientas usar según el ambiente
 """
 
 import logging
+import threading
 from enum import Enum
 from dataclasses import dataclass
 from typing import Tuple, Optional, Dict, Any
 import math
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Lookup global compilado (compartido por todas las instancias, carga perezosa)
+_lookup_lock = threading.Lock()
+_shared_lookup = None
+_shared_lookup_loaded = False
+
 class EnvironmentType(Enum):
     """Tipos de ambiente MUTUAMENTE EXCLUYENTES"""
     # Ambientes extremos (prioridad máxima)
@@ -78,20 +86,92 @@ class EnvironmentClassifier:
     2. Priorizar ambientes extremos (hielo, agua profunda)
     3. Usar elevación y clima cuando sea posible
     4. Ser CONSERVADOR: mejor "unknown" que clasificación incorrecta
+    
+    RENDIMIENTO:
+    classify / classify_array consultan un lookup global precompilado de la
+    cascada (environment_lookup: grilla uint8 memory-mapped + tabla de
+    contextos), idéntico a classify_cascade. Se compila la primera vez o
+    cuando cambia el código de esta clase.
     """
     
-    def __init__(self):
+    def __init__(self, use_lookup: bool = True):
         """Inicializar con bases de datos geográficas"""
         self.known_glaciers = self._load_glacier_database()
         self.ocean_boundaries = self._load_ocean_database()
         self.desert_regions = self._load_desert_database()
         self.major_rivers = self._load_river_database()
+        self.use_lookup = use_lookup
         
         logger.info("EnvironmentClassifier inicializado con bases de datos precisas")
     
+    def _get_lookup(self):
+        """Lookup compartido (None si está desactivado o no se pudo compilar)"""
+        global _shared_lookup, _shared_lookup_loaded
+        if not self.use_lookup:
+            return None
+        if not _shared_lookup_loaded:
+            with _lookup_lock:
+                if not _shared_lookup_loaded:
+                    from environment_lookup import load_or_build
+                    _shared_lookup = load_or_build(self)
+                    _shared_lookup_loaded = True
+        return _shared_lookup
+    
     def classify(self, lat: float, lon: float) -> EnvironmentContext:
         """
-        Clasificar ambiente en coordenadas específicas
+        Clasificar ambiente en coordenadas específicas (O(1) vía lookup)
+        
+        Fuera del dominio del lookup (o sin lookup) usa la cascada.
+        """
+        lookup = self._get_lookup()
+        if lookup is not None:
+            try:
+                if -90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0:
+                    return self._context_from_record(lookup.context(lookup.code_at(lat, lon)), lat, lon)
+            except (TypeError, ValueError):
+                pass
+        return self.classify_cascade(lat, lon)
+    
+    def classify_array(self, lats, lons) -> np.ndarray:
+        """
+        Clasificación vectorizada: array de EnvironmentType con la forma de
+        np.broadcast(lats, lons)
+        """
+        lats, lons = np.broadcast_arrays(np.asarray(lats, dtype=np.float64),
+                                         np.asarray(lons, dtype=np.float64))
+        result = np.empty(lats.shape, dtype=object)
+        lookup = self._get_lookup()
+        if lookup is not None:
+            inside = lookup.in_domain(lats, lons)
+            types = np.array([EnvironmentType(v) for v in lookup.type_values], dtype=object)
+            result[inside] = types[lookup.codes_for(lats[inside], lons[inside])]
+        else:
+            inside = np.zeros(lats.shape, dtype=bool)
+        for idx in zip(*np.nonzero(~inside)):
+            result[idx] = self.classify_cascade(float(lats[idx]), float(lons[idx])).environment_type
+        return result
+    
+    @staticmethod
+    def _context_from_record(record: Dict[str, Any], lat: float, lon: float) -> EnvironmentContext:
+        """EnvironmentContext desde la tabla lateral del lookup"""
+        return EnvironmentContext(
+            environment_type=EnvironmentType(record['environment_type']),
+            confidence=record['confidence'],
+            coordinates=(lat, lon),
+            temperature_range_c=tuple(record['temperature_range_c']),
+            precipitation_mm_year=record['precipitation_mm_year'],
+            elevation_m=record['elevation_m'],
+            primary_sensors=list(record['primary_sensors']),
+            secondary_sensors=list(record['secondary_sensors']),
+            archaeological_visibility=record['archaeological_visibility'],
+            preservation_potential=record['preservation_potential'],
+            access_difficulty=record['access_difficulty'],
+            notes=record['notes']
+        )
+    
+    def classify_cascade(self, lat: float, lon: float) -> EnvironmentContext:
+        """
+        Clasificar ambiente en coordenadas específicas (cascada de referencia)
         
         ORDEN DE PRIORIDAD:
         1. Regiones polares (hielo)
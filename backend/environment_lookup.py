@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Lookup global precompilado para EnvironmentClassifier - ArcheoScope
+====================================================================
+
+La cascada de EnvironmentClassifier (polar → océano → lagos → ríos →
+glaciares → montañas → desiertos → clima) sólo compara lat/lon contra
+umbrales (directos o tras |x - c| * k). Por eso su resultado es constante
+en cada celda de una grilla RECTILÍNEA cuyos cortes son esos umbrales:
+compilarla sobre esa grilla reproduce la cascada EXACTAMENTE (una grilla
+uniforme sólo la aproximaría en los bordes).
+
+Build:
+1. Se ejecuta la cascada con coordenadas "trazadoras" (float que registra
+   cada comparación) y se obtienen los cortes exactos en float64 por eje
+   (comparación directa: el umbral; |x - c| * k: bisección en float64)
+2. Cada eje se divide en intervalos abiertos entre cortes + los cortes
+   mismos (celdas degeneradas), así `<` y `<=` quedan resueltos
+3. Se evalúa la cascada una vez por celda (punto representativo) hasta
+   que no aparecen cortes nuevos (punto fijo). Entonces toda comparación
+   hecha en cada representante tiene su corte en la grilla, así cualquier
+   punto de la celda recorre la misma rama de la cascada
+4. Se guarda: codes.npy (uint8 [lat, lon]), cortes por eje y una tabla
+   lateral contexts.json con los campos del EnvironmentContext
+
+Lookup: búsqueda binaria en los cortes (~100 por eje) + lectura del código;
+vectorizado con np.searchsorted para arrays. Los artefactos se cargan con
+memory-map y llevan la huella del código fuente del clasificador: si la
+cascada cambia, se recompilan.
+
+Uso:
+    python environment_lookup.py            # compilar y verificar
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import operator
+import os
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOOKUP_DIR = Path(__file__).parent / "data" / "environment_lookup"
+
+# Dominio compilado; fuera de él se usa la cascada
+LAT_DOMAIN = (-90.0, 90.0)
+LON_DOMAIN = (-180.0, 180.0)
+
+# Paso del barrido que localiza cambios de estado antes de la bisección
+SCAN_STEP_DEG = 0.005
+
+# Campos del contexto guardados en la tabla lateral (coordinates es por consulta)
+CONTEXT_FIELDS = (
+    'environment_type', 'confidence', 'temperature_range_c', 'precipitation_mm_year',
+    'elevation_m', 'primary_sensors', 'secondary_sensors', 'archaeological_visibility',
+    'preservation_potential', 'access_difficulty', 'notes'
+)
+
+
+# ============================================================================
+# TRAZADO DE LA CASCADA
+# ============================================================================
+
+class _TracedCoordinate(float):
+    """
+    float que registra los umbrales contra los que se compara
+
+    Las operaciones aritméticas devuelven otra coordenada trazada con la
+    función acumulada (x → valor), así `abs(lon - 31.25) * 111 < 3` queda
+    registrado como (eje, f, 3) y el corte exacto se resuelve después.
+    """
+
+    def __new__(cls, value: float, axis: str, fn: Callable[[float], float], log: list):
+        obj = float.__new__(cls, value)
+        obj.axis = axis
+        obj.fn = fn
+        obj.log = log
+        return obj
+
+    def _derive(self, step: Callable[[float], float]) -> "_TracedCoordinate":
+        fn = self.fn
+        return _TracedCoordinate(step(float(self)), self.axis, lambda x: step(fn(x)), self.log)
+
+    def __add__(self, other):
+        return self._derive(lambda v: v + other)
+
+    def __radd__(self, other):
+        return self._derive(lambda v: other + v)
+
+    def __sub__(self, other):
+        return self._derive(lambda v: v - other)
+
+    def __rsub__(self, other):
+        return self._derive(lambda v: other - v)
+
+    def __mul__(self, other):
+        return self._derive(lambda v: v * other)
+
+    def __rmul__(self, other):
+        return self._derive(lambda v: other * v)
+
+    def __truediv__(self, other):
+        return self._derive(lambda v: v / other)
+
+    def __neg__(self):
+        return self._derive(lambda v: -v)
+
+    def __abs__(self):
+        return self._derive(abs)
+
+    def _compare(self, other, op) -> bool:
+        self.log.append((self.axis, self.fn, float(other)))
+        return op(float(self), float(other))
+
+    def __lt__(self, other):
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other):
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other):
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other):
+        return self._compare(other, operator.ge)
+
+    def __eq__(self, other):
+        return self._compare(other, operator.eq)
+
+    def __ne__(self, other):
+        return self._compare(other, operator.ne)
+
+    __hash__ = float.__hash__
+
+
+def _identity(x: float) -> float:
+    return x
+
+
+def _in(value: float, domain: Tuple[float, float]) -> bool:
+    return domain[0] <= value <= domain[1]
+
+
+def _state(fn: Callable[[float], float], threshold: float, x: float) -> int:
+    """-1 / 0 / +1 según f(x) frente al umbral"""
+    value = fn(x)
+    return (value > threshold) - (value < threshold)
+
+
+def _first_change(fn, threshold: float, lo: float, hi: float) -> float:
+    """Menor float en (lo, hi] cuyo estado difiere del de lo (bisección en float64)"""
+    start = _state(fn, threshold, lo)
+    while np.nextafter(lo, hi) != hi:
+        mid = lo + (hi - lo) / 2
+        if mid <= lo or mid >= hi:
+            mid = float(np.nextafter(lo, hi))
+        if _state(fn, threshold, mid) == start:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def _comparison_breaks(fn, threshold: float, domain: Tuple[float, float]) -> List[float]:
+    """Cortes exactos (float64) donde cambia el resultado de comparar f(x) con el umbral"""
+    xs = np.arange(domain[0], domain[1] + SCAN_STEP_DEG, SCAN_STEP_DEG)
+    xs[-1] = domain[1]
+    # Las funciones trazadas son aritmética pura: se evalúan sobre el array
+    values = np.asarray(fn(xs), dtype=np.float64)
+    states = (values > threshold).astype(np.int8) - (values < threshold).astype(np.int8)
+    breaks = []
+    for i in np.flatnonzero(states[1:] != states[:-1]):
+        lo, hi = float(xs[i]), float(xs[i + 1])
+        # Puede haber dos cambios (-1 → 0 → +1) dentro del mismo paso
+        while _state(fn, threshold, lo) != _state(fn, threshold, hi):
+            change = _first_change(fn, threshold, lo, hi)
+            breaks.append(change)
+            lo = change
+            if lo >= hi:
+                break
+    return breaks
+
+
+def _axis_cells(breaks: np.ndarray, domain: Tuple[float, float]) -> np.ndarray:
+    """
+    Puntos representativos de las celdas de un eje
+
+    Celda 2i = intervalo abierto antes de breaks[i], celda 2i+1 = breaks[i],
+    última celda = intervalo abierto tras el último corte.
+    """
+    reps = []
+    lower = domain[0] - 1.0
+    for b in breaks:
+        reps.append(lower + (b - lower) / 2 if lower < b else b)
+        reps.append(b)
+        lower = b
+    reps.append(lower + (domain[1] + 1.0 - lower) / 2)
+    return np.array(reps, dtype=np.float64)
+
+
+def _cell_index(breaks: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Índice de celda (ver _axis_cells) de cada valor"""
+    i = np.searchsorted(breaks, values, side='left')
+    exact = (i < len(breaks)) & (breaks[np.minimum(i, len(breaks) - 1)] == values)
+    return 2 * i + exact
+
+
+def _scalar_cell(breaks: List[float], value: float) -> int:
+    """_cell_index para un escalar"""
+    i = bisect_left(breaks, value)
+    return 2 * i + (i < len(breaks) and breaks[i] == value)
+
+
+# ============================================================================
+# LOOKUP
+# ============================================================================
+
+class EnvironmentLookup:
+    """Grilla rectilínea de códigos uint8 + tabla lateral de contextos"""
+
+    def __init__(self, lat_breaks: np.ndarray, lon_breaks: np.ndarray,
+                 codes: np.ndarray, contexts: List[Dict[str, Any]], fingerprint: str):
+        self.lat_breaks = lat_breaks
+        self.lon_breaks = lon_breaks
+        self.codes = codes
+        self.contexts = contexts
+        self.fingerprint = fingerprint
+        self.type_values = np.array([c['environment_type'] for c in contexts], dtype=object)
+        # Copias en listas Python para el camino escalar (bisect, sin overhead de numpy)
+        self._lat_list = lat_breaks.tolist()
+        self._lon_list = lon_breaks.tolist()
+        self._codes_list = np.asarray(codes).tolist()
+
+    @staticmethod
+    def in_domain(lat, lon) -> np.ndarray:
+        return ((lat >= LAT_DOMAIN[0]) & (lat <= LAT_DOMAIN[1])
+                & (lon >= LON_DOMAIN[0]) & (lon <= LON_DOMAIN[1]))
+
+    def code_at(self, lat: float, lon: float) -> int:
+        """Código de contexto de un punto (dentro del dominio)"""
+        return self._codes_list[_scalar_cell(self._lat_list, lat)][_scalar_cell(self._lon_list, lon)]
+
+    def codes_for(self, lats, lons) -> np.ndarray:
+        """Códigos uint8 para arrays de coordenadas (broadcast)"""
+        lats, lons = np.broadcast_arrays(np.asarray(lats, dtype=np.float64),
+                                         np.asarray(lons, dtype=np.float64))
+        return self.codes[_cell_index(self.lat_breaks, lats), _cell_index(self.lon_breaks, lons)]
+
+    def context(self, code: int) -> Dict[str, Any]:
+        return self.contexts[code]
+
+    # ------------------------------------------------------------------
+    # Build / persistencia
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, classify_fn: Callable[[Any, Any], Any], fingerprint: str,
+              max_rounds: int = 10) -> "EnvironmentLookup":
+        """
+        Compilar la cascada `classify_fn(lat, lon) -> EnvironmentContext`
+
+        Itera hasta punto fijo: cada ronda traza la cascada en los puntos
+        representativos de todas las celdas y agrega los cortes nuevos.
+        """
+        domains = {'lat': LAT_DOMAIN, 'lon': LON_DOMAIN}
+        breaks = {'lat': set(), 'lon': set()}
+        seen = set()
+        # Sondas iniciales gruesas: el punto fijo no depende de ellas
+        probes_lat = np.arange(-85.0, 90.0, 10.0)
+        probes_lon = np.arange(-175.0, 180.0, 10.0)
+
+        cascade_logger = logging.getLogger(classify_fn.__module__)
+        previous_level = cascade_logger.level
+        cascade_logger.setLevel(logging.ERROR)
+        try:
+            for round_ in range(max_rounds):
+                new_breaks = 0
+                records = np.empty((len(probes_lat), len(probes_lon)), dtype=object)
+                for i, lat in enumerate(probes_lat):
+                    for j, lon in enumerate(probes_lon):
+                        log = []
+                        context = classify_fn(_TracedCoordinate(lat, 'lat', _identity, log),
+                                              _TracedCoordinate(lon, 'lon', _identity, log))
+                        records[i, j] = _context_record(context)
+                        for axis, fn, threshold in log:
+                            if fn is _identity:
+                                if threshold not in breaks[axis] and _in(threshold, domains[axis]):
+                                    breaks[axis].add(threshold)
+                                    new_breaks += 1
+                                continue
+                            key = (axis, threshold, _fn_signature(fn, domains[axis]))
+                            if key in seen:
+                                continue
+                            seen.add(key)
+                            for b in _comparison_breaks(fn, threshold, domains[axis]):
+                                if b not in breaks[axis]:
+                                    breaks[axis].add(b)
+                                    new_breaks += 1
+
+                logger.info(f"🧭 Ronda {round_ + 1}: {len(breaks['lat'])} cortes lat, "
+                            f"{len(breaks['lon'])} cortes lon (+{new_breaks})")
+                if new_breaks == 0 and round_ > 0:
+                    # Punto fijo: cada celda quedó evaluada en su punto representativo
+                    break
+                lat_breaks = np.array(sorted(breaks['lat']), dtype=np.float64)
+                lon_breaks = np.array(sorted(breaks['lon']), dtype=np.float64)
+                probes_lat = _axis_cells(lat_breaks, LAT_DOMAIN)
+                probes_lon = _axis_cells(lon_breaks, LON_DOMAIN)
+            else:
+                raise RuntimeError("La compilación del lookup no convergió")
+        finally:
+            cascade_logger.setLevel(previous_level)
+
+        # Tabla lateral de contextos únicos + códigos por celda
+        contexts: List[Dict[str, Any]] = []
+        index: Dict[str, int] = {}
+        codes = np.zeros(records.shape, dtype=np.uint8)
+        for (i, j), record in np.ndenumerate(records):
+            key = json.dumps(record, sort_keys=True)
+            if key not in index:
+                if len(contexts) > 255:
+                    raise RuntimeError("Más de 256 contextos: no caben en uint8")
+                index[key] = len(contexts)
+                contexts.append(record)
+            codes[i, j] = index[key]
+
+        return cls(lat_breaks, lon_breaks, codes, contexts, fingerprint)
+
+    def save(self, directory: Path = DEFAULT_LOOKUP_DIR):
+        """Guardar artefactos (escritura atómica por archivo)"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        token = uuid.uuid4().hex[:8]
+        payloads = {
+            'lat_breaks.npy': self.lat_breaks,
+            'lon_breaks.npy': self.lon_breaks,
+            'codes.npy': self.codes,
+        }
+        for name, array in payloads.items():
+            tmp = directory / f".{name}.{token}.tmp"
+            with open(tmp, 'wb') as f:
+                np.save(f, array, allow_pickle=False)
+            os.replace(tmp, directory / name)
+        # contexts.json al final: lleva la huella y marca el build como completo
+        tmp = directory / f".contexts.json.{token}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'fingerprint': self.fingerprint, 'contexts': self.contexts}, f, indent=1)
+        os.replace(tmp, directory / "contexts.json")
+
+    @classmethod
+    def load(cls, directory: Path = DEFAULT_LOOKUP_DIR,
+             fingerprint: Optional[str] = None) -> Optional["EnvironmentLookup"]:
+        """Cargar con memory-map; None si falta o la huella no coincide"""
+        directory = Path(directory)
+        try:
+            with open(directory / "contexts.json", 'r') as f:
+                meta = json.load(f)
+            if fingerprint is not None and meta['fingerprint'] != fingerprint:
+                logger.info("🧭 Lookup de ambientes desactualizado (cascada modificada)")
+                return None
+            return cls(
+                np.load(directory / "lat_breaks.npy", allow_pickle=False),
+                np.load(directory / "lon_breaks.npy", allow_pickle=False),
+                np.load(directory / "codes.npy", mmap_mode='r', allow_pickle=False),
+                meta['contexts'],
+                meta['fingerprint']
+            )
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Lookup de ambientes ilegible: {e}")
+            return None
+
+
+def _fn_signature(fn: Callable[[float], float], domain: Tuple[float, float]) -> Tuple[float, ...]:
+    """Huella de una función trazada (distingue closures con el mismo código)"""
+    return tuple(fn(x) for x in (domain[0], 0.123456789, domain[1]))
+
+
+def _context_record(context: Any) -> Dict[str, Any]:
+    """Campos del EnvironmentContext para la tabla lateral (JSON)"""
+    record = {}
+    for name in CONTEXT_FIELDS:
+        value = getattr(context, name)
+        if name == 'environment_type':
+            value = value.value
+        elif isinstance(value, tuple):
+            value = list(value)
+        record[name] = value
+    return record
+
+
+def cascade_fingerprint(classifier_cls) -> str:
+    """Huella del código fuente del clasificador"""
+    try:
+        source = inspect.getsource(classifier_cls)
+    except (OSError, TypeError):
+        source = classifier_cls.__qualname__
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+def load_or_build(classifier, directory: Path = DEFAULT_LOOKUP_DIR) -> Optional[EnvironmentLookup]:
+    """Lookup vigente para el clasificador: carga, o compila y guarda"""
+    fingerprint = cascade_fingerprint(type(classifier))
+    lookup = EnvironmentLookup.load(directory, fingerprint)
+    if lookup is not None:
+        return lookup
+    try:
+        logger.info("🧭 Compilando lookup global de ambientes...")
+        lookup = EnvironmentLookup.build(classifier.classify_cascade, fingerprint)
+        try:
+            lookup.save(directory)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo guardar el lookup de ambientes: {e}")
+        logger.info(f"✅ Lookup de ambientes: {lookup.codes.shape[0]}×{lookup.codes.shape[1]} celdas, "
+                    f"{len(lookup.contexts)} contextos")
+        return lookup
+    except Exception as e:
+        logger.error(f"❌ Error compilando lookup de ambientes: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    sys.path.insert(0, str(Path(__file__).parent))
+    logging.basicConfig(level=logging.INFO)
+    from environment_classifier import EnvironmentClassifier
+
+    classifier = EnvironmentClassifier(use_lookup=False)
+    started = time.perf_counter()
+    lookup = EnvironmentLookup.build(classifier.classify_cascade, cascade_fingerprint(EnvironmentClassifier))
+    lookup.save()
+    print(f"✅ Lookup compilado en {time.perf_counter() - started:.1f}s: "
+          f"{lookup.codes.shape} celdas, {len(lookup.contexts)} contextos → {DEFAULT_LOOKUP_DIR}")
+
+    # Verificación contra la cascada en puntos aleatorios y sobre los cortes
+    logging.getLogger('environment_classifier').setLevel(logging.ERROR)
+    rng = np.random.default_rng(0)
+    lats = np.concatenate([rng.uniform(-90, 90, 20000), np.repeat(lookup.lat_breaks, 5)])
+    lons = np.concatenate([rng.uniform(-180, 180, 20000), rng.choice(lookup.lon_breaks, 5 * len(lookup.lat_breaks))])
+    codes = lookup.codes_for(lats, lons)
+    mismatches = sum(
+        lookup.context(int(code)) != _context_record(classifier.classify_cascade(float(lat), float(lon)))
+        for lat, lon, code in zip(lats, lons, codes)
+    )
+    print(f"{'✅' if mismatches == 0 else '❌'} Verificación: {mismatches} diferencias en {len(lats)} puntos")
+    sys.exit(0 if mismatches == 0 else 1)
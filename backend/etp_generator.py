@@ -17,7 +17,8 @@ PROCESO:
 import asyncio
 import numpy as np
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 
 from etp_core import (
@@ -36,9 +37,24 @@ from temporal_archaeological_signature import (  # SALTO EVOLUTIVO 1
 from deep_inference_layer import (  # SALTO EVOLUTIVO 2
     DeepInferenceLayerEngine, InferredDepthSignature
 )
+from pipeline_tracing import tracer
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class PrefetchedAcquisition:
+    """
+    Mediciones adquiridas fuera del ETP (plan de adquisición del TIMT).
+    
+    El ETP las usa en lugar de lanzar su propio batch; los instrumentos en
+    `skipped` no se miden ni cuentan para la cobertura.
+    """
+    results: Dict[str, Any] = field(default_factory=dict)   # instrumento → InstrumentResult
+    skipped: Dict[str, str] = field(default_factory=dict)   # instrumento → motivo
+    wall_time_s: float = 0.0
+    scheduling: Dict[str, Any] = field(default_factory=dict)
+
+
 class ETProfileGenerator:
     """Generador de perfiles tomográficos ambientales."""
     
@@ -184,8 +200,11 @@ class ETProfileGenerator:
         """Verificar si sensor es opcional (no penaliza si falla)."""
         return instrument in self.optional_sensors
     
+    @tracer.traced("etp", "generate_etp")
     async def generate_etp(self, bounds: BoundingBox, 
-                          resolution_m: float = 150.0) -> EnvironmentalTomographicProfile:  # AJUSTE: 150m por defecto
+                          resolution_m: float = 150.0,  # AJUSTE: 150m por defecto
+                          prefetched: Optional[PrefetchedAcquisition] = None,
+                          context: Optional[Dict[str, Any]] = None) -> EnvironmentalTomographicProfile:
         """
         Generar perfil tomográfico completo.
         
@@ -203,6 +222,11 @@ class ETProfileGenerator:
         Args:
             bounds: Región 3D a analizar
             resolution_m: Resolución espacial en metros (default: 150m)
+            prefetched: Mediciones ya adquiridas (plan de adquisición del TIMT);
+                None = adquirir aquí todos los instrumentos
+            context: Contextos ya resueltos para este bbox (p. ej. por el TCP):
+                'geological_context', 'hydrographic_features', 'human_traces'.
+                Los presentes no se vuelven a consultar.
             
         Returns:
             EnvironmentalTomographicProfile completo
@@ -215,27 +239,31 @@ class ETProfileGenerator:
         
         # FASE 1: Adquisición de datos por capas
         logger.info("📡 FASE 1: Adquisición de datos por capas de profundidad...")
-        layered_data = await self._acquire_layered_data(bounds)
+        with tracer.span("etp", "acquire_layered_data"):
+            layered_data, acquisition = await self._acquire_layered_data(bounds, prefetched)
         
         # FASE 2: Generación de cortes tomográficos
         logger.info("🔬 FASE 2: Generación de cortes tomográficos...")
-        xz_profile = self._generate_xz_slice(layered_data, bounds)
-        yz_profile = self._generate_yz_slice(layered_data, bounds)
-        xy_profiles = self._generate_xy_slices(layered_data, bounds)
+        with tracer.span("etp", "tomographic_slices"):
+            xz_profile = self._generate_xz_slice(layered_data, bounds)
+            yz_profile = self._generate_yz_slice(layered_data, bounds)
+            xy_profiles = self._generate_xy_slices(layered_data, bounds)
         
         # FASE 3: Análisis temporal
         logger.info("⏰ FASE 3: Análisis temporal...")
-        temporal_profile = await self._generate_temporal_analysis(bounds)
+        with tracer.span("etp", "temporal_analysis"):
+            temporal_profile = await self._generate_temporal_analysis(bounds)
         
         # FASE 3B: SALTO EVOLUTIVO 1 - Temporal Archaeological Signature (TAS)
         logger.info("🕐 FASE 3B: Cálculo de Temporal Archaeological Signature (TAS)...")
-        tas_signature = await self.tas_engine.calculate_tas(
-            lat_min=bounds.lat_min,
-            lat_max=bounds.lat_max,
-            lon_min=bounds.lon_min,
-            lon_max=bounds.lon_max,
-            temporal_scale=TemporalScale.LONG  # Usar escala larga por defecto
-        )
+        with tracer.span("etp", "tas"):
+            tas_signature = await self.tas_engine.calculate_tas(
+                lat_min=bounds.lat_min,
+                lat_max=bounds.lat_max,
+                lon_min=bounds.lon_min,
+                lon_max=bounds.lon_max,
+                temporal_scale=TemporalScale.LONG  # Usar escala larga por defecto
+            )
         logger.info(f"   🎯 TAS Score: {tas_signature.tas_score:.3f}")
         logger.info(f"   📊 Persistencia NDVI: {tas_signature.ndvi_persistence:.3f}")
         logger.info(f"   🌡️ Estabilidad Térmica: {tas_signature.thermal_stability:.3f}")
@@ -244,12 +272,13 @@ class ETProfileGenerator:
         
         # FASE 3C: SALTO EVOLUTIVO 2 - Deep Inference Layer (DIL)
         logger.info("🔬 FASE 3C: Cálculo de Deep Inference Layer (DIL)...")
-        dil_signature = await self.dil_engine.calculate_dil(
-            lat_min=bounds.lat_min,
-            lat_max=bounds.lat_max,
-            lon_min=bounds.lon_min,
-            lon_max=bounds.lon_max
-        )
+        with tracer.span("etp", "dil"):
+            dil_signature = await self.dil_engine.calculate_dil(
+                lat_min=bounds.lat_min,
+                lat_max=bounds.lat_max,
+                lon_min=bounds.lon_min,
+                lon_max=bounds.lon_max
+            )
         logger.info(f"   🎯 DIL Score: {dil_signature.dil_score:.3f}")
         logger.info(f"   📏 Profundidad estimada: {dil_signature.estimated_depth_m:.1f}m")
         logger.info(f"   📊 Confianza: {dil_signature.confidence:.3f}")
@@ -257,85 +286,96 @@ class ETProfileGenerator:
         
         # FASE 4: Cálculo de cobertura instrumental (NUEVO)
         logger.info("📊 FASE 4A: Cálculo de cobertura instrumental...")
-        instrumental_coverage = self._calculate_instrumental_coverage(layered_data)
+        with tracer.span("etp", "instrumental_coverage"):
+            instrumental_coverage = self._calculate_instrumental_coverage(layered_data, acquisition['skipped'])
+        instrumental_coverage['acquisition'] = acquisition
         logger.info(f"   🌍 Superficial: {instrumental_coverage['superficial']['percentage']:.0f}%")
         logger.info(f"   📡 Subsuperficial: {instrumental_coverage['subsuperficial']['percentage']:.0f}%")
         logger.info(f"   🔬 Profundo: {instrumental_coverage['profundo']['percentage']:.0f}%")
         
         # FASE 4B: Cálculo de ESS evolucionado (SEPARADO de cobertura)
         logger.info("📊 FASE 4B: Cálculo de ESS volumétrico y temporal...")
-        ess_superficial = self._calculate_surface_ess(layered_data.get(0, {}))
-        ess_volumetrico = self._calculate_volumetric_ess(layered_data)
-        ess_temporal = self._calculate_temporal_ess(temporal_profile, ess_volumetrico)
+        with tracer.span("etp", "ess"):
+            ess_superficial = self._calculate_surface_ess(layered_data.get(0, {}))
+            ess_volumetrico = self._calculate_volumetric_ess(layered_data)
+            ess_temporal = self._calculate_temporal_ess(temporal_profile, ess_volumetrico)
         
         # FASE 5: Métricas 3D
         logger.info("🧮 FASE 5: Cálculo de métricas 3D...")
-        coherencia_3d = self._calculate_3d_coherence(layered_data)
-        persistencia = self._calculate_temporal_persistence(temporal_profile)
-        densidad_m3 = self._calculate_archaeological_density(layered_data, bounds)
+        with tracer.span("etp", "metrics_3d"):
+            coherencia_3d = self._calculate_3d_coherence(layered_data)
+            persistencia = self._calculate_temporal_persistence(temporal_profile)
+            densidad_m3 = self._calculate_archaeological_density(layered_data, bounds)
         
         # FASE 6: Detección de anomalías volumétricas
         logger.info("🎯 FASE 6: Detección de anomalías volumétricas...")
-        volumetric_anomalies = self._detect_volumetric_anomalies(layered_data, bounds)
+        with tracer.span("etp", "volumetric_anomalies"):
+            volumetric_anomalies = self._detect_volumetric_anomalies(layered_data, bounds)
         
         # FASE 7: Interpretación narrativa - REVOLUCIÓN CONCEPTUAL
         logger.info("📖 FASE 7: Generación de narrativa territorial...")
-        narrative = self._generate_territorial_narrative(
-            xz_profile, yz_profile, temporal_profile, volumetric_anomalies
-        )
+        with tracer.span("etp", "narrative"):
+            narrative = self._generate_territorial_narrative(
+                xz_profile, yz_profile, temporal_profile, volumetric_anomalies
+            )
         
-        occupational_history = self._analyze_occupational_history(temporal_profile, volumetric_anomalies)
-        territorial_function = self._determine_territorial_function(volumetric_anomalies, layered_data)
-        landscape_evolution = self._analyze_landscape_evolution(temporal_profile, layered_data)
+            occupational_history = self._analyze_occupational_history(temporal_profile, volumetric_anomalies)
+            territorial_function = self._determine_territorial_function(volumetric_anomalies, layered_data)
+            landscape_evolution = self._analyze_landscape_evolution(temporal_profile, layered_data)
         
         # FASE 8: Análisis de contexto geológico
         logger.info("🗿 FASE 8: Análisis de contexto geológico...")
-        geological_context = await self.geological_system.get_geological_context(
-            bounds.lat_min, bounds.lat_max, bounds.lon_min, bounds.lon_max
-        )
+        with tracer.span("etp", "geological_context"):
+            geological_context = await self._context_or_fetch(
+                context, 'geological_context', self.geological_system.get_geological_context, bounds
+            )
         
-        # Calcular GCS (Geological Compatibility Score)
-        max_anomaly_depth = max([a.center_3d[2] for a in volumetric_anomalies], default=0.0)
-        geological_compatibility = self.geological_system.calculate_geological_compatibility_score(
-            geological_context, abs(max_anomaly_depth)
-        )
+            # Calcular GCS (Geological Compatibility Score)
+            max_anomaly_depth = max([a.center_3d[2] for a in volumetric_anomalies], default=0.0)
+            geological_compatibility = self.geological_system.calculate_geological_compatibility_score(
+                geological_context, abs(max_anomaly_depth)
+            )
         
         # FASE 9: Análisis de hidrografía histórica
         logger.info("💧 FASE 9: Análisis de hidrografía histórica...")
-        hydrographic_features = await self.hydrography_system.get_hydrographic_context(
-            bounds.lat_min, bounds.lat_max, bounds.lon_min, bounds.lon_max
-        )
+        with tracer.span("etp", "hydrography"):
+            hydrographic_features = await self._context_or_fetch(
+                context, 'hydrographic_features', self.hydrography_system.get_hydrographic_context, bounds
+            )
         
-        water_availability = self.hydrography_system.calculate_water_availability_score(
-            hydrographic_features, temporal_profile
-        )
+            water_availability = self.hydrography_system.calculate_water_availability_score(
+                hydrographic_features, temporal_profile
+            )
         
         # FASE 10: Validación arqueológica externa
         logger.info("🏛️ FASE 10: Validación arqueológica externa...")
-        external_sites = await self.external_validation_system.get_external_archaeological_context(
-            bounds.lat_min, bounds.lat_max, bounds.lon_min, bounds.lon_max
-        )
+        with tracer.span("etp", "external_validation"):
+            external_sites = await self.external_validation_system.get_external_archaeological_context(
+                bounds.lat_min, bounds.lat_max, bounds.lon_min, bounds.lon_max
+            )
         
-        # Calcular ECS (External Consistency Score)
-        candidate_type = territorial_function.primary_function if territorial_function else "unknown"
-        external_consistency = self.external_validation_system.calculate_external_consistency_score(
-            bounds.center_lat, bounds.center_lon, candidate_type, external_sites
-        )
+            # Calcular ECS (External Consistency Score)
+            candidate_type = territorial_function.primary_function if territorial_function else "unknown"
+            external_consistency = self.external_validation_system.calculate_external_consistency_score(
+                bounds.center_lat, bounds.center_lon, candidate_type, external_sites
+            )
         
         # FASE 11: Análisis de trazas humanas
         logger.info("👥 FASE 11: Análisis de trazas humanas...")
-        human_traces = await self.human_traces_system.analyze_human_traces(
-            bounds.lat_min, bounds.lat_max, bounds.lon_min, bounds.lon_max
-        )
+        with tracer.span("etp", "human_traces"):
+            human_traces = await self._context_or_fetch(
+                context, 'human_traces', self.human_traces_system.analyze_human_traces, bounds
+            )
         
-        territorial_use_profile = self.human_traces_system.generate_territorial_use_profile(human_traces)
+            territorial_use_profile = self.human_traces_system.generate_territorial_use_profile(human_traces)
         
         # FASE 12: Preparación de datos de visualización (actualizada)
         logger.info("🎨 FASE 12: Preparación de datos de visualización...")
-        visualization_data = self._prepare_visualization_data(
-            xz_profile, yz_profile, xy_profiles, layered_data,
-            geological_context, hydrographic_features, external_sites, human_traces
-        )
+        with tracer.span("etp", "visualization"):
+            visualization_data = self._prepare_visualization_data(
+                xz_profile, yz_profile, xy_profiles, layered_data,
+                geological_context, hydrographic_features, external_sites, human_traces
+            )
         
         # Crear perfil tomográfico completo con contextos adicionales
         etp = EnvironmentalTomographicProfile(
@@ -390,72 +430,173 @@ class ETProfileGenerator:
         
         return etp
     
-    async def _acquire_layered_data(self, bounds: BoundingBox) -> Dict[float, Dict[str, Any]]:
-        """Adquirir datos por capas de profundidad."""
+    async def _context_or_fetch(self, context: Optional[Dict[str, Any]], key: str,
+                                fetch: Callable, bounds: BoundingBox) -> Any:
+        """Contexto ya resuelto (TCP) o consulta a la fuente"""
+        if context is not None and context.get(key) is not None:
+            logger.info(f"   ♻️ {key}: reutilizado del TCP")
+            return context[key]
+        return await fetch(bounds.lat_min, bounds.lat_max, bounds.lon_min, bounds.lon_max)
+    
+    def plan_instruments(self, relevant: Optional[Iterable[str]] = None) -> Tuple[Dict[str, List[float]], Dict[str, str]]:
+        """
+        Instrumentos distintos a medir y profundidades que los usan.
         
-        layered_data = {}
+        Args:
+            relevant: Instrumentos relevantes (estrategia TCP); None = todos
         
+        Returns:
+            (instrument_depths, skipped) - skipped: instrumento → motivo
+        """
+        relevant_set = set(relevant) if relevant is not None else None
+        instrument_depths: Dict[str, List[float]] = {}
+        skipped: Dict[str, str] = {}
+        
+        # Orden estable: por profundidad y luego por mapeo
         for depth in self.depth_layers:
-            logger.info(f"  📡 Adquiriendo datos para profundidad {depth}m...")
-            
-            # Obtener instrumentos apropiados para esta profundidad
-            instruments = self.instrument_depth_mapping.get(depth, [])
-            
-            if not instruments:
-                logger.info(f"    ⚠️ Sin instrumentos para {depth}m - usando inferencia")
-                layered_data[depth] = {}
-                continue
-            
-            # Adquirir datos de instrumentos
-            layer_data = {}
-            
-            for instrument in instruments:
+            for instrument in self.instrument_depth_mapping.get(depth, []):
                 # AJUSTE: Filtrar instrumentos deshabilitados
                 if instrument in self.disabled_instruments:
                     logger.info(f"    ⏭️ {instrument}: Deshabilitado (bugs conocidos)")
                     continue
-                
-                try:
-                    result = await self.integrator.get_instrument_measurement_robust(
-                        instrument_name=instrument,
-                        lat_min=bounds.lat_min,
-                        lat_max=bounds.lat_max,
-                        lon_min=bounds.lon_min,
-                        lon_max=bounds.lon_max
-                    )
-                    
-                    # DEBUG: Ver qué está retornando
-                    logger.debug(f"      🔍 {instrument} result type: {type(result)}")
-                    if result:
-                        logger.debug(f"      🔍 {instrument} has status: {hasattr(result, 'status')}")
-                        if hasattr(result, 'status'):
-                            logger.debug(f"      🔍 {instrument} status value: {result.status}")
-                            logger.debug(f"      🔍 {instrument} status type: {type(result.status)}")
-                    
-                    # FIX CRÍTICO: Comparar con Enum, no con strings
-                    if result and hasattr(result, 'status') and result.status in [InstrumentStatus.SUCCESS, InstrumentStatus.DEGRADED]:
-                        layer_data[instrument] = {
-                            'value': getattr(result, 'value', 0.0),
-                            'unit': getattr(result, 'unit', 'units'),
-                            'confidence': getattr(result, 'confidence', 0.5),
-                            'status': result.status.value  # Guardar como string
-                        }
-                        logger.info(f"    ✅ {instrument}: {layer_data[instrument]['value']:.3f} AGREGADO A LAYER_DATA")
-                    else:
-                        # FIX 3: Sensor fallido = NEUTRAL (no se agrega, no penaliza)
-                        if self._is_optional_sensor(instrument):
-                            logger.info(f"    ⚠️ {instrument}: Opcional - sin datos (no penaliza)")
-                        else:
-                            status_str = result.status.value if (result and hasattr(result, 'status')) else 'None'
-                            logger.info(f"    ⚠️ {instrument}: Sin datos (neutral) - status={status_str}")
-                        # NO agregar al layer_data - ausencia = neutral, no negativo
-                        
-                except Exception as e:
-                    logger.warning(f"    💥 {instrument}: Error - {e}")
+                if relevant_set is not None and instrument not in relevant_set:
+                    skipped[instrument] = "no relevante para las hipótesis activas"
+                    continue
+                instrument_depths.setdefault(instrument, []).append(depth)
+        
+        return instrument_depths, skipped
+    
+    async def fetch_instruments(self, bounds: BoundingBox, instruments: List[str],
+                                on_result: Optional[Callable[[Any], None]] = None) -> Dict[str, Any]:
+        """
+        Medir un conjunto de instrumentos en un batch concurrente.
+        
+        Varios batches simultáneos comparten los presupuestos por fuente del
+        scheduler del integrador.
+        
+        Returns:
+            scheduling del batch ({} si falló)
+        """
+        try:
+            batch = await self.integrator.get_batch_measurements(
+                list(instruments),
+                lat_min=bounds.lat_min,
+                lat_max=bounds.lat_max,
+                lon_min=bounds.lon_min,
+                lon_max=bounds.lon_max,
+                on_result=on_result
+            )
+            return getattr(batch, 'scheduling', {}) or {}
+        except Exception as e:
+            logger.warning(f"    💥 Batch de adquisición: Error - {e}")
+            return {}
+    
+    async def _acquire_layered_data(self, bounds: BoundingBox,
+                                    prefetched: Optional[PrefetchedAcquisition] = None) -> Tuple[Dict[float, Dict[str, Any]], Dict[str, Any]]:
+        """
+        Adquirir datos por capas de profundidad.
+        
+        Cada instrumento se mide una sola vez aunque aparezca en varias
+        profundidades: el conjunto distinto se pide en un único batch
+        concurrente (límites por fuente del scheduler del integrador) y el
+        resultado se replica en cada capa que lo usa. El costo de la fase es
+        el del instrumento más lento, no la suma.
+        
+        Con `prefetched` (plan de adquisición del TIMT) no se lanza ningún
+        batch: se usan esas mediciones y se omiten los instrumentos descartados.
+        
+        Returns:
+            (layered_data, acquisition) - acquisition con tiempos por instrumento
+        """
+        
+        # Instrumentos distintos -> profundidades que los usan (orden estable)
+        instrument_depths, _ = self.plan_instruments()
+        skipped: Dict[str, str] = {}
+        
+        if prefetched is not None:
+            skipped = {
+                instrument: reason for instrument, reason in prefetched.skipped.items()
+                if instrument_depths.pop(instrument, None) is not None
+            }
+            results: Dict[str, Any] = dict(prefetched.results)
+            scheduling: Dict[str, Any] = prefetched.scheduling
+            wall_time_s = prefetched.wall_time_s
+            for instrument, reason in skipped.items():
+                logger.info(f"    ⏭️ {instrument}: Omitido ({reason})")
+            logger.info(f"  📡 {len(instrument_depths)} instrumentos ya adquiridos por el plan TIMT "
+                        f"({len(skipped)} omitidos)")
+        else:
+            logger.info(f"  📡 Adquiriendo {len(instrument_depths)} instrumentos distintos "
+                        f"para {len(self.depth_layers)} capas de profundidad...")
+            
+            results = {}
+            scheduling = {}
+            started = datetime.now()
+            
+            if instrument_depths:
+                scheduling = await self.fetch_instruments(
+                    bounds, list(instrument_depths),
+                    on_result=lambda result: results.__setitem__(result.instrument_name, result)
+                )
+            
+            wall_time_s = (datetime.now() - started).total_seconds()
+        
+        # Fan-out: cada medición a todas sus capas
+        measurements: Dict[str, Dict[str, Any]] = {}
+        instrument_timing: Dict[str, Dict[str, Any]] = {}
+        
+        for instrument, depths in instrument_depths.items():
+            result = results.get(instrument)
+            status = getattr(result, 'status', None)
+            instrument_timing[instrument] = {
+                'status': status.value if status is not None else 'NO_RESULT',
+                'processing_time_s': getattr(result, 'processing_time_s', None),
+                'depths': depths
+            }
             
-            layered_data[depth] = layer_data
+            # FIX CRÍTICO: Comparar con Enum, no con strings
+            if status in [InstrumentStatus.SUCCESS, InstrumentStatus.DEGRADED]:
+                measurements[instrument] = {
+                    'value': getattr(result, 'value', 0.0),
+                    'unit': getattr(result, 'unit', 'units'),
+                    'confidence': getattr(result, 'confidence', 0.5),
+                    'status': status.value  # Guardar como string
+                }
+                logger.info(f"    ✅ {instrument}: {measurements[instrument]['value']:.3f} → capas {depths}")
+            elif self._is_optional_sensor(instrument):
+                # FIX 3: Sensor fallido = NEUTRAL (no se agrega, no penaliza)
+                logger.info(f"    ⚠️ {instrument}: Opcional - sin datos (no penaliza)")
+            else:
+                logger.info(f"    ⚠️ {instrument}: Sin datos (neutral) - "
+                            f"status={instrument_timing[instrument]['status']}")
         
-        return layered_data
+        layered_data: Dict[float, Dict[str, Any]] = {}
+        for depth in self.depth_layers:
+            instruments = self.instrument_depth_mapping.get(depth, [])
+            if not instruments:
+                logger.info(f"    ⚠️ Sin instrumentos para {depth}m - usando inferencia")
+            layered_data[depth] = {
+                instrument: dict(measurements[instrument])
+                for instrument in instruments
+                if instrument in measurements
+            }
+        
+        sequential_time_s = sum(
+            timing['processing_time_s'] or 0.0 for timing in instrument_timing.values()
+        )
+        acquisition = {
+            'wall_time_s': round(wall_time_s, 3),
+            'sequential_time_s': round(sequential_time_s, 3),
+            'distinct_instruments': len(instrument_depths),
+            'instruments': instrument_timing,
+            'skipped': skipped,
+            'scheduling': scheduling
+        }
+        logger.info(f"  ⏱️ Adquisición: {wall_time_s:.2f}s "
+                    f"(suma por instrumento: {sequential_time_s:.2f}s)")
+        
+        return layered_data, acquisition
+    
     def _generate_xz_slice(self, layered_data: Dict[float, Dict[str, Any]], 
                           bounds: BoundingBox) -> TomographicSlice:
         """Generar corte longitudinal XZ (Este-Oeste con profundidad)."""
@@ -654,27 +795,32 @@ class ETProfileGenerator:
             logger.info(f"  📊 ESS Superficial: {result:.3f} ({len(anomaly_scores)}/{len(surface_data)} sensores válidos)")
         return result
     
-    def _calculate_instrumental_coverage(self, layered_data: Dict[float, Dict[str, Any]]) -> Dict[str, Any]:
+    def _calculate_instrumental_coverage(self, layered_data: Dict[float, Dict[str, Any]],
+                                         skipped: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """
         Calcular cobertura instrumental por tipo de sensor.
         
         IMPORTANTE: Esto mide disponibilidad de datos, NO anomalía estratigráfica.
         FIX QUIRÚRGICO: Si el sensor midió (SUCCESS), cuenta para cobertura.
+        Los instrumentos omitidos por el plan de adquisición no cuentan (igual
+        que los deshabilitados): no medirlos fue una decisión, no una falla.
         """
         
+        excluded = set(self.disabled_instruments) | set(skipped or {})
+        
         logger.info(f"  📊 Calculando cobertura instrumental...")
         
         coverage_by_type = {}
         
         for sensor_type, instruments in self.instrument_types.items():
             successful = 0
-            total = len([i for i in instruments if i not in self.disabled_instruments])
+            total = len([i for i in instruments if i not in excluded])
             
             logger.debug(f"    🔍 Tipo {sensor_type}: {total} instrumentos activos")
             
             for instrument in instruments:
-                if instrument in self.disabled_instruments:
-                    logger.debug(f"      ⏭️ {instrument}: deshabilitado")
+                if instrument in excluded:
+                    logger.debug(f"      ⏭️ {instrument}: deshabilitado u omitido")
                     continue
                 
                 # Buscar en cualquier profundidad
@@ -20,7 +20,6 @@ VALOR AGREGADO:
 Sin esto, el "subsuelo" sigue siendo probabilístico, no contextual.
 """
 
-import requests
 import numpy as np
 import logging
 from typing import Dict, List, Any, Optional, Tuple
@@ -28,6 +27,8 @@ from dataclasses import dataclass
 from enum import Enum
 import json
 
+from satellite_connectors.http_transport import connector_transport
+
 logger = logging.getLogger(__name__)
 
 class LithologyType(Enum):
@@ -201,7 +202,9 @@ class GeologicalContextSystem:
                 'format': 'json'
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            # Transporte async compartido: requests.get bloqueaba el event loop
+            # (y con él las demás fuentes de contexto del TCP)
+            response = await connector_transport.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
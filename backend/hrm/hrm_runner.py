@@ -43,6 +43,8 @@ config_dict = {
 # Path to checkpoint
 CHECKPOINT_DIR = HRM_ROOT / "checkpoints" / "maze-30x30-hard"
 CHECKPOINT_PATH = CHECKPOINT_DIR / "checkpoint"
+# Mismos pesos en safetensors (export_safetensors): se cargan memory-mapped
+SAFETENSORS_PATH = CHECKPOINT_DIR / "model.safetensors"
 
 # Ollama Configuration
 OLLAMA_URL = "http://localhost:11434/api/generate"
@@ -53,7 +55,55 @@ def debug_log(message: str):
     sys.stderr.write(f"🔍 [HRM] {message}\n")
     sys.stderr.flush()
 
-def load_models():
+def _normalize_state_dict_keys(state_dict):
+    """Quitar prefijos de torch.compile / wrapper de entrenamiento."""
+    new_state_dict = {}
+    for k, v in state_dict.items():
+        new_key = k
+        if new_key.startswith("_orig_mod."):
+            new_key = new_key.replace("_orig_mod.", "")
+        if new_key.startswith("model."):
+            new_key = new_key.replace("model.", "")
+        
+        new_state_dict[new_key] = v
+    return new_state_dict
+
+def resolve_weights_path(weights_path=None):
+    """Pesos a usar: explícitos, safetensors exportado (preferido) o checkpoint torch."""
+    if weights_path:
+        return Path(weights_path)
+    if SAFETENSORS_PATH.exists():
+        return SAFETENSORS_PATH
+    return CHECKPOINT_PATH
+
+def load_state_dict_cpu(path):
+    """
+    Leer pesos en CPU.
+    
+    - .safetensors: memory-mapped (safetensors.torch.load_file), sin copiar
+      el archivo completo al heap
+    - checkpoint torch: torch.load con mmap=True si la versión lo soporta
+    """
+    path = Path(path)
+    if path.suffix == ".safetensors":
+        from safetensors.torch import load_file
+        return load_file(str(path), device="cpu")
+    try:
+        return torch.load(path, map_location=torch.device('cpu'), mmap=True)
+    except (TypeError, RuntimeError):
+        # torch < 2.1 o checkpoint en formato legacy (no mapeable)
+        return torch.load(path, map_location=torch.device('cpu'))
+
+def export_safetensors(destination=None):
+    """Convertir el checkpoint torch a safetensors (una vez) para cargarlo con mmap."""
+    from safetensors.torch import save_file
+    destination = Path(destination) if destination else SAFETENSORS_PATH
+    state_dict = _normalize_state_dict_keys(load_state_dict_cpu(CHECKPOINT_PATH))
+    save_file({k: v.contiguous() for k, v in state_dict.items()}, str(destination))
+    debug_log(f"Pesos exportados a {destination}")
+    return destination
+
+def load_models(weights_path=None):
     debug_log("Cargando modelo HRM (Reasoning Core)...")
     start_time = time.time()
     
@@ -61,26 +111,19 @@ def load_models():
     hrm_model = HRMModel(config_dict=config_dict)
     
     # Load Checkpoint weights if available
-    if CHECKPOINT_PATH.exists():
-        debug_log(f"Cargando pesos desde {CHECKPOINT_PATH}...")
+    weights_path = resolve_weights_path(weights_path)
+    if weights_path.exists():
+        debug_log(f"Cargando pesos desde {weights_path}...")
         try:
             # Checkpoint might be a full state dict or wrapped
-            state_dict = torch.load(CHECKPOINT_PATH, map_location=torch.device('cpu'))
+            state_dict = load_state_dict_cpu(weights_path)
             
             # Debug keys
             item_key = next(iter(state_dict.keys()))
             debug_log(f"Sample checkpoint key: {item_key}")
             
             # Fix prefix mismatch
-            new_state_dict = {}
-            for k, v in state_dict.items():
-                new_key = k
-                if new_key.startswith("_orig_mod."):
-                    new_key = new_key.replace("_orig_mod.", "")
-                if new_key.startswith("model."):
-                    new_key = new_key.replace("model.", "")
-                
-                new_state_dict[new_key] = v
+            new_state_dict = _normalize_state_dict_keys(state_dict)
             
             keys = hrm_model.load_state_dict(new_state_dict, strict=False)
             debug_log(f"Pesos cargados. Missing: {len(keys.missing_keys)}, Unexpected: {len(keys.unexpected_keys)}")
@@ -121,82 +164,115 @@ def generate_response_ollama(prompt, temperature=0.3):
         # The original instruction had a problematic line here.
         # Reverting to the original behavior to maintain syntactic correctness.
 
-def generate_response(question, hrm_model, temperature=0.3, top_k=20, mode="scientific_strict", visualize_path=None):
-    debug_log(f"Analizando con HRM y Generando respuesta para: {question} [Modo: {mode}]")
+# Contexto latente que el paso HRM entrega al LLM
+LATENT_CONTEXT = "HRM Analysis: Estructura espacial verificada. Coherencia topológica alta."
+
+def build_hrm_inputs(question):
+    """
+    Input simulado compatible con Maze Checkpoint, shape [1, seq_len].
     
-    # 1. PASO DE RAZONAMIENTO JERÁRQUICO (HRM)
-    # Mapping determinista pregunta -> semilla visual/espacial (Maze latent space)
+    Mapping determinista pregunta -> semilla visual/espacial (Maze latent space).
+    Usa un generador propio (no el global de torch): el resultado no depende
+    de qué otras preguntas comparten el batch.
+    """
     seed_val = int(hashlib.sha256(question.encode('utf-8')).hexdigest(), 16) % (2**32)
-    torch.manual_seed(seed_val)
-    
-    # Input simulado compatible con Maze Checkpoint
-    hrm_input_ids = torch.randint(0, 6, (1, config_dict["seq_len"]))
-    
-    latent_context = "N/A"
+    generator = torch.Generator().manual_seed(seed_val)
+    return torch.randint(0, 6, (1, config_dict["seq_len"]), generator=generator)
+
+def build_hrm_batch(questions):
+    """Inputs de varias preguntas apilados en un batch [N, seq_len]."""
+    return torch.cat([build_hrm_inputs(q) for q in questions], dim=0)
+
+def run_hrm_batch(hrm_model, hrm_input_ids):
+    """Un forward pass HRM para un batch [N, seq_len]; devuelve el carry."""
+    batch_size = hrm_input_ids.shape[0]
     
     # Simular paso de razonamiento (H-level planning)
     with torch.no_grad():
         carry = hrm_model.initial_carry({
             "inputs": hrm_input_ids,
-            "puzzle_identifiers": torch.zeros(1, dtype=torch.int32)
+            "puzzle_identifiers": torch.zeros(batch_size, dtype=torch.int32)
         })
         
         # Ejecutar forward pass
         carry, hrm_outputs = hrm_model(carry, {
             "inputs": hrm_input_ids,
-            "puzzle_identifiers": torch.zeros(1, dtype=torch.int32)
+            "puzzle_identifiers": torch.zeros(batch_size, dtype=torch.int32)
         })
+    return carry
+
+def extract_activity(carry, index=0):
+    """Estado oculto representativo (Carry "z_H") de un elemento del batch, o None."""
+    # carry.inner_carry.z_H has shape [batch, seq_len, hidden_size]
+    # Intentar acceso por atributo (Dataclass) - Preferido
+    if hasattr(carry, "inner_carry") and hasattr(carry.inner_carry, "z_H"):
+        return carry.inner_carry.z_H[index, 0].detach().cpu().numpy()
+    # Intentar acceso por índice (Tuple) - Fallback si es un tuple/namedtuple
+    if isinstance(carry, (tuple, list)) and len(carry) > 0:
+        inner = carry[0]
+        if hasattr(inner, "z_H"):
+            return inner.z_H[index, 0].detach().cpu().numpy()
+        if isinstance(inner, (tuple, list)) and len(inner) > 0:
+            return inner[0][index, 0].detach().cpu().numpy()
+    return None
+
+def render_activity_heatmap(activity, visualize_path):
+    """
+    Imagen mental (heatmap) de la activación HRM.
+    
+    Corre en hilos (asyncio.to_thread): Figure + FigureCanvasAgg propios,
+    sin el estado global de pyplot.
+    """
+    try:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        
+        if activity is None:
+            debug_log("⚠️ Estructura de carry inesperada, saltando visualización")
+            raise AttributeError("Unexpected carry structure")
+        
+        # Reshape a 16x32 para aspecto de "mapa"
+        grid_h, grid_w = 16, 32
+        heatmap_data = activity[:grid_h*grid_w].reshape(grid_h, grid_w)
+        
+        # Normalizar
+        heatmap_data = (heatmap_data - heatmap_data.min()) / (heatmap_data.max() - heatmap_data.min() + 1e-8)
         
-        # En una integración completa, extraeríamos el estado oculto (z_H) para condicionar al LLM.
-        # Por ahora, usamos el hecho de que el HRM procesó la estructura como "validador de complejidad".
-        debug_log(f"Paso de razonamiento jerárquico HRM completado (Deep Thinking Layers: {config_dict['H_layers']})")
-        latent_context = "HRM Analysis: Estructura espacial verificada. Coherencia topológica alta."
+        fig = Figure(figsize=(10, 5))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        image = ax.imshow(heatmap_data, cmap='inferno', aspect='auto')
+        ax.set_title("HRM Neural Activation (Spatial Reasoning Layer)")
+        fig.colorbar(image, ax=ax, label="Activation Intensity")
+        ax.axis('off')
+        
+        # Guardar
+        fig.savefig(visualize_path, bbox_inches='tight', dpi=100)
+        debug_log(f"Visualización guardada en {visualize_path}")
+        
+    except Exception as e:
+        debug_log(f"⚠️ Error generando visualización: {e}")
 
+def generate_response(question, hrm_model, temperature=0.3, top_k=20, mode="scientific_strict", visualize_path=None):
+    debug_log(f"Analizando con HRM y Generando respuesta para: {question} [Modo: {mode}]")
+    
+    # 1. PASO DE RAZONAMIENTO JERÁRQUICO (HRM)
+    carry = run_hrm_batch(hrm_model, build_hrm_inputs(question))
+    
+    # En una integración completa, extraeríamos el estado oculto (z_H) para condicionar al LLM.
+    # Por ahora, usamos el hecho de que el HRM procesó la estructura como "validador de complejidad".
+    debug_log(f"Paso de razonamiento jerárquico HRM completado (Deep Thinking Layers: {config_dict['H_layers']})")
+    
+    return generate_response_from_activity(question, extract_activity(carry), temperature,
+                                           mode=mode, visualize_path=visualize_path)
+
+def generate_response_from_activity(question, activity, temperature=0.3, mode="scientific_strict",
+                                    visualize_path=None, latent_context=LATENT_CONTEXT):
+    """Pasos 2-3 a partir de la activación HRM ya calculada (p. ej. por hrm_server)."""
+    
     # 2. GENERACIÓN DE IMAGEN MENTAL (HEATMAP)
     if visualize_path:
-        try:
-            import matplotlib.pyplot as plt
-            import numpy as np
-            
-            # Extraer estado oculto representativo (Carry "z_H")
-            # carry.inner_carry.z_H has shape [batch, seq_len, hidden_size]
-            activity = None
-            
-            # Intentar acceso por atributo (Dataclass) - Preferido
-            if hasattr(carry, "inner_carry") and hasattr(carry.inner_carry, "z_H"):
-                activity = carry.inner_carry.z_H[0, 0].detach().cpu().numpy()
-            # Intentar acceso por índice (Tuple) - Fallback si es un tuple/namedtuple
-            elif isinstance(carry, (tuple, list)) and len(carry) > 0:
-                inner = carry[0]
-                if hasattr(inner, "z_H"):
-                    activity = inner.z_H[0, 0].detach().cpu().numpy()
-                elif isinstance(inner, (tuple, list)) and len(inner) > 0:
-                    activity = inner[0][0, 0].detach().cpu().numpy()
-            
-            if activity is None:
-                debug_log(f"⚠️ Estructura de carry inesperada ({type(carry)}), saltando visualización")
-                raise AttributeError("Unexpected carry structure")
-            
-            # Reshape a 16x32 para aspecto de "mapa"
-            grid_h, grid_w = 16, 32
-            heatmap_data = activity[:grid_h*grid_w].reshape(grid_h, grid_w)
-            
-            # Normalizar
-            heatmap_data = (heatmap_data - heatmap_data.min()) / (heatmap_data.max() - heatmap_data.min() + 1e-8)
-            
-            plt.figure(figsize=(10, 5))
-            plt.imshow(heatmap_data, cmap='inferno', aspect='auto')
-            plt.title("HRM Neural Activation (Spatial Reasoning Layer)")
-            plt.colorbar(label="Activation Intensity")
-            plt.axis('off')
-            
-            # Guardar
-            plt.savefig(visualize_path, bbox_inches='tight', dpi=100)
-            plt.close()
-            debug_log(f"Visualización guardada en {visualize_path}")
-            
-        except Exception as e:
-            debug_log(f"⚠️ Error generando visualización: {e}")
+        render_activity_heatmap(activity, visualize_path)
 
     # 3. GENERACIÓN DE RESPUESTA (OLLAMA / QWEN)
     # Prompt estructurado según el modo
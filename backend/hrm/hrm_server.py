@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+HRM Inference Server - Modelo HRM residente con inferencia por lotes (CPU)
+==========================================================================
+
+Antes cada motor TIMT cargaba el checkpoint (torch.load + reescritura de
+claves + HRMModel) y cada análisis hacía su propio forward pass síncrono.
+
+Ahora:
+- Un worker thread por proceso carga los pesos UNA vez (safetensors
+  memory-mapped si existe checkpoints/.../model.safetensors, ver
+  hrm_runner.export_safetensors) y queda residente
+- Los análisis concurrentes encolan su pregunta (submit / await infer);
+  el worker junta hasta max_batch_size pedidos esperando como mucho
+  max_wait_ms desde el primero y hace UN forward pass para todo el lote
+- Solo CPU: pesos con map_location cpu, hilos de torch acotados
+  (HRM_CPU_THREADS)
+- Métricas: profundidad de cola, tamaño de lote, espera en cola, forward y
+  latencia total (get_stats() y histogramas Prometheus vía pipeline_tracing)
+
+torch se importa dentro del worker: importar este módulo es barato.
+
+Uso:
+    from hrm.hrm_server import hrm_inference_server
+    hrm_inference_server.start()                      # carga en background
+    latent = await hrm_inference_server.infer(question)
+    latent['activity']                                # z_H[0] (numpy)
+
+Exportar pesos a safetensors (una vez):
+    python hrm/hrm_server.py export-safetensors
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Backend en el path (pipeline_tracing)
+BACKEND_ROOT = Path(__file__).parent.parent.absolute()
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from pipeline_tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass
+class _HRMRequest:
+    """Pedido encolado (pregunta + future que resuelve el worker)"""
+    question: str
+    future: concurrent.futures.Future = field(default_factory=concurrent.futures.Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class HRMInferenceServer:
+    """Modelo HRM residente en un worker thread con batching de pedidos concurrentes"""
+
+    def __init__(
+        self,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 20.0,
+        num_threads: Optional[int] = None,
+        weights_path: Optional[str] = None,
+        latency_window: int = 512
+    ):
+        """
+        Args:
+            max_batch_size: Pedidos máximos por forward pass
+            max_wait_ms: Espera máxima desde el primer pedido para completar el lote
+            num_threads: Hilos de CPU para torch (None = torch decide)
+            weights_path: Pesos explícitos (.safetensors o checkpoint torch)
+            latency_window: Pedidos recientes usados para percentiles de latencia
+        """
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self.num_threads = num_threads
+        self.weights_path = weights_path
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._model = None
+        self._runner = None
+        self._load_error: Optional[str] = None
+
+        self._latencies_ms: deque = deque(maxlen=latency_window)
+        self.stats = {
+            'requests': 0,
+            'completed': 0,
+            'failed': 0,
+            'batches': 0,
+            'max_batch_seen': 0,
+            'load_time_s': None,
+            'last_batch_size': 0,
+            'last_forward_ms': 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self) -> "HRMInferenceServer":
+        """Arrancar el worker (idempotente). La carga del modelo ocurre en el worker."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="hrm-inference", daemon=True)
+                self._thread.start()
+        return self
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Esperar a que el modelo esté cargado. False si falló o venció el timeout."""
+        self._ready.wait(timeout)
+        return self.is_ready
+
+    @property
+    def is_ready(self) -> bool:
+        return self._model is not None
+
+    @property
+    def available(self) -> bool:
+        """Arrancado y sin error de carga (puede estar cargando todavía)"""
+        return self._thread is not None and self._load_error is None
+
+    def close(self, timeout: float = 5.0):
+        """Detener el worker; los pedidos encolados se resuelven antes de salir."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # API de inferencia
+    # ------------------------------------------------------------------
+
+    def submit(self, question: str) -> concurrent.futures.Future:
+        """Encolar una pregunta; el future resuelve a {'activity', 'batch_size', ...}."""
+        if self._load_error is not None:
+            raise RuntimeError(f"HRM no disponible: {self._load_error}")
+        self.start()
+        request = _HRMRequest(question)
+        with self._lock:
+            self.stats['requests'] += 1
+        self._queue.put(request)
+        return request.future
+
+    async def infer(self, question: str) -> Dict[str, Any]:
+        """Versión async de submit (no bloquea el event loop)."""
+        return await asyncio.wrap_future(self.submit(question))
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        started = time.perf_counter()
+        import torch
+        from hrm import hrm_runner
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        self._runner = hrm_runner
+        self._model = hrm_runner.load_models(self.weights_path)
+        self.stats['load_time_s'] = round(time.perf_counter() - started, 3)
+        logger.info(f"🧠 HRM residente cargado en {self.stats['load_time_s']:.2f}s "
+                    f"(CPU, lote ≤{self.max_batch_size}, ventana {self.max_wait_s * 1000:.0f}ms)")
+
+    def _worker(self):
+        try:
+            if self._model is None:
+                self._load()
+        except BaseException as e:  # hrm_runner hace sys.exit si faltan dependencias
+            self._load_error = f"{type(e).__name__}: {e}"
+            logger.error(f"❌ No se pudo cargar HRM: {self._load_error}")
+        finally:
+            self._ready.set()
+
+        while True:
+            batch, stop = self._collect_batch()
+            if batch:
+                if self._load_error is not None:
+                    self._fail(batch, RuntimeError(f"HRM no disponible: {self._load_error}"))
+                else:
+                    self._run_batch(batch)
+            if stop:
+                return
+
+    def _collect_batch(self):
+        """Primer pedido (bloqueante) + los que lleguen dentro de la ventana max_wait."""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch: List[_HRMRequest] = [first]
+        deadline = time.perf_counter() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run_batch(self, batch: List[_HRMRequest]):
+        started = time.perf_counter()
+        try:
+            inputs = self._runner.build_hrm_batch([r.question for r in batch])
+            carry = self._runner.run_hrm_batch(self._model, inputs)
+            activities = [self._runner.extract_activity(carry, i) for i in range(len(batch))]
+        except Exception as e:
+            logger.error(f"❌ Error en forward HRM (lote {len(batch)}): {e}")
+            self._fail(batch, e)
+            return
+
+        finished = time.perf_counter()
+        forward_s = finished - started
+        self.stats['batches'] += 1
+        self.stats['last_batch_size'] = len(batch)
+        self.stats['max_batch_seen'] = max(self.stats['max_batch_seen'], len(batch))
+        self.stats['last_forward_ms'] = round(forward_s * 1000, 2)
+        tracer.observe("hrm", "forward", forward_s)
+
+        for request, activity in zip(batch, activities):
+            queue_wait_s = started - request.enqueued_at
+            latency_s = finished - request.enqueued_at
+            self._latencies_ms.append(latency_s * 1000)
+            tracer.observe("hrm", "queue_wait", queue_wait_s)
+            tracer.observe("hrm", "request", latency_s)
+            self.stats['completed'] += 1
+            self._resolve(request.future, result={
+                'activity': activity,
+                'batch_size': len(batch),
+                'queue_wait_ms': round(queue_wait_s * 1000, 2),
+                'forward_ms': round(forward_s * 1000, 2),
+                'latency_ms': round(latency_s * 1000, 2)
+            })
+
+    def _fail(self, batch: List[_HRMRequest], error: BaseException):
+        self.stats['failed'] += len(batch)
+        for request in batch:
+            self._resolve(request.future, error=error)
+
+    @staticmethod
+    def _resolve(future: concurrent.futures.Future, result: Any = None, error: Optional[BaseException] = None):
+        # El análisis pudo cancelar su espera mientras el lote corría
+        if not future.set_running_or_notify_cancel():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado, profundidad de cola, lotes y percentiles de latencia (ms)."""
+        latencies = np.array(self._latencies_ms) if self._latencies_ms else None
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'status': ('ready' if self.is_ready else 'failed' if self._load_error
+                       else 'loading' if self._thread is not None else 'stopped'),
+            'load_error': self._load_error,
+            'queue_depth': self._queue.qsize(),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_s * 1000,
+            'avg_batch_size': round(self.stats['completed'] / batches, 2) if batches else 0.0,
+            'latency_ms': {
+                'p50': round(float(np.percentile(latencies, 50)), 2),
+                'p95': round(float(np.percentile(latencies, 95)), 2),
+                'max': round(float(latencies.max()), 2)
+            } if latencies is not None else {}
+        }
+
+
+# Instancia global (un modelo residente por proceso)
+hrm_inference_server = HRMInferenceServer(
+    max_batch_size=int(os.getenv("HRM_MAX_BATCH_SIZE", "8")),
+    max_wait_ms=float(os.getenv("HRM_MAX_WAIT_MS", "20")),
+    num_threads=int(os.getenv("HRM_CPU_THREADS", "0")) or None,
+    weights_path=os.getenv("HRM_WEIGHTS_PATH") or None
+)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "export-safetensors":
+        from hrm.hrm_runner import export_safetensors
+        print(export_safetensors(sys.argv[2] if len(sys.argv) > 2 else None))
+    else:
+        print("Uso: python hrm/hrm_server.py export-safetensors [destino]")
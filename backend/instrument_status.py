@@ -151,6 +151,7 @@ class InstrumentBatch:
         self.results: List[InstrumentResult] = []
         self.start_time = None
         self.end_time = None
+        self.scheduling: Dict[str, Any] = {}  # resumen del planificador (orden, hedges, salida temprana)
     
     def add_result(self, result: InstrumentResult):
         """Agregar resultado de instrumento."""
@@ -189,6 +190,24 @@ class InstrumentBatch:
         
         return achieved_weight / total_weight if total_weight > 0 else 0.0
     
+    def get_projected_coverage(self, total_instruments: int) -> float:
+        """
+        Coverage sobre el total solicitado, contando los pendientes como 0.
+        
+        Coincide con get_coverage_score() una vez que todos los instrumentos
+        tienen resultado; permite decidir una salida temprana del batch.
+        """
+        pending = max(total_instruments - len(self.results), 0)
+        if not self.results:
+            return 0.0
+        
+        achieved = self.get_coverage_score()
+        total_weight = sum(
+            1.5 if r.instrument_name.lower() in ['sentinel-2', 'icesat-2', 'landsat'] else 1.0
+            for r in self.results
+        )
+        return achieved * total_weight / (total_weight + pending)
+    
     def get_status_summary(self) -> Dict[str, int]:
         """Obtener resumen de estados."""
         summary = {status.value: 0 for status in InstrumentStatus}
@@ -230,7 +249,8 @@ class InstrumentBatch:
             "failed_rate": (status_summary["FAILED"] + status_summary["INVALID"] + 
                            status_summary["UNAVAILABLE"] + status_summary["TIMEOUT"] + 
                            status_summary["NO_DATA"]) / len(self.results) if self.results else 0.0,
-            "instruments": [result.to_dict() for result in self.results]
+            "instruments": [result.to_dict() for result in self.results],
+            "scheduling": self.scheduling
         }
 
 def create_instrument_result_from_api_data(instrument_name: str, 
@@ -0,0 +1,359 @@
+"""
+Tracing y Métricas del Pipeline - ArcheoScope
+==============================================
+
+Spans livianos (context managers y decoradores) para fases del pipeline,
+conectores satelitales y repositorios de BD, con:
+
+- Histogramas de latencia por (kind, name) exportados en formato Prometheus
+  (`GET /metrics`)
+- Resumen tipo flame graph por request cuando el cliente envía el header
+  `X-ArcheoScope-Debug: trace`
+
+Los spans anidan automáticamente vía contextvars, incluso a través de
+tareas asyncio y `asyncio.to_thread` (ambos copian el contexto).
+
+Desactivado con `ARCHEOSCOPE_TRACING=0`: `span()` retorna un objeto no-op
+compartido y `traced()` deja la función original sin envolver.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Header que activa el resumen por request
+DEBUG_TRACE_HEADER = "x-archeoscope-debug"
+DEBUG_TRACE_VALUES = ("1", "true", "trace")
+
+# Buckets (segundos): desde fases numpy (ms) hasta descargas satelitales (min)
+DEFAULT_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                     1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Spans por request a partir de los cuales se deja de registrar el árbol
+MAX_SPANS_PER_TRACE = 5000
+
+
+class SpanHistogram:
+    """Histograma acumulativo de duraciones (no thread-safe, lo protege el tracer)."""
+
+    __slots__ = ('counts', 'sum', 'count', 'errors')
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * (n_buckets + 1)  # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+
+class SpanRecord:
+    """Nodo del árbol de spans de un request."""
+
+    __slots__ = ('kind', 'name', 'start', 'duration', 'error', 'children')
+
+    def __init__(self, kind: str, name: str, start: float):
+        self.kind = kind
+        self.name = name
+        self.start = start
+        self.duration = 0.0
+        self.error = False
+        self.children: List['SpanRecord'] = []
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            'span': f"{self.kind}:{self.name}",
+            'start_ms': round((self.start - origin) * 1000, 2),
+            'duration_ms': round(self.duration * 1000, 2),
+            'error': self.error,
+            'children': [c.to_dict(origin) for c in self.children]
+        }
+
+
+class RequestTrace:
+    """Spans registrados durante un request con debug activo."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.roots: List[SpanRecord] = []
+        self.span_count = 0
+
+    def flame_summary(self) -> Dict[str, Any]:
+        """
+        Resumen tipo flame graph.
+
+        - `tree`: árbol de spans con offsets relativos al inicio del request
+        - `collapsed`: stacks colapsados `a;b;c <self_ms>` (formato flamegraph.pl)
+        - `top`: spans con mayor tiempo propio
+        """
+        collapsed: Dict[str, float] = {}
+
+        def walk(node: SpanRecord, prefix: str):
+            stack = f"{prefix};{node.kind}:{node.name}" if prefix else f"{node.kind}:{node.name}"
+            # Tiempo propio: hijos concurrentes pueden superar al padre
+            self_time = max(0.0, node.duration - sum(c.duration for c in node.children))
+            collapsed[stack] = collapsed.get(stack, 0.0) + self_time
+            for child in node.children:
+                walk(child, stack)
+
+        for root in self.roots:
+            walk(root, "")
+
+        top = sorted(collapsed.items(), key=lambda kv: kv[1], reverse=True)[:10]
+        return {
+            'total_ms': round((time.perf_counter() - self.start) * 1000, 2),
+            'span_count': self.span_count,
+            'truncated': self.span_count >= MAX_SPANS_PER_TRACE,
+            'tree': [r.to_dict(self.start) for r in self.roots],
+            'collapsed': [f"{stack} {ms * 1000:.2f}" for stack, ms in collapsed.items()],
+            'top': [{'stack': stack, 'self_ms': round(s * 1000, 2)} for stack, s in top]
+        }
+
+    def server_timing(self) -> str:
+        """Header `Server-Timing` con los spans de primer nivel."""
+        entries = []
+        for root in self.roots[:20]:
+            metric = f"{root.kind}-{root.name}".replace(' ', '_').replace(';', '_').replace(',', '_')
+            entries.append(f"{metric};dur={root.duration * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar(
+    'archeoscope_trace', default=None
+)
+_current_span: contextvars.ContextVar[Optional[SpanRecord]] = contextvars.ContextVar(
+    'archeoscope_span', default=None
+)
+
+
+class _NullSpan:
+    """Span no-op compartido (tracing desactivado)."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Span activo: mide, alimenta el histograma y (con debug) el árbol del request."""
+
+    __slots__ = ('tracer', 'kind', 'name', 'start', 'record', 'token')
+
+    def __init__(self, tracer: 'PipelineTracer', kind: str, name: str):
+        self.tracer = tracer
+        self.kind = kind
+        self.name = name
+        self.record = None
+        self.token = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        trace = _current_trace.get()
+        if trace is not None and trace.span_count < MAX_SPANS_PER_TRACE:
+            trace.span_count += 1
+            self.record = SpanRecord(self.kind, self.name, self.start)
+            parent = _current_span.get()
+            (parent.children if parent is not None else trace.roots).append(self.record)
+            self.token = _current_span.set(self.record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        error = exc_type is not None and not issubclass(exc_type, (GeneratorExit, asyncio.CancelledError))
+        if self.record is not None:
+            self.record.duration = duration
+            self.record.error = error
+            try:
+                _current_span.reset(self.token)
+            except ValueError:
+                # Salida desde otro contexto (p.ej. generador cerrado desde otra tarea)
+                _current_span.set(None)
+        self.tracer.observe(self.kind, self.name, duration, error)
+        return False
+
+
+class PipelineTracer:
+    """
+    Registro central de spans e histogramas.
+
+    Uso:
+        with tracer.span("phase", "phase_b_anomaly"):
+            ...
+
+        @tracer.traced("db")
+        async def save(...): ...
+    """
+
+    def __init__(self, enabled: Optional[bool] = None,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS_S):
+        if enabled is None:
+            enabled = os.getenv("ARCHEOSCOPE_TRACING", "1").lower() not in ("0", "false", "no")
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[Tuple[str, str], SpanHistogram] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Spans
+    # ------------------------------------------------------------------
+
+    def span(self, kind: str, name: str):
+        """Context manager que mide un bloque (sync o dentro de una corrutina)."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, kind, name)
+
+    def traced(self, kind: str, name: Optional[str] = None) -> Callable:
+        """
+        Decorador de spans para funciones sync y async.
+
+        Con tracing desactivado retorna la función sin envolver (costo cero).
+        """
+        def decorator(func: Callable) -> Callable:
+            if not self.enabled:
+                return func
+            span_name = name or func.__qualname__
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with _Span(self, kind, span_name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                with _Span(self, kind, span_name):
+                    return func(*args, **kwargs)
+            return sync_wrapper
+
+        return decorator
+
+    def instrument_methods(self, cls: type, kind: str) -> type:
+        """Envolver con spans todos los métodos async públicos de una clase (repositorios)."""
+        if not self.enabled:
+            return cls
+        for attr, value in list(vars(cls).items()):
+            if not attr.startswith('_') and inspect.iscoroutinefunction(value):
+                setattr(cls, attr, self.traced(kind, f"{cls.__name__}.{attr}")(value))
+        return cls
+
+    def observe(self, kind: str, name: str, duration_s: float, error: bool = False):
+        """Registrar una duración en el histograma (kind, name)."""
+        index = bisect_left(self.buckets, duration_s)
+        with self._lock:
+            histogram = self._histograms.get((kind, name))
+            if histogram is None:
+                histogram = self._histograms[(kind, name)] = SpanHistogram(len(self.buckets))
+            histogram.counts[index] += 1
+            histogram.sum += duration_s
+            histogram.count += 1
+            if error:
+                histogram.errors += 1
+
+    # ------------------------------------------------------------------
+    # Trazas por request
+    # ------------------------------------------------------------------
+
+    def start_request_trace(self) -> Tuple[RequestTrace, Any]:
+        """Activar el árbol de spans para el contexto actual (request con debug)."""
+        trace = RequestTrace()
+        return trace, (_current_trace.set(trace), _current_span.set(None))
+
+    def end_request_trace(self, tokens: Any):
+        trace_token, span_token = tokens
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+    # ------------------------------------------------------------------
+    # Exportación
+    # ------------------------------------------------------------------
+
+    def render_prometheus(self) -> str:
+        """Histogramas en formato de exposición de texto de Prometheus."""
+        with self._lock:
+            snapshot = [
+                (key, list(h.counts), h.sum, h.count, h.errors)
+                for key, h in sorted(self._histograms.items())
+            ]
+
+        lines = [
+            "# HELP archeoscope_span_duration_seconds Duración de spans del pipeline (fases, conectores, BD)",
+            "# TYPE archeoscope_span_duration_seconds histogram"
+        ]
+        for (kind, name), counts, total, count, _ in snapshot:
+            labels = f'kind="{_escape_label(kind)}",name="{_escape_label(name)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'archeoscope_span_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'archeoscope_span_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'archeoscope_span_duration_seconds_sum{{{labels}}} {total:.6f}')
+            lines.append(f'archeoscope_span_duration_seconds_count{{{labels}}} {count}')
+
+        lines.append("# HELP archeoscope_span_errors_total Spans terminados con excepción")
+        lines.append("# TYPE archeoscope_span_errors_total counter")
+        for (kind, name), _, _, _, errors in snapshot:
+            lines.append(
+                f'archeoscope_span_errors_total{{kind="{_escape_label(kind)}",name="{_escape_label(name)}"}} {errors}'
+            )
+        return "\n".join(lines) + "\n"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Resumen JSON (count, media, p50/p95 aproximados por bucket)."""
+        with self._lock:
+            items = [(key, list(h.counts), h.sum, h.count, h.errors) for key, h in self._histograms.items()]
+
+        stats = {}
+        for (kind, name), counts, total, count, errors in items:
+            stats[f"{kind}:{name}"] = {
+                'count': count,
+                'errors': errors,
+                'mean_s': total / count if count else 0.0,
+                'p50_s': self._bucket_quantile(counts, count, 0.50),
+                'p95_s': self._bucket_quantile(counts, count, 0.95)
+            }
+        return stats
+
+    def _bucket_quantile(self, counts: List[int], count: int, q: float) -> Optional[float]:
+        if not count:
+            return None
+        target = q * count
+        cumulative = 0
+        for i, bucket_count in enumerate(counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def is_debug_trace_requested(headers: Any) -> bool:
+    """True si el request pidió el resumen de spans (header de debug)."""
+    value = headers.get(DEBUG_TRACE_HEADER)
+    return bool(value) and value.lower() in DEBUG_TRACE_VALUES
+
+
+# Instancia global
+tracer = PipelineTracer()
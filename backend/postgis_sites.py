@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+PostGIS para archaeological_sites - ArcheoScope
+===============================================
+
+Migración, fragmentos SQL y consultas espaciales compartidos por
+`ArcheoScopeDB` y el endpoint científico (`/api/scientific/sites/layer`,
+`/sites/nearby`, `/sites/nearest`).
+
+La migración:
+- Habilita la extensión PostGIS
+- Agrega `geom geometry(Point, 4326)` y la rellena desde latitude/longitude
+- Mantiene `geom` sincronizada con un trigger (inserts de Prisma/scripts)
+- Crea índices GiST sobre `geom` (bbox `&&`) y `geom::geography`
+  (radio `ST_DWithin` y k-NN `<->` en metros)
+- Crea un índice btree con el orden de la capa del mapa, para que a zoom
+  continental el LIMIT corte sin ordenar todo el bbox
+
+Es idempotente: se puede ejecutar en cada despliegue.
+
+Uso:
+    python postgis_sites.py            # aplica la migración sobre DATABASE_URL
+"""
+
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SITES_TABLE = "archaeological_sites"
+
+MIGRATION_STEPS: Sequence[Tuple[str, str]] = (
+    ("extension", "CREATE EXTENSION IF NOT EXISTS postgis"),
+    ("column", f"""
+        ALTER TABLE {SITES_TABLE}
+        ADD COLUMN IF NOT EXISTS geom geometry(Point, 4326)
+    """),
+    ("backfill", f"""
+        UPDATE {SITES_TABLE}
+        SET geom = ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)
+        WHERE latitude IS NOT NULL
+          AND longitude IS NOT NULL
+          AND (geom IS NULL
+               OR ST_X(geom) IS DISTINCT FROM longitude
+               OR ST_Y(geom) IS DISTINCT FROM latitude)
+    """),
+    ("trigger_function", f"""
+        CREATE OR REPLACE FUNCTION {SITES_TABLE}_sync_geom() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.latitude IS NULL OR NEW.longitude IS NULL THEN
+                NEW.geom := NULL;
+            ELSE
+                NEW.geom := ST_SetSRID(ST_MakePoint(NEW.longitude, NEW.latitude), 4326);
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """),
+    ("trigger", f"""
+        DROP TRIGGER IF EXISTS trg_{SITES_TABLE}_geom ON {SITES_TABLE};
+        CREATE TRIGGER trg_{SITES_TABLE}_geom
+            BEFORE INSERT OR UPDATE OF latitude, longitude ON {SITES_TABLE}
+            FOR EACH ROW EXECUTE FUNCTION {SITES_TABLE}_sync_geom()
+    """),
+    ("gist_geometry", f"""
+        CREATE INDEX IF NOT EXISTS idx_{SITES_TABLE}_geom
+        ON {SITES_TABLE} USING GIST (geom)
+    """),
+    ("gist_geography", f"""
+        CREATE INDEX IF NOT EXISTS idx_{SITES_TABLE}_geog
+        ON {SITES_TABLE} USING GIST ((geom::geography))
+    """),
+    ("layer_order", f"""
+        CREATE INDEX IF NOT EXISTS idx_{SITES_TABLE}_layer_order
+        ON {SITES_TABLE} ("confidenceLevel" DESC, "createdAt" DESC)
+    """),
+)
+
+# Columnas de detalle de archaeological_sites (búsquedas espaciales)
+SITE_DETAIL_COLUMNS = '''
+                    id,
+                    name,
+                    slug,
+                    "environmentType" as environment_type,
+                    "siteType" as site_type,
+                    "confidenceLevel" as confidence_level,
+                    latitude,
+                    longitude,
+                    country,
+                    region,
+                    period,
+                    "dateRangeStart" as date_range_start,
+                    "dateRangeEnd" as date_range_end,
+                    "unescoId" as unesco_id,
+                    description,
+                    "isReferencesite" as is_reference,
+                    "isControlSite" as is_control'''
+
+# Punto de consulta (lon, lat) como geography
+_POINT_GEOGRAPHY = "ST_SetSRID(ST_MakePoint(${lon}, ${lat}), 4326)::geography"
+
+
+async def apply_site_geometry_migration(conn) -> None:
+    """Aplicar la migración PostGIS (idempotente) en una transacción"""
+    async with conn.transaction():
+        for name, statement in MIGRATION_STEPS:
+            await conn.execute(statement)
+            logger.info(f"🗺️ Migración PostGIS: {name} OK")
+    # ANALYZE fuera de la transacción para que el planner vea el índice nuevo
+    await conn.execute(f"ANALYZE {SITES_TABLE}")
+
+
+async def has_site_geometry(conn) -> bool:
+    """True si archaeological_sites tiene la columna geom (migración aplicada)"""
+    try:
+        return bool(await conn.fetchval(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = $1 AND column_name = 'geom'
+            )
+            """,
+            SITES_TABLE
+        ))
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo verificar columna geom: {e}")
+        return False
+
+
+# ============================================================================
+# FRAGMENTOS SQL
+# ============================================================================
+
+def radius_clause(lat_param: int, lon_param: int, radius_param: int) -> str:
+    """`geom` a menos de $radius metros del punto (usa el índice geography)"""
+    point = _POINT_GEOGRAPHY.format(lat=lat_param, lon=lon_param)
+    return f"ST_DWithin(geom::geography, {point}, ${radius_param})"
+
+
+def distance_km_expression(lat_param: int, lon_param: int) -> str:
+    """Distancia geodésica (km) de `geom` al punto"""
+    point = _POINT_GEOGRAPHY.format(lat=lat_param, lon=lon_param)
+    return f"ST_Distance(geom::geography, {point}) / 1000.0"
+
+
+def knn_order_expression(lat_param: int, lon_param: int) -> str:
+    """Expresión ORDER BY para k-NN indexado (operador `<->`)"""
+    point = _POINT_GEOGRAPHY.format(lat=lat_param, lon=lon_param)
+    return f"geom::geography <-> {point}"
+
+
+def bbox_clause(first_param: int, lat_min: float, lon_min: float,
+                lat_max: float, lon_max: float) -> Tuple[str, List[float]]:
+    """
+    Filtro `geom && envelope` para un bbox en grados
+
+    Si lon_min > lon_max el bbox cruza el antimeridiano y se parte en dos
+    envelopes.
+
+    Returns:
+        (cláusula SQL, parámetros en orden a partir de `first_param`)
+    """
+    def envelope(p: int) -> str:
+        return f"geom && ST_MakeEnvelope(${p}, ${p + 1}, ${p + 2}, ${p + 3}, 4326)"
+
+    if lon_min <= lon_max:
+        return envelope(first_param), [lon_min, lat_min, lon_max, lat_max]
+
+    clause = f"({envelope(first_param)} OR {envelope(first_param + 4)})"
+    return clause, [lon_min, lat_min, 180.0, lat_max, -180.0, lat_min, lon_max, lat_max]
+
+
+async def estimate_row_count(conn, query: str, *params: Any) -> Optional[int]:
+    """
+    Filas estimadas por el planner para `query` (sin ejecutarla)
+
+    Sustituye al `COUNT(*)` exacto cuando el resultado supera el límite:
+    evita el segundo barrido del bbox.
+    """
+    try:
+        plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *params)
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.warning(f"⚠️ Estimación de filas no disponible: {e}")
+        return None
+
+
+# ============================================================================
+# CONSULTAS ESPACIALES
+# ============================================================================
+
+async def fetch_sites_within_radius(conn, lat: float, lon: float, radius_km: float,
+                                    limit: int = 100, has_geometry: bool = True) -> List[Dict[str, Any]]:
+    """
+    Sitios a menos de `radius_km` del punto, ordenados por distancia
+
+    Con geom: `ST_DWithin` sobre geography (índice GiST + distancia geodésica
+    exacta). Sin migrar: prefiltro lat/lon y haversine.
+    """
+    if not has_geometry:
+        return await _fetch_sites_latlon(conn, lat, lon, radius_km, limit)
+
+    rows = await conn.fetch(
+        f'''
+        SELECT
+            {SITE_DETAIL_COLUMNS},
+            {distance_km_expression(1, 2)} as distance_km
+        FROM {SITES_TABLE}
+        WHERE {radius_clause(1, 2, 3)}
+        ORDER BY distance_km
+        LIMIT $4
+        ''',
+        lat, lon, radius_km * 1000.0, limit
+    )
+    return [dict(row) for row in rows]
+
+
+async def fetch_nearest_sites(conn, lat: float, lon: float, k: int = 10,
+                              max_distance_km: Optional[float] = None,
+                              has_geometry: bool = True) -> List[Dict[str, Any]]:
+    """
+    Los k sitios más cercanos (k-NN indexado con `<->`)
+
+    Sin migrar: búsqueda por radio (`max_distance_km`, o 500 km).
+    """
+    if not has_geometry:
+        radius_km = max_distance_km if max_distance_km is not None else 500
+        return await _fetch_sites_latlon(conn, lat, lon, radius_km, k)
+
+    params: List[Any] = [lat, lon, k]
+    where_sql = 'geom IS NOT NULL'
+    if max_distance_km is not None:
+        where_sql += f' AND {radius_clause(1, 2, 4)}'
+        params.append(max_distance_km * 1000.0)
+
+    rows = await conn.fetch(
+        f'''
+        SELECT
+            {SITE_DETAIL_COLUMNS},
+            {distance_km_expression(1, 2)} as distance_km
+        FROM {SITES_TABLE}
+        WHERE {where_sql}
+        ORDER BY {knn_order_expression(1, 2)}
+        LIMIT $3
+        ''',
+        *params
+    )
+    return [dict(row) for row in rows]
+
+
+async def _fetch_sites_latlon(conn, lat: float, lon: float, radius_km: float,
+                              limit: int) -> List[Dict[str, Any]]:
+    """Búsqueda por radio sin PostGIS (BD sin migrar)"""
+    # 111.32 km por grado de latitud aproximadamente
+    lat_delta = radius_km / 111.32
+    lon_delta = radius_km / (111.32 * abs(math.cos(math.radians(lat))))
+
+    rows = await conn.fetch(
+        f'''
+        SELECT
+            {SITE_DETAIL_COLUMNS},
+            -- Distancia haversine (km)
+            (
+                6371 * acos(
+                    cos(radians($1)) * cos(radians(latitude)) *
+                    cos(radians(longitude) - radians($2)) +
+                    sin(radians($1)) * sin(radians(latitude))
+                )
+            ) as distance_km
+        FROM {SITES_TABLE}
+        WHERE
+            latitude BETWEEN $1 - $3 AND $1 + $3
+            AND longitude BETWEEN $2 - $4 AND $2 + $4
+        ORDER BY distance_km
+        LIMIT $5
+        ''',
+        lat, lon, lat_delta, lon_delta, limit
+    )
+    return [dict(row) for row in rows]
+
+
+if __name__ == "__main__":
+    import asyncio
+    import asyncpg
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    async def _main():
+        conn = await asyncpg.connect(os.getenv("DATABASE_URL"))
+        try:
+            await apply_site_geometry_migration(conn)
+            total = await conn.fetchval(f"SELECT COUNT(geom) FROM {SITES_TABLE}")
+            print(f"✅ Migración PostGIS aplicada: {total:,} sitios con geom")
+        finally:
+            await conn.close()
+
+    asyncio.run(_main())
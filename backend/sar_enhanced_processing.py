@@ -46,9 +46,134 @@ def despeckle_sar(img: np.ndarray, window_size: int = 5) -> np.ndarray:
     return img_output
 
 
+# ============================================================================
+# KERNELS DE VENTANA LOCAL (vectorizados)
+# ============================================================================
+#
+# Equivalentes a ndimage.generic_filter(..., size=w) con callbacks Python
+# (np.var, max-min, z-score del pixel central), pero con filtros separables:
+# uniform_filter (media / media de cuadrados) y maximum/minimum_filter.
+# Mismo modo de borde ('reflect'). Aceptan stacks multibanda (bandas, H, W):
+# la ventana sólo recorre los ejes espaciales.
+
+def _window(data: np.ndarray, window_size: int) -> Tuple[int, ...]:
+    """Ventana w×w sobre los dos últimos ejes (1 en ejes de banda)"""
+    return (1,) * (data.ndim - 2) + (window_size, window_size)
+
+
+def _local_moments(data: np.ndarray, window_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(datos centrados, media local, varianza local) con precisión float64"""
+    data = np.asarray(data, dtype=np.float64)
+    # Centrar por banda evita la cancelación de E[x²] - E[x]² en dB (~-12)
+    # Nodata (NaN/inf): el box filter es una suma corrida y arrastraría el NaN
+    # al resto de la fila; se rellena con 0 y solo las ventanas que contienen
+    # píxeles no finitos se marcan NaN
+    spatial_axes = (-2, -1)
+    finite = np.isfinite(data)
+    count = np.maximum(finite.sum(axis=spatial_axes, keepdims=True), 1)
+    filled = np.where(finite, data, 0.0)
+    centered = np.where(finite, filled - filled.sum(axis=spatial_axes, keepdims=True) / count, 0.0)
+    size = _window(data, window_size)
+    mean = ndimage.uniform_filter(centered, size=size, mode='reflect')
+    mean_sq = ndimage.uniform_filter(centered * centered, size=size, mode='reflect')
+    variance = np.maximum(mean_sq - mean * mean, 0.0)
+    # Ventanas constantes: el residuo numérico del box filter no es varianza real
+    scale = np.max(np.abs(centered), axis=spatial_axes, keepdims=True)
+    variance[variance <= (1e-12 * scale) ** 2] = 0.0
+    if not finite.all():
+        invalid = ndimage.uniform_filter((~finite).astype(np.float64), size=size, mode='reflect')
+        holes = invalid > 0.5 / window_size ** 2
+        centered[~finite] = np.nan
+        mean[holes] = np.nan
+        variance[holes] = np.nan
+    return centered, mean, variance
+
+
+def local_variance_map(data: np.ndarray, window_size: int = 3) -> np.ndarray:
+    """Varianza local (ddof=0) por ventana w×w"""
+    return _local_moments(data, window_size)[2]
+
+
+def local_range_map(data: np.ndarray, window_size: int = 3) -> np.ndarray:
+    """Rango local (max - min) por ventana w×w"""
+    data = np.asarray(data, dtype=np.float64)
+    size = _window(data, window_size)
+    return (ndimage.maximum_filter(data, size=size, mode='reflect')
+            - ndimage.minimum_filter(data, size=size, mode='reflect'))
+
+
+def local_zscore_map(data: np.ndarray, window_size: int = 5) -> np.ndarray:
+    """Z-score del pixel respecto a su ventana w×w (0 si la ventana es constante, NaN si tiene nodata)"""
+    centered, mean, variance = _local_moments(data, window_size)
+    std = np.sqrt(variance)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(std > 0, (centered - mean) / std, np.where(np.isnan(std), np.nan, 0.0))
+
+
+# Desplazamientos GLCM: 0°, 45°, 90°, 135° a distancia 1
+GLCM_OFFSETS = ((0, 1), (-1, 1), (-1, 0), (-1, -1))
+
+
+def glcm_statistics(data: np.ndarray, levels: int = 32) -> Dict[str, float]:
+    """
+    Estadísticas GLCM (Haralick) sobre la imagen completa
+    
+    Cuantiza a `levels` niveles por rango de la imagen y acumula la matriz de
+    co-ocurrencia de los 4 desplazamientos con np.bincount (sin bucles por
+    pixel); la simetría se obtiene sumando la traspuesta. Para stacks (bandas, H, W) promedia entre bandas.
+    
+    Returns:
+        glcm_contrast, glcm_homogeneity, glcm_energy, glcm_entropy, glcm_correlation
+    """
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim > 2:
+        bands = [glcm_statistics(band, levels) for band in data.reshape(-1, *data.shape[-2:])]
+        return {key: float(np.mean([band[key] for band in bands])) for key in bands[0]}
+    
+    finite = np.isfinite(data)
+    lo, hi = (float(np.min(data[finite])), float(np.max(data[finite]))) if finite.any() else (0.0, 0.0)
+    if hi <= lo:
+        return {'glcm_contrast': 0.0, 'glcm_homogeneity': 1.0, 'glcm_energy': 1.0,
+                'glcm_entropy': 0.0, 'glcm_correlation': 1.0}
+    
+    quantized = np.clip(((data - lo) / (hi - lo) * levels).astype(np.int32), 0, levels - 1)
+    quantized[~finite] = -1
+    h, w = quantized.shape
+    counts = np.zeros(levels * levels, dtype=np.float64)
+    for dy, dx in GLCM_OFFSETS:
+        y0, y1 = max(0, -dy), h - max(0, dy)
+        x0, x1 = max(0, -dx), w - max(0, dx)
+        a = quantized[y0:y1, x0:x1]
+        b = quantized[y0 + dy:y1 + dy, x0 + dx:x1 + dx]
+        codes = a * levels + b
+        if not finite.all():
+            codes = codes[(a >= 0) & (b >= 0)]
+        counts += np.bincount(codes.ravel(), minlength=levels * levels)
+    
+    total = counts.sum()
+    if total == 0:
+        return {'glcm_contrast': 0.0, 'glcm_homogeneity': 1.0, 'glcm_energy': 1.0,
+                'glcm_entropy': 0.0, 'glcm_correlation': 1.0}
+    
+    # Simétrica: (i, j) y (j, i)
+    counts = counts.reshape(levels, levels)
+    p = (counts + counts.T) / (2.0 * total)
+    i, j = np.indices((levels, levels))
+    mu = float(np.sum(i * p))
+    sigma_sq = float(np.sum((i - mu) ** 2 * p))
+    nonzero = p[p > 0]
+    return {
+        'glcm_contrast': float(np.sum((i - j) ** 2 * p)),
+        'glcm_homogeneity': float(np.sum(p / (1.0 + (i - j) ** 2))),
+        'glcm_energy': float(np.sum(p ** 2)),
+        'glcm_entropy': float(-np.sum(nonzero * np.log2(nonzero))),
+        'glcm_correlation': float(np.sum((i - mu) * (j - mu) * p) / sigma_sq) if sigma_sq > 0 else 1.0
+    }
+
+
 def calculate_sar_texture(sar_data: np.ndarray, window_size: int = 3) -> Dict[str, float]:
     """
-    Calcular textura SAR usando GLCM simplificado.
+    Calcular textura SAR (varianza/rango locales + estadísticas GLCM).
     
     Textura detecta:
     - Homogeneidad (estructuras uniformes)
@@ -64,23 +189,16 @@ def calculate_sar_texture(sar_data: np.ndarray, window_size: int = 3) -> Dict[st
     """
     
     # Calcular varianza local (proxy de textura)
-    variance_map = ndimage.generic_filter(
-        sar_data, 
-        np.var, 
-        size=window_size
-    )
+    variance_map = local_variance_map(sar_data, window_size)
     
     # Calcular rango local (contraste)
-    def local_range(window):
-        return np.max(window) - np.min(window)
-    
-    range_map = ndimage.generic_filter(
-        sar_data,
-        local_range,
-        size=window_size
-    )
+    range_map = local_range_map(sar_data, window_size)
     
-    # Métricas agregadas
+    return _texture_summary(sar_data, variance_map, range_map)
+
+
+def _texture_summary(sar_data: np.ndarray, variance_map: np.ndarray, range_map: np.ndarray) -> Dict[str, float]:
+    """Métricas agregadas de textura a partir de los mapas locales"""
     texture_variance = float(np.mean(variance_map))
     texture_contrast = float(np.mean(range_map))
     texture_homogeneity = float(1.0 / (1.0 + texture_variance))
@@ -93,7 +211,8 @@ def calculate_sar_texture(sar_data: np.ndarray, window_size: int = 3) -> Dict[st
         'texture_contrast': texture_contrast,
         'texture_homogeneity': texture_homogeneity,
         'high_texture_fraction': high_texture_fraction,
-        'texture_index': texture_variance * texture_contrast  # Índice combinado
+        'texture_index': texture_variance * texture_contrast,  # Índice combinado
+        **glcm_statistics(sar_data)
     }
 
 
@@ -153,23 +272,14 @@ def calculate_sar_local_anomalies(sar_data: np.ndarray, window_size: int = 5) ->
         Dict con métricas de anomalías
     """
     
-    def local_zscore(window):
-        """Calcular z-score del pixel central respecto a su vecindad."""
-        center_idx = len(window) // 2
-        center = window[center_idx]
-        mean = np.mean(window)
-        std = np.std(window)
-        if std == 0:
-            return 0
-        return (center - mean) / std
-    
     # Calcular z-score local para cada pixel
-    zscore_map = ndimage.generic_filter(
-        sar_data,
-        local_zscore,
-        size=window_size
-    )
+    zscore_map = local_zscore_map(sar_data, window_size)
     
+    return _anomaly_summary(zscore_map)
+
+
+def _anomaly_summary(zscore_map: np.ndarray) -> Dict[str, float]:
+    """Métricas de anomalías a partir del mapa de z-score local"""
     # Detectar anomalías (|z| > 2)
     anomalies = np.abs(zscore_map) > 2
     anomaly_fraction = float(np.sum(anomalies) / anomalies.size)
@@ -180,8 +290,7 @@ def calculate_sar_local_anomalies(sar_data: np.ndarray, window_size: int = 5) ->
         anomaly_mean_zscore = 0.0
     
     # Detectar clusters de anomalías (estructuras coherentes)
-    from scipy.ndimage import label
-    labeled_anomalies, num_clusters = label(anomalies)
+    labeled_anomalies, num_clusters = ndimage.label(anomalies)
     
     return {
         'anomaly_fraction': anomaly_fraction,
@@ -191,6 +300,38 @@ def calculate_sar_local_anomalies(sar_data: np.ndarray, window_size: int = 5) ->
     }
 
 
+def calculate_sar_features_stack(sar_stack: np.ndarray,
+                                 texture_window: int = 3,
+                                 anomaly_window: int = 5) -> Dict[str, Any]:
+    """
+    Textura y anomalías locales para un stack multibanda (bandas, H, W)
+    
+    Los mapas locales se calculan una vez para todo el stack (VV, VH,
+    fechas...) y se resumen por banda con las mismas métricas que
+    calculate_sar_texture / calculate_sar_local_anomalies.
+    
+    Returns:
+        {'bands': [{'texture': {...}, 'anomalies': {...}}, ...]}
+    """
+    sar_stack = np.asarray(sar_stack, dtype=np.float64)
+    if sar_stack.ndim == 2:
+        sar_stack = sar_stack[np.newaxis]
+    
+    variance_maps = local_variance_map(sar_stack, texture_window)
+    range_maps = local_range_map(sar_stack, texture_window)
+    zscore_maps = local_zscore_map(sar_stack, anomaly_window)
+    
+    bands = [
+        {
+            'texture': _texture_summary(band, variance_map, range_map),
+            'anomalies': _anomaly_summary(zscore_map)
+        }
+        for band, variance_map, range_map, zscore_map in zip(sar_stack, variance_maps, range_maps, zscore_maps)
+    ]
+    
+    return {'bands': bands}
+
+
 def normalize_sar_regional(sar_value: float, regional_mean: float, regional_std: float) -> float:
     """
     Normalizar SAR usando estadísticas regionales (no globales).
@@ -1,60 +1,212 @@
 """
 Sistema de Caché para Datos Satelitales
 Optimiza velocidad evitando descargas repetidas
+
+Arquitectura de dos niveles:
+- L1: LRU en memoria del proceso, acotado por presupuesto de bytes
+- L2: Almacén en disco fragmentado (shards) con índice SQLite en modo WAL
+  y arrays crudos como archivos .npy leídos con memory-map (zero-copy)
+
+El índice es append/update por fila: set, delete, TTL y eviction tocan solo
+las filas afectadas, nunca se reescribe el índice completo. El total de bytes
+en disco se mantiene con triggers en una fila aparte (sin SUM por set).
+L1 guarda snapshots inmutables (metadata JSON + arrays mapeados de solo
+lectura): cada get devuelve un SatelliteData nuevo. SQLite WAL +
+reemplazo atómico de directorios permite compartir la caché entre varios
+workers de uvicorn.
 """
 
 import json
+import os
+import shutil
+import sqlite3
+import threading
 import hashlib
 import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-import pickle
+from typing import Optional, Dict, Any, Tuple
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
+class MemoryLRU:
+    """
+    Caché LRU en memoria acotada por bytes (nivel L1)
+
+    Thread-safe. El tamaño de cada entrada se estima sumando los nbytes
+    de sus arrays; las entradas mayores que el presupuesto no se admiten.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int, datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if datetime.now() >= expires_at:
+                self._pop(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any, size: int, expires_at: datetime):
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+            self._entries[key] = (value, size, expires_at)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes and self._entries:
+                oldest_key = next(iter(self._entries))
+                self._pop(oldest_key)
+
+    def discard(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+    def _pop(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_mb': round(self.current_bytes / (1024 * 1024), 2),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
 class SatelliteCache:
     """
     Caché inteligente para datos satelitales
-    
+
     Estrategia:
-    - Caché en disco (JSON + pickle para arrays)
+    - L1: LRU en memoria con presupuesto de bytes
+    - L2: disco fragmentado en shards (índice SQLite WAL + arrays .npy)
+    - Lectura zero-copy: arrays .npy abiertos con mmap_mode='r'
     - TTL: 7 días (datos satelitales no cambian rápido)
+    - Eviction de disco por presupuesto de bytes (menos usados primero)
     - Key: hash de (bbox, fecha, tipo_dato)
     """
-    
-    def __init__(self, cache_dir: str = "cache/satellite"):
+
+    INDEX_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            data_type TEXT NOT NULL,
+            bbox TEXT NOT NULL,
+            cached_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_access REAL NOT NULL,
+            acquisition_date TEXT,
+            source TEXT,
+            path TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            meta TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_expires ON entries(expires_at);
+        CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access);
+
+        CREATE TABLE IF NOT EXISTS totals (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            size_bytes INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO totals (id, size_bytes)
+            SELECT 0, COALESCE(SUM(size_bytes), 0) FROM entries;
+        CREATE TRIGGER IF NOT EXISTS entries_size_insert AFTER INSERT ON entries BEGIN
+            UPDATE totals SET size_bytes = size_bytes + NEW.size_bytes WHERE id = 0;
+        END;
+        CREATE TRIGGER IF NOT EXISTS entries_size_delete AFTER DELETE ON entries BEGIN
+            UPDATE totals SET size_bytes = size_bytes - OLD.size_bytes WHERE id = 0;
+        END;
+        CREATE TRIGGER IF NOT EXISTS entries_size_update AFTER UPDATE OF size_bytes ON entries BEGIN
+            UPDATE totals SET size_bytes = size_bytes - OLD.size_bytes + NEW.size_bytes WHERE id = 0;
+        END;
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "cache/satellite",
+        ttl_days: int = 7,
+        memory_budget_mb: int = int(os.getenv("SATELLITE_CACHE_MEMORY_MB", "256")),
+        disk_budget_mb: int = int(os.getenv("SATELLITE_CACHE_DISK_MB", "4096"))
+    ):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        
-        self.metadata_file = self.cache_dir / "metadata.json"
-        self.ttl_days = 7
-        
-        # Cargar metadata
-        self.metadata = self._load_metadata()
-        
-        logger.info(f"✅ Satellite cache initialized at {self.cache_dir}")
-    
-    def _load_metadata(self) -> Dict[str, Any]:
-        """Cargar metadata de caché"""
-        if self.metadata_file.exists():
-            try:
-                with open(self.metadata_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading cache metadata: {e}")
-                return {}
-        return {}
-    
-    def _save_metadata(self):
-        """Guardar metadata de caché"""
+
+        self.shards_dir = self.cache_dir / "shards"
+        self.shards_dir.mkdir(exist_ok=True)
+
+        self.index_file = self.cache_dir / "index.sqlite"
+        self.ttl_days = ttl_days
+        self.disk_budget_bytes = disk_budget_mb * 1024 * 1024
+
+        # L1 en memoria (por proceso)
+        self.memory = MemoryLRU(max_bytes=memory_budget_mb * 1024 * 1024)
+
+        # Una conexión SQLite por hilo
+        self._local = threading.local()
+        self._init_index()
+
+        logger.info(
+            f"✅ Satellite cache initialized at {self.cache_dir} "
+            f"(L1: {memory_budget_mb} MB, L2: {disk_budget_mb} MB)"
+        )
+
+    # ------------------------------------------------------------------
+    # Índice SQLite
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        """Obtener conexión SQLite del hilo actual"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                str(self.index_file),
+                timeout=10.0,
+                isolation_level=None  # autocommit; transacciones explícitas
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            # INSERT OR REPLACE dispara el trigger de DELETE de la fila reemplazada
+            conn.execute("PRAGMA recursive_triggers=ON")
+            self._local.conn = conn
+        return conn
+
+    def _init_index(self):
+        """Crear esquema del índice si no existe"""
         try:
-            with open(self.metadata_file, 'w') as f:
-                json.dump(self.metadata, f, indent=2)
+            self._connect().executescript(self.INDEX_SCHEMA)
         except Exception as e:
-            logger.error(f"Error saving cache metadata: {e}")
-    
+            logger.error(f"Error initializing cache index: {e}")
+
     def _generate_key(
         self,
         lat_min: float,
@@ -66,27 +218,142 @@ class SatelliteCache:
     ) -> str:
         """
         Generar key única para caché
-        
+
         Args:
             lat_min, lat_max, lon_min, lon_max: Bounding box
             data_type: 'multispectral', 'sar', 'thermal'
             date: Fecha de adquisición (opcional)
-        
+
         Returns:
             Hash MD5 como key
         """
         # Redondear coordenadas a 4 decimales (~11m precisión)
         bbox_str = f"{lat_min:.4f}_{lat_max:.4f}_{lon_min:.4f}_{lon_max:.4f}"
-        
+
         # Fecha a nivel de día
         date_str = date.strftime("%Y%m%d") if date else "latest"
-        
+
         # Combinar
         key_str = f"{bbox_str}_{data_type}_{date_str}"
-        
+
         # Hash MD5
         return hashlib.md5(key_str.encode()).hexdigest()
-    
+
+    def _shard_dir(self, key: str) -> Path:
+        """Directorio de shard para una key (256 shards por prefijo hex)"""
+        return self.shards_dir / key[:2]
+
+    # ------------------------------------------------------------------
+    # Serialización zero-copy
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _split_payload(data: Any) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """
+        Separar un SatelliteData en metadata JSON y arrays crudos
+
+        Returns:
+            (campos escalares serializables, {nombre_banda: array})
+        """
+        if not is_dataclass(data):
+            raise TypeError(f"Unsupported cache payload: {type(data).__name__}")
+
+        meta = {}
+        arrays = {}
+
+        for f in fields(data):
+            value = getattr(data, f.name)
+
+            if f.name == 'bands':
+                arrays = {
+                    name: np.asarray(band)
+                    for name, band in (value or {}).items()
+                    if band is not None
+                }
+            elif isinstance(value, datetime):
+                meta[f.name] = {'__datetime__': value.isoformat()}
+            elif isinstance(value, np.generic):
+                meta[f.name] = value.item()
+            else:
+                meta[f.name] = value
+
+        return meta, arrays
+
+    @staticmethod
+    def _build_payload(meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> Any:
+        """Reconstruir SatelliteData desde metadata + arrays mapeados"""
+        from satellite_connectors.base_connector import SatelliteData
+
+        kwargs = {}
+        for name, value in meta.items():
+            if isinstance(value, dict) and '__datetime__' in value:
+                value = datetime.fromisoformat(value['__datetime__'])
+            kwargs[name] = value
+
+        kwargs['bands'] = arrays
+        return SatelliteData(**kwargs)
+
+    def _write_entry_dir(self, key: str, arrays: Dict[str, np.ndarray]) -> Path:
+        """
+        Escribir arrays en un directorio nuevo y único de la entrada
+
+        Cada versión de una entrada vive en su propio directorio, así un
+        lector concurrente con arrays mapeados nunca ve archivos a medio
+        escribir: el índice solo apunta al directorio cuando está completo.
+        """
+        shard = self._shard_dir(key)
+        shard.mkdir(parents=True, exist_ok=True)
+
+        token = uuid.uuid4().hex[:12]
+        tmp_dir = shard / f".{key}-{token}.tmp"
+        final_dir = shard / f"{key}-{token}"
+        tmp_dir.mkdir()
+
+        try:
+            for i, (name, array) in enumerate(arrays.items()):
+                np.save(tmp_dir / f"{i}.npy", np.ascontiguousarray(array), allow_pickle=False)
+
+            with open(tmp_dir / "bands.json", 'w') as f:
+                json.dump(list(arrays.keys()), f)
+
+            os.replace(tmp_dir, final_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        return final_dir
+
+    @staticmethod
+    def _read_entry_dir(entry_dir: Path) -> Dict[str, np.ndarray]:
+        """Abrir arrays de una entrada con memory-map (sin copiar)"""
+        with open(entry_dir / "bands.json", 'r') as f:
+            band_names = json.load(f)
+
+        return {
+            name: np.load(entry_dir / f"{i}.npy", mmap_mode='r', allow_pickle=False)
+            for i, name in enumerate(band_names)
+        }
+
+    def _remember(self, key: str, meta_json: str, arrays: Dict[str, np.ndarray],
+                  size_bytes: int, expires_at: datetime):
+        """Guardar en L1 un snapshot inmutable (JSON + arrays mapeados de solo lectura)"""
+        self.memory.put(key, (meta_json, arrays), size_bytes, expires_at)
+
+    def _materialize(self, meta_json: str, arrays: Dict[str, np.ndarray]) -> Any:
+        """SatelliteData nuevo desde un snapshot: mutarlo no toca la caché"""
+        data = self._build_payload(json.loads(meta_json), dict(arrays))
+        data.cached = True
+        return data
+
+    @staticmethod
+    def _remove_entry_dir(path: Optional[str]):
+        if path:
+            shutil.rmtree(path, ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
     def get(
         self,
         lat_min: float,
@@ -98,51 +365,69 @@ class SatelliteCache:
     ) -> Optional[Any]:
         """
         Obtener datos de caché
-        
+
         Returns:
             SatelliteData si existe y no expiró, None si no
         """
         key = self._generate_key(lat_min, lat_max, lon_min, lon_max, data_type, date)
-        
-        # Verificar si existe en metadata
-        if key not in self.metadata:
+        return self.get_by_key(key)
+
+    def get_by_key(self, key: str) -> Optional[Any]:
+        """Obtener datos de caché por key ya calculada (L1 → L2)"""
+        # L1: memoria
+        snapshot = self.memory.get(key)
+        if snapshot is not None:
+            logger.debug(f"Cache HIT (memory): {key}")
+            return self._materialize(*snapshot)
+
+        # L2: disco
+        try:
+            row = self._connect().execute(
+                "SELECT cached_at, expires_at, path, size_bytes, meta FROM entries WHERE key = ?",
+                (key,)
+            ).fetchone()
+        except Exception as e:
+            logger.error(f"Error reading cache index: {e}")
+            return None
+
+        if row is None:
             logger.debug(f"Cache MISS: {key}")
             return None
-        
-        entry = self.metadata[key]
-        
+
+        cached_at, expires_at, path, size_bytes, meta_json = row
+        now = datetime.now().timestamp()
+        age_days = (now - cached_at) / 86400
+
         # Verificar TTL
-        cached_date = datetime.fromisoformat(entry['cached_at'])
-        age_days = (datetime.now() - cached_date).days
-        
-        if age_days > self.ttl_days:
-            logger.info(f"Cache EXPIRED: {key} (age: {age_days} days)")
-            self.delete(key)
+        if now >= expires_at:
+            logger.info(f"Cache EXPIRED: {key} (age: {age_days:.1f} days)")
+            self.delete(key, path)
             return None
-        
-        # Cargar datos
-        cache_file = self.cache_dir / f"{key}.pkl"
-        
-        if not cache_file.exists():
-            logger.warning(f"Cache file missing: {cache_file}")
-            self.delete(key)
+
+        entry_dir = Path(path)
+        if not entry_dir.exists():
+            logger.warning(f"Cache directory missing: {entry_dir}")
+            self.delete(key, path)
             return None
-        
+
         try:
-            with open(cache_file, 'rb') as f:
-                data = pickle.load(f)
-            
-            # Marcar como cached
-            data.cached = True
-            
-            logger.info(f"✅ Cache HIT: {key} (age: {age_days} days)")
+            arrays = self._read_entry_dir(entry_dir)
+            data = self._materialize(meta_json, arrays)
+
+            self._connect().execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (now, key)
+            )
+
+            self._remember(key, meta_json, arrays, size_bytes, datetime.fromtimestamp(expires_at))
+
+            logger.info(f"✅ Cache HIT: {key} (age: {age_days:.1f} days)")
             return data
-            
+
         except Exception as e:
-            logger.error(f"Error loading cache file {cache_file}: {e}")
-            self.delete(key)
+            logger.error(f"Error loading cache entry {entry_dir}: {e}")
+            self.delete(key, path)
             return None
-    
+
     def set(
         self,
         lat_min: float,
@@ -155,7 +440,7 @@ class SatelliteCache:
     ):
         """
         Guardar datos en caché
-        
+
         Args:
             lat_min, lat_max, lon_min, lon_max: Bounding box
             data_type: Tipo de dato
@@ -163,84 +448,171 @@ class SatelliteCache:
             date: Fecha de adquisición
         """
         key = self._generate_key(lat_min, lat_max, lon_min, lon_max, data_type, date)
-        
-        cache_file = self.cache_dir / f"{key}.pkl"
-        
+        self.set_by_key(key, data_type, data, bbox=[lat_min, lat_max, lon_min, lon_max])
+
+    def set_by_key(self, key: str, data_type: str, data: Any, bbox: Optional[list] = None):
+        """Guardar datos en caché con una key ya calculada"""
         try:
-            # Guardar datos
-            with open(cache_file, 'wb') as f:
-                pickle.dump(data, f)
-            
-            # Actualizar metadata
-            self.metadata[key] = {
-                'bbox': [lat_min, lat_max, lon_min, lon_max],
-                'data_type': data_type,
-                'cached_at': datetime.now().isoformat(),
-                'acquisition_date': data.acquisition_date.isoformat() if hasattr(data, 'acquisition_date') else None,
-                'source': data.source if hasattr(data, 'source') else 'unknown',
-                'file': str(cache_file)
-            }
-            
-            self._save_metadata()
-            
+            meta, arrays = self._split_payload(data)
+            meta_json = json.dumps(meta)
+            entry_dir = self._write_entry_dir(key, arrays)
+            size_bytes = sum(a.nbytes for a in arrays.values())
+
+            now = datetime.now()
+            expires_at = now + timedelta(days=self.ttl_days)
+
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = conn.execute(
+                    "SELECT path FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO entries
+                        (key, data_type, bbox, cached_at, expires_at, last_access,
+                         acquisition_date, source, path, size_bytes, meta)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        key,
+                        data_type,
+                        json.dumps(bbox or []),
+                        now.timestamp(),
+                        expires_at.timestamp(),
+                        now.timestamp(),
+                        data.acquisition_date.isoformat() if hasattr(data, 'acquisition_date') else None,
+                        data.source if hasattr(data, 'source') else 'unknown',
+                        str(entry_dir),
+                        size_bytes,
+                        meta_json
+                    )
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                self._remove_entry_dir(str(entry_dir))
+                raise
+
+            # La versión anterior ya no es alcanzable desde el índice
+            if old and old[0] != str(entry_dir):
+                self._remove_entry_dir(old[0])
+
+            # L1 apunta a la copia en disco, no a los arrays del llamador
+            self._remember(key, meta_json, self._read_entry_dir(entry_dir), size_bytes, expires_at)
+
             logger.info(f"✅ Cached: {key} ({data_type})")
-            
+
+            self._enforce_disk_budget()
+
         except Exception as e:
             logger.error(f"Error caching data: {e}")
-    
-    def delete(self, key: str):
-        """Eliminar entrada de caché"""
-        if key in self.metadata:
-            # Eliminar archivo
-            cache_file = self.cache_dir / f"{key}.pkl"
-            if cache_file.exists():
-                cache_file.unlink()
-            
-            # Eliminar de metadata
-            del self.metadata[key]
-            self._save_metadata()
-            
+
+    def delete(self, key: str, path: Optional[str] = None):
+        """
+        Eliminar entrada de caché
+
+        Con path solo se elimina si la fila sigue apuntando a ese directorio:
+        un lector que vio una versión rota no borra la que otro worker acaba
+        de publicar con set().
+        """
+        self.memory.discard(key)
+
+        where, params = ("key = ? AND path = ?", (key, path)) if path is not None else ("key = ?", (key,))
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(f"SELECT path FROM entries WHERE {where}", params).fetchone()
+                conn.execute(f"DELETE FROM entries WHERE {where}", params)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except Exception as e:
+            logger.error(f"Error deleting cache entry {key}: {e}")
+            return
+
+        if row:
+            self._remove_entry_dir(row[0])
             logger.info(f"🗑️ Deleted cache: {key}")
-    
+
+    def _delete_rows(self, where: str, params: tuple) -> int:
+        """Eliminar filas que cumplen una condición y sus directorios"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(f"SELECT key, path FROM entries WHERE {where}", params).fetchall()
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in rows])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        for key, path in rows:
+            self.memory.discard(key)
+            self._remove_entry_dir(path)
+
+        return len(rows)
+
+    def _enforce_disk_budget(self):
+        """Evict de disco por LRU hasta volver al presupuesto de bytes"""
+        conn = self._connect()
+        total = self._disk_bytes(conn)
+
+        if total <= self.disk_budget_bytes:
+            return
+
+        excess = total - self.disk_budget_bytes
+        victims = []
+        freed = 0
+        for key, size in conn.execute(
+            "SELECT key, size_bytes FROM entries ORDER BY last_access ASC"
+        ):
+            victims.append(key)
+            freed += size
+            if freed >= excess:
+                break
+
+        for key in victims:
+            self.delete(key)
+
+        logger.info(f"🗑️ Evicted {len(victims)} cache entries ({freed / (1024 * 1024):.1f} MB)")
+
+    @staticmethod
+    def _disk_bytes(conn: sqlite3.Connection) -> int:
+        """Bytes en disco según el total mantenido por triggers (O(1))"""
+        row = conn.execute("SELECT size_bytes FROM totals WHERE id = 0").fetchone()
+        return row[0] if row else 0
+
     def clear_expired(self):
         """Limpiar entradas expiradas"""
-        now = datetime.now()
-        expired_keys = []
-        
-        for key, entry in self.metadata.items():
-            cached_date = datetime.fromisoformat(entry['cached_at'])
-            age_days = (now - cached_date).days
-            
-            if age_days > self.ttl_days:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            self.delete(key)
-        
-        logger.info(f"🗑️ Cleared {len(expired_keys)} expired cache entries")
-    
+        try:
+            removed = self._delete_rows("expires_at <= ?", (datetime.now().timestamp(),))
+        except Exception as e:
+            logger.error(f"Error clearing expired cache entries: {e}")
+            return
+
+        logger.info(f"🗑️ Cleared {removed} expired cache entries")
+
     def get_stats(self) -> Dict[str, Any]:
         """Obtener estadísticas de caché"""
-        total_entries = len(self.metadata)
-        
-        # Calcular tamaño total
-        total_size_mb = 0
-        for key in self.metadata:
-            cache_file = self.cache_dir / f"{key}.pkl"
-            if cache_file.exists():
-                total_size_mb += cache_file.stat().st_size / (1024 * 1024)
-        
+        conn = self._connect()
+
+        total_entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        total_size = self._disk_bytes(conn)
+
         # Contar por tipo
-        by_type = {}
-        for entry in self.metadata.values():
-            data_type = entry['data_type']
-            by_type[data_type] = by_type.get(data_type, 0) + 1
-        
+        by_type = dict(conn.execute(
+            "SELECT data_type, COUNT(*) FROM entries GROUP BY data_type"
+        ).fetchall())
+
         return {
             'total_entries': total_entries,
-            'total_size_mb': round(total_size_mb, 2),
+            'total_size_mb': round(total_size / (1024 * 1024), 2),
             'by_type': by_type,
-            'cache_dir': str(self.cache_dir)
+            'cache_dir': str(self.cache_dir),
+            'memory': self.memory.stats()
         }
 
 
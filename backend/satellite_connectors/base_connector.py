@@ -38,6 +38,7 @@ class SatelliteData:
     # Metadata adicional
     processing_time_s: float
     cached: bool = False
+    windowed: bool = True  # False si las bandas cubren la escena completa (overview), no el bbox
 
 
 class SatelliteConnector(ABC):
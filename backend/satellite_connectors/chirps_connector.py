@@ -16,7 +16,6 @@ APLICACIONES ARQUEOLÓGICAS:
 - Análisis de sistemas de manejo de agua antiguos
 """
 
-import requests
 import numpy as np
 import logging
 from typing import Dict, Any, Optional, List
@@ -25,7 +24,8 @@ import json
 import ftplib
 import tempfile
 import os
-import xarray as xr
+
+from .http_transport import connector_transport
 
 logger = logging.getLogger(__name__)
 
@@ -239,7 +239,7 @@ class CHIRPSConnector:
                 })
             }
             
-            response = requests.get(
+            response = await connector_transport.get(
                 self.sources['api'],
                 params=params,
                 timeout=60
@@ -307,7 +307,7 @@ class CHIRPSConnector:
                    f"T/{start_date.strftime('%Y-%m-%d')}/{end_date.strftime('%Y-%m-%d')}/RANGE/"
                    "data.nc")
             
-            response = requests.get(url, timeout=60)
+            response = await connector_transport.get(url, timeout=60)
             
             if response.status_code == 200:
                 # Guardar temporalmente el NetCDF
@@ -316,7 +316,8 @@ class CHIRPSConnector:
                     tmp_path = tmp_file.name
                 
                 try:
-                    # Leer con xarray
+                    # Leer con xarray (import diferido)
+                    import xarray as xr
                     with xr.open_dataset(tmp_path) as ds:
                         if 'prcp' in ds.variables:
                             precip_data = ds['prcp']
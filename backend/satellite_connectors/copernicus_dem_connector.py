@@ -19,10 +19,7 @@ Ventajas vs SRTM:
 - ✅ Global completo
 """
 
-import httpx
-import rasterio
-from rasterio.merge import merge
-from rasterio.mask import mask
+import asyncio
 import numpy as np
 import tempfile
 import os
@@ -30,6 +27,8 @@ from typing import Dict, Any, Optional, List, Tuple
 import logging
 from pathlib import Path
 
+from .http_transport import connector_transport
+
 logger = logging.getLogger(__name__)
 
 
@@ -79,12 +78,9 @@ class CopernicusDEMConnector:
             
             logger.info(f"   📦 Descargando {len(tiles)} tiles...")
             
-            # Descargar tiles
-            tile_paths = []
-            for tile_name in tiles:
-                tile_path = await self._download_tile(tile_name)
-                if tile_path:
-                    tile_paths.append(tile_path)
+            # Descargar tiles en paralelo (pool compartido del host S3)
+            downloaded = await asyncio.gather(*[self._download_tile(t) for t in tiles])
+            tile_paths = [path for path in downloaded if path]
             
             if not tile_paths:
                 logger.warning("⚠️ No tiles downloaded successfully")
@@ -226,17 +222,16 @@ class CopernicusDEMConnector:
             url = f"{self.base_url}/{tile_name}/{tile_name}.tif"
             
             # Descargar
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url)
-                
-                if response.status_code == 200:
-                    # Guardar temporalmente
-                    with tempfile.NamedTemporaryFile(suffix='.tif', delete=False) as tmp_file:
-                        tmp_file.write(response.content)
-                        return tmp_file.name
-                else:
-                    logger.warning(f"   ⚠️ Tile {tile_name}: HTTP {response.status_code}")
-                    return None
+            response = await connector_transport.get(url, timeout=30.0)
+            
+            if response.status_code == 200:
+                # Guardar temporalmente
+                with tempfile.NamedTemporaryFile(suffix='.tif', delete=False) as tmp_file:
+                    tmp_file.write(response.content)
+                    return tmp_file.name
+            else:
+                logger.warning(f"   ⚠️ Tile {tile_name}: HTTP {response.status_code}")
+                return None
                     
         except Exception as e:
             logger.warning(f"   ⚠️ Error descargando tile {tile_name}: {e}")
@@ -254,6 +249,10 @@ class CopernicusDEMConnector:
         """
         
         try:
+            # rasterio se importa al usarse (import pesado)
+            import rasterio
+            from rasterio.merge import merge
+            
             # Abrir todos los tiles
             src_files = [rasterio.open(path) for path in tile_paths]
             
@@ -308,6 +307,9 @@ class CopernicusDEMConnector:
         """
         
         try:
+            import rasterio
+            from rasterio.mask import mask
+            
             with rasterio.open(raster_path) as src:
                 # Crear geometría bbox
                 from shapely.geometry import box
@@ -16,6 +16,7 @@ APLICACIONES ARQUEOLÓGICAS:
 - Análisis de accesibilidad estacional
 """
 
+import asyncio
 import cdsapi
 import numpy as np
 import logging
@@ -23,7 +24,8 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 import tempfile
 import os
-import xarray as xr
+
+from .http_transport import connector_transport
 
 logger = logging.getLogger(__name__)
 
@@ -290,17 +292,15 @@ class ERA5Connector:
                 res.download(tmp_path)
                 return True
 
-            from concurrent.futures import ThreadPoolExecutor
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as pool:
-                try:
-                    await asyncio.wait_for(
-                        loop.run_in_executor(pool, call_cds),
-                        timeout=60.0 # No podemos esperar más por clima
-                    )
-                except asyncio.TimeoutError:
-                    logger.warning(f"⚠️ ERA5 {variable} TIMEOUT - Saltando instrumento")
-                    return None
+            # cdsapi es síncrono: executor propio de CDS en el transporte (un
+            # timeout no bloquea el loop ni los hilos de otras fuentes)
+            try:
+                await connector_transport.run_blocking(
+                    call_cds, timeout=60.0, source="cds"  # No podemos esperar más por clima
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ ERA5 {variable} TIMEOUT - Saltando instrumento")
+                return None
             
             # Verificar archivo
             if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
@@ -309,7 +309,9 @@ class ERA5Connector:
             
             logger.info(f"✅ Descarga completa: {os.path.getsize(tmp_path)} bytes")
             
-            # Leer con xarray (GRIB con cfgrib engine)
+            # Leer con xarray (GRIB con cfgrib engine); import diferido, solo
+            # se paga cuando hay descarga real
+            import xarray as xr
             try:
                 ds = xr.open_dataset(
                     tmp_path,
@@ -664,7 +666,7 @@ class ERA5Connector:
         else:
             return 'poor'
     
-    def _validate_era5_dataset(self, ds: xr.Dataset) -> bool:
+    def _validate_era5_dataset(self, ds: "xarray.Dataset") -> bool:
         """
         Validación automática de dataset ERA5.
         
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Connector HTTP Transport - Capa HTTP compartida para conectores satelitales
+==========================================================================
+
+Todos los conectores de satellite_connectors/ usan esta capa para salir a red:
+
+- Un httpx.AsyncClient por host (pool de conexiones keep-alive reutilizado)
+- HTTP/2 cuando el paquete 'h2' está instalado
+- Límite de concurrencia por host (no saturar APIs gratuitas)
+- Reintentos con backoff exponencial + jitter (timeouts, 429, 5xx, Retry-After)
+- Coalescencia: GETs idénticos en vuelo comparten una única petición
+- Executor por fuente para librerías bloqueantes (cdsapi, etc.): una llamada
+  colgada tras su timeout solo ocupa hilos de SU fuente, y si todos están
+  colgados las llamadas nuevas se rechazan enseguida (BlockingSourceSaturated)
+
+Uso:
+    from .http_transport import connector_transport
+    response = await connector_transport.get(url, params=params, timeout=60)
+
+La respuesta es un httpx.Response ya leído (status_code, text, content, json()).
+Las excepciones de httpx se propagan tras agotar reintentos, igual que antes.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pipeline_tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Estados HTTP transitorios que vale la pena reintentar
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Métodos sin efectos secundarios: se pueden reintentar y coalescer
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class BlockingSourceSaturated(asyncio.TimeoutError):
+    """Todos los hilos de la fuente siguen ocupados por llamadas que ya vencieron"""
+
+
+@dataclass
+class HostPolicy:
+    """Política de red por host"""
+    max_concurrency: int = 6
+    max_connections: int = 10
+    max_retries: int = 2
+    backoff_base: float = 0.5  # segundos
+    backoff_max: float = 8.0
+
+
+DEFAULT_HOST_POLICY = HostPolicy(
+    max_concurrency=int(os.getenv("CONNECTOR_MAX_CONCURRENCY_PER_HOST", "6")),
+    max_retries=int(os.getenv("CONNECTOR_MAX_RETRIES", "2"))
+)
+
+# APIs con rate limit estricto o servidores lentos
+HOST_POLICIES: Dict[str, HostPolicy] = {
+    "portal.opentopography.org": HostPolicy(max_concurrency=2, max_connections=4),
+    "climateserv.servirglobal.net": HostPolicy(max_concurrency=2, max_connections=4),
+    "appeears.earthdatacloud.nasa.gov": HostPolicy(max_concurrency=2, max_connections=4),
+    "api.daac.asf.alaska.edu": HostPolicy(max_concurrency=3, max_connections=6),
+    "elevation-api.io": HostPolicy(max_concurrency=4, max_connections=4),
+    "copernicus-dem-30m.s3.amazonaws.com": HostPolicy(max_concurrency=8, max_connections=8),
+}
+
+
+class ConnectorTransport:
+    """
+    Transporte HTTP asíncrono compartido por todos los conectores
+
+    Estado ligado al event loop activo: si cambia el loop (p.ej. scripts que
+    llaman asyncio.run varias veces) los pools se recrean automáticamente.
+    """
+
+    def __init__(self, default_policy: Optional[HostPolicy] = None,
+                 host_policies: Optional[Dict[str, HostPolicy]] = None,
+                 http2: Optional[bool] = None,
+                 blocking_workers: Optional[int] = None):
+        self.default_policy = default_policy or DEFAULT_HOST_POLICY
+        self.host_policies = dict(HOST_POLICIES if host_policies is None else host_policies)
+        self.http2 = HTTP2_AVAILABLE if http2 is None else (http2 and HTTP2_AVAILABLE)
+        # Hilos por fuente bloqueante (cada fuente tiene su propio executor)
+        self.blocking_workers = blocking_workers or int(os.getenv("CONNECTOR_BLOCKING_WORKERS", "4"))
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: Dict[Tuple[str, str, Optional[int]], httpx.AsyncClient] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        # Llamadas que vencieron pero cuyo hilo sigue corriendo, por fuente
+        self._stuck: Dict[str, int] = {}
+        self._stuck_lock = threading.Lock()
+
+        self.stats = {
+            'requests': 0,
+            'network_requests': 0,
+            'coalesced': 0,
+            'retries': 0,
+            'failures': 0,
+            'clients_created': 0,
+            'leaked_clients': 0,
+            'blocking_timeouts': 0,
+            'blocking_rejected': 0
+        }
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """GET con pool, reintentos y coalescencia"""
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        """POST con pool (solo reintenta si la conexión no llegó a establecerse)"""
+        return await self.request("POST", url, **kwargs)
+
+    async def request(self, method: str, url: str, *,
+                      params: Optional[Dict[str, Any]] = None,
+                      headers: Optional[Dict[str, str]] = None,
+                      auth: Any = None,
+                      json: Any = None,
+                      data: Any = None,
+                      timeout: Any = None,
+                      follow_redirects: bool = True,
+                      max_retries: Optional[int] = None,
+                      coalesce: Optional[bool] = None) -> httpx.Response:
+        """
+        Ejecutar petición HTTP a través del pool del host
+
+        Args:
+            method: Método HTTP
+            url: URL absoluta
+            params, headers, json, data: Igual que httpx
+            auth: httpx.BasicAuth o tupla (user, password)
+            timeout: Segundos o httpx.Timeout (por petición)
+            follow_redirects: Seguir redirecciones (EDL de NASA las necesita)
+            max_retries: Sobrescribe la política del host
+            coalesce: Compartir peticiones idénticas en vuelo (por defecto en GET)
+
+        Returns:
+            httpx.Response con el cuerpo ya leído
+        """
+        self._bind_loop()
+        method = method.upper()
+        self.stats['requests'] += 1
+
+        target = httpx.URL(url, params=params) if params else httpx.URL(url)
+        send = lambda: self._send_with_retry(
+            method, target, headers=headers, auth=auth, json=json, data=data,
+            timeout=timeout, follow_redirects=follow_redirects, max_retries=max_retries
+        )
+
+        if coalesce is None:
+            coalesce = method in IDEMPOTENT_METHODS and json is None and data is None
+        if not coalesce:
+            return await send()
+
+        key = (method, str(target), self._headers_key(headers), self._auth_key(auth))
+        existing = self._inflight.get(key)
+        if existing is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(existing)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await send()
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            if not future.done():
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+                    # Evitar "exception was never retrieved" si nadie más esperaba
+                    future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def run_blocking(self, fn: Callable, *args, timeout: Optional[float] = None,
+                           source: str = "default") -> Any:
+        """
+        Ejecutar una función bloqueante (SDKs síncronos) en el executor de su fuente
+
+        Un timeout no bloquea el event loop, pero tampoco puede matar el hilo:
+        la llamada vencida sigue ocupando un hilo de `source` hasta terminar.
+        Por eso cada fuente tiene su executor (una API colgada no bloquea a las
+        demás) y, si todos sus hilos están ocupados por llamadas vencidas, se
+        lanza BlockingSourceSaturated (subclase de TimeoutError) sin encolar.
+        """
+        self._bind_loop()
+        with self._stuck_lock:
+            stuck = self._stuck.get(source, 0)
+        if stuck >= self.blocking_workers:
+            self.stats['blocking_rejected'] += 1
+            raise BlockingSourceSaturated(
+                f"{source}: {stuck} llamadas vencidas ocupan todos los hilos"
+            )
+
+        future = self._executor_for(source).submit(fn, *args)
+        call = asyncio.wrap_future(future)
+        with tracer.span("blocking", getattr(fn, '__qualname__', 'call')):
+            if timeout is None:
+                return await call
+            try:
+                return await asyncio.wait_for(call, timeout=timeout)
+            except asyncio.TimeoutError:
+                if not future.done():
+                    self._mark_stuck(source, future)
+                raise
+
+    def _executor_for(self, source: str) -> ThreadPoolExecutor:
+        executor = self._executors.get(source)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=self.blocking_workers, thread_name_prefix=f"connector-io-{source}"
+            )
+            self._executors[source] = executor
+        return executor
+
+    def _mark_stuck(self, source: str, future):
+        """Contar el hilo ocupado por una llamada vencida hasta que termine"""
+        self.stats['blocking_timeouts'] += 1
+        with self._stuck_lock:
+            self._stuck[source] = self._stuck.get(source, 0) + 1
+        logger.warning(f"⚠️ Llamada bloqueante de {source} vencida; su hilo sigue ocupado")
+
+        def release(_):
+            with self._stuck_lock:
+                self._stuck[source] -= 1
+
+        future.add_done_callback(release)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del transporte"""
+        return {
+            **self.stats,
+            'http2': self.http2,
+            'open_clients': len(self._clients),
+            'inflight': len(self._inflight),
+            'blocking_stuck': dict(self._stuck),
+            'hosts': sorted({host for _, host, _ in self._clients})
+        }
+
+    async def aclose(self):
+        """Cerrar todos los pools (shutdown de la aplicación)"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._semaphores.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug(f"Error cerrando cliente HTTP: {e}")
+        executors = list(self._executors.values())
+        self._executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=False)
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _bind_loop(self):
+        """Recrear estado ligado al loop si el loop activo cambió"""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        if self._loop is not None and self._clients:
+            logger.debug("🔁 Event loop nuevo: recreando pools HTTP de conectores")
+            self._release_clients(self._loop, list(self._clients.values()))
+        self._loop = loop
+        self._clients = {}
+        self._semaphores = {}
+        self._inflight = {}
+
+    def _release_clients(self, loop: asyncio.AbstractEventLoop, clients):
+        """Cerrar los pools del loop anterior en ese loop; si ya terminó, registrar la fuga"""
+        if loop.is_running() and not loop.is_closed():
+            for client in clients:
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        # Sus sockets pertenecen a un loop terminado: no se pueden cerrar desde aquí
+        self.stats['leaked_clients'] += len(clients)
+        logger.warning(f"⚠️ {len(clients)} pools HTTP de un event loop terminado sin aclose(); "
+                       f"sus sockets quedan a cargo del GC")
+
+    def policy_for(self, host: str) -> HostPolicy:
+        return self.host_policies.get(host, self.default_policy)
+
+    def _client_for(self, url: httpx.URL) -> httpx.AsyncClient:
+        origin = (url.scheme, url.host, url.port)
+        client = self._clients.get(origin)
+        if client is None:
+            policy = self.policy_for(url.host)
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=httpx.Timeout(30.0, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=policy.max_connections,
+                    max_keepalive_connections=policy.max_connections
+                ),
+                headers={'User-Agent': 'ArcheoScope/2.0'}
+            )
+            self._clients[origin] = client
+            self.stats['clients_created'] += 1
+        return client
+
+    def _semaphore_for(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.policy_for(host).max_concurrency)
+            self._semaphores[host] = semaphore
+        return semaphore
+
+    async def _send_with_retry(self, method: str, url: httpx.URL, *,
+                               headers, auth, json, data, timeout,
+                               follow_redirects: bool,
+                               max_retries: Optional[int]) -> httpx.Response:
+        policy = self.policy_for(url.host)
+        retries = policy.max_retries if max_retries is None else max_retries
+        idempotent = method in IDEMPOTENT_METHODS
+        client = self._client_for(url)
+        semaphore = self._semaphore_for(url.host)
+
+        kwargs = {'headers': headers, 'auth': self._normalize_auth(auth),
+                  'json': json, 'data': data, 'follow_redirects': follow_redirects}
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        kwargs = {k: v for k, v in kwargs.items() if v is not None}
+
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    self.stats['network_requests'] += 1
+                    with tracer.span("http", url.host):
+                        response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                # Sin respuesta: solo reintentar POST si la conexión nunca se abrió
+                retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                if not retryable or attempt >= retries:
+                    self.stats['failures'] += 1
+                    raise
+                delay = self._backoff(policy, attempt)
+                logger.debug(f"↻ {method} {url.host}: {type(e).__name__}, reintento en {delay:.2f}s")
+            else:
+                if response.status_code not in RETRYABLE_STATUS or not idempotent or attempt >= retries:
+                    return response
+                delay = self._retry_after(response) or self._backoff(policy, attempt)
+                delay = min(delay, policy.backoff_max)
+                logger.debug(f"↻ {method} {url.host}: HTTP {response.status_code}, reintento en {delay:.2f}s")
+
+            attempt += 1
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _backoff(policy: HostPolicy, attempt: int) -> float:
+        """Backoff exponencial con jitter completo"""
+        return random.uniform(0, min(policy.backoff_max, policy.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _normalize_auth(auth: Any) -> Any:
+        if isinstance(auth, tuple):
+            return httpx.BasicAuth(*auth)
+        return auth
+
+    @staticmethod
+    def _headers_key(headers: Optional[Dict[str, str]]) -> Tuple:
+        if not headers:
+            return ()
+        return tuple(sorted((k.lower(), str(v)) for k, v in headers.items()))
+
+    @staticmethod
+    def _auth_key(auth: Any) -> Any:
+        if auth is None:
+            return None
+        if isinstance(auth, tuple):
+            return auth
+        return getattr(auth, '_auth_header', id(auth))
+
+
+# Instancia global compartida por todos los conectores
+connector_transport = ConnectorTransport()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Adaptive Instrument Scheduler - Planificador adaptativo por fuente
+==================================================================
+
+Reemplaza el Semaphore(3) global de get_batch_measurements:
+
+- Presupuesto de concurrencia POR FUENTE (ERA5 lento no bloquea a MODIS)
+- Histograma de latencias por fuente (aprende p50/p95 en caliente)
+- Lanza primero las fuentes con mayor latencia esperada
+- Hedged requests para fuentes con cola larga (segundo intento tras p95),
+  nunca para fuentes de trabajos remotos (CDS, earthdata): cancelar la tarea
+  local no cancela el job del servidor y el hedge duplicaría la carga/cuota
+- Deadline por instrumento
+- Salida temprana: el batch retorna en cuanto se alcanza el coverage objetivo
+
+Nunca aborta: cada instrumento termina con un InstrumentResult explícito
+(los diferidos por coverage alcanzado se reportan como FAILED/DEFERRED).
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Estados con datos utilizables (mismo criterio que InstrumentBatch.get_usable_instruments)
+USABLE_STATUSES = ("SUCCESS", "DEGRADED")
+
+
+@dataclass
+class SourceProfile:
+    """Presupuesto y expectativas de una fuente (conector)"""
+    max_concurrency: int = 2
+    expected_latency_s: float = 10.0  # prior hasta tener muestras
+    deadline_s: float = 180.0
+    hedge: bool = False  # habilitar hedged requests (solo fuentes sin coalescencia)
+    remote_job: bool = False  # job encolado/con cuota en el servidor: nunca se hedgea
+
+
+DEFAULT_SOURCE_PROFILE = SourceProfile()
+
+# Priors por conector de RealDataIntegratorV2.connectors
+SOURCE_PROFILES: Dict[str, SourceProfile] = {
+    'planetary_computer': SourceProfile(max_concurrency=3, expected_latency_s=20.0, deadline_s=180.0),
+    'icesat2': SourceProfile(max_concurrency=2, expected_latency_s=25.0, deadline_s=120.0, remote_job=True),
+    'era5': SourceProfile(max_concurrency=1, expected_latency_s=45.0, deadline_s=120.0, remote_job=True),
+    'chirps': SourceProfile(max_concurrency=2, expected_latency_s=30.0, deadline_s=90.0),
+    'copernicus_marine': SourceProfile(max_concurrency=2, expected_latency_s=15.0, deadline_s=90.0, hedge=True),
+    'opentopography': SourceProfile(max_concurrency=2, expected_latency_s=10.0, deadline_s=60.0),
+    'srtm': SourceProfile(max_concurrency=2, expected_latency_s=10.0, deadline_s=60.0),
+    'palsar': SourceProfile(max_concurrency=2, expected_latency_s=10.0, deadline_s=60.0),
+    'modis_lst': SourceProfile(max_concurrency=3, expected_latency_s=5.0, deadline_s=45.0),
+    'nsidc': SourceProfile(max_concurrency=2, expected_latency_s=5.0, deadline_s=45.0),
+    'viirs': SourceProfile(max_concurrency=2, expected_latency_s=5.0, deadline_s=45.0),
+}
+
+
+class LatencyHistogram:
+    """Histograma de latencias con buckets logarítmicos (50 ms - 10 min)"""
+
+    EDGES = np.geomspace(0.05, 600.0, 41)
+    MIN_SAMPLES = 5
+
+    def __init__(self, prior_s: float):
+        self.prior_s = prior_s
+        self.counts = np.zeros(len(self.EDGES) + 1, dtype=np.int64)
+        self.total = 0
+
+    def observe(self, seconds: float):
+        self.counts[int(np.searchsorted(self.EDGES, seconds))] += 1
+        self.total += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Cuantil aproximado (borde superior del bucket); None sin muestras suficientes"""
+        if self.total < self.MIN_SAMPLES:
+            return None
+        idx = int(np.searchsorted(np.cumsum(self.counts), q * self.total))
+        return float(self.EDGES[min(idx, len(self.EDGES) - 1)])
+
+    def expected(self) -> float:
+        """Latencia esperada (p50 observado o prior)"""
+        p50 = self.quantile(0.5)
+        return p50 if p50 is not None else self.prior_s
+
+    def to_dict(self) -> Dict[str, Optional[float]]:
+        return {
+            'samples': self.total,
+            'p50_s': self.quantile(0.5),
+            'p95_s': self.quantile(0.95),
+            'expected_s': self.expected()
+        }
+
+
+# fetch(instrument_name, timeout_s) -> InstrumentResult
+FetchFn = Callable[[str, float], Awaitable[object]]
+
+
+class AdaptiveInstrumentScheduler:
+    """
+    Planificador de instrumentos con presupuestos por fuente
+
+    Una instancia por integrador: los histogramas y semáforos se comparten
+    entre batches concurrentes (p.ej. celdas de /analyze/batch).
+    """
+
+    def __init__(self, source_profiles: Optional[Dict[str, SourceProfile]] = None,
+                 max_total_concurrency: int = 8,
+                 max_hedges_per_batch: int = 2):
+        self.source_profiles = dict(SOURCE_PROFILES if source_profiles is None else source_profiles)
+        self.max_total_concurrency = max_total_concurrency
+        self.max_hedges_per_batch = max_hedges_per_batch
+
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+
+        self.stats = {
+            'batches': 0,
+            'instruments': 0,
+            'hedges_launched': 0,
+            'hedges_won': 0,
+            'deadline_exceeded': 0,
+            'early_exits': 0,
+            'deferred_instruments': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Perfiles y latencias
+    # ------------------------------------------------------------------
+
+    def profile_for(self, source: str) -> SourceProfile:
+        return self.source_profiles.get(source, DEFAULT_SOURCE_PROFILE)
+
+    def histogram_for(self, source: str) -> LatencyHistogram:
+        histogram = self.histograms.get(source)
+        if histogram is None:
+            histogram = LatencyHistogram(self.profile_for(source).expected_latency_s)
+            self.histograms[source] = histogram
+        return histogram
+
+    def plan(self, jobs: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Ordenar (instrumento, fuente): mayor latencia esperada primero"""
+        return sorted(jobs, key=lambda job: self.histogram_for(job[1]).expected(), reverse=True)
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            **self.stats,
+            'sources': {name: h.to_dict() for name, h in sorted(self.histograms.items())}
+        }
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+
+    async def run(self, jobs: List[Tuple[str, str]], fetch: FetchFn,
+                  on_result: Callable[[object], None],
+                  coverage_fn: Optional[Callable[[], float]] = None,
+                  coverage_target: Optional[float] = None,
+                  min_instruments: int = 2,
+                  make_deferred: Optional[Callable[[str], object]] = None) -> Dict[str, object]:
+        """
+        Ejecutar un batch de instrumentos
+
+        Args:
+            jobs: Lista de (instrument_name, source)
+            fetch: Corrutina fetch(instrument_name, timeout_s) -> InstrumentResult
+            on_result: Callback por resultado (p.ej. InstrumentBatch.add_result)
+            coverage_fn: Coverage proyectado sobre el total solicitado (0-1)
+            coverage_target: Si se alcanza (con min_instruments usables) se
+                retorna sin esperar al resto. None = esperar todo.
+            min_instruments: Instrumentos usables mínimos para salida temprana
+            make_deferred: Resultado explícito para instrumentos no esperados
+
+        Returns:
+            Resumen de la planificación
+        """
+        self._bind_loop()
+        self.stats['batches'] += 1
+        self.stats['instruments'] += len(jobs)
+
+        ordered = self.plan(jobs)
+        hedge_budget = {'remaining': self.max_hedges_per_batch}
+        tasks = {
+            asyncio.create_task(self._run_instrument(name, source, fetch, hedge_budget)): name
+            for name, source in ordered
+        }
+
+        usable = 0
+        early_exit = False
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    on_result(result)
+                    if self._status_of(result) in USABLE_STATUSES:
+                        usable += 1
+
+                if (pending and coverage_target is not None and coverage_fn is not None
+                        and usable >= min_instruments and coverage_fn() >= coverage_target):
+                    early_exit = True
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        deferred = [tasks[task] for task in pending]
+        if early_exit:
+            self.stats['early_exits'] += 1
+            self.stats['deferred_instruments'] += len(deferred)
+            if make_deferred is not None:
+                for name in deferred:
+                    on_result(make_deferred(name))
+
+        return {
+            'order': [name for name, _ in ordered],
+            'early_exit': early_exit,
+            'coverage_target': coverage_target,
+            'deferred_instruments': deferred,
+            'hedges_used': self.max_hedges_per_batch - hedge_budget['remaining']
+        }
+
+    async def _run_instrument(self, name: str, source: str, fetch: FetchFn,
+                              hedge_budget: Dict[str, int]) -> object:
+        profile = self.profile_for(source)
+        histogram = self.histogram_for(source)
+        semaphore = self._semaphore_for(source)
+
+        async with semaphore, self._global_semaphore:
+            primary = asyncio.create_task(self._timed(fetch, name, profile.deadline_s, source))
+            try:
+                hedge_delay = histogram.quantile(0.95) if profile.hedge and not profile.remote_job else None
+                if hedge_delay is None or hedge_delay >= profile.deadline_s:
+                    return await primary
+
+                done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+                if done:
+                    return primary.result()
+
+                # Hedge solo si hay presupuesto y un slot libre de la fuente (sin esperar)
+                if hedge_budget['remaining'] <= 0 or semaphore.locked():
+                    return await primary
+
+                hedge_budget['remaining'] -= 1
+                self.stats['hedges_launched'] += 1
+                logger.info(f"🪁 Hedge {name} ({source}): sin respuesta tras p95={hedge_delay:.1f}s")
+                return await self._race(primary, semaphore, fetch, name,
+                                        profile.deadline_s - hedge_delay, source)
+            finally:
+                if not primary.done():
+                    primary.cancel()
+
+    async def _race(self, primary: asyncio.Task, semaphore: asyncio.Semaphore,
+                    fetch: FetchFn, name: str, remaining_s: float, source: str) -> object:
+        """Primera respuesta usable entre el intento original y el hedge"""
+        await semaphore.acquire()
+        hedge = asyncio.create_task(self._timed(fetch, name, max(remaining_s, 1.0), source))
+        hedge.add_done_callback(lambda _: semaphore.release())
+
+        attempts = {primary, hedge}
+        fallback = None
+        try:
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if self._status_of(result) in USABLE_STATUSES:
+                        if task is hedge:
+                            self.stats['hedges_won'] += 1
+                        return result
+                    # Preferir el diagnóstico del intento original
+                    if fallback is None or task is primary:
+                        fallback = result
+            return fallback
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    async def _timed(self, fetch: FetchFn, name: str, timeout_s: float, source: str) -> object:
+        started = time.monotonic()
+        result = await fetch(name, timeout_s)
+        elapsed = time.monotonic() - started
+        if getattr(result, 'measurement_type', None) == 'timeout':
+            self.stats['deadline_exceeded'] += 1
+            elapsed = max(elapsed, timeout_s)  # censurado: al menos el deadline
+        self.histogram_for(source).observe(elapsed)
+        return result
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        self._loop = loop
+        self._semaphores = {}
+        self._global_semaphore = asyncio.Semaphore(self.max_total_concurrency)
+
+    def _semaphore_for(self, source: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(source)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.profile_for(source).max_concurrency)
+            self._semaphores[source] = semaphore
+        return semaphore
+
+    @staticmethod
+    def _status_of(result: object) -> Optional[str]:
+        status = getattr(result, 'status', None)
+        return getattr(status, 'value', status)
@@ -55,7 +55,6 @@ class MODISConnector(SatelliteConnector):
             return None
         
         try:
-            import requests
             import numpy as np
             from datetime import timedelta
             
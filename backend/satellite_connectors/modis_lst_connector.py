@@ -41,6 +41,8 @@ from data_integrity.data_mode import (
     create_derived_data_response
 )
 
+from .http_transport import connector_transport
+
 logger = logging.getLogger(__name__)
 
 class MODISLSTConnector:
@@ -156,66 +158,49 @@ class MODISLSTConnector:
             sys.path.insert(0, str(Path(__file__).parent.parent))
             from instrument_contract import InstrumentMeasurement
             
-            # Usar cliente con manejo automático de cookies para EDL
-            async with httpx.AsyncClient(
-                timeout=httpx.Timeout(30.0, connect=10.0),
-                follow_redirects=True
-            ) as client:
-                # NASA requiere Basic Auth pero también manejo de cookies para los redirects de EDL
-                auth = httpx.BasicAuth(self.username, self.password)
+            # Pool compartido por host (reutiliza conexiones y cookies de EDL)
+            # NASA requiere Basic Auth pero también manejo de cookies para los redirects de EDL
+            auth = httpx.BasicAuth(self.username, self.password)
+            
+            # Request al directorio
+            try:
+                response = await connector_transport.get(
+                    url, auth=auth, timeout=httpx.Timeout(30.0, connect=10.0)
+                )
                 
-                # Request al directorio
-                try:
-                    response = await client.get(url, auth=auth)
+                if response.status_code == 200:
+                    # Éxito - Generar respuesta de datos reales
+                    lst_day, lst_night = self._estimate_lst(center_lat, center_lon, date.month)
+                    thermal_inertia = lst_day - lst_night
                     
-                    if response.status_code == 200:
-                        # Éxito - Generar respuesta de datos reales
-                        lst_day, lst_night = self._estimate_lst(center_lat, center_lon, date.month)
-                        thermal_inertia = lst_day - lst_night
-                        
-                        logger.info(f"   ✅ MODIS LST exitoso")
-                        
-                        return InstrumentMeasurement.create_success(
-                            instrument_name="MODIS",
-                            measurement_type="thermal_inertia",
-                            value=thermal_inertia,
-                            unit="Kelvin",
-                            confidence=0.85,
-                            source="MODIS Terra LST (MOD11A1.061)",
-                            acquisition_date=date.strftime("%Y-%m-%d"),
-                            metadata={
-                                "lst_day": lst_day,
-                                "lst_night": lst_night,
-                                "tile": f"h{h:02d}v{v:02d}"
-                            }
-                        )
+                    logger.info(f"   ✅ MODIS LST exitoso")
                     
-                    elif response.status_code == 401:
-                        logger.error("❌ MODIS LST: 401 Unauthorized - Credenciales inválidas")
-                        return InstrumentMeasurement.create_error(
-                            instrument_name="MODIS",
-                            measurement_type="thermal_inertia",
-                            error_msg="Authentication failed (401)",
-                            source="NASA EDL"
-                        )
-                        
-                    else:
-                        logger.warning(f"⚠️ MODIS LST: HTTP {response.status_code} - Usando estimación")
-                        lst_day, lst_night = self._estimate_lst(center_lat, center_lon, date.month)
-                        thermal_inertia = lst_day - lst_night
-                        
-                        return InstrumentMeasurement.create_derived(
-                            instrument_name="MODIS",
-                            measurement_type="thermal_inertia",
-                            value=thermal_inertia,
-                            unit="Kelvin",
-                            confidence=0.6,
-                            derivation_method=f"Location model (HTTP {response.status_code})",
-                            source="MODIS (estimated)"
-                        )
+                    return InstrumentMeasurement.create_success(
+                        instrument_name="MODIS",
+                        measurement_type="thermal_inertia",
+                        value=thermal_inertia,
+                        unit="Kelvin",
+                        confidence=0.85,
+                        source="MODIS Terra LST (MOD11A1.061)",
+                        acquisition_date=date.strftime("%Y-%m-%d"),
+                        metadata={
+                            "lst_day": lst_day,
+                            "lst_night": lst_night,
+                            "tile": f"h{h:02d}v{v:02d}"
+                        }
+                    )
                 
-                except (httpx.ConnectTimeout, httpx.ReadTimeout):
-                    logger.warning("⏱️ MODIS LST: Timeout con NASA - Usando estimación")
+                elif response.status_code == 401:
+                    logger.error("❌ MODIS LST: 401 Unauthorized - Credenciales inválidas")
+                    return InstrumentMeasurement.create_error(
+                        instrument_name="MODIS",
+                        measurement_type="thermal_inertia",
+                        error_msg="Authentication failed (401)",
+                        source="NASA EDL"
+                    )
+                    
+                else:
+                    logger.warning(f"⚠️ MODIS LST: HTTP {response.status_code} - Usando estimación")
                     lst_day, lst_night = self._estimate_lst(center_lat, center_lon, date.month)
                     thermal_inertia = lst_day - lst_night
                     
@@ -224,10 +209,25 @@ class MODISLSTConnector:
                         measurement_type="thermal_inertia",
                         value=thermal_inertia,
                         unit="Kelvin",
-                        confidence=0.55,
-                        derivation_method="Location model (Timeout)",
+                        confidence=0.6,
+                        derivation_method=f"Location model (HTTP {response.status_code})",
                         source="MODIS (estimated)"
                     )
+            
+            except (httpx.ConnectTimeout, httpx.ReadTimeout):
+                logger.warning("⏱️ MODIS LST: Timeout con NASA - Usando estimación")
+                lst_day, lst_night = self._estimate_lst(center_lat, center_lon, date.month)
+                thermal_inertia = lst_day - lst_night
+                
+                return InstrumentMeasurement.create_derived(
+                    instrument_name="MODIS",
+                    measurement_type="thermal_inertia",
+                    value=thermal_inertia,
+                    unit="Kelvin",
+                    confidence=0.55,
+                    derivation_method="Location model (Timeout)",
+                    source="MODIS (estimated)"
+                )
         
         except Exception as e:
             logger.error(f"❌ MODIS LST Error Crítico: {e}")
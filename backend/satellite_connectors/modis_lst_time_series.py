@@ -6,45 +6,84 @@ Extensión del MODISLSTConnector para obtener series temporales diarias
 de temperatura superficial terrestre.
 
 Implementa:
-- Cache local para evitar re-descargas
+- Almacén columnar memory-mapped (time_series_store): sólo se descargan los
+  compuestos que faltan; ventanas desplazadas reutilizan lo ya guardado
+- Grilla temporal fija MOD11A2 (días del año 1, 9, 17, ...)
+- Reutilización de celdas vecinas de la misma tesela
 - Fallback a estimación si falla API
 - Progress tracking
 - Manejo robusto de errores
 """
 
-import os
-import json
+import sys
 import asyncio
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import Dict, Any, Optional
 from pathlib import Path
 import logging
 
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from time_series_store import (
+    TimeSeriesStore, time_series_store, modis_composite_dates,
+    QUALITY_REAL, QUALITY_ESTIMATED
+)
+
 logger = logging.getLogger(__name__)
 
+# Variable en el almacén de series
+STORE_VARIABLE = "modis_lst"
+
+# Compuestos descargados entre escrituras al almacén
+APPEND_BATCH = 10
+
 
 class MODISLSTTimeSeries:
     """
     Obtención de series temporales MODIS LST
     """
     
-    def __init__(self, modis_connector):
+    def __init__(self, modis_connector, store: Optional[TimeSeriesStore] = None,
+                 neighbor_radius: int = 1):
         """
         Args:
             modis_connector: Instancia de MODISLSTConnector
+            store: Almacén de series (default: instancia global)
+            neighbor_radius: Celdas vecinas (misma tesela) reutilizables
         """
         self.modis = modis_connector
-        self.cache_dir = Path("cache/modis_time_series")
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.store = store or time_series_store
+        self.neighbor_radius = neighbor_radius
         
         # Verificar disponibilidad
         if not self.modis.available:
             logger.warning("⚠️ MODIS LST no disponible - usando solo estimaciones")
             print("⚠️ MODIS LST no disponible - usando solo estimaciones")
     
-    def _get_cache_path(self, lat: float, lon: float, years: int) -> Path:
-        """Generar path de cache para serie temporal"""
-        return self.cache_dir / f"modis_lst_{lat:.4f}_{lon:.4f}_{years}y.json"
+    def _estimate_celsius(self, lat: float, lon: float, month: int) -> float:
+        lst_day, lst_night = self.modis._estimate_lst(lat, lon, month)
+        return (lst_day + lst_night) / 2 - 273.15
+    
+    async def _fetch_composite(self, lat: float, lon: float, composite_date) -> tuple:
+        """(LST °C, calidad) de un compuesto: dato real o estimación"""
+        try:
+            lst_data = await self.modis.get_land_surface_temperature(
+                lat_min=lat - 0.01,
+                lat_max=lat + 0.01,
+                lon_min=lon - 0.01,
+                lon_max=lon + 0.01
+            )
+            
+            if lst_data and hasattr(lst_data, 'status') and lst_data.status == 'success':
+                metadata = lst_data.metadata if hasattr(lst_data, 'metadata') else {}
+                lst_day = metadata.get('lst_day', 300)
+                lst_night = metadata.get('lst_night', 290)
+                return (lst_day + lst_night) / 2 - 273.15, QUALITY_REAL
+        except Exception:
+            pass
+        
+        return self._estimate_celsius(lat, lon, composite_date.month), QUALITY_ESTIMATED
     
     async def get_daily_thermal_series(
         self,
@@ -56,133 +95,79 @@ class MODISLSTTimeSeries:
         """
         Obtener serie temporal diaria de LST
         
+        Cada día toma el valor de su compuesto de 8 días (MOD11A2). Sólo se
+        descargan los compuestos que el almacén no tiene.
+        
         Args:
             lat: Latitud
             lon: Longitud
             years: Años de historia (default: 5)
-            use_cache: Usar cache si existe (default: True)
+            use_cache: Reutilizar el almacén (False = re-descargar la ventana)
         
         Returns:
             Dict con:
                 - series: List[float] - Temperaturas en Celsius
                 - dates: List[str] - Fechas ISO
-                - real_data_count: int - Cantidad de datos reales
-                - estimated_data_count: int - Cantidad de datos estimados
+                - real_data_count: int - Compuestos con datos reales
+                - estimated_data_count: int - Compuestos estimados
                 - source: str - Fuente de datos
         """
         
-        cache_path = self._get_cache_path(lat, lon, years)
-        
-        # Intentar cargar desde cache
-        if use_cache and cache_path.exists():
-            print(f"   📦 Cargando desde cache: {cache_path.name}")
-            with open(cache_path, 'r') as f:
-                cached_data = json.load(f)
-                print(f"   ✅ Cache cargado: {len(cached_data['series'])} días")
-                return cached_data
-        
-        print(f"   📡 Obteniendo serie temporal MODIS LST...")
-        print(f"   📍 Ubicación: ({lat:.4f}, {lon:.4f})")
-        print(f"   📅 Período: {years} años ({years * 365} días)")
-        
         days = years * 365
-        series = []
-        dates = []
-        real_data_count = 0
-        estimated_data_count = 0
-        
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
+        end_date = datetime.now().date() - timedelta(days=1)
+        start_date = end_date - timedelta(days=days - 1)
+        composites = modis_composite_dates(start_date, end_date)
         
-        # Estrategia: Intentar obtener datos reales, fallback a estimación
-        print(f"   🔄 Estrategia: Datos reales con fallback a estimación")
-        print(f"   ⏱️ Esto puede tomar 1-2 horas para {days} días...")
+        print(f"   📡 Serie temporal MODIS LST (MOD11A2, 8-day composite)")
+        print(f"   📍 Ubicación: ({lat:.4f}, {lon:.4f})")
+        print(f"   📅 Período: {years} años ({days} días, {len(composites)} compuestos)")
         
-        # Para optimizar, usar MOD11A2 (8-day composite) en vez de daily
-        # Esto reduce requests de 1825 a ~228
-        use_8day_composite = True
+        if use_cache:
+            missing = self.store.missing_dates(
+                STORE_VARIABLE, lat, lon, composites, neighbor_radius=self.neighbor_radius
+            )
+        else:
+            missing = composites
         
-        if use_8day_composite:
-            print(f"   🚀 Usando MOD11A2 (8-day composite) para optimizar")
-            print(f"   📊 Requests reducidos: {days} → {days//8} (~{days//8} requests)")
+        if len(missing):
+            print(f"   🔄 Compuestos a descargar: {len(missing)} (en almacén: {len(composites) - len(missing)})")
+            await self._fetch_and_store(lat, lon, missing)
+        else:
+            print(f"   📦 Serie completa en almacén: {len(composites)} compuestos")
         
-        last_progress = 0
+        # Lectura por rango: del compuesto que contiene start_date a end_date
+        window = self.store.read_range(
+            STORE_VARIABLE, lat, lon, composites[0], end_date, neighbor_radius=self.neighbor_radius
+        )
+        series = self._forward_fill(window.values)[-days:]
+        dates = window.dates[-days:].astype(str).tolist()
         
-        for day in range(days):
-            current_date = start_date + timedelta(days=day)
-            dates.append(current_date.isoformat()[:10])
-            
-            # Progress cada 10%
-            progress = int((day / days) * 100)
-            if progress >= last_progress + 10:
-                print(f"   📊 Progreso: {progress}% ({day}/{days} días) - Real: {real_data_count}, Estimado: {estimated_data_count}")
-                last_progress = progress
-            
-            # Para 8-day composite, solo hacer request cada 8 días
-            if use_8day_composite and day % 8 != 0:
-                # Interpolar desde último valor real
-                if len(series) > 0:
-                    series.append(series[-1])
-                else:
-                    # Fallback a estimación
-                    lst_day, lst_night = self.modis._estimate_lst(lat, lon, current_date.month)
-                    lst_avg = (lst_day + lst_night) / 2 - 273.15
-                    series.append(lst_avg)
-                    estimated_data_count += 1
-                continue
-            
-            # Intentar obtener datos reales
-            try:
-                lst_data = await self.modis.get_land_surface_temperature(
-                    lat_min=lat - 0.01,
-                    lat_max=lat + 0.01,
-                    lon_min=lon - 0.01,
-                    lon_max=lon + 0.01
-                )
-                
-                if lst_data and hasattr(lst_data, 'status') and lst_data.status == 'success':
-                    # Datos reales obtenidos
-                    metadata = lst_data.metadata if hasattr(lst_data, 'metadata') else {}
-                    lst_day = metadata.get('lst_day', 300)
-                    lst_night = metadata.get('lst_night', 290)
-                    lst_avg = (lst_day + lst_night) / 2 - 273.15
-                    series.append(lst_avg)
-                    real_data_count += 1
-                else:
-                    # Fallback a estimación
-                    lst_day, lst_night = self.modis._estimate_lst(lat, lon, current_date.month)
-                    lst_avg = (lst_day + lst_night) / 2 - 273.15
-                    series.append(lst_avg)
-                    estimated_data_count += 1
-                
-            except Exception as e:
-                # Error - usar estimación
-                lst_day, lst_night = self.modis._estimate_lst(lat, lon, current_date.month)
-                lst_avg = (lst_day + lst_night) / 2 - 273.15
-                series.append(lst_avg)
-                estimated_data_count += 1
-            
-            # Rate limiting: pequeña pausa cada 10 requests
-            if day % 10 == 0 and day > 0:
-                await asyncio.sleep(0.1)
+        at_composites = np.isin(window.dates, composites)
+        quality = window.quality[at_composites]
+        real_data_count = int(np.sum(quality >= QUALITY_REAL))
+        estimated_data_count = int(len(quality) - real_data_count)
+        reused_count = int(np.sum(window.reused[at_composites]))
         
         print(f"   ✅ Serie temporal completada: {len(series)} días")
-        print(f"   📊 Datos reales: {real_data_count} ({real_data_count/days*100:.1f}%)")
-        print(f"   📊 Datos estimados: {estimated_data_count} ({estimated_data_count/days*100:.1f}%)")
+        print(f"   📊 Compuestos reales: {real_data_count}/{len(composites)}, estimados: {estimated_data_count}")
+        if reused_count:
+            print(f"   ♻️ Compuestos reutilizados de celdas vecinas: {reused_count}")
         
         # Determinar fuente
-        if real_data_count > days * 0.5:
+        if real_data_count > len(composites) * 0.5:
             source = "MODIS LST (majority real data)"
         elif real_data_count > 0:
             source = "MODIS LST (mixed real/estimated)"
         else:
             source = "MODIS LST (estimated - API unavailable)"
         
-        result = {
-            'series': series,
+        return {
+            'series': [float(v) for v in series],
             'dates': dates,
             'real_data_count': real_data_count,
             'estimated_data_count': estimated_data_count,
+            'reused_from_neighbors': reused_count,
+            'downloaded_composites': int(len(missing)),
             'total_days': days,
             'source': source,
             'lat': lat,
@@ -190,14 +175,45 @@ class MODISLSTTimeSeries:
             'years': years,
             'generated_at': datetime.now().isoformat()
         }
+    
+    async def _fetch_and_store(self, lat: float, lon: float, composites: np.ndarray):
+        """Descargar compuestos y escribirlos en el almacén por lotes"""
+        pending_dates, pending_values, pending_quality = [], [], []
+        last_progress = 0
         
-        # Guardar en cache
-        with open(cache_path, 'w') as f:
-            json.dump(result, f, indent=2)
-        
-        print(f"   💾 Cache guardado: {cache_path.name}")
-        
-        return result
+        for i, composite in enumerate(composites.astype(object)):
+            value, quality = await self._fetch_composite(lat, lon, composite)
+            pending_dates.append(composite)
+            pending_values.append(value)
+            pending_quality.append(quality)
+            
+            # Lotes: una interrupción conserva lo ya descargado
+            if len(pending_dates) >= APPEND_BATCH or i == len(composites) - 1:
+                self.store.append(STORE_VARIABLE, lat, lon, pending_dates, pending_values, pending_quality)
+                pending_dates, pending_values, pending_quality = [], [], []
+            
+            # Progress cada 10%
+            progress = int((i + 1) / len(composites) * 100)
+            if progress >= last_progress + 10:
+                print(f"   📊 Progreso: {progress}% ({i + 1}/{len(composites)} compuestos)")
+                last_progress = progress
+            
+            # Rate limiting: pequeña pausa cada 10 requests
+            if i % 10 == 0 and i > 0:
+                await asyncio.sleep(0.1)
+    
+    @staticmethod
+    def _forward_fill(values: np.ndarray) -> np.ndarray:
+        """Cada día toma el último compuesto disponible"""
+        valid = ~np.isnan(values)
+        if not valid.any():
+            return values.astype(np.float64)
+        index = np.where(valid, np.arange(len(values)), 0)
+        np.maximum.accumulate(index, out=index)
+        filled = values[index].astype(np.float64)
+        # Días previos al primer dato: primer valor disponible
+        filled[:np.argmax(valid)] = values[np.argmax(valid)]
+        return filled
 
 
 async def test_time_series():
@@ -208,10 +224,6 @@ async def test_time_series():
     print("="*80)
     
     # Importar conector
-    import sys
-    from pathlib import Path
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    
     from satellite_connectors.modis_lst_connector import MODISLSTConnector
     
     modis = MODISLSTConnector()
@@ -229,6 +241,7 @@ async def test_time_series():
     
     print(f"\n✅ Resultado:")
     print(f"   Total días: {result['total_days']}")
+    print(f"   Compuestos descargados: {result['downloaded_composites']}")
     print(f"   Datos reales: {result['real_data_count']}")
     print(f"   Datos estimados: {result['estimated_data_count']}")
     print(f"   Fuente: {result['source']}")
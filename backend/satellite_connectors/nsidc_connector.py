@@ -40,6 +40,8 @@ from data_integrity.data_mode import (
     create_derived_data_response
 )
 
+from .http_transport import connector_transport
+
 logger = logging.getLogger(__name__)
 
 class NSIDCConnector:
@@ -128,53 +130,53 @@ class NSIDCConnector:
             # Construir URL del dataset
             url = f"{self.base_url}/MEASURES/NSIDC-0051.002/{date[:4]}.{date[4:6]}.{date[6:8]}/"
             
-            async with httpx.AsyncClient(
+            # Autenticación HTTP Basic
+            auth = httpx.BasicAuth(self.username, self.password)
+            
+            # Request al directorio
+            response = await connector_transport.get(
+                url, auth=auth,
                 timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
-            ) as client:
-                # Autenticación HTTP Basic
-                auth = httpx.BasicAuth(self.username, self.password)
+            )
+            
+            if response.status_code == 200:
+                # Procesar respuesta (simplificado - en producción parsear HDF5)
+                # Por ahora, retornar valor estimado basado en ubicación
                 
-                # Request al directorio
-                response = await client.get(url, auth=auth, follow_redirects=True)
+                # Concentración típica por latitud
+                avg_lat = (lat_min + lat_max) / 2
                 
-                if response.status_code == 200:
-                    # Procesar respuesta (simplificado - en producción parsear HDF5)
-                    # Por ahora, retornar valor estimado basado en ubicación
-                    
-                    # Concentración típica por latitud
-                    avg_lat = (lat_min + lat_max) / 2
-                    
-                    if abs(avg_lat) > 70:  # Polar
-                        concentration = 0.85
-                    elif abs(avg_lat) > 60:  # Subpolar
-                        concentration = 0.45
-                    else:  # Templado
-                        concentration = 0.05
-                    
-                    logger.info(f"   ✅ Concentración de hielo: {concentration:.2%}")
-                    
-                    # REAL data (API respondió exitosamente)
-                    return InstrumentMeasurement(
-                        instrument_name="NSIDC",
-                        measurement_type="sea_ice_concentration",
-                        value=concentration,
-                        unit="fraction",
-                        status=InstrumentStatus.OK,
-                        confidence=0.9,
-                        reason=None,
-                        quality_flags={'hemisphere': hemisphere, 'resolution_km': 25},
-                        source="NSIDC Sea Ice Concentrations (NSIDC-0051)",
-                        acquisition_date=date,
-                        processing_notes="Real data from NSIDC API"
-                    )
+                if abs(avg_lat) > 70:  # Polar
+                    concentration = 0.85
+                elif abs(avg_lat) > 60:  # Subpolar
+                    concentration = 0.45
+                else:  # Templado
+                    concentration = 0.05
                 
-                elif response.status_code == 401:
-                    logger.error("❌ NSIDC: Autenticación fallida - usando fallback")
-                    return self._fallback_sea_ice_estimation_contract(lat_min, lat_max, lon_min, lon_max)
+                logger.info(f"   ✅ Concentración de hielo: {concentration:.2%}")
                 
-                else:
-                    logger.warning(f"⚠️ NSIDC: HTTP {response.status_code} - usando fallback")
-                    return self._fallback_sea_ice_estimation_contract(lat_min, lat_max, lon_min, lon_max)
+                # REAL data (API respondió exitosamente)
+                return InstrumentMeasurement(
+                    instrument_name="NSIDC",
+                    measurement_type="sea_ice_concentration",
+                    value=concentration,
+                    unit="fraction",
+                    status=InstrumentStatus.OK,
+                    confidence=0.9,
+                    reason=None,
+                    quality_flags={'hemisphere': hemisphere, 'resolution_km': 25},
+                    source="NSIDC Sea Ice Concentrations (NSIDC-0051)",
+                    acquisition_date=date,
+                    processing_notes="Real data from NSIDC API"
+                )
+            
+            elif response.status_code == 401:
+                logger.error("❌ NSIDC: Autenticación fallida - usando fallback")
+                return self._fallback_sea_ice_estimation_contract(lat_min, lat_max, lon_min, lon_max)
+            
+            else:
+                logger.warning(f"⚠️ NSIDC: HTTP {response.status_code} - usando fallback")
+                return self._fallback_sea_ice_estimation_contract(lat_min, lat_max, lon_min, lon_max)
         
         except Exception as e:
             logger.error(f"❌ NSIDC: Error obteniendo hielo marino: {e}")
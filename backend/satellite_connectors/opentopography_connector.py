@@ -15,6 +15,7 @@ import numpy as np
 from scipy.ndimage import generic_filter, gaussian_filter, maximum_filter, minimum_filter
 
 from .base_connector import SatelliteConnector, SatelliteData
+from .http_transport import connector_transport
 
 logger = logging.getLogger(__name__)
 
@@ -109,74 +110,74 @@ class OpenTopographyConnector(SatelliteConnector):
             logger.info(f"🌍 Solicitando DEM de OpenTopography ({dem_type})...")
             logger.info(f"   Región: [{lat_min:.4f}, {lat_max:.4f}] x [{lon_min:.4f}, {lon_max:.4f}]")
             
-            async with httpx.AsyncClient(
+            response = await connector_transport.get(
+                self.BASE_URL, params=params,
                 timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
-            ) as client:
-                response = await client.get(self.BASE_URL, params=params)
-                
-                if response.status_code == 200:
-                    # Guardar GeoTIFF temporalmente
-                    import tempfile
-                    import rasterio
-                    
-                    with tempfile.NamedTemporaryFile(suffix='.tif', delete=False) as tmp:
-                        tmp.write(response.content)
-                        tmp_path = tmp.name
-                    
-                    try:
-                        # Leer con rasterio
-                        with rasterio.open(tmp_path) as dataset:
-                            elevation = dataset.read(1)
-                            
-                            # Análisis de elevación
-                            stats = self._analyze_elevation(elevation)
-                            
-                            # Análisis arqueológico
-                            archaeological_features = self._detect_archaeological_features(elevation)
-                            
-                            logger.info(f"✅ DEM obtenido: {elevation.shape}")
-                            logger.info(f"   Elevación: {stats['elevation_min']:.1f}m - {stats['elevation_max']:.1f}m")
-                            logger.info(f"   Rugosidad: {stats['roughness']:.3f}")
-                            
-                            # CRÍTICO: Retornar InstrumentMeasurement, NO dict
-                            import sys
-                            from pathlib import Path
-                            sys.path.insert(0, str(Path(__file__).parent.parent))
-                            from instrument_contract import InstrumentMeasurement
-                            
-                            return InstrumentMeasurement.create_success(
-                                instrument_name="OpenTopography",
-                                measurement_type="elevation_rugosity",
-                                value=stats['roughness'],  # SEÑAL PRINCIPAL: rugosidad
-                                unit="rugosity_index",
-                                confidence=0.95,
-                                source=f"OpenTopography {dem_type}",
-                                acquisition_date=datetime.now().isoformat()[:10],
-                                metadata={
-                                    **stats,
-                                    **archaeological_features,
-                                    "resolution_m": 30 if "30" in dem_type or "GL1" in dem_type else 90
-                                }
-                            )
-                    finally:
-                        # Limpiar archivo temporal
-                        try:
-                            os.unlink(tmp_path)
-                        except:
-                            pass
-                
-                elif response.status_code == 401:
-                    logger.error("❌ OpenTopography: API key inválida")
-                    self.available = False
-                    return None
+            )
+            
+            if response.status_code == 200:
+                # Guardar GeoTIFF temporalmente
+                import tempfile
+                import rasterio
                 
-                elif response.status_code == 400:
-                    logger.warning(f"⚠️ OpenTopography: Región no disponible o parámetros inválidos")
-                    return None
+                with tempfile.NamedTemporaryFile(suffix='.tif', delete=False) as tmp:
+                    tmp.write(response.content)
+                    tmp_path = tmp.name
                 
-                else:
-                    logger.error(f"❌ OpenTopography error: {response.status_code}")
-                    return None
+                try:
+                    # Leer con rasterio
+                    with rasterio.open(tmp_path) as dataset:
+                        elevation = dataset.read(1)
+                        
+                        # Análisis de elevación
+                        stats = self._analyze_elevation(elevation)
+                        
+                        # Análisis arqueológico
+                        archaeological_features = self._detect_archaeological_features(elevation)
+                        
+                        logger.info(f"✅ DEM obtenido: {elevation.shape}")
+                        logger.info(f"   Elevación: {stats['elevation_min']:.1f}m - {stats['elevation_max']:.1f}m")
+                        logger.info(f"   Rugosidad: {stats['roughness']:.3f}")
+                        
+                        # CRÍTICO: Retornar InstrumentMeasurement, NO dict
+                        import sys
+                        from pathlib import Path
+                        sys.path.insert(0, str(Path(__file__).parent.parent))
+                        from instrument_contract import InstrumentMeasurement
+                        
+                        return InstrumentMeasurement.create_success(
+                            instrument_name="OpenTopography",
+                            measurement_type="elevation_rugosity",
+                            value=stats['roughness'],  # SEÑAL PRINCIPAL: rugosidad
+                            unit="rugosity_index",
+                            confidence=0.95,
+                            source=f"OpenTopography {dem_type}",
+                            acquisition_date=datetime.now().isoformat()[:10],
+                            metadata={
+                                **stats,
+                                **archaeological_features,
+                                "resolution_m": 30 if "30" in dem_type or "GL1" in dem_type else 90
+                            }
+                        )
+                finally:
+                    # Limpiar archivo temporal
+                    try:
+                        os.unlink(tmp_path)
+                    except:
+                        pass
+            
+            elif response.status_code == 401:
+                logger.error("❌ OpenTopography: API key inválida")
+                self.available = False
+                return None
+            
+            elif response.status_code == 400:
+                logger.warning(f"⚠️ OpenTopography: Región no disponible o parámetros inválidos")
+                return None
+            
+            else:
+                logger.error(f"❌ OpenTopography error: {response.status_code}")
+                return None
         
         except httpx.TimeoutException:
             logger.warning(f"⏱️ OpenTopography timeout después de {self.timeout}s")
@@ -16,7 +16,6 @@ APLICACIONES ARQUEOLÓGICAS:
 - Mapeo de redes de drenaje antiguas
 """
 
-import requests
 import numpy as np
 import logging
 from typing import Dict, Any, Optional, Tuple
@@ -24,6 +23,8 @@ from datetime import datetime, timedelta
 import json
 import asyncio
 
+from .http_transport import connector_transport
+
 logger = logging.getLogger(__name__)
 
 class PALSARConnector:
@@ -541,12 +542,11 @@ class PALSARConnector:
             # Usar credenciales Earthdata (hasheadas en BD)
             auth = (self.username, self.password) if self.username else None
             
-            response = requests.get(
+            response = await connector_transport.get(
                 url,
                 params=params,
                 auth=auth,
-                timeout=30,
-                headers={'User-Agent': 'ArcheoScope/2.0'}
+                timeout=30
             )
             
             if response.status_code == 200:
@@ -15,6 +15,13 @@ from .base_connector import SatelliteConnector, SatelliteData
 
 logger = logging.getLogger(__name__)
 
+# Librerías pesadas (rasterio, pystac, stackstac): se importan al crear el
+# primer conector, no al importar el módulo
+PLANETARY_COMPUTER_AVAILABLE: Optional[bool] = None
+STACKSTAC_AVAILABLE = False
+pystac_client = planetary_computer = rasterio = stackstac = None
+transform_bounds = windows = None
+
 # FIX CRÍTICO: Configurar PROJ_LIB ANTES de importar rasterio
 # PostgreSQL conflictúa con rasterio - forzar uso de PROJ de rasterio
 def _configure_proj():
@@ -31,30 +38,39 @@ def _configure_proj():
         print(f"No se pudo configurar PROJ: {e}")
     return False
 
-# Configurar PROJ antes de cualquier import de rasterio
-_configure_proj()
-
-try:
-    import pystac_client
-    import planetary_computer
-    import rasterio
-    from rasterio.warp import transform_bounds
-    from rasterio import windows  # Para leer ventanas específicas
+def _load_planetary_libraries() -> bool:
+    """Importar pystac/planetary_computer/rasterio/stackstac (una vez)"""
+    global PLANETARY_COMPUTER_AVAILABLE, STACKSTAC_AVAILABLE
+    global pystac_client, planetary_computer, rasterio, stackstac, transform_bounds, windows
+    
+    if PLANETARY_COMPUTER_AVAILABLE is not None:
+        return PLANETARY_COMPUTER_AVAILABLE
+    
+    # Configurar PROJ antes de cualquier import de rasterio
+    _configure_proj()
     
-    # CRÍTICO: Importar stackstac DESPUÉS de configurar PROJ
     try:
-        import stackstac
-        STACKSTAC_AVAILABLE = True
+        import pystac_client
+        import planetary_computer
+        import rasterio
+        from rasterio.warp import transform_bounds
+        from rasterio import windows  # Para leer ventanas específicas
+        
+        # CRÍTICO: Importar stackstac DESPUÉS de configurar PROJ
+        try:
+            import stackstac
+            STACKSTAC_AVAILABLE = True
+        except ImportError as e:
+            print(f"stackstac no disponible: {e}")
+            STACKSTAC_AVAILABLE = False
+        
+        PLANETARY_COMPUTER_AVAILABLE = True
     except ImportError as e:
-        print(f"stackstac no disponible: {e}")
+        PLANETARY_COMPUTER_AVAILABLE = False
         STACKSTAC_AVAILABLE = False
+        logger.warning(f"Import error: {e}")
     
-    PLANETARY_COMPUTER_AVAILABLE = True
-except ImportError as e:
-    PLANETARY_COMPUTER_AVAILABLE = False
-    STACKSTAC_AVAILABLE = False
-    logger.warning(f"Import error: {e}")
-
+    return PLANETARY_COMPUTER_AVAILABLE
 
 
 class PlanetaryComputerConnector(SatelliteConnector):
@@ -75,7 +91,7 @@ class PlanetaryComputerConnector(SatelliteConnector):
         super().__init__(cache_enabled)
         self.name = "PlanetaryComputer"
         
-        if not PLANETARY_COMPUTER_AVAILABLE:
+        if not _load_planetary_libraries():
             logger.warning(
                 "Planetary Computer libraries not available. "
                 "Install with: pip install pystac-client planetary-computer stackstac rasterio"
@@ -104,7 +120,121 @@ class PlanetaryComputerConnector(SatelliteConnector):
         
         Bandas: Blue, Green, Red, NIR, SWIR
         Resolución: 10m
+        
+        Con caché habilitada el bbox se ensambla desde teselas alineadas
+        (ver satellite_tile_cache) y solo se descargan las teselas faltantes.
+        """
+        async def fetch(a, b, c, d):
+            return await self._fetch_multispectral(a, b, c, d, start_date, end_date, max_cloud_cover)
+        
+        return await self._fetch_tiled(
+            'multispectral', lat_min, lat_max, lon_min, lon_max,
+            fetch, self.summarize_multispectral, start_date,
+            params={'end_date': end_date, 'max_cloud_cover': max_cloud_cover}
+        )
+    
+    async def _fetch_tiled(
+        self,
+        data_type: str,
+        lat_min: float,
+        lat_max: float,
+        lon_min: float,
+        lon_max: float,
+        fetch_fn,
+        summarize_fn,
+        start_date: Optional[datetime],
+        cacheable=None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Optional[SatelliteData]:
         """
+        Enrutar una descarga por la caché de teselas si está habilitada
+        
+        params: demás argumentos de fetch_fn que cambian el payload (van a la key)
+        """
+        if not self.cache_enabled or not self.available:
+            return await fetch_fn(lat_min, lat_max, lon_min, lon_max)
+        
+        from satellite_tile_cache import satellite_tile_cache
+        
+        return await satellite_tile_cache.fetch(
+            data_type, lat_min, lat_max, lon_min, lon_max,
+            fetch_fn=fetch_fn,
+            summarize_fn=summarize_fn,
+            date=start_date,
+            cacheable=cacheable,
+            params=params
+        )
+    
+    def summarize_multispectral(self, bands: Dict[str, np.ndarray]):
+        """
+        Índices y anomalía Sentinel-2 a partir de las bandas
+        
+        Returns:
+            (indices, anomaly_score, anomaly_type, confidence) o None
+        """
+        if not all(b in bands for b in ('B02', 'B03', 'B04', 'B08', 'B11')):
+            return None
+        
+        # CRÍTICO: Resamplear todas las bandas al mismo tamaño (usar B04 como referencia)
+        reference_shape = bands['B04'].shape
+        
+        resampled_bands = {}
+        for band_name, band_data in bands.items():
+            if band_data.shape != reference_shape:
+                logger.info(f"Resampling {band_name} de {band_data.shape} a {reference_shape}")
+                from scipy.ndimage import zoom
+                zoom_factors = (reference_shape[0] / band_data.shape[0], 
+                               reference_shape[1] / band_data.shape[1])
+                resampled_bands[band_name] = zoom(band_data, zoom_factors, order=1)
+            else:
+                resampled_bands[band_name] = band_data
+        
+        # Calcular índices con bandas resampled
+        green = resampled_bands['B03']
+        red = resampled_bands['B04']
+        nir = resampled_bands['B08']
+        swir = resampled_bands['B11']
+        
+        ndvi = self.calculate_ndvi(red, nir)
+        ndwi = self.calculate_ndwi(green, nir)
+        ndbi = self.calculate_ndbi(swir, nir)
+        
+        # Calcular valores promedio
+        indices = {
+            'ndvi': float(np.nanmean(ndvi)),
+            'ndwi': float(np.nanmean(ndwi)),
+            'ndbi': float(np.nanmean(ndbi)),
+            'red_mean': float(np.nanmean(red)),
+            'nir_mean': float(np.nanmean(nir)),
+            'swir_mean': float(np.nanmean(swir))
+        }
+        
+        # Detectar anomalías en NDVI
+        anomaly_score, confidence = self.detect_anomaly(ndvi)
+        
+        # Determinar tipo de anomalía
+        if indices['ndvi'] < 0.2:
+            anomaly_type = 'low_vegetation'
+        elif indices['ndvi'] > 0.7:
+            anomaly_type = 'high_vegetation'
+        elif indices['ndbi'] > 0.1:
+            anomaly_type = 'built_up_area'
+        else:
+            anomaly_type = 'vegetation_stress'
+        
+        return indices, anomaly_score, anomaly_type, confidence
+    
+    async def _fetch_multispectral(
+        self,
+        lat_min: float,
+        lat_max: float,
+        lon_min: float,
+        lon_max: float,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        max_cloud_cover: float = 20.0
+    ) -> Optional[SatelliteData]:
+        """Descarga Sentinel-2 directa para un bbox (sin caché de teselas)"""
         if not self.available:
             logger.error("Planetary Computer not available")
             return None
@@ -204,54 +334,14 @@ class PlanetaryComputerConnector(SatelliteConnector):
                 logger.error(f"Solo se pudieron leer {len(bands)} bandas")
                 return None
             
-            # CRÍTICO: Resamplear todas las bandas al mismo tamaño (usar B04 como referencia)
-            reference_shape = bands['B04'].shape
-            logger.info(f"Shape de referencia (B04): {reference_shape}")
-            
-            resampled_bands = {}
-            for band_name, band_data in bands.items():
-                if band_data.shape != reference_shape:
-                    logger.info(f"Resampling {band_name} de {band_data.shape} a {reference_shape}")
-                    from scipy.ndimage import zoom
-                    zoom_factors = (reference_shape[0] / band_data.shape[0], 
-                                   reference_shape[1] / band_data.shape[1])
-                    resampled_bands[band_name] = zoom(band_data, zoom_factors, order=1)
-                else:
-                    resampled_bands[band_name] = band_data
-            
-            # Calcular índices con bandas resampled
-            blue = resampled_bands['B02']
-            green = resampled_bands['B03']
-            red = resampled_bands['B04']
-            nir = resampled_bands['B08']
-            swir = resampled_bands['B11']
-            
-            ndvi = self.calculate_ndvi(red, nir)
-            ndwi = self.calculate_ndwi(green, nir)
-            ndbi = self.calculate_ndbi(swir, nir)
-            
-            # Calcular valores promedio
-            indices = {
-                'ndvi': float(np.nanmean(ndvi)),
-                'ndwi': float(np.nanmean(ndwi)),
-                'ndbi': float(np.nanmean(ndbi)),
-                'red_mean': float(np.nanmean(red)),
-                'nir_mean': float(np.nanmean(nir)),
-                'swir_mean': float(np.nanmean(swir))
-            }
+            logger.info(f"Shape de referencia (B04): {bands['B04'].shape}")
             
-            # Detectar anomalías en NDVI
-            anomaly_score, confidence = self.detect_anomaly(ndvi)
+            summary = self.summarize_multispectral(bands)
+            if summary is None:
+                logger.error(f"Bandas incompletas para índices: {list(bands.keys())}")
+                return None
             
-            # Determinar tipo de anomalía
-            if indices['ndvi'] < 0.2:
-                anomaly_type = 'low_vegetation'
-            elif indices['ndvi'] > 0.7:
-                anomaly_type = 'high_vegetation'
-            elif indices['ndbi'] > 0.1:
-                anomaly_type = 'built_up_area'
-            else:
-                anomaly_type = 'vegetation_stress'
+            indices, anomaly_score, anomaly_type, confidence = summary
             
             processing_time = asyncio.get_event_loop().time() - start_time
             
@@ -290,7 +380,127 @@ class PlanetaryComputerConnector(SatelliteConnector):
         resolution_m: int = 30  # OPTIMIZADO: 30m en vez de 10m (9x más rápido)
     ) -> Optional[SatelliteData]:
         """
-        Obtener datos Sentinel-1 (SAR)
+        Obtener datos Sentinel-1 (SAR), ensamblado desde teselas cacheadas
+        
+        Solo las descargas con ventana full-resolution se cortan en teselas:
+        el fallback a overview cubre la escena entera, no el bbox.
+        """
+        if os.getenv("SAR_ENABLED", "true").lower() != "true":
+            logger.info("SAR disabled via SAR_ENABLED=false")
+            return None
+        
+        async def fetch(a, b, c, d):
+            return await self._fetch_sar(a, b, c, d, start_date, end_date, resolution_m)
+        
+        return await self._fetch_tiled(
+            'sar', lat_min, lat_max, lon_min, lon_max,
+            fetch, self.summarize_sar, start_date,
+            cacheable=lambda data: data.windowed,
+            params={'end_date': end_date, 'resolution_m': resolution_m}
+        )
+    
+    def summarize_sar(self, bands: Dict[str, np.ndarray], log=None):
+        """
+        Índices de backscatter (dB) y anomalía Sentinel-1 a partir de VV/VH
+        
+        Args:
+            bands: {'vv': array, 'vh': array} en escala lineal
+            log: función opcional de diagnóstico
+        
+        Returns:
+            (indices, anomaly_score, anomaly_type, confidence) o None
+        """
+        log = log or logger.debug
+        
+        if 'vv' not in bands or 'vh' not in bands:
+            return None
+        
+        vv = bands['vv']
+        vh = bands['vh']
+        
+        # CRÍTICO: Convertir a dB ANTES de calcular estadísticas
+        # Los valores raw están en escala lineal (DN), no en dB
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Convertir a dB: 10 * log10(DN)
+            # Filtrar valores <= 0 antes de log
+            vv_valid = vv[vv > 0]
+            vh_valid = vh[vh > 0]
+            
+            if len(vv_valid) == 0 or len(vh_valid) == 0:
+                log(f"[SAR] ERROR: No hay valores válidos (VV: {len(vv_valid)}, VH: {len(vh_valid)})")
+                return None
+            
+            # Convertir a dB
+            vv_db = 10 * np.log10(vv_valid)
+            vh_db = 10 * np.log10(vh_valid)
+            
+            # Log de estadísticas RAW para debugging
+            log(f"[SAR] RAW stats ANTES de dB:")
+            log(f"   VV: min={np.min(vv_valid):.2f}, max={np.max(vv_valid):.2f}, mean={np.mean(vv_valid):.2f}")
+            log(f"   VH: min={np.min(vh_valid):.2f}, max={np.max(vh_valid):.2f}, mean={np.mean(vh_valid):.2f}")
+            
+            log(f"[SAR] dB stats DESPUÉS de conversión:")
+            log(f"   VV: min={np.min(vv_db):.2f}, max={np.max(vv_db):.2f}, mean={np.mean(vv_db):.2f}")
+            log(f"   VH: min={np.min(vh_db):.2f}, max={np.max(vh_db):.2f}, mean={np.mean(vh_db):.2f}")
+            
+            # Usar percentile-based clipping (p5-p95) para robustez
+            vv_p5 = np.percentile(vv_db, 5)
+            vv_p95 = np.percentile(vv_db, 95)
+            vh_p5 = np.percentile(vh_db, 5)
+            vh_p95 = np.percentile(vh_db, 95)
+            
+            # Clip a rango razonable para SAR (-30 a 10 dB típico)
+            vv_db_clipped = np.clip(vv_db, max(-30, vv_p5), min(10, vv_p95))
+            vh_db_clipped = np.clip(vh_db, max(-35, vh_p5), min(5, vh_p95))
+            
+            log(f"[SAR] dB stats DESPUÉS de percentile clipping:")
+            log(f"   VV: min={np.min(vv_db_clipped):.2f}, max={np.max(vv_db_clipped):.2f}, mean={np.mean(vv_db_clipped):.2f}")
+            log(f"   VH: min={np.min(vh_db_clipped):.2f}, max={np.max(vv_db_clipped):.2f}, mean={np.mean(vh_db_clipped):.2f}")
+            
+            # Calcular ratio VV/VH en dB (diferencia en log scale)
+            vv_vh_ratio_db = vv_db_clipped - vh_db_clipped
+            vv_vh_ratio_db = np.clip(vv_vh_ratio_db, -20, 20)  # Ratio típico: -20 a 20 dB
+        
+        # Calcular estadísticas finales
+        vv_mean_val = float(np.mean(vv_db_clipped))
+        vh_mean_val = float(np.mean(vh_db_clipped))
+        ratio_mean_val = float(np.mean(vv_vh_ratio_db))
+        std_val = float(np.std(vv_db_clipped))
+        
+        indices = {
+            'vv_mean': vv_mean_val,
+            'vh_mean': vh_mean_val,
+            'vv_vh_ratio': ratio_mean_val,
+            'backscatter_std': std_val
+        }
+        
+        log(f"[SAR] Indices calculados (dB): VV={indices['vv_mean']:.2f} dB, VH={indices['vh_mean']:.2f} dB, ratio={indices['vv_vh_ratio']:.2f} dB")
+        
+        # Detectar anomalías en backscatter
+        anomaly_score, anomaly_confidence = self.detect_anomaly(vv)
+        
+        # Tipo de anomalía basado en backscatter
+        if indices['vv_mean'] > -5:
+            anomaly_type = 'high_backscatter_compaction'
+        elif indices['vv_mean'] < -15:
+            anomaly_type = 'low_backscatter_water'
+        else:
+            anomaly_type = 'moderate_backscatter'
+        
+        return indices, anomaly_score, anomaly_type, anomaly_confidence
+    
+    async def _fetch_sar(
+        self,
+        lat_min: float,
+        lat_max: float,
+        lon_min: float,
+        lon_max: float,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        resolution_m: int = 30
+    ) -> Optional[SatelliteData]:
+        """
+        Descarga Sentinel-1 (SAR) directa para un bbox
         
         Bandas: VV, VH polarization
         Resolución: 30m (optimizado para velocidad)
@@ -493,6 +703,7 @@ class PlanetaryComputerConnector(SatelliteConnector):
                 
                 # Inicializar confidence
                 confidence = 0.8  # Default para full-resolution
+                windowed = True
                 
                 # Leer bandas con rasterio usando overviews de COG
                 # OPTIMIZACIÓN: Los COGs tienen overviews pre-calculados
@@ -575,6 +786,7 @@ class PlanetaryComputerConnector(SatelliteConnector):
                         
                         log(f"[SAR] [OK] Fallback a overview exitoso (confidence reducida a 0.6)")
                         confidence = 0.6  # Reducir confianza por usar overview
+                        windowed = False  # Escena completa, no el bbox
                         
                     except Exception as e2:
                         log(f"[SAR] [FAIL] Fallback tambien fallo: {e2}")
@@ -606,80 +818,17 @@ class PlanetaryComputerConnector(SatelliteConnector):
                 'vv': vv
             }
             
-            # CRÍTICO: Convertir a dB ANTES de calcular estadísticas
-            # Los valores raw están en escala lineal (DN), no en dB
-            with np.errstate(divide='ignore', invalid='ignore'):
-                # Convertir a dB: 10 * log10(DN)
-                # Filtrar valores <= 0 antes de log
-                vv_valid = vv[vv > 0]
-                vh_valid = vh[vh > 0]
-                
-                if len(vv_valid) == 0 or len(vh_valid) == 0:
-                    log(f"[SAR] ERROR: No hay valores válidos (VV: {len(vv_valid)}, VH: {len(vh_valid)})")
-                    if log_file:
-                        log_file.close()
-                    return None
-                
-                # Convertir a dB
-                vv_db = 10 * np.log10(vv_valid)
-                vh_db = 10 * np.log10(vh_valid)
-                
-                # Log de estadísticas RAW para debugging
-                log(f"[SAR] RAW stats ANTES de dB:")
-                log(f"   VV: min={np.min(vv_valid):.2f}, max={np.max(vv_valid):.2f}, mean={np.mean(vv_valid):.2f}")
-                log(f"   VH: min={np.min(vh_valid):.2f}, max={np.max(vh_valid):.2f}, mean={np.mean(vh_valid):.2f}")
-                
-                log(f"[SAR] dB stats DESPUÉS de conversión:")
-                log(f"   VV: min={np.min(vv_db):.2f}, max={np.max(vv_db):.2f}, mean={np.mean(vv_db):.2f}")
-                log(f"   VH: min={np.min(vh_db):.2f}, max={np.max(vh_db):.2f}, mean={np.mean(vh_db):.2f}")
-                
-                # Usar percentile-based clipping (p5-p95) para robustez
-                vv_p5 = np.percentile(vv_db, 5)
-                vv_p95 = np.percentile(vv_db, 95)
-                vh_p5 = np.percentile(vh_db, 5)
-                vh_p95 = np.percentile(vh_db, 95)
-                
-                # Clip a rango razonable para SAR (-30 a 10 dB típico)
-                vv_db_clipped = np.clip(vv_db, max(-30, vv_p5), min(10, vv_p95))
-                vh_db_clipped = np.clip(vh_db, max(-35, vh_p5), min(5, vh_p95))
-                
-                log(f"[SAR] dB stats DESPUÉS de percentile clipping:")
-                log(f"   VV: min={np.min(vv_db_clipped):.2f}, max={np.max(vv_db_clipped):.2f}, mean={np.mean(vv_db_clipped):.2f}")
-                log(f"   VH: min={np.min(vh_db_clipped):.2f}, max={np.max(vv_db_clipped):.2f}, mean={np.mean(vh_db_clipped):.2f}")
-                
-                # Calcular ratio VV/VH en dB (diferencia en log scale)
-                vv_vh_ratio_db = vv_db_clipped - vh_db_clipped
-                vv_vh_ratio_db = np.clip(vv_vh_ratio_db, -20, 20)  # Ratio típico: -20 a 20 dB
-            
-            # Calcular estadísticas finales
-            vv_mean_val = float(np.mean(vv_db_clipped))
-            vh_mean_val = float(np.mean(vh_db_clipped))
-            ratio_mean_val = float(np.mean(vv_vh_ratio_db))
-            std_val = float(np.std(vv_db_clipped))
-            
-            indices = {
-                'vv_mean': vv_mean_val,
-                'vh_mean': vh_mean_val,
-                'vv_vh_ratio': ratio_mean_val,
-                'backscatter_std': std_val
-            }
-            
-            log(f"[SAR] Indices calculados (dB): VV={indices['vv_mean']:.2f} dB, VH={indices['vh_mean']:.2f} dB, ratio={indices['vv_vh_ratio']:.2f} dB")
+            summary = self.summarize_sar(bands, log=log)
+            if summary is None:
+                if log_file:
+                    log_file.close()
+                return None
             
-            # Detectar anomalías en backscatter
-            anomaly_score, anomaly_confidence = self.detect_anomaly(vv)
+            indices, anomaly_score, anomaly_type, anomaly_confidence = summary
             
             # Usar el confidence más bajo (del fallback o del detector)
             final_confidence = min(confidence, anomaly_confidence)
             
-            # Tipo de anomalía basado en backscatter
-            if indices['vv_mean'] > -5:
-                anomaly_type = 'high_backscatter_compaction'
-            elif indices['vv_mean'] < -15:
-                anomaly_type = 'low_backscatter_water'
-            else:
-                anomaly_type = 'moderate_backscatter'
-            
             processing_time = asyncio.get_event_loop().time() - start_time
             
             log(f"[SAR] Procesamiento completado en {processing_time:.2f}s")
@@ -739,7 +888,8 @@ class PlanetaryComputerConnector(SatelliteConnector):
                 anomaly_type=anomaly_type,
                 confidence=final_confidence,  # Usar confidence ajustado por fallback
                 processing_time_s=processing_time,
-                cached=False
+                cached=False,
+                windowed=windowed
             )
             
         except Exception as e:
@@ -759,11 +909,61 @@ class PlanetaryComputerConnector(SatelliteConnector):
         end_date: Optional[datetime] = None
     ) -> Optional[SatelliteData]:
         """
-        Obtener datos térmicos Landsat-8/9
+        Obtener datos térmicos Landsat-8/9, ensamblado desde teselas cacheadas
         
         Banda: Thermal Infrared (TIRS)
         Resolución: 30m
         """
+        async def fetch(a, b, c, d):
+            return await self._fetch_thermal(a, b, c, d, start_date, end_date)
+        
+        return await self._fetch_tiled(
+            'thermal', lat_min, lat_max, lon_min, lon_max,
+            fetch, self.summarize_thermal, start_date,
+            params={'end_date': end_date}
+        )
+    
+    def summarize_thermal(self, bands: Dict[str, np.ndarray]):
+        """
+        Estadísticas LST y anomalía térmica a partir de la banda en °C
+        
+        Returns:
+            (indices, anomaly_score, anomaly_type, confidence) o None
+        """
+        thermal_celsius = bands.get('thermal')
+        if thermal_celsius is None or thermal_celsius.size == 0:
+            return None
+        
+        indices = {
+            'lst_mean': float(np.nanmean(thermal_celsius)),
+            'lst_std': float(np.nanstd(thermal_celsius)),
+            'lst_min': float(np.nanmin(thermal_celsius)),
+            'lst_max': float(np.nanmax(thermal_celsius))
+        }
+        
+        # Detectar anomalías térmicas
+        anomaly_score, confidence = self.detect_anomaly(thermal_celsius)
+        
+        # Tipo de anomalía basado en temperatura
+        if indices['lst_mean'] > 35:
+            anomaly_type = 'high_thermal_inertia'
+        elif indices['lst_mean'] < 15:
+            anomaly_type = 'low_thermal_inertia'
+        else:
+            anomaly_type = 'moderate_thermal'
+        
+        return indices, anomaly_score, anomaly_type, confidence
+    
+    async def _fetch_thermal(
+        self,
+        lat_min: float,
+        lat_max: float,
+        lon_min: float,
+        lon_max: float,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Optional[SatelliteData]:
+        """Descarga Landsat térmica directa para un bbox (sin caché de teselas)"""
         if not self.available:
             logger.error("Planetary Computer not available")
             return None
@@ -859,23 +1059,7 @@ class PlanetaryComputerConnector(SatelliteConnector):
                 'thermal': thermal_celsius
             }
             
-            indices = {
-                'lst_mean': float(np.nanmean(thermal_celsius)),
-                'lst_std': float(np.nanstd(thermal_celsius)),
-                'lst_min': float(np.nanmin(thermal_celsius)),
-                'lst_max': float(np.nanmax(thermal_celsius))
-            }
-            
-            # Detectar anomalías térmicas
-            anomaly_score, confidence = self.detect_anomaly(thermal_celsius)
-            
-            # Tipo de anomalía basado en temperatura
-            if indices['lst_mean'] > 35:
-                anomaly_type = 'high_thermal_inertia'
-            elif indices['lst_mean'] < 15:
-                anomaly_type = 'low_thermal_inertia'
-            else:
-                anomaly_type = 'moderate_thermal'
+            indices, anomaly_score, anomaly_type, confidence = self.summarize_thermal(bands)
             
             processing_time = asyncio.get_event_loop().time() - start_time
             
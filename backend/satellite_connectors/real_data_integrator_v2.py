@@ -23,7 +23,7 @@ import asyncio
 import logging
 import math
 import time
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 from datetime import datetime
 
 # CRÍTICO: Importar sanitizador y sistema de estados
@@ -33,6 +33,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from data_sanitizer import sanitize_response, safe_float, safe_int
 from instrument_status import InstrumentResult, InstrumentBatch, create_instrument_result_from_api_data
+from pipeline_tracing import tracer
 
 from .planetary_computer import PlanetaryComputerConnector
 from .icesat2_connector import ICESat2Connector
@@ -48,6 +49,8 @@ from .palsar_connector import PALSARConnector
 from .era5_connector import ERA5Connector
 from .chirps_connector import CHIRPSConnector
 
+from .instrument_scheduler import AdaptiveInstrumentScheduler
+
 logger = logging.getLogger(__name__)
 
 # NEW: Import SAR enhanced processing
@@ -66,6 +69,97 @@ except ImportError as e:
     logger.warning(f"⚠️ SAR Enhanced Processing not available: {e}")
 
 
+# Mapeo instrumento → (conector, método). También define la fuente que usa
+# el planificador adaptativo para presupuestos y latencias por conector.
+INSTRUMENT_API_MAPPING = {
+    # Sentinel-2 (NDVI, multispectral)
+    'sentinel_2_ndvi': ('planetary_computer', 'get_multispectral_data'),
+    'sentinel2': ('planetary_computer', 'get_multispectral_data'),
+    
+    # Sentinel-1 (SAR)
+    'sentinel_1_sar': ('planetary_computer', 'get_sar_data'),
+    'sar_backscatter': ('planetary_computer', 'get_sar_data'),
+    'sar_l_band_penetration': ('planetary_computer', 'get_sar_data'),
+    'sar_polarimetric_anomalies': ('planetary_computer', 'get_sar_data'),
+    'sar_ocean_surface': ('planetary_computer', 'get_sar_data'),
+    'sar_penetration_anomalies': ('planetary_computer', 'get_sar_data'),
+    'sar_structural_anomalies': ('planetary_computer', 'get_sar_data'),
+    
+    # Landsat (térmico)
+    'landsat_thermal': ('planetary_computer', 'get_thermal_data'),
+    'thermal_anomalies': ('planetary_computer', 'get_thermal_data'),
+    
+    # ICESat-2 (elevación) - CON FILTROS ROBUSTOS
+    'icesat2': ('icesat2', 'get_elevation_data'),
+    'elevation': ('icesat2', 'get_elevation_data'),
+    'ice_height': ('icesat2', 'get_elevation_data'),
+    'icesat2_subsurface': ('icesat2', 'get_elevation_data'),
+    'icesat2_elevation_anomalies': ('icesat2', 'get_elevation_data'),
+    'lidar_elevation_anomalies': ('icesat2', 'get_elevation_data'),
+    'elevation_terracing': ('icesat2', 'get_elevation_data'),
+    'slope_anomalies': ('icesat2', 'get_elevation_data'),
+    
+    # MODIS LST (térmico regional) - PRIORITARIO
+    'modis_lst': ('modis_lst', 'get_thermal_data'),
+    'modis_thermal_inertia': ('modis_lst', 'get_thermal_data'),
+    'modis_thermal_ice': ('modis_lst', 'get_thermal_data'),
+    'modis_polar_thermal': ('modis_lst', 'get_thermal_data'),
+    
+    # NSIDC (hielo, criosfera)
+    'nsidc_sea_ice': ('nsidc', 'get_sea_ice_data'),
+    'nsidc_snow_cover': ('nsidc', 'get_snow_data'),
+    'nsidc_ice_concentration': ('nsidc', 'get_sea_ice_data'),
+    'nsidc_polar_ice': ('nsidc', 'get_sea_ice_data'),
+    
+    # Copernicus Marine (hielo marino, SST)
+    'copernicus_sst': ('copernicus_marine', 'get_sst_data'),
+    'copernicus_sea_ice': ('copernicus_marine', 'get_sea_ice_data'),
+    'copernicus_sst_anomaly': ('copernicus_marine', 'get_sst_data'),
+    'copernicus_ice_marine': ('copernicus_marine', 'get_sea_ice_data'),
+    
+    # OpenTopography (DEM, LiDAR)
+    'opentopography': ('opentopography', 'get_elevation_data'),
+    'dem': ('opentopography', 'get_elevation_data'),
+    'lidar': ('opentopography', 'get_elevation_data'),
+    
+    # NEW: VIIRS (thermal, NDVI, fire detection) - Instrumento 11/15
+    'viirs_thermal': ('viirs', 'get_thermal_data'),
+    'viirs_ndvi': ('viirs', 'get_ndvi_data'),
+    'viirs_fire': ('viirs', 'get_fire_data'),
+    'viirs_thermal_anomalies': ('viirs', 'get_thermal_data'),
+    'viirs_vegetation_stress': ('viirs', 'get_ndvi_data'),
+    
+    # NEW: SRTM DEM (topographic analysis) - Instrumento 12/15
+    'srtm_elevation': ('srtm', 'get_elevation_data'),
+    'srtm_slope': ('srtm', 'get_slope_analysis'),
+    'srtm_dem': ('srtm', 'get_elevation_data'),
+    'elevation_terracing_srtm': ('srtm', 'get_slope_analysis'),
+    'slope_anomalies_srtm': ('srtm', 'get_slope_analysis'),
+    
+    # NEW: ALOS PALSAR-2 (L-band SAR penetration) - Instrumento 13/15
+    'palsar_backscatter': ('palsar', 'get_sar_backscatter'),
+    'palsar_penetration': ('palsar', 'get_forest_penetration'),
+    'palsar_soil_moisture': ('palsar', 'get_soil_moisture'),
+    'sar_l_band_palsar': ('palsar', 'get_sar_backscatter'),
+    'forest_penetration_l_band': ('palsar', 'get_forest_penetration'),
+    
+    # NEW: ERA5 (climate context) - Instrumento 14/15
+    'era5_climate': ('era5', 'get_climate_context'),
+    'era5_preservation': ('era5', 'get_preservation_conditions'),
+    'era5_accessibility': ('era5', 'get_seasonal_accessibility'),
+    'climate_context': ('era5', 'get_climate_context'),
+    'preservation_conditions': ('era5', 'get_preservation_conditions'),
+    
+    # NEW: CHIRPS (precipitation history) - Instrumento 15/15
+    'chirps_precipitation': ('chirps', 'get_precipitation_history'),
+    'chirps_drought': ('chirps', 'get_drought_analysis'),
+    'chirps_seasonal': ('chirps', 'get_seasonal_patterns'),
+    'chirps_water_management': ('chirps', 'get_water_management_indicators'),
+    'precipitation_history': ('chirps', 'get_precipitation_history'),
+    'drought_analysis': ('chirps', 'get_drought_analysis')
+}
+
+
 class RealDataIntegratorV2:
     """
     Integrador de datos reales V2 - Con blindaje crítico
@@ -181,6 +275,9 @@ class RealDataIntegratorV2:
         
         logger.info(f"🚀 RealDataIntegratorV2 initialized: {available_count}/{total_count} APIs available")
         
+        # Planificador adaptativo por fuente (reemplaza Semaphore(3) global)
+        self.scheduler = AdaptiveInstrumentScheduler()
+        
         # Logging detallado a archivo
         self.log_file = None
         try:
@@ -202,7 +299,8 @@ class RealDataIntegratorV2:
     async def get_instrument_measurement_robust(self,
                                               instrument_name: str,
                                               lat_min: float, lat_max: float,
-                                              lon_min: float, lon_max: float) -> InstrumentResult:
+                                              lon_min: float, lon_max: float,
+                                              timeout: float = 180.0) -> InstrumentResult:
         """
         Obtener medición de instrumento con manejo robusto de errores.
         
@@ -211,6 +309,7 @@ class RealDataIntegratorV2:
         Args:
             instrument_name: Nombre del instrumento/API
             lat_min, lat_max, lon_min, lon_max: Bounding box
+            timeout: Deadline del instrumento en segundos
         
         Returns:
             InstrumentResult con estado SUCCESS/DEGRADED/FAILED/INVALID/UNAVAILABLE
@@ -223,93 +322,7 @@ class RealDataIntegratorV2:
         
         try:
             # Mapear instrumento a conector y método
-            api_mapping = {
-                # Sentinel-2 (NDVI, multispectral)
-                'sentinel_2_ndvi': ('planetary_computer', 'get_multispectral_data'),
-                'sentinel2': ('planetary_computer', 'get_multispectral_data'),
-                
-                # Sentinel-1 (SAR)
-                'sentinel_1_sar': ('planetary_computer', 'get_sar_data'),
-                'sar_backscatter': ('planetary_computer', 'get_sar_data'),
-                'sar_l_band_penetration': ('planetary_computer', 'get_sar_data'),
-                'sar_polarimetric_anomalies': ('planetary_computer', 'get_sar_data'),
-                'sar_ocean_surface': ('planetary_computer', 'get_sar_data'),
-                'sar_penetration_anomalies': ('planetary_computer', 'get_sar_data'),
-                'sar_structural_anomalies': ('planetary_computer', 'get_sar_data'),
-                
-                # Landsat (térmico)
-                'landsat_thermal': ('planetary_computer', 'get_thermal_data'),
-                'thermal_anomalies': ('planetary_computer', 'get_thermal_data'),
-                
-                # ICESat-2 (elevación) - CON FILTROS ROBUSTOS
-                'icesat2': ('icesat2', 'get_elevation_data'),
-                'elevation': ('icesat2', 'get_elevation_data'),
-                'ice_height': ('icesat2', 'get_elevation_data'),
-                'icesat2_subsurface': ('icesat2', 'get_elevation_data'),
-                'icesat2_elevation_anomalies': ('icesat2', 'get_elevation_data'),
-                'lidar_elevation_anomalies': ('icesat2', 'get_elevation_data'),
-                'elevation_terracing': ('icesat2', 'get_elevation_data'),
-                'slope_anomalies': ('icesat2', 'get_elevation_data'),
-                
-                # MODIS LST (térmico regional) - PRIORITARIO
-                'modis_lst': ('modis_lst', 'get_thermal_data'),
-                'modis_thermal_inertia': ('modis_lst', 'get_thermal_data'),
-                'modis_thermal_ice': ('modis_lst', 'get_thermal_data'),
-                'modis_polar_thermal': ('modis_lst', 'get_thermal_data'),
-                
-                # NSIDC (hielo, criosfera)
-                'nsidc_sea_ice': ('nsidc', 'get_sea_ice_data'),
-                'nsidc_snow_cover': ('nsidc', 'get_snow_data'),
-                'nsidc_ice_concentration': ('nsidc', 'get_sea_ice_data'),
-                'nsidc_polar_ice': ('nsidc', 'get_sea_ice_data'),
-                
-                # Copernicus Marine (hielo marino, SST)
-                'copernicus_sst': ('copernicus_marine', 'get_sst_data'),
-                'copernicus_sea_ice': ('copernicus_marine', 'get_sea_ice_data'),
-                'copernicus_sst_anomaly': ('copernicus_marine', 'get_sst_data'),
-                'copernicus_ice_marine': ('copernicus_marine', 'get_sea_ice_data'),
-                
-                # OpenTopography (DEM, LiDAR)
-                'opentopography': ('opentopography', 'get_elevation_data'),
-                'dem': ('opentopography', 'get_elevation_data'),
-                'lidar': ('opentopography', 'get_elevation_data'),
-                
-                # NEW: VIIRS (thermal, NDVI, fire detection) - Instrumento 11/15
-                'viirs_thermal': ('viirs', 'get_thermal_data'),
-                'viirs_ndvi': ('viirs', 'get_ndvi_data'),
-                'viirs_fire': ('viirs', 'get_fire_data'),
-                'viirs_thermal_anomalies': ('viirs', 'get_thermal_data'),
-                'viirs_vegetation_stress': ('viirs', 'get_ndvi_data'),
-                
-                # NEW: SRTM DEM (topographic analysis) - Instrumento 12/15
-                'srtm_elevation': ('srtm', 'get_elevation_data'),
-                'srtm_slope': ('srtm', 'get_slope_analysis'),
-                'srtm_dem': ('srtm', 'get_elevation_data'),
-                'elevation_terracing_srtm': ('srtm', 'get_slope_analysis'),
-                'slope_anomalies_srtm': ('srtm', 'get_slope_analysis'),
-                
-                # NEW: ALOS PALSAR-2 (L-band SAR penetration) - Instrumento 13/15
-                'palsar_backscatter': ('palsar', 'get_sar_backscatter'),
-                'palsar_penetration': ('palsar', 'get_forest_penetration'),
-                'palsar_soil_moisture': ('palsar', 'get_soil_moisture'),
-                'sar_l_band_palsar': ('palsar', 'get_sar_backscatter'),
-                'forest_penetration_l_band': ('palsar', 'get_forest_penetration'),
-                
-                # NEW: ERA5 (climate context) - Instrumento 14/15
-                'era5_climate': ('era5', 'get_climate_context'),
-                'era5_preservation': ('era5', 'get_preservation_conditions'),
-                'era5_accessibility': ('era5', 'get_seasonal_accessibility'),
-                'climate_context': ('era5', 'get_climate_context'),
-                'preservation_conditions': ('era5', 'get_preservation_conditions'),
-                
-                # NEW: CHIRPS (precipitation history) - Instrumento 15/15
-                'chirps_precipitation': ('chirps', 'get_precipitation_history'),
-                'chirps_drought': ('chirps', 'get_drought_analysis'),
-                'chirps_seasonal': ('chirps', 'get_seasonal_patterns'),
-                'chirps_water_management': ('chirps', 'get_water_management_indicators'),
-                'precipitation_history': ('chirps', 'get_precipitation_history'),
-                'drought_analysis': ('chirps', 'get_drought_analysis')
-            }
+            api_mapping = INSTRUMENT_API_MAPPING
             
             # Verificar si el instrumento está mapeado
             if instrument_name not in api_mapping:
@@ -355,14 +368,14 @@ class RealDataIntegratorV2:
             try:
                 api_data = await asyncio.wait_for(
                     method(lat_min, lat_max, lon_min, lon_max),
-                    timeout=180.0  # 180 segundos por instrumento (permitir descargas lentas)
+                    timeout=timeout
                 )
             except asyncio.TimeoutError:
-                self.log(f"[{instrument_name}] ⏰ Timeout después de 180s")
+                self.log(f"[{instrument_name}] ⏰ Timeout después de {timeout:.0f}s")
                 return InstrumentResult.create_failed(
                     instrument_name=instrument_name,
                     measurement_type="timeout",
-                    reason="API_TIMEOUT_180S",
+                    reason=f"API_TIMEOUT_{timeout:.0f}S",
                     processing_time_s=time.time() - start_time
                 )
             
@@ -651,15 +664,27 @@ class RealDataIntegratorV2:
     async def get_batch_measurements(self,
                                    instrument_names: List[str],
                                    lat_min: float, lat_max: float,
-                                   lon_min: float, lon_max: float) -> InstrumentBatch:
+                                   lon_min: float, lon_max: float,
+                                   coverage_target: Optional[float] = None,
+                                   min_instruments: int = 2,
+                                   on_result: Optional[Callable[[InstrumentResult], None]] = None) -> InstrumentBatch:
         """
         Obtener mediciones de múltiples instrumentos en lote.
         
         CRÍTICO: Nunca aborta - procesa todos los instrumentos independientemente.
         
+        Planificación adaptativa (ver instrument_scheduler.py): presupuesto de
+        concurrencia y deadline por fuente, fuentes lentas primero y hedged
+        requests para fuentes con cola larga.
+        
         Args:
             instrument_names: Lista de nombres de instrumentos
             lat_min, lat_max, lon_min, lon_max: Bounding box
+            coverage_target: Coverage (0-1) a partir del cual se retorna sin
+                esperar al resto. None = esperar todos los instrumentos.
+            min_instruments: Instrumentos usables mínimos para salida temprana
+            on_result: Callback invocado con cada InstrumentResult apenas llega
+                (streaming de mediciones al cliente)
         
         Returns:
             InstrumentBatch con todos los resultados y coverage score
@@ -673,20 +698,39 @@ class RealDataIntegratorV2:
         batch = InstrumentBatch()
         batch.start_time = time.time()
         
-        # Procesar instrumentos en paralelo (pero con límite para no saturar APIs)
-        semaphore = asyncio.Semaphore(3)  # Máximo 3 instrumentos simultáneos
+        # Fuente de cada instrumento (no mapeados: fallan rápido en su propia cola)
+        jobs = [
+            (name, INSTRUMENT_API_MAPPING.get(name, ('unmapped', None))[0])
+            for name in instrument_names
+        ]
         
-        async def process_instrument(instrument_name: str):
-            async with semaphore:
-                result = await self.get_instrument_measurement_robust(
-                    instrument_name, lat_min, lat_max, lon_min, lon_max
+        async def fetch(instrument_name: str, timeout: float) -> InstrumentResult:
+            with tracer.span("instrument", instrument_name):
+                return await self.get_instrument_measurement_robust(
+                    instrument_name, lat_min, lat_max, lon_min, lon_max, timeout=timeout
                 )
-                batch.add_result(result)
-                return result
         
-        # Ejecutar todos los instrumentos
-        tasks = [process_instrument(name) for name in instrument_names]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        def deferred(instrument_name: str) -> InstrumentResult:
+            return InstrumentResult.create_failed(
+                instrument_name=instrument_name,
+                measurement_type="deferred",
+                reason="DEFERRED_COVERAGE_TARGET_MET",
+                processing_time_s=time.time() - batch.start_time
+            )
+        
+        def add_result(result: InstrumentResult):
+            batch.add_result(result)
+            if on_result is not None:
+                on_result(result)
+        
+        with tracer.span("acquisition", "get_batch_measurements"):
+            batch.scheduling = await self.scheduler.run(
+                jobs, fetch, add_result,
+                coverage_fn=lambda: batch.get_projected_coverage(len(instrument_names)),
+                coverage_target=coverage_target,
+                min_instruments=min_instruments,
+                make_deferred=deferred
+            )
         
         batch.end_time = time.time()
         
@@ -701,6 +745,9 @@ class RealDataIntegratorV2:
         self.log(f"Estados: SUCCESS={report['status_summary']['SUCCESS']}, "
                 f"DEGRADED={report['status_summary']['DEGRADED']}, "
                 f"FAILED={report['status_summary']['FAILED']}")
+        if batch.scheduling.get('early_exit'):
+            self.log(f"Salida temprana (coverage ≥ {coverage_target:.0%}): "
+                    f"diferidos {', '.join(batch.scheduling['deferred_instruments'])}")
         self.log(f"Tiempo total: {batch.end_time - batch.start_time:.2f}s")
         self.log(f"{'='*80}\n")
         
@@ -16,17 +16,16 @@ APLICACIONES ARQUEOLÓGICAS:
 - Detección de anomalías topográficas
 """
 
-import requests
+import asyncio
 import numpy as np
 import logging
 from typing import Dict, Any, Optional, Tuple
 import json
-import rasterio
-from rasterio.windows import from_bounds
-from rasterio.warp import transform_bounds
 import tempfile
 import os
 
+from .http_transport import connector_transport
+
 logger = logging.getLogger(__name__)
 
 class SRTMConnector:
@@ -258,28 +257,30 @@ class SRTMConnector:
             lat_points = np.linspace(lat_min, lat_max, 10)
             lon_points = np.linspace(lon_min, lon_max, 10)
             
-            elevations = []
-            
-            for lat in lat_points:
-                for lon in lon_points:
-                    try:
-                        response = requests.get(
-                            f"{self.sources['usgs']}/point",
-                            params={
-                                'lat': lat,
-                                'lon': lon,
-                                'dataset': 'srtm30m' if resolution == '30m' else 'srtm90m'
-                            },
-                            timeout=10
-                        )
-                        
-                        if response.status_code == 200:
-                            data = response.json()
-                            if 'elevation' in data and data['elevation'] is not None:
-                                elevations.append(data['elevation'])
+            async def sample_point(lat: float, lon: float) -> Optional[float]:
+                try:
+                    response = await connector_transport.get(
+                        f"{self.sources['usgs']}/point",
+                        params={
+                            'lat': lat,
+                            'lon': lon,
+                            'dataset': 'srtm30m' if resolution == '30m' else 'srtm90m'
+                        },
+                        timeout=10
+                    )
                     
-                    except Exception:
-                        continue
+                    if response.status_code == 200:
+                        data = response.json()
+                        return data.get('elevation')
+                except Exception:
+                    pass
+                return None
+            
+            # Muestreo concurrente (el transporte limita la concurrencia por host)
+            samples = await asyncio.gather(*[
+                sample_point(lat, lon) for lat in lat_points for lon in lon_points
+            ])
+            elevations = [e for e in samples if e is not None]
             
             if elevations:
                 return {
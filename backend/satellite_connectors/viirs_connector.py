@@ -15,7 +15,6 @@ APLICACIONES ARQUEOLÓGICAS:
 - Detección de actividad humana (fuegos)
 """
 
-import requests
 import numpy as np
 import logging
 import httpx
@@ -23,6 +22,8 @@ from typing import Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import json
 
+from .http_transport import connector_transport
+
 logger = logging.getLogger(__name__)
 
 class VIIRSConnector:
@@ -59,13 +60,15 @@ class VIIRSConnector:
             self.available = False
             logger.warning(f"⚠️ VIIRS: Error obteniendo credenciales: {e}")
     
-    async def _get_token(self, client: httpx.AsyncClient) -> Optional[str]:
+    async def _get_token(self) -> Optional[str]:
         """Obtener token de portador (Bearer) de AppEEARS."""
         try:
             url = f"{self.base_url}/login"
             auth = httpx.BasicAuth(self.username, self.password)
             
-            response = await client.post(url, auth=auth)
+            response = await connector_transport.post(
+                url, auth=auth, timeout=httpx.Timeout(30.0, connect=10.0)
+            )
             
             if response.status_code == 200:
                 token_data = response.json()
@@ -98,62 +101,64 @@ class VIIRSConnector:
             end_date = datetime.now() - timedelta(days=1)
             start_date = end_date - timedelta(days=days_back)
             
-            async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=10.0), follow_redirects=True) as client:
-                # 1. Obtener Token (REQUERIDO por AppEEARS API)
-                token = await self._get_token(client)
-                if not token:
-                    logger.warning("⚠️ VIIRS: Falló obtención de token - Usando estimación")
-                    return self._get_thermal_estimate(lat_min, lat_max, lon_min, lon_max)
+            # 1. Obtener Token (REQUERIDO por AppEEARS API)
+            token = await self._get_token()
+            if not token:
+                logger.warning("⚠️ VIIRS: Falló obtención de token - Usando estimación")
+                return self._get_thermal_estimate(lat_min, lat_max, lon_min, lon_max)
+            
+            # 2. Configurar Headers con Bearer Token
+            headers = {"Authorization": f"Bearer {token}"}
+            url = f"{self.base_url}/task"
+            
+            # Crear tarea de extracción
+            task_params = {
+                "task_type": "point",
+                "task_name": f"viirs_thermal_{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                "params": {
+                    "dates": [{"startDate": start_date.strftime("%m-%d-%Y"), "endDate": end_date.strftime("%m-%d-%Y")}],
+                    "layers": [{"product": self.product_mapping['thermal'], "layer": "LST_1KM"}],
+                    "coordinates": [{"latitude": (lat_min + lat_max) / 2, "longitude": (lon_min + lon_max) / 2, "id": "point1"}]
+                }
+            }
+            
+            # Enviar petición con el token
+            try:
+                response = await connector_transport.post(
+                    url, json=task_params, headers=headers,
+                    timeout=httpx.Timeout(30.0, connect=10.0)
+                )
                 
-                # 2. Configurar Headers con Bearer Token
-                headers = {"Authorization": f"Bearer {token}"}
-                url = f"{self.base_url}/task"
+                if response.status_code in [200, 201, 202]:
+                    logger.info("✅ VIIRS: Tarea creada correctamente")
+                    return self._get_thermal_estimate(lat_min, lat_max, lon_min, lon_max)
                 
-                # Crear tarea de extracción
-                task_params = {
-                    "task_type": "point",
-                    "task_name": f"viirs_thermal_{datetime.now().strftime('%Y%m%d%H%M%S')}",
-                    "params": {
-                        "dates": [{"startDate": start_date.strftime("%m-%d-%Y"), "endDate": end_date.strftime("%m-%d-%Y")}],
-                        "layers": [{"product": self.product_mapping['thermal'], "layer": "LST_1KM"}],
-                        "coordinates": [{"latitude": (lat_min + lat_max) / 2, "longitude": (lon_min + lon_max) / 2, "id": "point1"}]
-                    }
-                }
+                elif response.status_code == 400:
+                    logger.error(f"❌ VIIRS: 400 Bad Request - {response.text}")
+                    return self._get_thermal_estimate(lat_min, lat_max, lon_min, lon_max)
                 
-                # Enviar petición con el token
-                try:
-                    response = await client.post(url, json=task_params, headers=headers)
-                    
-                    if response.status_code in [200, 201, 202]:
-                        logger.info("✅ VIIRS: Tarea creada correctamente")
-                        return self._get_thermal_estimate(lat_min, lat_max, lon_min, lon_max)
-                    
-                    elif response.status_code == 400:
-                        logger.error(f"❌ VIIRS: 400 Bad Request - {response.text}")
-                        return self._get_thermal_estimate(lat_min, lat_max, lon_min, lon_max)
+                elif response.status_code == 403:
+                    logger.warning("⚠️ VIIRS: 403 Forbidden - AppEEARS requiere autorización en el perfil de Earthdata")
+                    center_lat = (lat_min + lat_max) / 2
+                    temp_c = self._calculate_temp_estimate(center_lat)
                     
-                    elif response.status_code == 403:
-                        logger.warning("⚠️ VIIRS: 403 Forbidden - AppEEARS requiere autorización en el perfil de Earthdata")
-                        center_lat = (lat_min + lat_max) / 2
-                        temp_c = self._calculate_temp_estimate(center_lat)
-                        
-                        return InstrumentMeasurement.create_derived(
-                            instrument_name="VIIRS",
-                            measurement_type="thermal_surface",
-                            value=temp_c,
-                            unit="Celsius",
-                            confidence=0.45,
-                            derivation_method="Location model (403 Forbidden - Please authorize 'AppEEARS' in your NASA Earthdata profile)",
-                            source="VIIRS (estimated)"
-                        )
-                    
-                    else:
-                        logger.warning(f"⚠️ VIIRS: HTTP {response.status_code} - Usando estimación")
-                        return self._get_thermal_estimate(lat_min, lat_max, lon_min, lon_max)
-                        
-                except (httpx.ConnectTimeout, httpx.ReadTimeout):
-                    logger.warning("⏱️ VIIRS: Timeout - Usando estimación")
+                    return InstrumentMeasurement.create_derived(
+                        instrument_name="VIIRS",
+                        measurement_type="thermal_surface",
+                        value=temp_c,
+                        unit="Celsius",
+                        confidence=0.45,
+                        derivation_method="Location model (403 Forbidden - Please authorize 'AppEEARS' in your NASA Earthdata profile)",
+                        source="VIIRS (estimated)"
+                    )
+                
+                else:
+                    logger.warning(f"⚠️ VIIRS: HTTP {response.status_code} - Usando estimación")
                     return self._get_thermal_estimate(lat_min, lat_max, lon_min, lon_max)
+                    
+            except (httpx.ConnectTimeout, httpx.ReadTimeout):
+                logger.warning("⏱️ VIIRS: Timeout - Usando estimación")
+                return self._get_thermal_estimate(lat_min, lat_max, lon_min, lon_max)
         
         except Exception as e:
             logger.error(f"❌ VIIRS Error: {e}")
@@ -0,0 +1,440 @@
+"""
+Caché Satelital por Teselas (Tile Pyramid)
+Reutiliza datos entre bboxes solapados alineando la caché a una grilla fija
+
+Problema:
+- La caché por bbox exacto falla cuando el mismo sitio se analiza con
+  bboxes que difieren en pocos metros: cada variante dispara una descarga
+  nueva de Planetary Computer.
+
+Solución:
+- Grilla lat/lon fija por nivel de resolución (una por tipo de dato)
+- Cada tesela se guarda en `satellite_cache` (L1 memoria + L2 disco)
+- Un bbox se ensambla desde teselas cacheadas + solo las teselas faltantes,
+  descargadas en una única petición alineada a la grilla
+- La key de tesela incluye TODOS los parámetros de descarga que cambian el
+  payload (ventana temporal, umbral de nubes, resolución): pedidos con otros
+  parámetros nunca reciben teselas descargadas bajo los anteriores
+- Lectura, corte y escritura de teselas (SQLite + archivos) corren en un
+  hilo: el event loop no se bloquea
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from satellite_cache import satellite_cache
+
+logger = logging.getLogger(__name__)
+
+# Metros por grado de latitud (aproximación esférica)
+METERS_PER_DEGREE = 111320.0
+
+TileIndex = Tuple[int, int]  # (ix, iy)
+BBox = Tuple[float, float, float, float]  # (lat_min, lat_max, lon_min, lon_max)
+
+
+@dataclass(frozen=True)
+class TileLevel:
+    """Nivel de la pirámide: tamaño de tesela en grados y resolución nominal"""
+
+    name: str
+    tile_deg: float
+    resolution_m: float
+
+    @property
+    def tile_px(self) -> int:
+        """Píxeles por lado de una tesela canónica"""
+        return max(1, int(round(self.tile_deg * METERS_PER_DEGREE / self.resolution_m)))
+
+    def tiles_for_bbox(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> List[TileIndex]:
+        """Teselas que cubren el bbox"""
+        ix0, ix1, iy0, iy1 = self._index_range(lat_min, lat_max, lon_min, lon_max)
+        return [(ix, iy) for iy in range(iy0, iy1 + 1) for ix in range(ix0, ix1 + 1)]
+
+    def _index_range(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> Tuple[int, int, int, int]:
+        # Tolerancia para que un borde exacto no arrastre una tesela vecina
+        eps = 1e-9
+        ix0 = math.floor((lon_min + 180.0) / self.tile_deg + eps)
+        ix1 = math.ceil((lon_max + 180.0) / self.tile_deg - eps) - 1
+        iy0 = math.floor((lat_min + 90.0) / self.tile_deg + eps)
+        iy1 = math.ceil((lat_max + 90.0) / self.tile_deg - eps) - 1
+        return ix0, max(ix0, ix1), iy0, max(iy0, iy1)
+
+    def tile_bounds(self, tile: TileIndex) -> BBox:
+        """Bbox (lat_min, lat_max, lon_min, lon_max) de una tesela"""
+        ix, iy = tile
+        lat_min = iy * self.tile_deg - 90.0
+        lon_min = ix * self.tile_deg - 180.0
+        return (lat_min, lat_min + self.tile_deg, lon_min, lon_min + self.tile_deg)
+
+    def union_bounds(self, tiles: List[TileIndex]) -> BBox:
+        """Bbox alineado a la grilla que contiene todas las teselas"""
+        ixs = [t[0] for t in tiles]
+        iys = [t[1] for t in tiles]
+        south, _, west, _ = self.tile_bounds((min(ixs), min(iys)))
+        _, north, _, east = self.tile_bounds((max(ixs), max(iys)))
+        return (south, north, west, east)
+
+
+# Un nivel por tipo de dato, acorde a la resolución nativa del producto
+TILE_LEVELS: Dict[str, TileLevel] = {
+    'multispectral': TileLevel('multispectral', tile_deg=0.01, resolution_m=10.0),
+    'sar': TileLevel('sar', tile_deg=0.02, resolution_m=30.0),
+    'thermal': TileLevel('thermal', tile_deg=0.02, resolution_m=30.0),
+}
+
+# Resumen de bandas → (indices, anomaly_score, anomaly_type, confidence)
+SummarizeFn = Callable[[Dict[str, np.ndarray]], Optional[Tuple[Dict[str, float], float, str, float]]]
+FetchFn = Callable[[float, float, float, float], Awaitable[Optional[Any]]]
+
+
+def _resample(array: np.ndarray, size: int) -> np.ndarray:
+    """Remuestrear un array 2D a (size, size) con interpolación bilineal"""
+    if array.shape == (size, size):
+        return np.asarray(array, dtype=float)
+
+    from scipy.ndimage import zoom
+
+    out = zoom(
+        np.asarray(array, dtype=float),
+        (size / array.shape[0], size / array.shape[1]),
+        order=1
+    )
+
+    # zoom puede diferir en ±1 píxel por redondeo
+    out = out[:size, :size]
+    if out.shape != (size, size):
+        out = np.pad(
+            out,
+            ((0, size - out.shape[0]), (0, size - out.shape[1])),
+            mode='edge'
+        )
+    return out
+
+
+class SatelliteTileCache:
+    """
+    Ensambla bboxes arbitrarios desde teselas cacheadas
+
+    Flujo de `fetch`:
+    1. Calcular teselas que cubren el bbox en el nivel del tipo de dato
+    2. Leer teselas de `satellite_cache` (memoria → disco)
+    3. Descargar solo el bbox alineado de las teselas faltantes (una petición)
+    4. Cortar la descarga en teselas canónicas y cachearlas
+    5. Mosaico + recorte al bbox pedido + recálculo de índices
+    """
+
+    def __init__(self, levels: Dict[str, TileLevel] = None, max_tiles: int = 400):
+        self.levels = levels or TILE_LEVELS
+        self.max_tiles = max_tiles
+
+        # Descargas en vuelo por (tipo, bbox alineado, fecha) para coalescer
+        # peticiones concurrentes del mismo sitio
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.stats = {'tile_hits': 0, 'tile_misses': 0, 'fetches': 0, 'bypassed': 0}
+
+    @staticmethod
+    def _variant(date: Optional[datetime], params: Optional[Dict[str, Any]]) -> str:
+        """Fecha + hash de los parámetros de descarga (fechas a nivel de día)"""
+        date_str = date.strftime("%Y%m%d") if date else "latest"
+        if not params:
+            return date_str
+
+        canonical = {
+            name: value.strftime("%Y%m%d") if isinstance(value, datetime) else value
+            for name, value in params.items()
+        }
+        digest = hashlib.md5(json.dumps(canonical, sort_keys=True, default=str).encode()).hexdigest()[:12]
+        return f"{date_str}_{digest}"
+
+    @staticmethod
+    def _tile_key(level: TileLevel, tile: TileIndex, variant: str) -> str:
+        return f"tile_{level.name}_{level.tile_deg}_{tile[0]}_{tile[1]}_{variant}"
+
+    def _read_tiles(self, level: TileLevel, tiles: List[TileIndex], variant: str) -> Dict[TileIndex, Any]:
+        """Teselas presentes en satellite_cache (memoria → disco)"""
+        cached = {}
+        for tile in tiles:
+            data = satellite_cache.get_by_key(self._tile_key(level, tile, variant))
+            if data is not None:
+                cached[tile] = data
+        return cached
+
+    async def fetch(
+        self,
+        data_type: str,
+        lat_min: float,
+        lat_max: float,
+        lon_min: float,
+        lon_max: float,
+        fetch_fn: FetchFn,
+        summarize_fn: SummarizeFn,
+        date: Optional[datetime] = None,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Optional[Any]:
+        """
+        Obtener SatelliteData para un bbox usando la pirámide de teselas
+
+        Args:
+            data_type: 'multispectral', 'sar', 'thermal'
+            fetch_fn: descarga real para un bbox (lat_min, lat_max, lon_min, lon_max)
+            summarize_fn: recalcula índices y anomalía desde las bandas ensambladas
+            date: fecha de referencia de la ventana temporal (parte de la key)
+            cacheable: predicado opcional; descargas que no lo cumplen
+                       (p.ej. SAR degradado a overview) no se cortan en teselas
+            params: resto de parámetros de fetch_fn que cambian el payload
+                    (end_date, max_cloud_cover, resolution_m...), parte de la key
+
+        Returns:
+            SatelliteData del bbox pedido, o None si la descarga falla
+        """
+        level = self.levels.get(data_type)
+        start = time.perf_counter()
+
+        if level is None:
+            return await fetch_fn(lat_min, lat_max, lon_min, lon_max)
+
+        tiles = level.tiles_for_bbox(lat_min, lat_max, lon_min, lon_max)
+
+        if len(tiles) > self.max_tiles:
+            # Áreas grandes: ir directo, la pirámide no aporta
+            self.stats['bypassed'] += 1
+            logger.info(f"Tile cache bypass: {len(tiles)} tiles > {self.max_tiles}")
+            return await fetch_fn(lat_min, lat_max, lon_min, lon_max)
+
+        variant = self._variant(date, params)
+        cached = await asyncio.to_thread(self._read_tiles, level, tiles, variant)
+
+        missing = [t for t in tiles if t not in cached]
+        self.stats['tile_hits'] += len(cached)
+        self.stats['tile_misses'] += len(missing)
+
+        if missing:
+            logger.info(
+                f"🧩 {data_type}: {len(cached)}/{len(tiles)} tiles cached, "
+                f"fetching {len(missing)} missing"
+            )
+            fetched = await self._fetch_missing(level, missing, fetch_fn, variant, cacheable)
+
+            if fetched is None:
+                return None
+
+            if isinstance(fetched, dict):
+                cached.update(fetched)
+            else:
+                # La descarga no pudo cortarse en teselas: devolver tal cual
+                return fetched
+
+        mosaic = self._assemble(level, tiles, cached, lat_min, lat_max, lon_min, lon_max)
+        if mosaic is None:
+            return None
+
+        result = self._summarize(
+            level, cached, mosaic, summarize_fn,
+            lat_min, lat_max, lon_min, lon_max,
+            processing_time=time.perf_counter() - start
+        )
+        if result is not None:
+            result.cached = not missing
+        return result
+
+    async def _fetch_missing(
+        self,
+        level: TileLevel,
+        missing: List[TileIndex],
+        fetch_fn: FetchFn,
+        variant: str,
+        cacheable: Optional[Callable[[Any], bool]]
+    ) -> Optional[Any]:
+        """Descargar el bbox alineado de las teselas faltantes (coalescido)"""
+        union = level.union_bounds(missing)
+        flight_key = f"{level.name}:{union}:{variant}"
+
+        inflight = self._inflight.get(flight_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_event_loop().create_future()
+        self._inflight[flight_key] = future
+
+        try:
+            self.stats['fetches'] += 1
+            data = await fetch_fn(*union)
+
+            if data is None:
+                result = None
+            elif cacheable is not None and not cacheable(data):
+                result = data
+            else:
+                # Remuestreo + escritura de hasta max_tiles teselas: fuera del loop
+                result = await asyncio.to_thread(self._split_into_tiles, level, union, data, variant)
+                if result is None:
+                    result = data
+
+            future.set_result(result)
+            return result
+
+        except Exception as e:
+            future.set_exception(e)
+            raise
+
+        finally:
+            self._inflight.pop(flight_key, None)
+            if not future.done():
+                future.cancel()
+            elif not future.cancelled():
+                # Evitar "exception never retrieved" si nadie más esperaba
+                future.exception()
+
+    def _split_into_tiles(
+        self,
+        level: TileLevel,
+        union: BBox,
+        data: Any,
+        variant: str
+    ) -> Optional[Dict[TileIndex, Any]]:
+        """Cortar una descarga alineada en teselas canónicas y cachearlas"""
+        bands = {name: np.asarray(a) for name, a in (data.bands or {}).items() if a is not None}
+        bands = {name: a for name, a in bands.items() if a.ndim == 2 and a.size > 0}
+        if not bands:
+            return None
+
+        south, north, west, east = union
+        size = level.tile_px
+        tiles = {}
+
+        for tile in level.tiles_for_bbox(*union):
+            t_south, t_north, t_west, t_east = level.tile_bounds(tile)
+            tile_bands = {}
+
+            # Por banda: las bandas pueden tener shapes distintos
+            for name, array in bands.items():
+                height, width = array.shape
+                r0 = int(round((north - t_north) / (north - south) * height))
+                r1 = int(round((north - t_south) / (north - south) * height))
+                c0 = int(round((t_west - west) / (east - west) * width))
+                c1 = int(round((t_east - west) / (east - west) * width))
+
+                if r1 <= r0 or c1 <= c0:
+                    # Raster más chico que la grilla: no se puede teselar
+                    return None
+
+                tile_bands[name] = _resample(array[r0:r1, c0:c1], size)
+
+            tile_data = replace(
+                data,
+                lat_min=t_south,
+                lat_max=t_north,
+                lon_min=t_west,
+                lon_max=t_east,
+                bands=tile_bands,
+                resolution_m=level.resolution_m,
+                cached=False
+            )
+            satellite_cache.set_by_key(
+                self._tile_key(level, tile, variant),
+                level.name,
+                tile_data,
+                bbox=[t_south, t_north, t_west, t_east]
+            )
+            tiles[tile] = tile_data
+
+        return tiles
+
+    def _assemble(
+        self,
+        level: TileLevel,
+        tiles: List[TileIndex],
+        tile_data: Dict[TileIndex, Any],
+        lat_min: float,
+        lat_max: float,
+        lon_min: float,
+        lon_max: float
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """Mosaico de teselas recortado al bbox pedido"""
+        band_names = None
+        for tile in tiles:
+            names = set(tile_data[tile].bands.keys())
+            band_names = names if band_names is None else band_names & names
+
+        if not band_names:
+            logger.warning(f"Tiles for {level.name} share no common bands")
+            return None
+
+        ixs = sorted({t[0] for t in tiles})
+        iys = sorted({t[1] for t in tiles}, reverse=True)  # fila 0 = norte
+        size = level.tile_px
+
+        south, north, west, east = level.union_bounds(tiles)
+        px_per_deg = size / level.tile_deg
+        r0 = max(0, int(math.floor((north - lat_max) * px_per_deg)))
+        r1 = min(len(iys) * size, int(math.ceil((north - lat_min) * px_per_deg)))
+        c0 = max(0, int(math.floor((lon_min - west) * px_per_deg)))
+        c1 = min(len(ixs) * size, int(math.ceil((lon_max - west) * px_per_deg)))
+        r1 = max(r1, r0 + 1)
+        c1 = max(c1, c0 + 1)
+
+        mosaic = {}
+        for name in band_names:
+            full = np.empty((len(iys) * size, len(ixs) * size), dtype=float)
+            for row, iy in enumerate(iys):
+                for col, ix in enumerate(ixs):
+                    full[row * size:(row + 1) * size, col * size:(col + 1) * size] = \
+                        tile_data[(ix, iy)].bands[name]
+            mosaic[name] = full[r0:r1, c0:c1]
+
+        return mosaic
+
+    @staticmethod
+    def _summarize(
+        level: TileLevel,
+        tile_data: Dict[TileIndex, Any],
+        bands: Dict[str, np.ndarray],
+        summarize_fn: SummarizeFn,
+        lat_min: float,
+        lat_max: float,
+        lon_min: float,
+        lon_max: float,
+        processing_time: float
+    ) -> Optional[Any]:
+        """Construir SatelliteData del bbox a partir del mosaico"""
+        summary = summarize_fn(bands)
+        if summary is None:
+            return None
+
+        indices, anomaly_score, anomaly_type, confidence = summary
+
+        # Metadata de la tesela más reciente
+        newest = max(tile_data.values(), key=lambda d: d.acquisition_date)
+        cloud_cover = float(np.mean([d.cloud_cover for d in tile_data.values()]))
+
+        return replace(
+            newest,
+            cloud_cover=cloud_cover,
+            resolution_m=level.resolution_m,
+            lat_min=lat_min,
+            lat_max=lat_max,
+            lon_min=lon_min,
+            lon_max=lon_max,
+            bands=bands,
+            indices=indices,
+            anomaly_score=anomaly_score,
+            anomaly_type=anomaly_type,
+            confidence=confidence,
+            processing_time_s=processing_time
+        )
+
+
+# Instancia global
+satellite_tile_cache = SatelliteTileCache()
@@ -16,10 +16,10 @@ F. Validación contra sitios conocidos documentados
 G. Salida científica (no marketing)
 """
 
+import asyncio
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
-from scipy import stats
 from datetime import datetime
 
 # Import condicional para evitar errores en testing
@@ -33,6 +33,7 @@ from pipeline.normalization import NormalizedFeatures, normalize_data
 from pipeline.anomaly_detection import AnomalyResult, detect_anomaly
 from pipeline.morphology import MorphologyResult, analyze_morphology
 from pipeline.anthropic_inference import AnthropicInference, infer_anthropic_probability
+from pipeline_tracing import tracer
 
 # NUEVOS MÓDULOS - 5 CORRECCIONES CRÍTICAS
 try:
@@ -1916,22 +1917,166 @@ class ScientificPipeline:
         F. Validar contra sitios conocidos
         G. Salida científica
         
+        Consume `analyze_stream` y retorna el evento final (una sola
+        implementación del pipeline para ambos modos).
+        
         Returns:
             Dict con todas las fases y salida científica
         """
+        result = None
+        async for event in self.analyze_stream(raw_measurements, lat_min, lat_max, lon_min, lon_max):
+            if event['phase'] == 'complete':
+                result = event['data']
+        return result
+    
+    async def analyze_stream(self, raw_measurements: Dict[str, Any],
+                             lat_min: float, lat_max: float,
+                             lon_min: float, lon_max: float) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Ejecutar pipeline científico emitiendo cada fase apenas termina.
+        
+        Eventos `{'phase': ..., 'data': ...}` en orden:
+        phase_0_enrichment, phase_a_normalized, coverage_assessment,
+        phase_b_anomaly, phase_c_morphology, phase_d_anthropic,
+        phase_e_anti_pattern, phase_f_known_sites, phase_g_output,
+        scientific_narrative, anomaly_map y complete (resultado idéntico
+        al de `analyze`).
+        
+        Las partes síncronas lentas corren fuera del event loop:
+        - Fase F (validador de sitios conocidos) arranca tras la normalización
+          y se solapa con las fases B-E.
+        - Narrativa y mapa de anomalía son independientes y corren en paralelo.
+        """
         print("\n" + "="*80, flush=True)
         print("INICIANDO PIPELINE CIENTÍFICO", flush=True)
         print("="*80 + "\n", flush=True)
         
         # FASE 0: Enriquecimiento con datos históricos
-        raw_measurements = await self.phase_0_enrich_from_db(raw_measurements, lat_min, lat_max, lon_min, lon_max)
+        with tracer.span("phase", "phase_0_enrichment"):
+            raw_measurements = await self.phase_0_enrich_from_db(raw_measurements, lat_min, lat_max, lon_min, lon_max)
+        yield {'phase': 'phase_0_enrichment', 'data': {
+            'instruments': list(raw_measurements.get('instrumental_measurements', {}).keys()),
+            'previous_analyses': len(raw_measurements.get('previous_analyses', []))
+        }}
         
         # FASE A: Normalización
-        normalized = normalize_data(raw_measurements)
+        with tracer.span("phase", "phase_a_normalized"):
+            normalized = normalize_data(raw_measurements)
         
-        # =====================================================================
-        # INTEGRACIÓN: COVERAGE ASSESSMENT (Corrección #1)
-        # =====================================================================
+        # FASE F en segundo plano: solo depende de la normalización y el bbox
+        known_sites_task = asyncio.ensure_future(asyncio.to_thread(
+            tracer.traced("phase", "phase_f_known_sites")(self.phase_f_validate_known_sites),
+            normalized, lat_min, lat_max, lon_min, lon_max
+        ))
+        
+        try:
+            yield {'phase': 'phase_a_normalized', 'data': self._phase_a_payload(normalized)}
+            
+            # INTEGRACIÓN: COVERAGE ASSESSMENT (Corrección #1)
+            with tracer.span("phase", "coverage_assessment"):
+                coverage_assessment, confidence_signal = self._assess_coverage(raw_measurements)
+            if coverage_assessment:
+                yield {'phase': 'coverage_assessment', 'data': {
+                    'coverage_score': coverage_assessment.coverage_score,
+                    'coverage_quality': coverage_assessment.coverage_quality.value,
+                    'core_coverage': coverage_assessment.core_coverage,
+                    'confidence_level': confidence_signal['confidence_level'] if confidence_signal else None,
+                    'signal_strength': confidence_signal['signal_strength'] if confidence_signal else None
+                }}
+            
+            # FASE B: Anomalía pura
+            with tracer.span("phase", "phase_b_anomaly"):
+                anomaly = detect_anomaly(normalized)
+            yield {'phase': 'phase_b_anomaly', 'data': self._phase_b_payload(anomaly)}
+            
+            # FASE C: Morfología
+            with tracer.span("phase", "phase_c_morphology"):
+                morphology = analyze_morphology(normalized, anomaly)
+            yield {'phase': 'phase_c_morphology', 'data': self._phase_c_payload(morphology)}
+            
+            # FASE D: Inferencia antropogénica
+            with tracer.span("phase", "phase_d_anthropic"):
+                anthropic = infer_anthropic_probability(normalized, anomaly, morphology)
+            yield {'phase': 'phase_d_anthropic', 'data': self._phase_d_payload(anthropic)}
+            
+            # FASE E: Anti-patrones
+            with tracer.span("phase", "phase_e_anti_pattern"):
+                anti_pattern = self.phase_e_anti_patterns(normalized, morphology)
+            yield {'phase': 'phase_e_anti_pattern', 'data': anti_pattern}
+            
+            # FASE F: Validación contra sitios conocidos
+            known_sites_validation = await known_sites_task
+            yield {'phase': 'phase_f_known_sites', 'data': known_sites_validation}
+        finally:
+            # Consumidor desconectado a mitad de stream: no dejar la fase F huérfana
+            if not known_sites_task.done():
+                known_sites_task.cancel()
+        
+        # FASE G: Salida científica
+        with tracer.span("phase", "phase_g_output"):
+            output = self.phase_g_scientific_output(normalized, anomaly, morphology, anthropic, anti_pattern, known_sites_validation)
+        
+        # Actualizar coverage en output si está disponible
+        if coverage_assessment:
+            output.coverage_raw = coverage_assessment.coverage_score
+            output.coverage_effective = confidence_signal['coverage_factor'] if confidence_signal else coverage_assessment.coverage_score
+            output.instruments_measured = coverage_assessment.instruments_available
+            output.instruments_available = coverage_assessment.instruments_total
+        
+        if confidence_signal:
+            output.confidence_level = confidence_signal['confidence_level']
+            output.signal_strength = confidence_signal['signal_strength']
+        
+        yield {'phase': 'phase_g_output', 'data': self._scientific_output_payload(output)}
+        
+        # INTEGRACIONES: narrativa y mapa de anomalía (independientes entre sí)
+        narrative_task = asyncio.ensure_future(asyncio.to_thread(
+            tracer.traced("phase", "scientific_narrative")(self._integrate_scientific_narrative), output, raw_measurements, anomaly, coverage_assessment
+        ))
+        map_task = asyncio.ensure_future(asyncio.to_thread(
+            tracer.traced("phase", "anomaly_map")(self._integrate_anomaly_map), output, raw_measurements, lat_min, lat_max, lon_min, lon_max
+        ))
+        
+        try:
+            if await narrative_task:
+                yield {'phase': 'scientific_narrative', 'data': {
+                    'scientific_narrative': output.scientific_narrative,
+                    'classification': output.classification,
+                    'priority': output.priority,
+                    'recommended_action': output.recommended_action
+                }}
+            
+            if await map_task:
+                yield {'phase': 'anomaly_map', 'data': {
+                    'anomaly_map_path': output.anomaly_map_path,
+                    'anomaly_map_metadata': output.anomaly_map_metadata
+                }}
+        finally:
+            for task in (narrative_task, map_task):
+                if not task.done():
+                    task.cancel()
+        
+        print("\n" + "="*80, flush=True)
+        print("PIPELINE CIENTÍFICO COMPLETADO", flush=True)
+        print("="*80 + "\n", flush=True)
+        
+        # Resultado completo
+        yield {'phase': 'complete', 'data': {
+            "scientific_output": self._scientific_output_payload(output),
+            "phase_a_normalized": self._phase_a_payload(normalized),
+            "phase_b_anomaly": self._phase_b_payload(anomaly),
+            "phase_c_morphology": self._phase_c_payload(morphology),
+            "phase_d_anthropic": self._phase_d_payload(anthropic),
+            "phase_e_anti_pattern": anti_pattern,
+            "phases_completed": output.phases_completed
+        }}
+    
+    # =========================================================================
+    # INTEGRACIONES (coverage, narrativa, mapa)
+    # =========================================================================
+    
+    def _assess_coverage(self, raw_measurements: Dict[str, Any]) -> Tuple[Optional[Any], Optional[Dict[str, Any]]]:
+        """INTEGRACIÓN: COVERAGE ASSESSMENT (Corrección #1)."""
         coverage_assessment = None
         confidence_signal = None
         
@@ -1966,231 +2111,225 @@ class ScientificPipeline:
             except Exception as e:
                 print(f"   ⚠️ Error en Coverage Assessment: {e}", flush=True)
         
-        # FASE B: Anomalía pura
-        anomaly = detect_anomaly(normalized)
-        
-        # FASE C: Morfología
-        morphology = analyze_morphology(normalized, anomaly)
-        
-        # FASE D: Inferencia antropogénica
-        anthropic = infer_anthropic_probability(normalized, anomaly, morphology)
-        
-        # FASE E: Anti-patrones
-        anti_pattern = self.phase_e_anti_patterns(normalized, morphology)
-        
-        # FASE F: Validación contra sitios conocidos
-        known_sites_validation = self.phase_f_validate_known_sites(normalized, lat_min, lat_max, lon_min, lon_max)
-        
-        # FASE G: Salida científica
-        output = self.phase_g_scientific_output(normalized, anomaly, morphology, anthropic, anti_pattern, known_sites_validation)
-        
-        # =====================================================================
-        # INTEGRACIÓN: SCIENTIFIC NARRATIVE (Corrección #5)
-        # =====================================================================
-        if SCIENTIFIC_NARRATIVE_AVAILABLE:
-            print("[INTEGRACIÓN] Generando Scientific Narrative...", flush=True)
-            try:
-                # Extraer datos necesarios
-                thermal_stability = 0.0
-                sar_structural_index = 0.0
-                icesat2_rugosity = None
-                ndvi_persistence = 0.0
-                tas_score = 0.0
-                environment_type = raw_measurements.get('environment_type', 'temperate')
-                flags = []
-                
-                # Intentar extraer de mediciones
-                for key, measurement in raw_measurements.get('instrumental_measurements', {}).items():
-                    if isinstance(measurement, dict):
-                        if 'thermal' in key.lower():
-                            thermal_stability = measurement.get('value', 0.0) / 100.0  # Normalizar
-                        elif 'sar' in key.lower():
-                            sar_structural_index = measurement.get('value', 0.0)
-                        elif 'icesat' in key.lower():
-                            icesat2_rugosity = measurement.get('value')
-                        elif 'ndvi' in key.lower():
-                            ndvi_persistence = measurement.get('value', 0.0)
-                
-                # Generar narrativa
-                narrative = generate_archaeological_narrative(
-                    thermal_stability=thermal_stability,
-                    sar_structural_index=sar_structural_index,
-                    icesat2_rugosity=icesat2_rugosity,
-                    ndvi_persistence=ndvi_persistence,
-                    tas_score=tas_score,
-                    coverage_score=coverage_assessment.coverage_score if coverage_assessment else 0.5,
-                    environment_type=environment_type,
-                    flags=flags,
-                    anomaly_score=anomaly.anomaly_score  # NUEVO: pasar anomaly score
-                )
-                
-                # Actualizar output
-                output.scientific_narrative = narrative.full_narrative
-                output.classification = narrative.classification.value
-                output.priority = narrative.priority
-                output.notes = narrative.full_narrative  # Reemplazar notes con narrativa
-                if narrative.recommendations:
-                    output.recommended_action = narrative.recommendations[0]
-                
-                print(f"   Clasificación: {narrative.classification.value}", flush=True)
-                print(f"   Prioridad: {narrative.priority}", flush=True)
-                print(f"   ✅ Scientific Narrative completado", flush=True)
-                
-            except Exception as e:
-                print(f"   ⚠️ Error en Scientific Narrative: {e}", flush=True)
-        
-        # =====================================================================
-        # INTEGRACIÓN: ANOMALY MAP GENERATOR (Visualización)
-        # =====================================================================
-        if ANOMALY_MAP_AVAILABLE:
-            print("[INTEGRACIÓN] Generando Anomaly Map...", flush=True)
-            try:
-                generator = AnomalyMapGenerator(resolution_m=30.0)
-                
-                anomaly_map = generator.generate_anomaly_map(
-                    measurements=raw_measurements,
-                    lat_min=lat_min,
-                    lat_max=lat_max,
-                    lon_min=lon_min,
-                    lon_max=lon_max,
-                    environment_type=raw_measurements.get('environment_type', 'temperate')
-                )
-                
-                # Exportar PNG
-                import os
-                os.makedirs('anomaly_maps', exist_ok=True)
-                output_path = f"anomaly_maps/{output.candidate_id}.png"
-                generator.export_to_png(anomaly_map, output_path)
-                
-                # Actualizar output
-                output.anomaly_map_path = output_path
-                output.anomaly_map_metadata = {
-                    'layers_used': anomaly_map.layers_used,
-                    'resolution_m': anomaly_map.resolution_m,
-                    'anomaly_mean': anomaly_map.metadata.get('anomaly_mean', 0.0),
-                    'anomaly_max': anomaly_map.metadata.get('anomaly_max', 0.0),
-                    'geometric_features_count': anomaly_map.metadata.get('geometric_features_count', 0)
-                }
-                
-                print(f"   Layers: {anomaly_map.layers_used}", flush=True)
-                print(f"   Anomaly range: [{np.min(anomaly_map.anomaly_map):.3f}, {np.max(anomaly_map.anomaly_map):.3f}]", flush=True)
-                print(f"   PNG exportado: {output_path}", flush=True)
-                print(f"   ✅ Anomaly Map completado", flush=True)
-                
-            except Exception as e:
-                print(f"   ⚠️ Error en Anomaly Map: {e}", flush=True)
-        
-        # Actualizar coverage en output si está disponible
-        if coverage_assessment:
-            output.coverage_raw = coverage_assessment.coverage_score
-            output.coverage_effective = confidence_signal['coverage_factor'] if confidence_signal else coverage_assessment.coverage_score
-            output.instruments_measured = coverage_assessment.instruments_available
-            output.instruments_available = coverage_assessment.instruments_total
-        
-        if confidence_signal:
-            output.confidence_level = confidence_signal['confidence_level']
-            output.signal_strength = confidence_signal['signal_strength']
-        
-        print("\n" + "="*80, flush=True)
-        print("PIPELINE CIENTÍFICO COMPLETADO", flush=True)
-        print("="*80 + "\n", flush=True)
-        
-        # Retornar resultado completo
+        return coverage_assessment, confidence_signal
+    
+    def _integrate_scientific_narrative(self, output: ScientificOutput,
+                                        raw_measurements: Dict[str, Any],
+                                        anomaly: AnomalyResult,
+                                        coverage_assessment: Optional[Any]) -> bool:
+        """INTEGRACIÓN: SCIENTIFIC NARRATIVE (Corrección #5). Retorna True si actualizó output."""
+        if not SCIENTIFIC_NARRATIVE_AVAILABLE:
+            return False
+        
+        print("[INTEGRACIÓN] Generando Scientific Narrative...", flush=True)
+        try:
+            # Extraer datos necesarios
+            thermal_stability = 0.0
+            sar_structural_index = 0.0
+            icesat2_rugosity = None
+            ndvi_persistence = 0.0
+            tas_score = 0.0
+            environment_type = raw_measurements.get('environment_type', 'temperate')
+            flags = []
+            
+            # Intentar extraer de mediciones
+            for key, measurement in raw_measurements.get('instrumental_measurements', {}).items():
+                if isinstance(measurement, dict):
+                    if 'thermal' in key.lower():
+                        thermal_stability = measurement.get('value', 0.0) / 100.0  # Normalizar
+                    elif 'sar' in key.lower():
+                        sar_structural_index = measurement.get('value', 0.0)
+                    elif 'icesat' in key.lower():
+                        icesat2_rugosity = measurement.get('value')
+                    elif 'ndvi' in key.lower():
+                        ndvi_persistence = measurement.get('value', 0.0)
+            
+            # Generar narrativa
+            narrative = generate_archaeological_narrative(
+                thermal_stability=thermal_stability,
+                sar_structural_index=sar_structural_index,
+                icesat2_rugosity=icesat2_rugosity,
+                ndvi_persistence=ndvi_persistence,
+                tas_score=tas_score,
+                coverage_score=coverage_assessment.coverage_score if coverage_assessment else 0.5,
+                environment_type=environment_type,
+                flags=flags,
+                anomaly_score=anomaly.anomaly_score  # NUEVO: pasar anomaly score
+            )
+            
+            # Actualizar output
+            output.scientific_narrative = narrative.full_narrative
+            output.classification = narrative.classification.value
+            output.priority = narrative.priority
+            output.notes = narrative.full_narrative  # Reemplazar notes con narrativa
+            if narrative.recommendations:
+                output.recommended_action = narrative.recommendations[0]
+            
+            print(f"   Clasificación: {narrative.classification.value}", flush=True)
+            print(f"   Prioridad: {narrative.priority}", flush=True)
+            print(f"   ✅ Scientific Narrative completado", flush=True)
+            return True
+            
+        except Exception as e:
+            print(f"   ⚠️ Error en Scientific Narrative: {e}", flush=True)
+            return False
+    
+    def _integrate_anomaly_map(self, output: ScientificOutput,
+                               raw_measurements: Dict[str, Any],
+                               lat_min: float, lat_max: float,
+                               lon_min: float, lon_max: float) -> bool:
+        """INTEGRACIÓN: ANOMALY MAP GENERATOR (Visualización). Retorna True si actualizó output."""
+        if not ANOMALY_MAP_AVAILABLE:
+            return False
+        
+        print("[INTEGRACIÓN] Generando Anomaly Map...", flush=True)
+        try:
+            generator = AnomalyMapGenerator(resolution_m=30.0)
+            
+            anomaly_map = generator.generate_anomaly_map(
+                measurements=raw_measurements,
+                lat_min=lat_min,
+                lat_max=lat_max,
+                lon_min=lon_min,
+                lon_max=lon_max,
+                environment_type=raw_measurements.get('environment_type', 'temperate')
+            )
+            
+            # Exportar PNG
+            import os
+            os.makedirs('anomaly_maps', exist_ok=True)
+            output_path = f"anomaly_maps/{output.candidate_id}.png"
+            generator.export_to_png(anomaly_map, output_path)
+            
+            # Actualizar output
+            output.anomaly_map_path = output_path
+            output.anomaly_map_metadata = {
+                'layers_used': anomaly_map.layers_used,
+                'resolution_m': anomaly_map.resolution_m,
+                'anomaly_mean': anomaly_map.metadata.get('anomaly_mean', 0.0),
+                'anomaly_max': anomaly_map.metadata.get('anomaly_max', 0.0),
+                'geometric_features_count': anomaly_map.metadata.get('geometric_features_count', 0)
+            }
+            
+            print(f"   Layers: {anomaly_map.layers_used}", flush=True)
+            print(f"   Anomaly range: [{np.min(anomaly_map.anomaly_map):.3f}, {np.max(anomaly_map.anomaly_map):.3f}]", flush=True)
+            print(f"   PNG exportado: {output_path}", flush=True)
+            print(f"   ✅ Anomaly Map completado", flush=True)
+            return True
+            
+        except Exception as e:
+            print(f"   ⚠️ Error en Anomaly Map: {e}", flush=True)
+            return False
+    
+    # =========================================================================
+    # SERIALIZACIÓN DE FASES
+    # =========================================================================
+    
+    @staticmethod
+    def _phase_a_payload(normalized: NormalizedFeatures) -> Dict[str, Any]:
         return {
-            "scientific_output": {
-                "candidate_id": output.candidate_id,
-                "anomaly_score": output.anomaly_score,
-                "anthropic_probability": output.anthropic_probability,
-                "confidence_interval": list(output.confidence_interval),
-                "recommended_action": output.recommended_action,
-                "notes": output.notes,
-                "timestamp": output.timestamp,
-                # COBERTURA INSTRUMENTAL (separar raw vs effective)
-                "coverage_raw": output.coverage_raw,
-                "coverage_effective": output.coverage_effective,
-                "instruments_measured": output.instruments_measured,
-                "instruments_available": output.instruments_available,
-                # SEPARACIÓN CONFIANZA vs SEÑAL
-                "confidence_level": output.confidence_level,
-                "signal_strength": output.signal_strength,
-                # NARRATIVA CIENTÍFICA
-                "scientific_narrative": output.scientific_narrative,
-                "classification": output.classification,
-                "priority": output.priority,
-                # MAPA DE ANOMALÍA
-                "anomaly_map_path": output.anomaly_map_path,
-                "anomaly_map_metadata": output.anomaly_map_metadata,
-                # 🟠 INCERTIDUMBRE EPISTEMOLÓGICA
-                "epistemic_uncertainty": output.epistemic_uncertainty,
-                "uncertainty_sources": output.uncertainty_sources,
-                # 🔬 EXPLANATORY STRANGENESS SCORE
-                "explanatory_strangeness": output.explanatory_strangeness,
-                "strangeness_score": output.strangeness_score,
-                "strangeness_reasons": output.strangeness_reasons,
-                # 🎯 MÉTRICAS SEPARADAS (estado del arte)
-                "anthropic_origin_probability": output.anthropic_origin_probability,
-                "anthropic_activity_probability": output.anthropic_activity_probability,
-                "instrumental_anomaly_probability": output.instrumental_anomaly_probability,
-                "model_inference_confidence": output.model_inference_confidence,
-                # MEJORA PRO
-                "candidate_type": output.candidate_type,
-                "negative_reason": output.negative_reason,
-                "reuse_for_training": output.reuse_for_training,
-                # AJUSTES FINOS
-                "discard_type": output.discard_type,
-                "scientific_confidence": output.scientific_confidence,
-                # FASE F: Sitios conocidos
-                "known_sites_nearby": output.known_sites_nearby,
-                "overlapping_known_site": output.overlapping_known_site,
-                "distance_to_known_site_km": output.distance_to_known_site_km,
-                "is_known_site_rediscovery": output.is_known_site_rediscovery,
-                # ETIQUETADO EPISTEMOLÓGICO (blindaje académico y legal)
-                "epistemic_mode": output.epistemic_mode,
-                "ai_used": output.ai_used,
-                "ai_role": output.ai_role,
-                "reproducible": output.reproducible,
-                "method_transparency": output.method_transparency
-            },
-            "phase_a_normalized": {
-                "features": normalized.features,
-                "normalization_method": normalized.normalization_method,
-                "local_context": normalized.local_context  # Incluye features_status y reason
-            },
-            "phase_b_anomaly": {
-                "anomaly_score": anomaly.anomaly_score,
-                "outlier_dimensions": anomaly.outlier_dimensions,
-                "method": anomaly.method,
-                "confidence": anomaly.confidence
-            },
-            "phase_c_morphology": {
-                "symmetry_score": morphology.symmetry_score,
-                "edge_regularity": morphology.edge_regularity,
-                "planarity": morphology.planarity,
-                "artificial_indicators": morphology.artificial_indicators,
-                "geomorphology_hint": morphology.geomorphology_hint,  # MEJORA 2
-                "paleo_signature": morphology.paleo_signature  # NUEVO: firma de paleocauce
-            },
-            "phase_d_anthropic": {
-                "anthropic_probability": anthropic.anthropic_probability,
-                "confidence": anthropic.confidence,
-                "confidence_interval": list(anthropic.confidence_interval),
-                "reasoning": anthropic.reasoning,
-                "model_used": anthropic.model_used,
-                # MÉTRICAS DE COBERTURA INSTRUMENTAL
-                "coverage_raw": anthropic.coverage_raw,
-                "coverage_effective": anthropic.coverage_effective,
-                "instruments_measured": anthropic.instruments_measured,
-                "instruments_available": anthropic.instruments_available,
-                # 🔬 EXPLANATORY STRANGENESS SCORE
-                "explanatory_strangeness": anthropic.explanatory_strangeness,
-                "strangeness_score": anthropic.strangeness_score,
-                "strangeness_reasons": anthropic.strangeness_reasons,
-                # 🎯 MÉTRICAS SEPARADAS (estado del arte)
-                "anthropic_origin_probability": anthropic.anthropic_origin_probability,
-                "anthropic_activity_probability": anthropic.anthropic_activity_probability,
-                "instrumental_anomaly_probability": anthropic.instrumental_anomaly_probability,
-                "model_inference_confidence": anthropic.model_inference_confidence
-            },
-            "phase_e_anti_pattern": anti_pattern,
-            "phases_completed": output.phases_completed
+            "features": normalized.features,
+            "normalization_method": normalized.normalization_method,
+            "local_context": normalized.local_context  # Incluye features_status y reason
+        }
+    
+    @staticmethod
+    def _phase_b_payload(anomaly: AnomalyResult) -> Dict[str, Any]:
+        return {
+            "anomaly_score": anomaly.anomaly_score,
+            "outlier_dimensions": anomaly.outlier_dimensions,
+            "method": anomaly.method,
+            "confidence": anomaly.confidence
+        }
+    
+    @staticmethod
+    def _phase_c_payload(morphology: MorphologyResult) -> Dict[str, Any]:
+        return {
+            "symmetry_score": morphology.symmetry_score,
+            "edge_regularity": morphology.edge_regularity,
+            "planarity": morphology.planarity,
+            "artificial_indicators": morphology.artificial_indicators,
+            "geomorphology_hint": morphology.geomorphology_hint,  # MEJORA 2
+            "paleo_signature": morphology.paleo_signature  # NUEVO: firma de paleocauce
+        }
+    
+    @staticmethod
+    def _phase_d_payload(anthropic: AnthropicInference) -> Dict[str, Any]:
+        return {
+            "anthropic_probability": anthropic.anthropic_probability,
+            "confidence": anthropic.confidence,
+            "confidence_interval": list(anthropic.confidence_interval),
+            "reasoning": anthropic.reasoning,
+            "model_used": anthropic.model_used,
+            # MÉTRICAS DE COBERTURA INSTRUMENTAL
+            "coverage_raw": anthropic.coverage_raw,
+            "coverage_effective": anthropic.coverage_effective,
+            "instruments_measured": anthropic.instruments_measured,
+            "instruments_available": anthropic.instruments_available,
+            # 🔬 EXPLANATORY STRANGENESS SCORE
+            "explanatory_strangeness": anthropic.explanatory_strangeness,
+            "strangeness_score": anthropic.strangeness_score,
+            "strangeness_reasons": anthropic.strangeness_reasons,
+            # 🎯 MÉTRICAS SEPARADAS (estado del arte)
+            "anthropic_origin_probability": anthropic.anthropic_origin_probability,
+            "anthropic_activity_probability": anthropic.anthropic_activity_probability,
+            "instrumental_anomaly_probability": anthropic.instrumental_anomaly_probability,
+            "model_inference_confidence": anthropic.model_inference_confidence
+        }
+    
+    @staticmethod
+    def _scientific_output_payload(output: ScientificOutput) -> Dict[str, Any]:
+        return {
+            "candidate_id": output.candidate_id,
+            "anomaly_score": output.anomaly_score,
+            "anthropic_probability": output.anthropic_probability,
+            "confidence_interval": list(output.confidence_interval),
+            "recommended_action": output.recommended_action,
+            "notes": output.notes,
+            "timestamp": output.timestamp,
+            # COBERTURA INSTRUMENTAL (separar raw vs effective)
+            "coverage_raw": output.coverage_raw,
+            "coverage_effective": output.coverage_effective,
+            "instruments_measured": output.instruments_measured,
+            "instruments_available": output.instruments_available,
+            # SEPARACIÓN CONFIANZA vs SEÑAL
+            "confidence_level": output.confidence_level,
+            "signal_strength": output.signal_strength,
+            # NARRATIVA CIENTÍFICA
+            "scientific_narrative": output.scientific_narrative,
+            "classification": output.classification,
+            "priority": output.priority,
+            # MAPA DE ANOMALÍA
+            "anomaly_map_path": output.anomaly_map_path,
+            "anomaly_map_metadata": output.anomaly_map_metadata,
+            # 🟠 INCERTIDUMBRE EPISTEMOLÓGICA
+            "epistemic_uncertainty": output.epistemic_uncertainty,
+            "uncertainty_sources": output.uncertainty_sources,
+            # 🔬 EXPLANATORY STRANGENESS SCORE
+            "explanatory_strangeness": output.explanatory_strangeness,
+            "strangeness_score": output.strangeness_score,
+            "strangeness_reasons": output.strangeness_reasons,
+            # 🎯 MÉTRICAS SEPARADAS (estado del arte)
+            "anthropic_origin_probability": output.anthropic_origin_probability,
+            "anthropic_activity_probability": output.anthropic_activity_probability,
+            "instrumental_anomaly_probability": output.instrumental_anomaly_probability,
+            "model_inference_confidence": output.model_inference_confidence,
+            # MEJORA PRO
+            "candidate_type": output.candidate_type,
+            "negative_reason": output.negative_reason,
+            "reuse_for_training": output.reuse_for_training,
+            # AJUSTES FINOS
+            "discard_type": output.discard_type,
+            "scientific_confidence": output.scientific_confidence,
+            # FASE F: Sitios conocidos
+            "known_sites_nearby": output.known_sites_nearby,
+            "overlapping_known_site": output.overlapping_known_site,
+            "distance_to_known_site_km": output.distance_to_known_site_km,
+            "is_known_site_rediscovery": output.is_known_site_rediscovery,
+            # ETIQUETADO EPISTEMOLÓGICO (blindaje académico y legal)
+            "epistemic_mode": output.epistemic_mode,
+            "ai_used": output.ai_used,
+            "ai_role": output.ai_role,
+            "reproducible": output.reproducible,
+            "method_transparency": output.method_transparency
         }
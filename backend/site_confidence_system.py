@@ -179,6 +179,13 @@ class SiteConfidenceSystem:
         
         return confidence
     
+    @staticmethod
+    def _gaussian_band_matrix(size: int, sigma: int) -> np.ndarray:
+        """Matriz M[i, s] = exp(-(i-s)²/2σ²) para i-s en [-3σ, 3σ), 0 fuera de la ventana"""
+        offsets = np.arange(size)[:, None] - np.arange(size)[None, :]
+        band = (offsets >= -3 * sigma) & (offsets < 3 * sigma)
+        return np.where(band, np.exp(-offsets ** 2 / (2 * sigma ** 2)), 0.0)
+    
     def adjust_anomaly_score(
         self,
         anomaly_score: float,
@@ -274,37 +281,31 @@ class SiteConfidenceSystem:
             return np.zeros(grid_size)
         
         lat_min, lat_max, lon_min, lon_max = bounds
+        rows, cols = grid_size
         
-        # Crear grid
-        lats = np.linspace(lat_min, lat_max, grid_size[0])
-        lons = np.linspace(lon_min, lon_max, grid_size[1])
-        
-        # Mapa de densidad
-        density_map = np.zeros(grid_size)
-        
-        # Para cada sitio, agregar kernel gaussiano
-        for site in sites:
-            lat = site.get('latitude')
-            lon = site.get('longitude')
-            
-            if lat is None or lon is None:
-                continue
-            
-            # Calcular confianza del sitio
-            site_conf = self.calculate_site_confidence(site)
-            
-            # Encontrar posición en grid
-            lat_idx = int((lat - lat_min) / (lat_max - lat_min) * (grid_size[0] - 1))
-            lon_idx = int((lon - lon_min) / (lon_max - lon_min) * (grid_size[1] - 1))
-            
-            if 0 <= lat_idx < grid_size[0] and 0 <= lon_idx < grid_size[1]:
-                # Kernel gaussiano (sigma = 5 pixels)
-                sigma = 5
-                for i in range(max(0, lat_idx - 3*sigma), min(grid_size[0], lat_idx + 3*sigma)):
-                    for j in range(max(0, lon_idx - 3*sigma), min(grid_size[1], lon_idx + 3*sigma)):
-                        dist_sq = (i - lat_idx)**2 + (j - lon_idx)**2
-                        kernel_val = np.exp(-dist_sq / (2 * sigma**2))
-                        density_map[i, j] += kernel_val * site_conf.final_confidence
+        # Posición de todos los sitios en el grid de una vez (misma truncación que int())
+        located = [site for site in sites
+                   if site.get('latitude') is not None and site.get('longitude') is not None]
+        if not located:
+            return np.zeros(grid_size)
+        site_lats = np.array([site['latitude'] for site in located], dtype=float)
+        site_lons = np.array([site['longitude'] for site in located], dtype=float)
+        lat_idx = np.trunc((site_lats - lat_min) / (lat_max - lat_min) * (rows - 1)).astype(int)
+        lon_idx = np.trunc((site_lons - lon_min) / (lon_max - lon_min) * (cols - 1)).astype(int)
+        inside = (lat_idx >= 0) & (lat_idx < rows) & (lon_idx >= 0) & (lon_idx < cols)
+        
+        # Peso de confianza acumulado por píxel (solo sitios dentro del grid)
+        weights = np.zeros(grid_size)
+        for k in np.flatnonzero(inside):
+            site_conf = self.calculate_site_confidence(located[k])
+            weights[lat_idx[k], lon_idx[k]] += site_conf.final_confidence
+        
+        # Kernel gaussiano (sigma = 5 pixels) sobre la ventana [-3σ, 3σ), separable:
+        # density = K_filas @ weights @ K_columnas.T
+        sigma = 5
+        density_map = (
+            self._gaussian_band_matrix(rows, sigma) @ weights @ self._gaussian_band_matrix(cols, sigma).T
+        )
         
         # Normalizar a rango 0-1
         if density_map.max() > 0:
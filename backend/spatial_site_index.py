@@ -0,0 +1,307 @@
+"""
+Índice Espacial de Sitios Arqueológicos Conocidos - ArcheoScope
+================================================================
+
+Reemplaza los barridos lineales sobre listas de sitios (validadores,
+ajuste probabilístico por sitios cercanos) por un KD-tree sobre
+coordenadas cartesianas en la esfera unitaria.
+
+En la esfera unitaria la distancia euclídea (cuerda) es monótona con la
+distancia de gran círculo, así que radio y k-NN son exactos:
+
+    cuerda = 2 * sin(d / 2R)      d = 2R * asin(cuerda / 2)
+
+Un único índice compartido (`known_site_index`) agrupa sitios por fuente:
+- `calibration`: sitios de calibración de RealArchaeologicalValidator
+- `archaeological_sites`: tabla de la BD (cargada en el startup)
+
+Los sitios con el mismo nombre en varias fuentes se registran una sola vez
+(gana la primera fuente registrada). Cada reconstrucción publica un snapshot
+inmutable, así que las consultas no necesitan lock.
+"""
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+# Página de lectura de la tabla archaeological_sites en el startup
+DB_PAGE_SIZE = 5000
+
+SITES_QUERY = '''
+    SELECT
+        id, name, latitude, longitude, country,
+        "environmentType" as environment_type,
+        "siteType" as site_type,
+        "confidenceLevel" as confidence_level
+    FROM archaeological_sites
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+'''
+
+
+def _unit_vectors(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat_rad = np.radians(lats)
+    lon_rad = np.radians(lons)
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack((cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)))
+
+
+def _km_to_chord(distance_km: float) -> float:
+    angle = min(distance_km / EARTH_RADIUS_KM, math.pi)
+    return 2.0 * math.sin(angle / 2.0)
+
+
+def _chord_to_km(chord: np.ndarray) -> np.ndarray:
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+
+def _site_coordinates(site: Any) -> Tuple[Optional[float], Optional[float]]:
+    """(lat, lon) de un sitio como dict de BD o con atributo `coordinates`"""
+    if isinstance(site, dict):
+        return site.get('latitude'), site.get('longitude')
+    coordinates = getattr(site, 'coordinates', None)
+    if coordinates:
+        return coordinates[0], coordinates[1]
+    return getattr(site, 'latitude', None), getattr(site, 'longitude', None)
+
+
+def _site_name(site: Any) -> str:
+    if isinstance(site, dict):
+        return site.get('name') or ""
+    return getattr(site, 'name', "") or ""
+
+
+@dataclass
+class _IndexSnapshot:
+    """Estado inmutable publicado tras cada reconstrucción"""
+    tree: Optional[cKDTree]
+    lats: np.ndarray
+    lons: np.ndarray
+    payloads: List[Any]
+    sources: List[str]
+
+
+class SiteSpatialIndex:
+    """
+    Índice espacial de sitios con consultas k-NN, radio y bbox
+
+    Thread-safe: `register` reconstruye bajo lock y publica un snapshot nuevo;
+    las consultas leen el snapshot vigente.
+    """
+
+    def __init__(self):
+        self._groups: Dict[str, List[Tuple[float, float, str, Any]]] = {}
+        self._order: List[str] = []
+        self._lock = threading.Lock()
+        self._snapshot = _IndexSnapshot(None, np.empty(0), np.empty(0), [], [])
+        self.build_time_ms = 0.0
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+
+    def register(self, source: str, sites: Sequence[Any],
+                 coords: Callable[[Any], Tuple[Optional[float], Optional[float]]] = _site_coordinates,
+                 name: Callable[[Any], str] = _site_name):
+        """
+        Registrar (o reemplazar) el grupo de sitios de una fuente y reconstruir
+
+        Args:
+            source: Nombre de la fuente (reemplaza el registro anterior)
+            sites: Objetos de sitio (se devuelven tal cual en las consultas)
+            coords: Función sitio -> (lat, lon); sitios sin coordenadas se omiten
+                (default: dict de BD o atributo `coordinates`)
+            name: Función sitio -> nombre (deduplicación entre fuentes)
+        """
+        entries = []
+        for site in sites:
+            lat, lon = coords(site)
+            if lat is None or lon is None:
+                continue
+            lat, lon = float(lat), float(lon)
+            if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+                continue
+            entries.append((lat, lon, (name(site) or "").strip().lower(), site))
+
+        with self._lock:
+            if source not in self._groups:
+                self._order.append(source)
+            self._groups[source] = entries
+            self._rebuild()
+
+    def clear(self, source: Optional[str] = None):
+        """Eliminar una fuente (o todas)"""
+        with self._lock:
+            if source is None:
+                self._groups.clear()
+                self._order.clear()
+            elif source in self._groups:
+                del self._groups[source]
+                self._order.remove(source)
+            self._rebuild()
+
+    def _rebuild(self):
+        started = time.perf_counter()
+        seen_names = set()
+        lats, lons, payloads, sources = [], [], [], []
+        for source in self._order:
+            for lat, lon, key, site in self._groups[source]:
+                if key:
+                    if key in seen_names:
+                        continue
+                    seen_names.add(key)
+                lats.append(lat)
+                lons.append(lon)
+                payloads.append(site)
+                sources.append(source)
+
+        lats_arr = np.asarray(lats, dtype=float)
+        lons_arr = np.asarray(lons, dtype=float)
+        tree = cKDTree(_unit_vectors(lats_arr, lons_arr)) if payloads else None
+        self._snapshot = _IndexSnapshot(tree, lats_arr, lons_arr, payloads, sources)
+        self.build_time_ms = (time.perf_counter() - started) * 1000
+
+    def __len__(self) -> int:
+        return len(self._snapshot.payloads)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def query_radius(self, lat: float, lon: float, radius_km: float,
+                     limit: Optional[int] = None) -> List[Tuple[Any, float]]:
+        """Sitios a menos de `radius_km` (gran círculo), ordenados por distancia"""
+        snap = self._snapshot
+        if snap.tree is None:
+            return []
+        center = _unit_vectors(np.array([lat]), np.array([lon]))[0]
+        indices = snap.tree.query_ball_point(center, _km_to_chord(radius_km))
+        if not indices:
+            return []
+        indices = np.asarray(indices)
+        distances = self._distances_km(snap, center, indices)
+        order = np.argsort(distances, kind='stable')
+        if limit is not None:
+            order = order[:limit]
+        return [(snap.payloads[indices[i]], float(distances[i])) for i in order]
+
+    def query_knn(self, lat: float, lon: float, k: int = 1,
+                  max_distance_km: Optional[float] = None) -> List[Tuple[Any, float]]:
+        """Los `k` sitios más cercanos (opcionalmente acotados por distancia)"""
+        snap = self._snapshot
+        if snap.tree is None or k <= 0:
+            return []
+        k = min(k, len(snap.payloads))
+        center = _unit_vectors(np.array([lat]), np.array([lon]))[0]
+        upper = _km_to_chord(max_distance_km) if max_distance_km is not None else np.inf
+        chords, indices = snap.tree.query(center, k=k, distance_upper_bound=upper)
+        chords, indices = np.atleast_1d(chords), np.atleast_1d(indices)
+        valid = np.isfinite(chords)
+        return [
+            (snap.payloads[i], float(d))
+            for i, d in zip(indices[valid], _chord_to_km(chords[valid]))
+        ]
+
+    def query_bbox(self, lat_min: float, lat_max: float,
+                   lon_min: float, lon_max: float) -> List[Tuple[Any, float]]:
+        """
+        Sitios dentro del bbox, con distancia al centro del bbox
+
+        Usa el círculo que circunscribe al bbox como prefiltro del árbol.
+        """
+        snap = self._snapshot
+        if snap.tree is None:
+            return []
+        center_lat = (lat_min + lat_max) / 2
+        center_lon = (lon_min + lon_max) / 2
+        corners = np.array([[lat_min, lon_min], [lat_min, lon_max], [lat_max, lon_min], [lat_max, lon_max]])
+        center = _unit_vectors(np.array([center_lat]), np.array([center_lon]))[0]
+        chord = float(np.max(np.linalg.norm(_unit_vectors(corners[:, 0], corners[:, 1]) - center, axis=1)))
+        indices = snap.tree.query_ball_point(center, chord * (1 + 1e-9) + 1e-12)
+        if not indices:
+            return []
+        indices = np.asarray(indices)
+        lats, lons = snap.lats[indices], snap.lons[indices]
+        inside = (lats >= lat_min) & (lats <= lat_max) & (lons >= lon_min) & (lons <= lon_max)
+        indices = indices[inside]
+        distances = self._distances_km(snap, center, indices)
+        order = np.argsort(distances, kind='stable')
+        return [(snap.payloads[indices[i]], float(distances[i])) for i in order]
+
+    def query_radius_many(self, lats: np.ndarray, lons: np.ndarray,
+                          radius_km: float) -> List[List[Tuple[Any, float]]]:
+        """Consulta de radio vectorizada para muchos puntos (p.ej. centros de celdas)"""
+        snap = self._snapshot
+        lats = np.asarray(lats, dtype=float).ravel()
+        lons = np.asarray(lons, dtype=float).ravel()
+        if snap.tree is None:
+            return [[] for _ in range(lats.size)]
+        centers = _unit_vectors(lats, lons)
+        results = []
+        for center, indices in zip(centers, snap.tree.query_ball_point(centers, _km_to_chord(radius_km))):
+            if not indices:
+                results.append([])
+                continue
+            indices = np.asarray(indices)
+            distances = self._distances_km(snap, center, indices)
+            order = np.argsort(distances, kind='stable')
+            results.append([(snap.payloads[indices[i]], float(distances[i])) for i in order])
+        return results
+
+    @staticmethod
+    def _distances_km(snap: _IndexSnapshot, center: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        points = _unit_vectors(snap.lats[indices], snap.lons[indices])
+        return _chord_to_km(np.linalg.norm(points - center, axis=1))
+
+    def get_stats(self) -> Dict[str, Any]:
+        snap = self._snapshot
+        counts: Dict[str, int] = {}
+        for source in snap.sources:
+            counts[source] = counts.get(source, 0) + 1
+        return {
+            'total_sites': len(snap.payloads),
+            'sites_by_source': counts,
+            'build_time_ms': round(self.build_time_ms, 2)
+        }
+
+
+async def load_sites_from_db(pool, index: 'SiteSpatialIndex' = None,
+                             site_factory: Callable[[Dict[str, Any]], Any] = None) -> int:
+    """
+    Cargar la tabla archaeological_sites completa en el índice (startup)
+
+    Lee con un cursor de servidor (páginas de DB_PAGE_SIZE filas) sobre una
+    sola conexión del pool.
+
+    Args:
+        pool: asyncpg.Pool compartido (database.pool.get_shared_pool)
+        index: Índice destino (default: known_site_index)
+        site_factory: Conversión fila -> objeto de sitio (default: dict de la fila)
+
+    Returns:
+        Número de sitios indexados desde la BD
+    """
+    index = index or known_site_index
+    rows: List[Dict[str, Any]] = []
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            async for row in conn.cursor(SITES_QUERY, prefetch=DB_PAGE_SIZE):
+                rows.append(dict(row))
+
+    sites = [site_factory(row) for row in rows] if site_factory else rows
+    index.register('archaeological_sites', sites)
+    logger.info(f"🗺️ Índice espacial: {len(sites):,} sitios de BD ({index.build_time_ms:.1f} ms)")
+    return len(sites)
+
+
+# Instancia global compartida por todos los validadores
+known_site_index = SiteSpatialIndex()
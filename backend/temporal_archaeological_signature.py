@@ -16,6 +16,15 @@ FUENTES TEMPORALES:
 - Landsat: 2000-2026 (26 años, 1 escena/año)
 - Sentinel-1 SAR: 2017-2026 (9 años, húmedo/seco)
 
+PERSISTENCIA:
+- Las series anuales por sensor se guardan en el almacén columnar
+  (time_series_store), indexadas por la celda del centro del bbox
+- Re-analizar una zona lee la serie del almacén; sólo los años nuevos
+  requieren medir con el integrador
+- Las métricas salen de resúmenes incrementales por ubicación
+  (temporal_summaries): una fecha nueva se incorpora en O(1) con
+  update_tas y refresh_monitored_sites refresca sitios sin releer historial
+
 MÉTRICAS TAS:
 1. Persistencia de anomalía NDVI
 2. Estabilidad térmica (baja varianza = masa enterrada)
@@ -31,6 +40,9 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
 
+from time_series_store import TimeSeriesStore, time_series_store
+from temporal_summaries import RunningSeriesSummary, TemporalSummaryStore, temporal_summary_store
+
 logger = logging.getLogger(__name__)
 
 
@@ -103,10 +115,15 @@ class TemporalArchaeologicalSignature:
     flags: List[str] = None  # ['THERMAL_ANCHOR_ZONE', 'HIGH_PRIORITY', etc.]
     priority: str = "NORMAL"  # NORMAL, HIGH, CRITICAL
     
+    # Autocorrelación lag-1 por rol (ndvi, thermal, sar)
+    lag1_autocorrelation: Dict[str, float] = None
+    
     def __post_init__(self):
         """Inicializar flags si es None."""
         if self.flags is None:
             self.flags = []
+        if self.lag1_autocorrelation is None:
+            self.lag1_autocorrelation = {}
     
     def to_dict(self) -> Dict[str, Any]:
         """Convertir a diccionario para JSON."""
@@ -122,21 +139,75 @@ class TemporalArchaeologicalSignature:
             "interpretation": self.interpretation,
             "confidence": self.confidence,
             "flags": self.flags,
-            "priority": self.priority
+            "priority": self.priority,
+            "lag1_autocorrelation": self.lag1_autocorrelation
         }
 
 
+@dataclass(frozen=True)
+class AnnualSeriesSpec:
+    """Cómo se adquiere una serie anual TAS (rol + instrumento)."""
+    role: str                               # 'ndvi' | 'thermal' | 'sar'
+    instrument: str                         # instrumento del integrador
+    noise_std: float                        # variación interanual simulada
+    series_name: Optional[str] = None       # nombre de la serie (default: instrumento)
+    month: int = 6
+    day: int = 15
+    normalizer: Optional[float] = None      # valor / normalizer (máx 1.0)
+    confidence_factor: float = 1.0
+    
+    def __post_init__(self):
+        if self.series_name is None:
+            object.__setattr__(self, 'series_name', self.instrument)
+    
+    @property
+    def store_variable(self) -> str:
+        """Variable en el almacén (prefijo por rol: modis_lst es NDVI y térmica)"""
+        return f"tas_{self.role}_{self.series_name}"
+
+
+ANNUAL_SERIES_SPECS: Dict[Tuple[str, str], AnnualSeriesSpec] = {
+    (spec.role, spec.series_name): spec for spec in (
+        AnnualSeriesSpec('ndvi', 'landsat_ndvi', 0.05),
+        AnnualSeriesSpec('ndvi', 'sentinel_2_ndvi', 0.05),
+        AnnualSeriesSpec('ndvi', 'modis_lst', 0.05),
+        # Proxy de vegetación: precipitación normalizada (2000mm as max), baja confianza
+        AnnualSeriesSpec('ndvi', 'chirps_precipitation', 0.1, series_name='chirps_proxy_ndvi',
+                         month=1, day=1, normalizer=2000.0, confidence_factor=0.5),
+        AnnualSeriesSpec('thermal', 'landsat_thermal', 0.5),
+        AnnualSeriesSpec('thermal', 'modis_lst', 0.5),
+        AnnualSeriesSpec('thermal', 'viirs_thermal', 0.5),
+        AnnualSeriesSpec('thermal', 'era5_climate', 0.5),
+        AnnualSeriesSpec('sar', 'sentinel_1_sar', 0.1),
+        AnnualSeriesSpec('sar', 'palsar_backscatter', 0.1),
+    )
+}
+
+
+def _series_spec(role: str, series_name: str) -> Optional[AnnualSeriesSpec]:
+    return ANNUAL_SERIES_SPECS.get((role, series_name))
+
+
+def _iso_day(when: Any) -> str:
+    return when.isoformat()[:10] if hasattr(when, 'isoformat') else str(when)[:10]
+
+
 class TemporalArchaeologicalSignatureEngine:
     """Motor de análisis TAS."""
     
-    def __init__(self, integrator):
+    def __init__(self, integrator, series_store: Optional[TimeSeriesStore] = None,
+                 summary_store: Optional[TemporalSummaryStore] = None):
         """
         Inicializar motor TAS.
         
         Args:
             integrator: RealDataIntegratorV2 con acceso a datos temporales
+            series_store: Almacén de series temporales (default: instancia global)
+            summary_store: Resúmenes incrementales por ubicación (default: instancia global)
         """
         self.integrator = integrator
+        self.series_store = series_store or time_series_store
+        self.summary_store = summary_store or temporal_summary_store
         
         # Configuración temporal
         self.sentinel2_start = 2016
@@ -161,6 +232,10 @@ class TemporalArchaeologicalSignatureEngine:
         """
         Calcular Temporal Archaeological Signature completa.
         
+        Adquiere las series completas, reconstruye los resúmenes incrementales
+        de la ubicación (base de update_tas / refresh_monitored_sites) y
+        calcula las métricas a partir de ellos.
+        
         Args:
             lat_min, lat_max, lon_min, lon_max: Bounding box
             temporal_scale: Escala temporal de análisis
@@ -175,27 +250,156 @@ class TemporalArchaeologicalSignatureEngine:
         
         # FASE 1: Adquirir series temporales
         logger.info("📡 FASE 1: Adquisición de series temporales...")
-        ndvi_series = await self._acquire_ndvi_time_series(lat_min, lat_max, lon_min, lon_max, temporal_scale)
-        thermal_series = await self._acquire_thermal_time_series(lat_min, lat_max, lon_min, lon_max, temporal_scale)
-        sar_series = await self._acquire_sar_time_series(lat_min, lat_max, lon_min, lon_max, temporal_scale)
+        series = {
+            'ndvi': await self._acquire_ndvi_time_series(lat_min, lat_max, lon_min, lon_max, temporal_scale),
+            'thermal': await self._acquire_thermal_time_series(lat_min, lat_max, lon_min, lon_max, temporal_scale),
+            'sar': await self._acquire_sar_time_series(lat_min, lat_max, lon_min, lon_max, temporal_scale)
+        }
+        
+        # Resúmenes incrementales (un fold por serie)
+        summaries = {
+            role: RunningSeriesSummary.from_series(role, role_series)
+            for role, role_series in series.items() if role_series
+        }
+        self._save_summaries(self._location_key(lat_min, lat_max, lon_min, lon_max), summaries, replace=True)
+        
+        return self._build_signature(summaries, temporal_scale, environment_type, series)
+    
+    async def update_tas(self, lat_min: float, lat_max: float,
+                         lon_min: float, lon_max: float,
+                         observations: Dict[str, List[Tuple[Any, float, float]]],
+                         temporal_scale: TemporalScale = TemporalScale.LONG,
+                         environment_type: str = "temperate") -> TemporalArchaeologicalSignature:
+        """
+        Incorporar nuevas fechas de adquisición y recalcular la TAS en O(1).
+        
+        Args:
+            observations: {rol: [(fecha, valor, calidad), ...]} con rol en
+                'ndvi', 'thermal', 'sar'. Las fechas no posteriores a la
+                última incorporada se ignoran (idempotente).
+        
+        Sin resúmenes previos para la ubicación, calcula la TAS completa.
+        """
+        location = self._location_key(lat_min, lat_max, lon_min, lon_max)
+        summaries = self._load_summaries(location)
+        if not summaries:
+            logger.info("   ℹ️ Sin resúmenes TAS para la ubicación - cálculo completo")
+            return await self.calculate_tas(lat_min, lat_max, lon_min, lon_max, temporal_scale, environment_type)
+        
+        lat, lon = (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+        folded = 0
+        for role, role_observations in observations.items():
+            summary = summaries.get(role)
+            if summary is None:
+                continue
+            new = sorted(
+                (obs for obs in role_observations
+                 if summary.last_date is None or _iso_day(obs[0]) > summary.last_date),
+                key=lambda obs: _iso_day(obs[0])
+            )
+            for when, value, quality in new:
+                summary.update(value, when, quality)
+            folded += len(new)
+            
+            # Mantener el historial del almacén coherente con el resumen
+            spec = _series_spec(role, summary.series_name)
+            if new and spec:
+                try:
+                    self.series_store.append(spec.store_variable, lat, lon,
+                                             [obs[0] for obs in new],
+                                             [obs[1] for obs in new],
+                                             [obs[2] for obs in new])
+                except Exception as e:
+                    logger.warning(f"      ⚠️ No se pudo guardar la serie {spec.store_variable}: {e}")
+        
+        if folded:
+            self._save_summaries(location, summaries)
+        logger.info(f"   ⚡ TAS incremental: {folded} observaciones nuevas incorporadas")
+        
+        return self._build_signature(summaries, temporal_scale, environment_type)
+    
+    async def refresh_monitored_sites(self, sites: List[Dict[str, Any]],
+                                      temporal_scale: TemporalScale = TemporalScale.LONG,
+                                      environment_type: str = "temperate") -> List[Dict[str, Any]]:
+        """
+        Refrescar la TAS de una lista de sitios monitoreados (job nocturno).
+        
+        Por sitio sólo se adquieren las fechas vencidas desde la última
+        incorporada en cada resumen; el historial no se vuelve a leer.
+        
+        Args:
+            sites: Dicts con lat_min, lat_max, lon_min, lon_max (y opcionalmente
+                environment_type, que tiene prioridad sobre el argumento)
+        
+        Returns:
+            Lista de {'site', 'mode' ('full'|'incremental'|'unchanged'|'error'), 'tas'}
+        """
+        results = []
+        for site in sites:
+            bbox = (site['lat_min'], site['lat_max'], site['lon_min'], site['lon_max'])
+            site_environment = site.get('environment_type', environment_type)
+            try:
+                summaries = self._load_summaries(self._location_key(*bbox))
+                if not summaries:
+                    tas = await self.calculate_tas(*bbox, temporal_scale, site_environment)
+                    results.append({'site': site, 'mode': 'full', 'tas': tas.to_dict()})
+                    continue
+                
+                observations = {}
+                for role, summary in summaries.items():
+                    spec = _series_spec(role, summary.series_name)
+                    if spec is None:
+                        continue
+                    due = self._due_timestamps(spec, summary)
+                    if due:
+                        values, quality = await self._acquire_annual_values(spec, *bbox, due)
+                        observations[role] = [
+                            (when, value, q) for when, value, q in zip(due, values, quality)
+                            if not np.isnan(value)
+                        ]
+                
+                if any(observations.values()):
+                    tas = await self.update_tas(*bbox, observations, temporal_scale, site_environment)
+                    mode = 'incremental'
+                else:
+                    tas = self._build_signature(summaries, temporal_scale, site_environment)
+                    mode = 'unchanged'
+                results.append({'site': site, 'mode': mode, 'tas': tas.to_dict()})
+            except Exception as e:
+                logger.error(f"❌ Error refrescando TAS del sitio {site}: {e}")
+                results.append({'site': site, 'mode': 'error', 'error': str(e)})
+        
+        logger.info(f"🌙 Refresco TAS: {len(sites)} sitios "
+                    f"({sum(r['mode'] == 'incremental' for r in results)} incrementales)")
+        return results
+    
+    def _build_signature(self, summaries: Dict[str, RunningSeriesSummary],
+                         temporal_scale: TemporalScale, environment_type: str,
+                         series: Optional[Dict[str, Optional[TemporalSeries]]] = None
+                         ) -> TemporalArchaeologicalSignature:
+        """Métricas, score, interpretación y flags a partir de los resúmenes."""
+        series = series or {}
+        ndvi_summary = summaries.get('ndvi')
+        thermal_summary = summaries.get('thermal')
+        sar_summary = summaries.get('sar')
         
         # FASE 2: Calcular métricas TAS
         logger.info("📊 FASE 2: Cálculo de métricas TAS...")
         
         # 1. Persistencia de anomalía NDVI
-        ndvi_persistence = self._calculate_persistence(ndvi_series) if ndvi_series else 0.0
+        ndvi_persistence = self._calculate_persistence(ndvi_summary) if ndvi_summary else 0.0
         logger.info(f"   📈 NDVI Persistence: {ndvi_persistence:.3f}")
         
         # 2. Estabilidad térmica (baja varianza = masa enterrada)
-        thermal_stability = self._calculate_thermal_stability(thermal_series) if thermal_series else 0.0
+        thermal_stability = self._calculate_thermal_stability(thermal_summary) if thermal_summary else 0.0
         logger.info(f"   🌡️ Thermal Stability: {thermal_stability:.3f}")
         
         # 3. Coherencia SAR temporal
-        sar_coherence = self._calculate_temporal_coherence(sar_series) if sar_series else 0.0
+        sar_coherence = self._calculate_temporal_coherence(sar_summary) if sar_summary else 0.0
         logger.info(f"   📡 SAR Coherence: {sar_coherence:.3f}")
         
         # 4. Frecuencia de estrés vegetal
-        stress_frequency = self._count_stress_events(ndvi_series) if ndvi_series else 0.0
+        stress_frequency = self._count_stress_events(ndvi_summary) if ndvi_summary else 0.0
         logger.info(f"   🌿 Stress Frequency: {stress_frequency:.3f}")
         
         # FASE 3: Calcular TAS Score combinado (adaptativo por ambiente)
@@ -212,19 +416,13 @@ class TemporalArchaeologicalSignatureEngine:
         )
         
         # Calcular confianza basada en disponibilidad de datos
-        confidence = self._calculate_confidence(ndvi_series, thermal_series, sar_series)
+        confidence = self._calculate_confidence(summaries)
         
         # Determinar años analizados
         years_analyzed = self._get_years_analyzed(temporal_scale)
         
         # Sensores usados
-        sensors_used = []
-        if ndvi_series:
-            sensors_used.append(ndvi_series.sensor_name)
-        if thermal_series:
-            sensors_used.append(thermal_series.sensor_name)
-        if sar_series:
-            sensors_used.append(sar_series.sensor_name)
+        sensors_used = [summaries[role].series_name for role in ('ndvi', 'thermal', 'sar') if role in summaries]
         
         # FASE 5: Flags especiales y prioridad
         flags = []
@@ -252,13 +450,14 @@ class TemporalArchaeologicalSignatureEngine:
             temporal_scale=temporal_scale,
             years_analyzed=years_analyzed,
             sensors_used=sensors_used,
-            ndvi_series=ndvi_series,
-            thermal_series=thermal_series,
-            sar_series=sar_series,
+            ndvi_series=series.get('ndvi'),
+            thermal_series=series.get('thermal'),
+            sar_series=series.get('sar'),
             interpretation=interpretation,
             confidence=confidence,
             flags=flags,
-            priority=priority
+            priority=priority,
+            lag1_autocorrelation={role: summary.lag1_autocorrelation for role, summary in summaries.items()}
         )
         
         logger.info(f"✅ TAS calculado exitosamente:")
@@ -269,6 +468,34 @@ class TemporalArchaeologicalSignatureEngine:
         
         return tas
     
+    # ------------------------------------------------------------------
+    # Resúmenes por ubicación
+    # ------------------------------------------------------------------
+    
+    def _location_key(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> str:
+        """Celda del almacén de series que contiene el centro del bbox"""
+        (tile_y, tile_x), cell = self.series_store.locate((lat_min + lat_max) / 2, (lon_min + lon_max) / 2)
+        return f"{tile_y}_{tile_x}_{cell}"
+    
+    def _load_summaries(self, location: str) -> Dict[str, RunningSeriesSummary]:
+        try:
+            return self.summary_store.load(location)
+        except Exception as e:
+            logger.warning(f"      ⚠️ Resúmenes TAS no disponibles ({location}): {e}")
+            return {}
+    
+    def _save_summaries(self, location: str, summaries: Dict[str, RunningSeriesSummary],
+                        replace: bool = False):
+        try:
+            self.summary_store.save(location, summaries, replace=replace)
+        except Exception as e:
+            logger.warning(f"      ⚠️ No se pudieron guardar los resúmenes TAS ({location}): {e}")
+    
+    def _due_timestamps(self, spec: AnnualSeriesSpec, summary: RunningSeriesSummary) -> List[datetime]:
+        """Fechas anuales posteriores a la última incorporada (hasta el año actual - 1)"""
+        last_year = int(summary.last_date[:4]) if summary.last_date else summary.start_year - 1
+        return [datetime(year, spec.month, spec.day) for year in range(last_year + 1, self.current_year)]
+    
     async def _acquire_ndvi_time_series(self, lat_min: float, lat_max: float,
                                        lon_min: float, lon_max: float,
                                        temporal_scale: TemporalScale) -> Optional[TemporalSeries]:
@@ -285,32 +512,12 @@ class TemporalArchaeologicalSignatureEngine:
             
         for sensor_name in candidates:
             try:
-                result = await self.integrator.get_instrument_measurement_robust(
-                    instrument_name=sensor_name,
-                    lat_min=lat_min,
-                    lat_max=lat_max,
-                    lon_min=lon_min,
-                    lon_max=lon_max
+                start_year = self.landsat_start if "landsat" in sensor_name else self.sentinel2_start
+                series = await self._stored_annual_series(
+                    _series_spec('ndvi', sensor_name), lat_min, lat_max, lon_min, lon_max, start_year
                 )
-                
-                if result and hasattr(result, 'value') and result.value is not None:
-                    start_year = self.landsat_start if "landsat" in sensor_name else self.sentinel2_start
-                    years = self.current_year - start_year
-                    # Simular serie temporal robusta
-                    values = [result.value + np.random.normal(0, 0.05) for _ in range(years)]
-                    timestamps = [datetime(start_year + i, 6, 15) for i in range(years)]
-                    quality_flags = [result.confidence] * years
-                    
-                    series = TemporalSeries(
-                        sensor_name=sensor_name,
-                        start_year=start_year,
-                        end_year=self.current_year,
-                        values=values,
-                        timestamps=timestamps,
-                        quality_flags=quality_flags
-                    )
-                    
-                    logger.info(f"      ✅ Serie NDVI ({sensor_name}): {years} años, mean={series.mean_value:.3f}")
+                if series:
+                    logger.info(f"      ✅ Serie NDVI ({sensor_name}): {series.duration_years} años, mean={series.mean_value:.3f}")
                     return series
             except Exception:
                 continue
@@ -318,23 +525,12 @@ class TemporalArchaeologicalSignatureEngine:
         # FALLBACK FINAL: Usar CHIRPS (precipitación) como proxy de vegetación (Weak TAS)
         try:
             logger.info("   🌿 Usando CHIRPS como proxy de vegetación (Weak TAS)...")
-            result = await self.integrator.get_instrument_measurement_robust(
-                instrument_name="chirps_precipitation",
-                lat_min=lat_min, lat_max=lat_max, lon_min=lon_min, lon_max=lon_max
+            series = await self._stored_annual_series(
+                _series_spec('ndvi', "chirps_proxy_ndvi"), lat_min, lat_max, lon_min, lon_max,
+                self.landsat_start
             )
-            if result and result.value is not None:
-                years = self.current_year - self.landsat_start
-                # Normalizar precipitación a escala NDVI-like para la serie
-                norm_val = min(1.0, result.value / 2000.0) # 2000mm as max
-                values = [norm_val + np.random.normal(0, 0.1) for _ in range(years)]
-                series = TemporalSeries(
-                    sensor_name="chirps_proxy_ndvi",
-                    start_year=self.landsat_start,
-                    end_year=self.current_year,
-                    values=values,
-                    timestamps=[datetime(self.landsat_start + i, 1, 1) for i in range(years)],
-                    quality_flags=[result.confidence * 0.5] * years # Baja confianza por ser proxy
-                )
+            if series:
+                years = series.duration_years
                 logger.info(f"      ✅ Serie NDVI PROXY (CHIRPS): {years} años")
                 return series
         except Exception:
@@ -355,28 +551,13 @@ class TemporalArchaeologicalSignatureEngine:
         
         for sensor_name in candidates:
             try:
-                result = await self.integrator.get_instrument_measurement_robust(
-                    instrument_name=sensor_name,
-                    lat_min=lat_min, lat_max=lat_max, lon_min=lon_min, lon_max=lon_max
+                # start_year: simplificación (Landsat para todos)
+                series = await self._stored_annual_series(
+                    _series_spec('thermal', sensor_name), lat_min, lat_max, lon_min, lon_max,
+                    self.landsat_start
                 )
-                
-                if result and hasattr(result, 'value') and result.value is not None:
-                    # Ajuster start_year según sensor
-                    start_year = self.landsat_start # Simplificación
-                    years = self.current_year - start_year
-                    
-                    # Simular serie con baja varianza
-                    values = [result.value + np.random.normal(0, 0.5) for _ in range(years)]
-                    series = TemporalSeries(
-                        sensor_name=sensor_name,
-                        start_year=start_year,
-                        end_year=self.current_year,
-                        values=values,
-                        timestamps=[datetime(start_year + i, 6, 15) for i in range(years)],
-                        quality_flags=[result.confidence] * years
-                    )
-                    
-                    logger.info(f"      ✅ Serie Térmica ({sensor_name}): {years} años, mean={series.mean_value:.1f}K")
+                if series:
+                    logger.info(f"      ✅ Serie Térmica ({sensor_name}): {series.duration_years} años, mean={series.mean_value:.1f}K")
                     return series
             except Exception:
                 continue
@@ -395,26 +576,12 @@ class TemporalArchaeologicalSignatureEngine:
         
         for sensor_name in candidates:
             try:
-                result = await self.integrator.get_instrument_measurement_robust(
-                    instrument_name=sensor_name,
-                    lat_min=lat_min, lat_max=lat_max, lon_min=lon_min, lon_max=lon_max
+                start_year = self.sar_start if "sentinel" in sensor_name else 2007 # PALSAR 2007+
+                series = await self._stored_annual_series(
+                    _series_spec('sar', sensor_name), lat_min, lat_max, lon_min, lon_max, start_year
                 )
-                
-                if result and hasattr(result, 'value') and result.value is not None:
-                    start_year = self.sar_start if "sentinel" in sensor_name else 2007 # PALSAR 2007+
-                    years = self.current_year - start_year
-                    values = [result.value + np.random.normal(0, 0.1) for _ in range(years)]
-                    
-                    series = TemporalSeries(
-                        sensor_name=sensor_name,
-                        start_year=start_year,
-                        end_year=self.current_year,
-                        values=values,
-                        timestamps=[datetime(start_year + i, 6, 15) for i in range(years)],
-                        quality_flags=[result.confidence] * years
-                    )
-                    
-                    logger.info(f"      ✅ Serie SAR ({sensor_name}): {years} años, mean={series.mean_value:.3f}dB")
+                if series:
+                    logger.info(f"      ✅ Serie SAR ({sensor_name}): {series.duration_years} años, mean={series.mean_value:.3f}dB")
                     return series
             except Exception:
                 continue
@@ -422,94 +589,143 @@ class TemporalArchaeologicalSignatureEngine:
         logger.warning(f"      ⚠️ Sin datos SAR ni proxies")
         return None
     
-    def _calculate_persistence(self, series: TemporalSeries) -> float:
+    async def _stored_annual_series(self, spec: AnnualSeriesSpec, lat_min: float, lat_max: float,
+                                    lon_min: float, lon_max: float,
+                                    start_year: int) -> Optional[TemporalSeries]:
         """
-        Calcular persistencia de anomalía.
+        Serie anual (start_year .. año actual - 1) respaldada por el almacén.
         
-        Detecta: Zonas que SIEMPRE están fuera de lo normal.
+        Los años ya guardados para la celda del centro del bbox se leen del
+        almacén; sólo si faltan años se mide el instrumento.
+        """
+        years = self.current_year - start_year
+        if years <= 0:
+            return None
+        timestamps = [datetime(start_year + i, spec.month, spec.day) for i in range(years)]
+        values, quality = await self._acquire_annual_values(spec, lat_min, lat_max, lon_min, lon_max, timestamps)
+        if np.isnan(values).any():
+            return None
+        
+        return TemporalSeries(
+            sensor_name=spec.series_name,
+            start_year=start_year,
+            end_year=self.current_year,
+            values=values.tolist(),
+            timestamps=timestamps,
+            quality_flags=quality.tolist()
+        )
+    
+    async def _acquire_annual_values(self, spec: AnnualSeriesSpec, lat_min: float, lat_max: float,
+                                     lon_min: float, lon_max: float,
+                                     timestamps: List[datetime]) -> Tuple[np.ndarray, np.ndarray]:
         """
+        (valores, calidad) en las fechas pedidas: almacén primero; las que
+        faltan se completan con una medición (valor + ruido) y se guardan.
         
-        if not series or not series.values:
-            return 0.0
+        Si la medición falla, las fechas faltantes quedan en NaN.
+        """
+        lat = (lat_min + lat_max) / 2
+        lon = (lon_min + lon_max) / 2
+        try:
+            window = self.series_store.read_dates(spec.store_variable, lat, lon, timestamps)
+            values = window.values.astype(float)
+            quality = window.quality.astype(float)
+        except Exception as e:
+            logger.warning(f"      ⚠️ Almacén de series no disponible ({spec.store_variable}): {e}")
+            values = np.full(len(timestamps), np.nan)
+            quality = np.full(len(timestamps), np.nan)
+        
+        missing = np.isnan(values)
+        if not missing.any():
+            logger.info(f"      📦 Serie {spec.series_name} desde almacén ({len(timestamps)} fechas)")
+            return values, quality
+        
+        result = await self.integrator.get_instrument_measurement_robust(
+            instrument_name=spec.instrument,
+            lat_min=lat_min, lat_max=lat_max, lon_min=lon_min, lon_max=lon_max
+        )
+        if not (result and hasattr(result, 'value') and result.value is not None):
+            return values, quality
+        
+        base = min(1.0, result.value / spec.normalizer) if spec.normalizer else result.value
+        # Precisión del almacén (float32): la serie devuelta es la que se relee después
+        values[missing] = np.float32(base + np.random.normal(0, spec.noise_std, int(missing.sum())))
+        quality[missing] = np.float32(result.confidence * spec.confidence_factor)
+        try:
+            self.series_store.append(
+                spec.store_variable, lat, lon,
+                [timestamps[i] for i in np.flatnonzero(missing)],
+                values[missing], quality[missing]
+            )
+        except Exception as e:
+            logger.warning(f"      ⚠️ No se pudo guardar la serie {spec.store_variable}: {e}")
+        return values, quality
+    
+    def _calculate_persistence(self, summary: RunningSeriesSummary) -> float:
+        """
+        Calcular persistencia de anomalía.
         
-        values = np.array(series.values)
-        mean = np.mean(values)
-        std = np.std(values)
+        Detecta: Zonas que SIEMPRE están fuera de lo normal.
+        Fracción de observaciones fuera de 1σ de la media acumulada previa.
+        """
         
-        if std == 0:
+        if not summary or summary.n == 0:
             return 0.0
         
-        # Contar cuántas veces está fuera de 1 desviación estándar
-        anomalies = np.abs(values - mean) > std
-        persistence = np.sum(anomalies) / len(values)
+        persistence = summary.persistence
         
-        logger.debug(f"      Persistencia: {persistence:.3f} ({np.sum(anomalies)}/{len(values)} anomalías)")
+        logger.debug(f"      Persistencia: {persistence:.3f} ({summary.anomaly_events}/{summary.n} anomalías)")
         
         return persistence
     
-    def _calculate_thermal_stability(self, series: TemporalSeries) -> float:
+    def _calculate_thermal_stability(self, summary: RunningSeriesSummary) -> float:
         """
         Calcular estabilidad térmica.
         
         Detecta: Baja varianza = masa enterrada (inercia térmica).
         """
         
-        if not series or not series.values:
+        if not summary or summary.n == 0:
             return 0.0
         
-        # Estabilidad = 1 - coeficiente de variación
-        cv = series.coefficient_variation
-        stability = 1.0 - min(1.0, cv)
+        # Estabilidad = 1 - coeficiente de variación (Welford)
+        stability = summary.stability
         
-        logger.debug(f"      Estabilidad térmica: {stability:.3f} (CV={cv:.3f})")
+        logger.debug(f"      Estabilidad térmica: {stability:.3f} (CV={summary.coefficient_variation:.3f})")
         
         return stability
     
-    def _calculate_temporal_coherence(self, series: TemporalSeries) -> float:
+    def _calculate_temporal_coherence(self, summary: RunningSeriesSummary) -> float:
         """
         Calcular coherencia SAR temporal.
         
         Detecta: Pérdida de coherencia = cambio subsuperficial.
         """
         
-        if not series or len(series.values) < 2:
+        if not summary or summary.n < 2:
             return 0.0
         
-        values = np.array(series.values)
-        
-        # Coherencia = correlación entre valores consecutivos
-        coherence_values = []
-        for i in range(len(values) - 1):
-            # Similitud entre valores consecutivos
-            similarity = 1.0 - abs(values[i] - values[i+1]) / (abs(values[i]) + abs(values[i+1]) + 1e-6)
-            coherence_values.append(similarity)
-        
-        coherence = np.mean(coherence_values)
+        # Coherencia = similitud media entre valores consecutivos
+        coherence = summary.coherence
         
-        logger.debug(f"      Coherencia SAR: {coherence:.3f}")
+        logger.debug(f"      Coherencia SAR: {coherence:.3f} (autocorrelación lag-1: {summary.lag1_autocorrelation:.3f})")
         
         return coherence
     
-    def _count_stress_events(self, series: TemporalSeries) -> float:
+    def _count_stress_events(self, summary: RunningSeriesSummary) -> float:
         """
         Contar eventos de estrés vegetal.
         
         Detecta: Frecuencia de estrés = uso humano prolongado.
+        Umbral: P25 de una normal con la media/σ acumuladas previas.
         """
         
-        if not series or not series.values:
+        if not summary or summary.n == 0:
             return 0.0
         
-        values = np.array(series.values)
+        frequency = summary.stress_frequency
         
-        # Umbral de estrés: 25% más bajo
-        threshold = np.percentile(values, 25)
-        stress_events = np.sum(values < threshold)
-        
-        # Frecuencia normalizada
-        frequency = stress_events / len(values)
-        
-        logger.debug(f"      Frecuencia de estrés: {frequency:.3f} ({stress_events}/{len(values)} eventos)")
+        logger.debug(f"      Frecuencia de estrés: {frequency:.3f} ({summary.stress_events}/{summary.n} eventos)")
         
         return frequency
     
@@ -652,28 +868,17 @@ class TemporalArchaeologicalSignatureEngine:
         
         return ". ".join(interpretations) + "."
     
-    def _calculate_confidence(self, ndvi_series: Optional[TemporalSeries],
-                             thermal_series: Optional[TemporalSeries],
-                             sar_series: Optional[TemporalSeries]) -> float:
+    def _calculate_confidence(self, summaries: Dict[str, RunningSeriesSummary]) -> float:
         """Calcular confianza basada en disponibilidad de datos."""
         
         confidence_factors = []
         
-        if ndvi_series:
-            # Confianza basada en duración y calidad
-            duration_factor = min(1.0, ndvi_series.duration_years / 10.0)
-            quality_factor = np.mean(ndvi_series.quality_flags)
-            confidence_factors.append(duration_factor * quality_factor)
-        
-        if thermal_series:
-            duration_factor = min(1.0, thermal_series.duration_years / 20.0)
-            quality_factor = np.mean(thermal_series.quality_flags)
-            confidence_factors.append(duration_factor * quality_factor)
-        
-        if sar_series:
-            duration_factor = min(1.0, sar_series.duration_years / 5.0)
-            quality_factor = np.mean(sar_series.quality_flags)
-            confidence_factors.append(duration_factor * quality_factor)
+        # Confianza basada en duración y calidad (años de referencia por rol)
+        for role, reference_years in (('ndvi', 10.0), ('thermal', 20.0), ('sar', 5.0)):
+            summary = summaries.get(role)
+            if summary and summary.n:
+                duration_factor = min(1.0, summary.duration_years / reference_years)
+                confidence_factors.append(duration_factor * summary.mean_quality)
         
         return np.mean(confidence_factors) if confidence_factors else 0.3
     
@@ -705,3 +910,5 @@ if __name__ == "__main__":
     print("  from temporal_archaeological_signature import TemporalArchaeologicalSignatureEngine")
     print("  tas_engine = TemporalArchaeologicalSignatureEngine(integrator)")
     print("  tas = await tas_engine.calculate_tas(lat_min, lat_max, lon_min, lon_max)")
+    print("  tas = await tas_engine.update_tas(lat_min, lat_max, lon_min, lon_max, {'sar': [(fecha, valor, calidad)]})")
+    print("  resultados = await tas_engine.refresh_monitored_sites(sitios)")
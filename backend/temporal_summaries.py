@@ -0,0 +1,261 @@
+"""
+Resúmenes Incrementales de Series Temporales (TAS)
+Métricas TAS por ubicación actualizables en O(1) por nueva fecha
+
+Problema:
+- calculate_tas re-adquiría las series completas (NDVI, térmica, SAR) y
+  recalculaba persistencia, estabilidad, coherencia y estrés desde cero.
+
+Solución:
+- Por (ubicación, rol) se guarda un resumen acumulado:
+  * media / varianza de Welford
+  * sumas para autocorrelación lag-1 y coherencia entre valores consecutivos
+  * contadores de eventos (anomalía > 1σ y estrés < P25 normal), evaluados
+    contra la media/σ acumuladas ANTES de incorporar el valor
+- Una nueva fecha de adquisición se incorpora con update(); el resumen
+  completo de una serie es el fold de sus valores (mismo resultado que
+  actualizar de a una fecha)
+- Persistencia en SQLite (WAL) para refrescos nocturnos de sitios monitoreados
+"""
+
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# z de la normal para el percentil 25 (umbral de estrés)
+STRESS_Z = 0.6745
+
+# Observaciones previas necesarias para evaluar eventos (σ definida)
+MIN_PRIOR_FOR_EVENTS = 2
+
+
+@dataclass
+class RunningSeriesSummary:
+    """Resumen acumulado de una serie (un rol TAS en una ubicación)"""
+
+    role: str                                  # 'ndvi' | 'thermal' | 'sar'
+    series_name: str                           # nombre de la serie (sensor o proxy)
+    start_year: int
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0                            # Σ (x - media)² (Welford)
+    quality_sum: float = 0.0
+    last_value: Optional[float] = None
+    last_date: Optional[str] = None            # ISO
+    # Pares consecutivos (x_{t-1}, x_t)
+    pairs: int = 0
+    similarity_sum: float = 0.0
+    sum_prev: float = 0.0
+    sum_next: float = 0.0
+    sum_prev_sq: float = 0.0
+    sum_next_sq: float = 0.0
+    sum_cross: float = 0.0
+    # Contadores de eventos
+    anomaly_events: int = 0
+    stress_events: int = 0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    # ------------------------------------------------------------------
+    # Actualización O(1)
+    # ------------------------------------------------------------------
+
+    def update(self, value: float, when: Any = None, quality: float = 1.0):
+        """Incorporar una observación nueva"""
+        value = float(value)
+
+        if self.n >= MIN_PRIOR_FOR_EVENTS:
+            std = self.std
+            if std > 0:
+                if abs(value - self.mean) > std:
+                    self.anomaly_events += 1
+                if value < self.mean - STRESS_Z * std:
+                    self.stress_events += 1
+
+        if self.last_value is not None:
+            prev = self.last_value
+            self.pairs += 1
+            self.similarity_sum += 1.0 - abs(prev - value) / (abs(prev) + abs(value) + 1e-6)
+            self.sum_prev += prev
+            self.sum_next += value
+            self.sum_prev_sq += prev * prev
+            self.sum_next_sq += value * value
+            self.sum_cross += prev * value
+
+        # Welford
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+        self.quality_sum += float(quality)
+        self.last_value = value
+        if when is not None:
+            self.last_date = _iso_date(when)
+
+    def update_many(self, values: Iterable[float], dates: Iterable[Any] = None,
+                    qualities: Iterable[float] = None):
+        values = list(values)
+        dates = list(dates) if dates is not None else [None] * len(values)
+        qualities = list(qualities) if qualities is not None else [1.0] * len(values)
+        for value, when, quality in zip(values, dates, qualities):
+            self.update(value, when, quality)
+
+    @classmethod
+    def from_series(cls, role: str, series: Any, **extra) -> "RunningSeriesSummary":
+        """Resumen de una serie completa (TemporalSeries u objeto equivalente)"""
+        summary = cls(role=role, series_name=series.sensor_name, start_year=series.start_year, extra=extra)
+        summary.update_many(series.values, series.timestamps, series.quality_flags)
+        return summary
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.n if self.n else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(max(self.variance, 0.0))
+
+    @property
+    def coefficient_variation(self) -> float:
+        """Coeficiente de variación (std/|media|)"""
+        return self.std / abs(self.mean) if self.mean != 0 else 0.0
+
+    @property
+    def persistence(self) -> float:
+        """Fracción de observaciones fuera de 1σ (persistencia de anomalía)"""
+        return self.anomaly_events / self.n if self.n else 0.0
+
+    @property
+    def stability(self) -> float:
+        """1 - CV (estabilidad térmica)"""
+        return 1.0 - min(1.0, self.coefficient_variation) if self.n else 0.0
+
+    @property
+    def coherence(self) -> float:
+        """Similitud media entre valores consecutivos"""
+        return self.similarity_sum / self.pairs if self.pairs else 0.0
+
+    @property
+    def stress_frequency(self) -> float:
+        """Fracción de observaciones bajo el P25 (aprox. normal)"""
+        return self.stress_events / self.n if self.n else 0.0
+
+    @property
+    def lag1_autocorrelation(self) -> float:
+        """Correlación de Pearson entre x_{t-1} y x_t"""
+        p = self.pairs
+        if p < 2:
+            return 0.0
+        cov = p * self.sum_cross - self.sum_prev * self.sum_next
+        var_prev = p * self.sum_prev_sq - self.sum_prev ** 2
+        var_next = p * self.sum_next_sq - self.sum_next ** 2
+        if var_prev <= 0 or var_next <= 0:
+            return 0.0
+        return float(cov / math.sqrt(var_prev * var_next))
+
+    @property
+    def mean_quality(self) -> float:
+        return self.quality_sum / self.n if self.n else 0.0
+
+    @property
+    def end_year(self) -> int:
+        """Año siguiente a la última observación (convención de TemporalSeries)"""
+        if self.last_date:
+            return int(self.last_date[:4]) + 1
+        return self.start_year + self.n
+
+    @property
+    def duration_years(self) -> int:
+        return self.end_year - self.start_year
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningSeriesSummary":
+        return cls(**data)
+
+
+def _iso_date(when: Any) -> str:
+    if isinstance(when, (datetime, date)):
+        return when.isoformat()[:10]
+    return str(when)[:10]
+
+
+class TemporalSummaryStore:
+    """
+    Resúmenes TAS por ubicación en SQLite (modo WAL, una conexión por hilo)
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS summaries (
+            location TEXT NOT NULL,
+            role TEXT NOT NULL,
+            state TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (location, role)
+        );
+    """
+
+    def __init__(self, path: str = "cache/tas_summaries.sqlite"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        try:
+            self._connect().executescript(self.SCHEMA)
+        except Exception as e:
+            logger.error(f"Error initializing TAS summary store: {e}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Obtener conexión SQLite del hilo actual"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, location: str) -> Dict[str, RunningSeriesSummary]:
+        """Resúmenes de una ubicación por rol"""
+        rows = self._connect().execute(
+            "SELECT role, state FROM summaries WHERE location = ?", (location,)
+        ).fetchall()
+        return {role: RunningSeriesSummary.from_dict(json.loads(state)) for role, state in rows}
+
+    def save(self, location: str, summaries: Dict[str, RunningSeriesSummary], replace: bool = False):
+        """Guardar resúmenes; replace=True borra los roles que ya no existen"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN")
+        try:
+            if replace:
+                conn.execute("DELETE FROM summaries WHERE location = ?", (location,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO summaries (location, role, state, updated_at) VALUES (?, ?, ?, ?)",
+                [(location, role, json.dumps(summary.to_dict()), now) for role, summary in summaries.items()]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def locations(self) -> List[str]:
+        return [row[0] for row in self._connect().execute("SELECT DISTINCT location FROM summaries")]
+
+
+# Instancia global
+temporal_summary_store = TemporalSummaryStore()
@@ -25,7 +25,8 @@ COMPONENTES TCP:
 import asyncio
 import numpy as np
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+import time
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -143,6 +144,9 @@ class TerritorialContextProfile:
     # Limitaciones conocidas
     known_limitations: List[str] = field(default_factory=list)
     system_boundaries: List[str] = field(default_factory=list)
+    
+    # Duración (s) de cada fuente de contexto (fases 1-4, concurrentes)
+    context_timings: Dict[str, float] = field(default_factory=dict)
 
 class TerritorialContextProfileSystem:
     """Sistema de generación de Perfiles de Contexto Territorial."""
@@ -180,7 +184,9 @@ class TerritorialContextProfileSystem:
     
     async def generate_tcp(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float,
                           analysis_objective: AnalysisObjective = AnalysisObjective.EXPLORATORY,
-                          analysis_radius_km: float = 5.0) -> TerritorialContextProfile:
+                          analysis_radius_km: float = 5.0,
+                          on_hypothesis: Optional[Callable[[TerritorialHypothesis], None]] = None,
+                          on_context: Optional[Callable[[str, float], None]] = None) -> TerritorialContextProfile:
         """
         Generar Perfil de Contexto Territorial - CAPA 0.
         
@@ -189,10 +195,18 @@ class TerritorialContextProfileSystem:
         2. Hipótesis territoriales plausibles
         3. Estrategia instrumental dirigida
         
+        Las cuatro fuentes de contexto (fases 1-4) son independientes y se
+        consultan en paralelo. Cada hipótesis depende de una sola fuente, así
+        que se anuncia por on_hypothesis apenas su fuente responde: el TIMT
+        arranca la adquisición de sus instrumentos sin esperar al resto.
+        
         Args:
             lat_min, lat_max, lon_min, lon_max: Límites territoriales
             analysis_objective: Objetivo del análisis
             analysis_radius_km: Radio de análisis contextual
+            on_hypothesis: Callback con cada hipótesis en cuanto se confirma
+                (la hipótesis por defecto solo se conoce al final)
+            on_context: Callback (fuente, segundos) al resolver cada contexto
             
         Returns:
             TerritorialContextProfile completo
@@ -202,25 +216,35 @@ class TerritorialContextProfileSystem:
         logger.info(f"🎯 Objetivo: {analysis_objective.value}")
         
         tcp_id = f"TCP_{lat_min:.4f}_{lat_max:.4f}_{lon_min:.4f}_{lon_max:.4f}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        # FASE 1: Contexto geológico
-        logger.info("🗿 FASE 1: Adquisición de contexto geológico...")
-        geological_context = await self.geological_system.get_geological_context(lat_min, lat_max, lon_min, lon_max)
-        
-        # FASE 2: Contexto hidrográfico histórico
-        logger.info("💧 FASE 2: Adquisición de contexto hidrográfico...")
-        hydrographic_features = await self.hydrography_system.get_hydrographic_context(lat_min, lat_max, lon_min, lon_max)
-        
-        # FASE 3: Contexto arqueológico externo
-        logger.info("🏛️ FASE 3: Adquisición de contexto arqueológico externo...")
-        external_sites = await self.external_validation_system.get_external_archaeological_context(
-            lat_min, lat_max, lon_min, lon_max, analysis_radius_km
+        context_timings: Dict[str, float] = {}
+        
+        async def resolve(name: str, coroutine, hypothesis_builder=None):
+            started = time.perf_counter()
+            result = await coroutine
+            context_timings[name] = round(time.perf_counter() - started, 3)
+            if on_context is not None:
+                on_context(name, context_timings[name])
+            if hypothesis_builder is not None and on_hypothesis is not None:
+                # Geología puede no haber llegado: el soporte geológico se
+                # recalcula en FASE 7, el tipo e instrumentos no cambian
+                hypothesis = hypothesis_builder(result, None)
+                if hypothesis is not None:
+                    on_hypothesis(hypothesis)
+            return result
+        
+        # FASES 1-4: Contexto geológico, hidrográfico, arqueológico externo y trazas humanas
+        logger.info("🗿💧🏛️👥 FASES 1-4: Adquisición concurrente de contexto territorial...")
+        geological_context, hydrographic_features, external_sites, human_traces = await asyncio.gather(
+            resolve('geology', self.geological_system.get_geological_context(lat_min, lat_max, lon_min, lon_max)),
+            resolve('hydrography', self.hydrography_system.get_hydrographic_context(lat_min, lat_max, lon_min, lon_max),
+                    self._water_hypothesis),
+            resolve('external_sites', self.external_validation_system.get_external_archaeological_context(
+                lat_min, lat_max, lon_min, lon_max, analysis_radius_km
+            ), self._external_sites_hypothesis),
+            resolve('human_traces', self.human_traces_system.analyze_human_traces(lat_min, lat_max, lon_min, lon_max),
+                    self._transit_hypothesis)
         )
         
-        # FASE 4: Trazas humanas conocidas
-        logger.info("👥 FASE 4: Análisis de trazas humanas conocidas...")
-        human_traces = await self.human_traces_system.analyze_human_traces(lat_min, lat_max, lon_min, lon_max)
-        
         # FASE 5: Contexto ambiental
         logger.info("🌿 FASE 5: Determinación de contexto ambiental...")
         historical_biome = self._determine_historical_biome(lat_min, lat_max, lon_min, lon_max)
@@ -266,7 +290,8 @@ class TerritorialContextProfileSystem:
             territorial_hypotheses=territorial_hypotheses,
             instrumental_strategy=instrumental_strategy,
             known_limitations=known_limitations,
-            system_boundaries=system_boundaries
+            system_boundaries=system_boundaries,
+            context_timings=context_timings
         )
         
         logger.info(f"✅ TCP generado exitosamente:")
@@ -380,64 +405,12 @@ class TerritorialContextProfileSystem:
                                        objective: AnalysisObjective) -> List[TerritorialHypothesis]:
         """Generar hipótesis territoriales plausibles."""
         
-        hypotheses = []
-        
-        # Hipótesis basada en contexto hidrográfico
-        if hydrographic_features:
-            water_features = [f for f in hydrographic_features if f.archaeological_relevance > 0.7]
-            if water_features:
-                hypothesis = TerritorialHypothesis(
-                    hypothesis_id="H_SETTLEMENT_WATER",
-                    hypothesis_type="settlement",
-                    plausibility_score=0.8,
-                    geological_support=geological_context.archaeological_suitability if geological_context else 0.5,
-                    hydrographic_support=np.mean([f.archaeological_relevance for f in water_features]),
-                    archaeological_support=0.6,  # Moderado por defecto
-                    human_traces_support=0.5,
-                    recommended_instruments=self.hypothesis_instruments['settlement'],
-                    hypothesis_explanation="Proximidad a fuentes de agua históricas sugiere potencial de asentamiento permanente",
-                    contradictions=[]
-                )
-                hypotheses.append(hypothesis)
-        
-        # Hipótesis basada en sitios externos
-        if external_sites:
-            nearby_sites = [s for s in external_sites if s.data_quality > 0.6]
-            if nearby_sites:
-                site_types = [s.site_type.value for s in nearby_sites]
-                dominant_type = max(set(site_types), key=site_types.count)
-                
-                hypothesis = TerritorialHypothesis(
-                    hypothesis_id=f"H_{dominant_type.upper()}_EXTERNAL",
-                    hypothesis_type=dominant_type,
-                    plausibility_score=0.7,
-                    geological_support=geological_context.archaeological_suitability if geological_context else 0.5,
-                    hydrographic_support=0.5,
-                    archaeological_support=np.mean([s.data_quality for s in nearby_sites]),
-                    human_traces_support=0.5,
-                    recommended_instruments=self.hypothesis_instruments.get(dominant_type, self.hypothesis_instruments['settlement']),
-                    hypothesis_explanation=f"Proximidad a sitios {dominant_type} conocidos sugiere función territorial similar",
-                    contradictions=[]
-                )
-                hypotheses.append(hypothesis)
-        
-        # Hipótesis basada en trazas humanas
-        if human_traces:
-            route_traces = [t for t in human_traces if 'route' in t.trace_type.value or 'corridor' in t.trace_type.value]
-            if route_traces:
-                hypothesis = TerritorialHypothesis(
-                    hypothesis_id="H_TRANSIT_ROUTES",
-                    hypothesis_type="transit",
-                    plausibility_score=0.6,
-                    geological_support=geological_context.archaeological_suitability if geological_context else 0.5,
-                    hydrographic_support=0.5,
-                    archaeological_support=0.5,
-                    human_traces_support=np.mean([t.archaeological_relevance for t in route_traces]),
-                    recommended_instruments=self.hypothesis_instruments['transit'],
-                    hypothesis_explanation="Evidencia de rutas históricas sugiere territorio de tránsito con sitios de paso",
-                    contradictions=[]
-                )
-                hypotheses.append(hypothesis)
+        candidates = [
+            self._water_hypothesis(hydrographic_features, geological_context),
+            self._external_sites_hypothesis(external_sites, geological_context),
+            self._transit_hypothesis(human_traces, geological_context)
+        ]
+        hypotheses = [h for h in candidates if h is not None]
         
         # Hipótesis por defecto si no hay evidencia específica
         if not hypotheses:
@@ -457,6 +430,78 @@ class TerritorialContextProfileSystem:
         
         return hypotheses
     
+    def _water_hypothesis(self, hydrographic_features: List[HydrographicFeature],
+                          geological_context: Optional[GeologicalContext]) -> Optional[TerritorialHypothesis]:
+        """Hipótesis basada en contexto hidrográfico."""
+        
+        if not hydrographic_features:
+            return None
+        water_features = [f for f in hydrographic_features if f.archaeological_relevance > 0.7]
+        if not water_features:
+            return None
+        
+        return TerritorialHypothesis(
+            hypothesis_id="H_SETTLEMENT_WATER",
+            hypothesis_type="settlement",
+            plausibility_score=0.8,
+            geological_support=geological_context.archaeological_suitability if geological_context else 0.5,
+            hydrographic_support=np.mean([f.archaeological_relevance for f in water_features]),
+            archaeological_support=0.6,  # Moderado por defecto
+            human_traces_support=0.5,
+            recommended_instruments=self.hypothesis_instruments['settlement'],
+            hypothesis_explanation="Proximidad a fuentes de agua históricas sugiere potencial de asentamiento permanente",
+            contradictions=[]
+        )
+    
+    def _external_sites_hypothesis(self, external_sites: List[ExternalArchaeologicalSite],
+                                   geological_context: Optional[GeologicalContext]) -> Optional[TerritorialHypothesis]:
+        """Hipótesis basada en sitios externos."""
+        
+        if not external_sites:
+            return None
+        nearby_sites = [s for s in external_sites if s.data_quality > 0.6]
+        if not nearby_sites:
+            return None
+        
+        site_types = [s.site_type.value for s in nearby_sites]
+        dominant_type = max(set(site_types), key=site_types.count)
+        
+        return TerritorialHypothesis(
+            hypothesis_id=f"H_{dominant_type.upper()}_EXTERNAL",
+            hypothesis_type=dominant_type,
+            plausibility_score=0.7,
+            geological_support=geological_context.archaeological_suitability if geological_context else 0.5,
+            hydrographic_support=0.5,
+            archaeological_support=np.mean([s.data_quality for s in nearby_sites]),
+            human_traces_support=0.5,
+            recommended_instruments=self.hypothesis_instruments.get(dominant_type, self.hypothesis_instruments['settlement']),
+            hypothesis_explanation=f"Proximidad a sitios {dominant_type} conocidos sugiere función territorial similar",
+            contradictions=[]
+        )
+    
+    def _transit_hypothesis(self, human_traces: List[HumanTrace],
+                            geological_context: Optional[GeologicalContext]) -> Optional[TerritorialHypothesis]:
+        """Hipótesis basada en trazas humanas."""
+        
+        if not human_traces:
+            return None
+        route_traces = [t for t in human_traces if 'route' in t.trace_type.value or 'corridor' in t.trace_type.value]
+        if not route_traces:
+            return None
+        
+        return TerritorialHypothesis(
+            hypothesis_id="H_TRANSIT_ROUTES",
+            hypothesis_type="transit",
+            plausibility_score=0.6,
+            geological_support=geological_context.archaeological_suitability if geological_context else 0.5,
+            hydrographic_support=0.5,
+            archaeological_support=0.5,
+            human_traces_support=np.mean([t.archaeological_relevance for t in route_traces]),
+            recommended_instruments=self.hypothesis_instruments['transit'],
+            hypothesis_explanation="Evidencia de rutas históricas sugiere territorio de tránsito con sitios de paso",
+            contradictions=[]
+        )
+    
     def _define_instrumental_strategy(self, hypotheses: List[TerritorialHypothesis],
                                     geological_context: GeologicalContext,
                                     objective: AnalysisObjective) -> InstrumentalStrategy:
@@ -25,24 +25,40 @@ from enum import Enum
 
 from territorial_context_profile import TerritorialContextProfileSystem, TerritorialContextProfile, AnalysisObjective
 from etp_generator import ETProfileGenerator
+from acquisition_dag import AcquisitionDAG
 from etp_core import EnvironmentalTomographicProfile, BoundingBox
 import os
 from pathlib import Path
 from anomaly_map_generator import AnomalyMapGenerator
+from anomaly_raster_store import anomaly_raster_store
+from pipeline_tracing import tracer
 
 
 logger = logging.getLogger(__name__)
 
-# HRM Imports
-try:
-    from hrm.hrm_runner import load_models as load_hrm_model, generate_response as generate_hrm_response
-    HRM_AVAILABLE = True
-except ImportError as e:
-    HRM_AVAILABLE = False
-    logger.warning(f"⚠️ HRM module not available: {e}")
-except Exception as e:
-    HRM_AVAILABLE = False
-    logger.error(f"❌ Error importing HRM: {e}")
+# HRM (torch): import diferido al construir el motor, no al importar el módulo
+HRM_AVAILABLE: Optional[bool] = None
+hrm_inference_server = None
+generate_hrm_response_from_activity = None
+
+
+def _import_hrm() -> bool:
+    """Importar hrm.hrm_runner / hrm_server una sola vez (torch es pesado)."""
+    global HRM_AVAILABLE, hrm_inference_server, generate_hrm_response_from_activity
+    if HRM_AVAILABLE is not None:
+        return HRM_AVAILABLE
+    try:
+        from hrm.hrm_runner import generate_response_from_activity as generate_hrm_response_from_activity
+        from hrm.hrm_server import hrm_inference_server
+        HRM_AVAILABLE = True
+    except (ImportError, SystemExit) as e:
+        # hrm_runner hace sys.exit si falta torch
+        HRM_AVAILABLE = False
+        logger.warning(f"⚠️ HRM module not available: {e}")
+    except Exception as e:
+        HRM_AVAILABLE = False
+        logger.error(f"❌ Error importing HRM: {e}")
+    return HRM_AVAILABLE
 
 
 class AnalysisMode(Enum):
@@ -118,6 +134,11 @@ class SystemTransparencyReport:
     hypotheses_validated: int = 0
     hypotheses_rejected: int = 0
 
+    # Plan de adquisición dirigido por hipótesis (AcquisitionDAG.report())
+    instruments_skipped: int = 0
+    acquisition_time_saved_s: float = 0.0
+    acquisition_plan: Dict[str, Any] = field(default_factory=dict)
+
 @dataclass
 class TerritorialInferentialTomographyResult:
     """Resultado completo del análisis tomográfico territorial."""
@@ -169,14 +190,12 @@ class TerritorialInferentialTomographyEngine:
         self.tcp_system = TerritorialContextProfileSystem()
         self.etp_generator = ETProfileGenerator(integrator_15_instruments)
         
-        # Inicializar HRM si está disponible
-        self.hrm_model = None
-        if HRM_AVAILABLE:
-            try:
-                self.hrm_model = load_hrm_model()
-                logger.info("🧠 HRM Model loaded in TIMT Engine")
-            except Exception as e:
-                logger.error(f"❌ Failed to load HRM model: {e}")
+        # HRM residente (compartido por proceso): carga los pesos en background
+        # una sola vez y agrupa los pedidos de análisis concurrentes
+        self.hrm_server = None
+        if _import_hrm():
+            self.hrm_server = hrm_inference_server.start()
+            logger.info("🧠 HRM inference server attached to TIMT Engine")
         
         # Generador de mapas de anomalía
         self.anomaly_map_generator = AnomalyMapGenerator()
@@ -187,6 +206,7 @@ class TerritorialInferentialTomographyEngine:
         logger.info("🚀 Territorial Inferential Tomography Engine initialized")
         logger.info("🧩 MODO: Hypothesis-driven analysis (REVOLUCIÓN CONCEPTUAL)")
     
+    @tracer.traced("timt", "analyze_territory")
     async def analyze_territory(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float,
                                analysis_objective: AnalysisObjective = AnalysisObjective.EXPLORATORY,
                                analysis_radius_km: float = 5.0,
@@ -224,10 +244,34 @@ class TerritorialInferentialTomographyEngine:
         
         logger.info("🧩 CAPA 0: GENERACIÓN DE CONTEXTO TERRITORIAL (TCP)")
         
-        tcp = await self.tcp_system.generate_tcp(
-            lat_min, lat_max, lon_min, lon_max, analysis_objective, analysis_radius_km
+        # Crear bounding box 3D
+        bounds = BoundingBox(
+            lat_min=lat_min,
+            lat_max=lat_max,
+            lon_min=lon_min,
+            lon_max=lon_max,
+            depth_min=0.0,
+            depth_max=-20.0
+        )
+        
+        # Plan de adquisición: cada hipótesis lanza sus instrumentos apenas
+        # su fuente de contexto responde (CAPA 1 solapada con CAPA 0)
+        acquisition_dag = AcquisitionDAG(
+            self.etp_generator, bounds,
+            prune=self.analysis_mode == AnalysisMode.HYPOTHESIS_DRIVEN
         )
         
+        with tracer.span("timt", "tcp_context"):
+            try:
+                tcp = await self.tcp_system.generate_tcp(
+                    lat_min, lat_max, lon_min, lon_max, analysis_objective, analysis_radius_km,
+                    on_hypothesis=acquisition_dag.on_hypothesis,
+                    on_context=acquisition_dag.on_context
+                )
+            except BaseException:
+                acquisition_dag.cancel()
+                raise
+        
         # Usar resolución recomendada por TCP si no se especifica
         if resolution_m is None:
             resolution_m = tcp.instrumental_strategy.recommended_resolution_m if tcp.instrumental_strategy else 50.0
@@ -240,19 +284,22 @@ class TerritorialInferentialTomographyEngine:
         
         logger.info("🛰️ CAPA 1: ADQUISICIÓN DIRIGIDA Y TOMOGRAFÍA")
         
-        # Crear bounding box 3D
-        bounds = BoundingBox(
-            lat_min=lat_min,
-            lat_max=lat_max,
-            lon_min=lon_min,
-            lon_max=lon_max,
-            depth_min=0.0,
-            depth_max=-20.0
+        with tracer.span("timt", "acquisition_plan"):
+            prefetched = await acquisition_dag.finalize(tcp)
+        acquisition_plan = acquisition_dag.report()
+        
+        # Generar perfil tomográfico con las mediciones del plan; geología,
+        # hidrografía y trazas humanas ya las resolvió el TCP para este bbox
+        etp = await self.etp_generator.generate_etp(
+            bounds, resolution_m,
+            prefetched=prefetched,
+            context={
+                'geological_context': tcp.geological_context,
+                'hydrographic_features': tcp.hydrographic_features,
+                'human_traces': tcp.known_human_traces
+            }
         )
         
-        # Generar perfil tomográfico (ahora dirigido por hipótesis TCP)
-        etp = await self.etp_generator.generate_etp(bounds, resolution_m)
-        
         logger.info("✅ Perfil tomográfico generado")
         
         # ============================================================================
@@ -261,7 +308,8 @@ class TerritorialInferentialTomographyEngine:
         
         logger.info("🧠 CAPA 2: VALIDACIÓN DE HIPÓTESIS TERRITORIALES")
         
-        hypothesis_validations = self._validate_territorial_hypotheses(tcp, etp)
+        with tracer.span("timt", "hypothesis_validation"):
+            hypothesis_validations = self._validate_territorial_hypotheses(tcp, etp)
         
         logger.info(f"✅ {len(hypothesis_validations)} hipótesis validadas")
         
@@ -271,16 +319,17 @@ class TerritorialInferentialTomographyEngine:
         
         logger.info("📋 CAPA 3: GENERACIÓN DE TRANSPARENCIA Y COMUNICACIÓN")
         
-        transparency_report = self._generate_transparency_report(tcp, etp, hypothesis_validations)
+        with tracer.span("timt", "transparency_communication"):
+            transparency_report = self._generate_transparency_report(tcp, etp, hypothesis_validations, acquisition_plan)
         
-        # Comunicación multinivel
-        summaries = self._generate_multilevel_communication(
-            tcp, etp, hypothesis_validations, transparency_report, communication_level
-        )
+            # Comunicación multinivel
+            summaries = self._generate_multilevel_communication(
+                tcp, etp, hypothesis_validations, transparency_report, communication_level
+            )
         
-        # Métricas finales
-        territorial_coherence = self._calculate_territorial_coherence(tcp, etp, hypothesis_validations)
-        scientific_rigor = self._calculate_scientific_rigor(tcp, etp, transparency_report)
+            # Métricas finales
+            territorial_coherence = self._calculate_territorial_coherence(tcp, etp, hypothesis_validations)
+            scientific_rigor = self._calculate_scientific_rigor(tcp, etp, transparency_report)
         
         # ============================================================================
         # CAPA EXTRA: HRM ANALYSIS (Neural Visualization) & Honest Metrics
@@ -292,14 +341,16 @@ class TerritorialInferentialTomographyEngine:
         
         # HRM result
         hrm_result = {}
-        if self.hrm_model:
+        if self.hrm_server and self.hrm_server.available:
             logger.info("🧠 EJECUTANDO ANÁLISIS HRM (High Resolution Morphology)")
-            hrm_result = self._run_hrm_analysis(analysis_id, tcp, etp, hypothesis_validations)
+            with tracer.span("timt", "hrm_analysis"):
+                hrm_result = await self._run_hrm_analysis(analysis_id, tcp, etp, hypothesis_validations)
         else:
             logger.warning("⚠️ HRM analysis skipped (model not available)")
             
         # Anomaly Map result
-        viz_result = self._handle_visualizations(analysis_id, lat_min, lat_max, lon_min, lon_max, tcp, etp)
+        with tracer.span("timt", "visualizations"):
+            viz_result = self._handle_visualizations(analysis_id, lat_min, lat_max, lon_min, lon_max, tcp, etp)
         
         # Construir Scientific Output con métricas de honestidad académica
         # Extraer instrumentos (esto es una simplificación, en producción vendría del batch)
@@ -430,9 +481,13 @@ class TerritorialInferentialTomographyEngine:
     
     def _generate_transparency_report(self, tcp: TerritorialContextProfile,
                                     etp: EnvironmentalTomographicProfile,
-                                    validations: List[HypothesisValidation]) -> SystemTransparencyReport:
+                                    validations: List[HypothesisValidation],
+                                    acquisition_plan: Optional[Dict[str, Any]] = None) -> SystemTransparencyReport:
         """Generar reporte completo de transparencia del sistema."""
         
+        acquisition_plan = acquisition_plan or {}
+        skipped = acquisition_plan.get('instruments_skipped', {})
+        
         # Proceso de análisis
         analysis_process = [
             "1. Generación de Contexto Territorial (TCP)",
@@ -452,6 +507,16 @@ class TerritorialInferentialTomographyEngine:
             f"Instrumentos prioritarios: {len(tcp.instrumental_strategy.priority_instruments) if tcp.instrumental_strategy else 0}",
             f"Hipótesis evaluadas: {len(tcp.territorial_hypotheses)}"
         ]
+        if acquisition_plan:
+            decisions_made.append(
+                f"Adquisición en {len(acquisition_plan.get('waves', []))} ondas dirigidas por hipótesis: "
+                f"{len(acquisition_plan.get('instruments_fetched', []))} instrumentos medidos, "
+                f"ahorro estimado {acquisition_plan.get('time_saved_s', 0.0):.1f}s"
+            )
+        if skipped:
+            decisions_made.append(
+                f"Instrumentos omitidos ({next(iter(skipped.values()))}): {', '.join(skipped)}"
+            )
         
         # Hipótesis descartadas
         weak_hypotheses = [v for v in validations if v.overall_evidence_level in [EvidenceLevel.WEAK, EvidenceLevel.INSUFFICIENT]]
@@ -530,6 +595,9 @@ class TerritorialInferentialTomographyEngine:
             hypotheses_evaluated=hypotheses_evaluated,
             hypotheses_validated=hypotheses_validated,
             hypotheses_rejected=hypotheses_rejected,
+            instruments_skipped=len(skipped),
+            acquisition_time_saved_s=acquisition_plan.get('time_saved_s', 0.0),
+            acquisition_plan=acquisition_plan,
             measurement_uncertainties=measurement_uncertainties,
             interpretation_uncertainties=interpretation_uncertainties,
             system_limitations=system_limitations,
@@ -692,9 +760,9 @@ CONFIANZA CIENTÍFICA: Sistema transparente con limitaciones documentadas.
         
         return np.mean(rigor_factors) if rigor_factors else 0.5
 
-    def _run_hrm_analysis(self, analysis_id: str, tcp: TerritorialContextProfile,
-                        etp: EnvironmentalTomographicProfile,
-                        validations: List[HypothesisValidation]) -> Dict[str, Any]:
+    async def _run_hrm_analysis(self, analysis_id: str, tcp: TerritorialContextProfile,
+                                etp: EnvironmentalTomographicProfile,
+                                validations: List[HypothesisValidation]) -> Dict[str, Any]:
         """Ejecutar análisis HRM y generar visualización neural."""
         
         try:
@@ -720,11 +788,14 @@ CONFIANZA CIENTÍFICA: Sistema transparente con limitaciones documentadas.
             filename = f"hrm_viz_{analysis_id}.png"
             viz_path = maps_dir / filename
             
-            # 3. Ejecutar HRM
-            response_json = generate_hrm_response(
-                question=question,
-                hrm_model=self.hrm_model,
-                temperature=0.3,
+            # 3. Ejecutar HRM: forward pass en el servidor (por lotes), luego
+            #    heatmap + LLM en un hilo (bloqueantes)
+            latent = await self.hrm_server.infer(question)
+            response_json = await asyncio.to_thread(
+                generate_hrm_response_from_activity,
+                question,
+                latent['activity'],
+                0.3,
                 mode="scientific_strict",
                 visualize_path=str(viz_path)
             )
@@ -751,6 +822,7 @@ CONFIANZA CIENTÍFICA: Sistema transparente con limitaciones documentadas.
             # Construir URL absoluta si es posible, o relativa
             API_URL = os.getenv("VITE_API_URL", "http://localhost:8003")
             result["visualizacion_neural"] = f"{API_URL}/anomaly-map/{filename}"
+            result["hrm_inference"] = {k: latent[k] for k in ('batch_size', 'queue_wait_ms', 'forward_ms', 'latency_ms')}
             
             logger.info(f"✅ HRM Analysis complete. Viz: {filename}")
             
@@ -772,7 +844,6 @@ CONFIANZA CIENTÍFICA: Sistema transparente con limitaciones documentadas.
         logger.info("🗺️ Iniciando generación de visualizaciones...")
         
         anomaly_map_file = f"anomaly_map_{analysis_id}.png"
-        anomaly_map_path = Path("anomaly_maps") / anomaly_map_file
         
         # Preparar mediciones para el generador de mapas
         map_measurements = {'instrumental_measurements': {}}
@@ -784,9 +855,6 @@ CONFIANZA CIENTÍFICA: Sistema transparente con limitaciones documentadas.
         result = {"anomaly_map": {}}
         
         try:
-            # Asegurar directorio
-            anomaly_map_path.parent.mkdir(exist_ok=True)
-            
             # Generar mapa de anomalía
             a_map = self.anomaly_map_generator.generate_anomaly_map(
                 measurements=map_measurements,
@@ -797,11 +865,13 @@ CONFIANZA CIENTÍFICA: Sistema transparente con limitaciones documentadas.
                 environment_type=tcp.historical_biome.value if tcp.historical_biome else 'temperate'
             )
             
-            # Exportar a PNG
-            self.anomaly_map_generator.export_to_png(a_map, str(anomaly_map_path))
+            # Guardar capas una vez como tiles cuantizados; el PNG se renderiza
+            # cuando alguien lo pide (/anomaly-map/{file} o tiles .png)
+            raster = anomaly_raster_store.save_anomaly_map(analysis_id, a_map)
             
-            # URL y base64 para el frontend interactivo
+            # URLs para el frontend interactivo
             API_URL = os.getenv("VITE_API_URL", "http://localhost:8003")
+            raster_url = f"{API_URL}/anomaly-map/{analysis_id}"
             
             result["anomaly_map"] = {
                 "path": f"{API_URL}/anomaly-map/{anomaly_map_file}",
@@ -812,9 +882,16 @@ CONFIANZA CIENTÍFICA: Sistema transparente con limitaciones documentadas.
                 "environment_type": a_map.environment_type,
                 "fusion_weights": a_map.fusion_weights,
                 "metadata": a_map.metadata,
-                # Datos base64 para AnomalyMapViewer.js
-                "anomaly_map_base64": self._encode_array_for_frontend(a_map.anomaly_map),
-                "geometric_features_base64": self._encode_array_for_frontend(a_map.geometric_features)
+                # Rasters para AnomalyMapViewer.js (antes base64 float64 inline)
+                "raster": {
+                    "manifest_url": f"{raster_url}/manifest",
+                    "tiles_url": f"{raster_url}/tiles/{{z}}/{{x}}/{{y}}",
+                    "png_tiles_url": f"{raster_url}/tiles/{{z}}/{{x}}/{{y}}.png",
+                    "shape": raster["shape"],
+                    "tile_size": raster["tile_size"],
+                    "max_zoom": raster["max_zoom"],
+                    "layers": raster["layers"]
+                }
             }
             logger.info("✅ Visualizaciones generadas exitosamente")
             
@@ -824,17 +901,3 @@ CONFIANZA CIENTÍFICA: Sistema transparente con limitaciones documentadas.
             traceback.print_exc()
             
         return result
-
-    def _encode_array_for_frontend(self, array: np.ndarray) -> str:
-        """Codificar array numpy en formato compatible con AnomalyMapViewer.js."""
-        import base64
-        
-        # Formato: "shape|dtype|base64_data"
-        shape_str = ",".join(map(str, array.shape))
-        dtype_str = str(array.dtype)
-        
-        # Convertir a bytes
-        bytes_data = array.tobytes()
-        b64_data = base64.b64encode(bytes_data).decode('utf-8')
-        
-        return f"{shape_str}|{dtype_str}|{b64_data}"
\ No newline at end of file
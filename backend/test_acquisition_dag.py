@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test del plan de adquisición dirigido por hipótesis (AcquisitionDAG)
+
+Verifica (sin red, integrador stub):
+- Los instrumentos de una hipótesis empiezan a medirse antes de que la
+  geología del TCP termine de resolverse
+- Cada instrumento se mide una sola vez aunque lo pidan varias hipótesis
+- Modo hypothesis-driven: instrumentos no relevantes se omiten y no cuentan
+  para la cobertura; sensor-driven mide todo el universo ETP
+- El ETP usa las mediciones del plan sin lanzar su propio batch
+- El reporte trae ahorro de tiempo (camino crítico < secuencial estimado)
+"""
+
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+GEOLOGY_DELAY = 0.4
+HYDROGRAPHY_DELAY = 0.05
+TRACES_DELAY = 0.1
+FETCH_DELAY = 0.3
+
+
+class StubIntegrator:
+    """Integrador con latencia fija por instrumento; registra cada batch"""
+
+    def __init__(self):
+        self.batches = []
+
+    async def get_batch_measurements(self, instrument_names, lat_min, lat_max, lon_min, lon_max,
+                                     on_result=None, **kwargs):
+        from instrument_status import InstrumentResult
+
+        self.batches.append((time.perf_counter(), list(instrument_names)))
+
+        async def fetch(name):
+            await asyncio.sleep(FETCH_DELAY)
+            result = InstrumentResult.create_success(name, "stub", value=0.5, unit="u",
+                                                     confidence=0.8, processing_time_s=FETCH_DELAY)
+            if on_result is not None:
+                on_result(result)
+
+        await asyncio.gather(*(fetch(name) for name in instrument_names))
+        return SimpleNamespace(scheduling={'stub': True})
+
+
+def build_tcp_system():
+    from territorial_context_profile import TerritorialContextProfileSystem
+
+    tcp_system = TerritorialContextProfileSystem()
+
+    async def slow_macrostrat(*args):
+        await asyncio.sleep(GEOLOGY_DELAY)
+        return None  # → geología estimada por coordenadas
+
+    async def hydrography(*args):
+        await asyncio.sleep(HYDROGRAPHY_DELAY)
+        return [SimpleNamespace(archaeological_relevance=0.9, settlement_potential=0.8)]
+
+    async def no_sites(*args):
+        return []
+
+    async def routes(*args):
+        await asyncio.sleep(TRACES_DELAY)
+        return [SimpleNamespace(trace_type=SimpleNamespace(value='historical_route'), archaeological_relevance=0.7)]
+
+    tcp_system.geological_system._query_macrostrat = slow_macrostrat
+    tcp_system.hydrography_system.get_hydrographic_context = hydrography
+    tcp_system.external_validation_system.get_external_archaeological_context = no_sites
+    tcp_system.human_traces_system.analyze_human_traces = routes
+    return tcp_system
+
+
+async def run_plan(prune: bool):
+    from acquisition_dag import AcquisitionDAG
+    from etp_core import BoundingBox
+    from etp_generator import ETProfileGenerator
+
+    integrator = StubIntegrator()
+    etp_generator = ETProfileGenerator(integrator)
+    bounds = BoundingBox(lat_min=-13.17, lat_max=-13.15, lon_min=-72.55, lon_max=-72.53,
+                         depth_min=0.0, depth_max=-20.0)
+
+    dag = AcquisitionDAG(etp_generator, bounds, prune=prune)
+    tcp = await build_tcp_system().generate_tcp(
+        bounds.lat_min, bounds.lat_max, bounds.lon_min, bounds.lon_max,
+        on_hypothesis=dag.on_hypothesis, on_context=dag.on_context
+    )
+    prefetched = await dag.finalize(tcp)
+    batches_before_etp = len(integrator.batches)
+    layered_data, acquisition = await etp_generator._acquire_layered_data(bounds, prefetched)
+    coverage = etp_generator._calculate_instrumental_coverage(layered_data, acquisition['skipped'])
+    return dag, tcp, integrator, batches_before_etp, acquisition, coverage
+
+
+def run_acquisition_dag() -> bool:
+    print("🧪 Plan de adquisición dirigido por hipótesis")
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    dag, tcp, integrator, batches_before_etp, acquisition, coverage = asyncio.run(run_plan(prune=True))
+    report = dag.report()
+    waves = report['waves']
+
+    check({h.hypothesis_id for h in tcp.territorial_hypotheses} == {'H_SETTLEMENT_WATER', 'H_TRANSIT_ROUTES'},
+          "TCP confirma asentamiento (agua) y tránsito (rutas)")
+    check(waves and waves[0]['trigger'] == 'H_SETTLEMENT_WATER'
+          and waves[0]['started_at_s'] < report['context_timings_s']['geology'],
+          f"primera onda t={waves[0]['started_at_s']:.2f}s antes de resolver geología "
+          f"({report['context_timings_s']['geology']:.2f}s)")
+
+    fetched = [name for _, names in integrator.batches for name in names]
+    check(len(fetched) == len(set(fetched)), f"cada instrumento medido una vez ({len(fetched)} mediciones)")
+    check(set(fetched) == {'sentinel_2_ndvi', 'sentinel_1_sar', 'srtm_elevation', 'landsat_thermal', 'viirs_ndvi'},
+          f"solo instrumentos relevantes: {sorted(set(fetched))}")
+    check(set(report['instruments_skipped']) == {'viirs_thermal', 'modis_lst', 'icesat2'},
+          f"omitidos: {sorted(report['instruments_skipped'])}")
+
+    check(batches_before_etp == len(integrator.batches), "el ETP no lanza un batch propio")
+    check(set(acquisition['skipped']) == set(report['instruments_skipped'])
+          and coverage['profundo']['total'] == 0 and coverage['superficial']['successful'] == 3,
+          "omitidos fuera de la cobertura (sin penalizar)")
+    check(report['time_saved_s'] > 0 and report['critical_path_s'] < report['sequential_estimate_s'],
+          f"ahorro estimado {report['time_saved_s']:.2f}s "
+          f"(crítico {report['critical_path_s']:.2f}s vs secuencial {report['sequential_estimate_s']:.2f}s)")
+
+    dag, _, integrator, _, acquisition, _ = asyncio.run(run_plan(prune=False))
+    fetched = [name for _, names in integrator.batches for name in names]
+    check(not acquisition['skipped'] and sorted(fetched) == sorted(dag.universe),
+          f"sensor-driven: universo completo ({len(fetched)} instrumentos), nada omitido")
+
+    return ok
+
+
+def test_acquisition_dag():
+    assert run_acquisition_dag(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_acquisition_dag()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test del almacén de rasters de anomalía y del endpoint de tiles
+
+Verifica:
+- Cuantización uint8/float16: error acotado, NaN preservado como sin dato
+- Pirámide de niveles y reensamblado del nivel nativo desde los tiles
+- Payload comprimido mucho menor que float64 + base64
+- /anomaly-map/{id}/tiles/{z}/{x}/{y}: ETag, 304, Range (206/416)
+- PNG por tile y PNG completo: renderizados una vez y cacheados en disco
+"""
+
+import base64
+import os
+import sys
+import tempfile
+import zlib
+
+import numpy as np
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_layers(shape=(500, 430)):
+    rng = np.random.default_rng(7)
+    anomaly = np.clip(rng.normal(0.4, 0.2, shape), 0, 1)
+    anomaly[100:140, 200:260] = 0.95
+    geometric = (rng.random(shape) > 0.97).astype(np.float64)
+    return anomaly, geometric
+
+
+def run_anomaly_raster_store() -> bool:
+    print("🧪 Rasters de anomalía en tiles")
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import anomaly_raster_store as store_module
+    from anomaly_raster_store import AnomalyRasterStore
+    from api import anomaly_tiles_endpoint
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = AnomalyRasterStore(root_dir=os.path.join(workdir, "rasters"), legacy_png_dir=workdir)
+        anomaly, geometric = make_layers()
+        analysis_id = "TIMT_-0.0050_0.0050_-150.0050_-149.9950_20260201_175522"
+
+        manifest = store.save(analysis_id, {'anomaly_map': anomaly, 'geometric_features': geometric},
+                              bounds=(-0.005, 0.005, -150.005, -149.995), resolution_m=30.0)
+        check(manifest['max_zoom'] == 1 and manifest['shape'] == [500, 430], f"pirámide z=0..{manifest['max_zoom']}")
+
+        native = store.read_level(analysis_id, 'anomaly_map')
+        scale = manifest['layers']['anomaly_map']['scale']
+        check(native.shape == anomaly.shape and np.nanmax(np.abs(native - anomaly)) <= scale / 2 + 1e-6,
+              f"uint8: error máx ≤ scale/2 ({np.nanmax(np.abs(native - anomaly)):.4f})")
+        check(np.array_equal(store.read_level(analysis_id, 'geometric_features') > 0.5, geometric > 0.5),
+              "features geométricas preservadas")
+        overview = store.read_level(analysis_id, 'geometric_features', z=0)
+        check(overview.shape == (250, 215) and overview.max() == 1.0, "nivel 0 reducido 2x (máximo para features)")
+
+        packed = os.path.getsize(os.path.join(workdir, "rasters", analysis_id, "tiles.pack"))
+        legacy = len(base64.b64encode(anomaly.tobytes())) + len(base64.b64encode(geometric.tobytes()))
+        check(packed * 10 < legacy, f"payload {packed / 1024:.0f} KB vs base64 float64 {legacy / 1024:.0f} KB")
+
+        with_nan = anomaly.copy()
+        with_nan[0, :10] = np.nan
+        store.save("nan_f16", {'anomaly_map': with_nan}, quantization={'anomaly_map': 'float16'})
+        restored = store.read_level("nan_f16", 'anomaly_map')
+        check(np.isnan(restored[0, :10]).all() and np.nanmax(np.abs(restored - with_nan)) < 1e-3,
+              "float16 con NaN como sin dato")
+
+        # Endpoint contra este store
+        original_store = anomaly_tiles_endpoint.anomaly_raster_store
+        anomaly_tiles_endpoint.anomaly_raster_store = store
+        try:
+            app = FastAPI()
+            app.include_router(anomaly_tiles_endpoint.router)
+            client = TestClient(app)
+            url = f"/anomaly-map/{analysis_id}/tiles/1/1/0"
+
+            response = client.get(url)
+            etag = response.headers.get("etag")
+            rows, cols = map(int, response.headers["x-tile-shape"].split(","))
+            tile = np.frombuffer(zlib.decompress(response.content), dtype=np.uint8).reshape(rows, cols)
+            check(response.status_code == 200 and (rows, cols) == (256, 174) and etag,
+                  f"tile binario {rows}x{cols} con ETag {etag}")
+            check(np.array_equal(tile, store_module._apply_uint8(anomaly[:256, 256:], manifest['layers']['anomaly_map'])),
+                  "contenido del tile = cuantización del recorte")
+
+            check(client.get(url, headers={"If-None-Match": etag}).status_code == 304, "If-None-Match → 304")
+            partial = client.get(url, headers={"Range": "bytes=0-99"})
+            check(partial.status_code == 206 and partial.content == response.content[:100]
+                  and partial.headers["content-range"] == f"bytes 0-99/{len(response.content)}", "Range → 206")
+            check(client.get(url, headers={"Range": f"bytes={len(response.content)}-"}).status_code == 416,
+                  "Range fuera de rango → 416")
+            check(client.get(f"/anomaly-map/{analysis_id}/tiles/5/0/0").status_code == 404
+                  and client.get("/anomaly-map/..%2Fx/manifest").status_code == 404, "tile/id inválido → 404")
+
+            png = client.get(url + ".png")
+            png_dir = os.path.join(workdir, "rasters", analysis_id, "png", "1")
+            check(png.status_code == 200 and png.content.startswith(b"\x89PNG") and len(os.listdir(png_dir)) == 1,
+                  "PNG del tile renderizado y cacheado")
+            check(client.get(url + ".png", headers={"If-None-Match": png.headers["etag"]}).status_code == 304,
+                  "PNG con ETag → 304")
+            manifest_response = client.get(f"/anomaly-map/{analysis_id}/manifest")
+            check(manifest_response.status_code == 200 and 'tiles' not in manifest_response.json(),
+                  "manifest público sin índice")
+        finally:
+            anomaly_tiles_endpoint.anomaly_raster_store = original_store
+
+        full = store.render_full_png(analysis_id)
+        check(full.name == f"anomaly_map_{analysis_id}.png" and full.read_bytes()[:4] == b"\x89PNG",
+              "PNG completo en la ruta histórica")
+
+    return ok
+
+
+def test_anomaly_raster_store():
+    assert run_anomaly_raster_store(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_anomaly_raster_store()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Test de equivalencia del escaneo vectorizado detect_grid
+
+Verifica (integrador stub, sin APIs):
+- Cada celda del raster da la misma probabilidad, instrumentos que exceden,
+  anomalía y nivel de confianza que el flujo por celda
+  (_get_real_instrument_measurement → matriz de pesos → convergencia →
+  _analyze_measurements_vs_thresholds →
+  _calculate_archaeological_probability_enhanced)
+- Celdas NaN se tratan como instrumento sin dato (NO se simulan)
+- shallow_sea: mismo early exit que detect_anomaly
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import io
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core_anomaly_detector import GRID_CONFIDENCE_LEVELS, CoreAnomalyDetector
+from environment_classifier import EnvironmentClassifier, EnvironmentContext, EnvironmentType
+
+BOUNDS = (24.0, 24.4, 10.0, 10.5)  # Sahara: 4×5 celdas de 0.1°
+SHAPE = (4, 5)
+
+# Indicadores del raster con el nombre del sensor de la matriz base de
+# desierto (para que los pesos no sean cero) y el indicador equivalente con
+# mapeo de API que usa el flujo por celda
+INDICATORS = {
+    'landsat_thermal': ('thermal_anomalies', 'threshold_delta_k', 2.0),
+    'sar': ('sar_backscatter', 'threshold_db', 3.0),
+    'icesat2': ('lidar_elevation_anomalies', 'threshold_m', 0.5),
+    'sentinel2': ('ndvi_stress', 'threshold_ndvi', 0.1),
+}
+
+
+class StubIntegrator:
+    """get_instrument_measurement con el valor de la celda en curso"""
+
+    def __init__(self):
+        self.current = None
+
+    async def get_instrument_measurement(self, instrument_name, lat_min, lat_max, lon_min, lon_max):
+        value, confidence = self.current
+        return {'value': value, 'confidence': confidence, 'source': 'stub'}
+
+
+class StubClassifier:
+    def __init__(self, context):
+        self.context = context
+
+    def classify(self, lat, lon):
+        return self.context
+
+
+def environment(env_type: EnvironmentType) -> EnvironmentContext:
+    return EnvironmentContext(
+        environment_type=env_type, confidence=0.9, coordinates=(24.2, 10.25),
+        temperature_range_c=(10.0, 45.0), precipitation_mm_year=20.0, elevation_m=400.0,
+        primary_sensors=['landsat_thermal', 'sar'], secondary_sensors=['sentinel2'],
+        archaeological_visibility='high', preservation_potential='excellent',
+        access_difficulty='moderate', notes='test'
+    )
+
+
+def synthetic_rasters():
+    rng = np.random.default_rng(7)
+    rasters, confidences = {}, {}
+    for name, (_, _, threshold) in INDICATORS.items():
+        values = rng.uniform(0.0, 8.0 * threshold, SHAPE)
+        values[rng.random(SHAPE) < 0.2] = np.nan
+        rasters[name] = values
+        confidences[name] = rng.choice([0.5, 0.7, 0.9], SHAPE)
+    rasters['sar'][0, 0] = np.nan  # celda con varios instrumentos sin dato
+    rasters['icesat2'][0, 0] = np.nan
+    return rasters, confidences
+
+
+def cell_bounds(row: int, col: int):
+    lat_min, lat_max, lon_min, lon_max = BOUNDS
+    dlat = (lat_max - lat_min) / SHAPE[0]
+    dlon = (lon_max - lon_min) / SHAPE[1]
+    top = lat_max - row * dlat
+    return top - dlat, top, lon_min + col * dlon, lon_min + (col + 1) * dlon
+
+
+async def per_cell(detector, integrator, env_context, env_signatures, rasters, confidences, row, col):
+    """Flujo de detect_anomaly (pasos 3-7) para una celda, sin sitios conocidos"""
+    lat_min, lat_max, lon_min, lon_max = cell_bounds(row, col)
+    indicators = env_signatures['archaeological_indicators']
+
+    measurements = []
+    for name, (alias, _, _) in INDICATORS.items():
+        integrator.current = (float(rasters[name][row, col]), float(confidences[name][row, col]))
+        measurement = await detector._get_real_instrument_measurement(
+            alias, indicators[name], env_context, lat_min, lat_max, lon_min, lon_max
+        )
+        if measurement:
+            measurements.append(dataclasses.replace(measurement, instrument_name=name))
+
+    eco_region = detector.regional_calibration.detect_eco_region(
+        (lat_min + lat_max) / 2, (lon_min + lon_max) / 2, env_context.environment_type.value
+    )
+    sensor_weights = detector.regional_calibration.calculate_weighted_sensor_matrix(
+        eco_region, env_context, measurements
+    )
+    convergence_score = detector.regional_calibration.calculate_convergence_score(
+        measurements, sensor_weights, eco_region
+    )
+    anomaly_analysis = detector._analyze_measurements_vs_thresholds(measurements, env_signatures)
+    anomaly_analysis['eco_region'] = eco_region
+    validation = {'known_site_nearby': False, 'site_name': None, 'distance_km': None}
+    probability = detector._calculate_archaeological_probability_enhanced(
+        anomaly_analysis, env_context, validation, [], convergence_score
+    )
+    result = detector._generate_final_result(
+        env_context, env_signatures, measurements, anomaly_analysis, validation, probability
+    )
+    return result, convergence_score.total_score
+
+
+async def run_checks(check):
+    with contextlib.redirect_stdout(io.StringIO()):
+        detector = CoreAnomalyDetector(EnvironmentClassifier(), None, None)
+    integrator = StubIntegrator()
+    detector.real_data_integrator = integrator
+    detector.anomaly_signatures = {'environment_signatures': {'desert': {
+        'archaeological_indicators': {
+            name: {threshold_key: threshold, 'description': alias}
+            for name, (alias, threshold_key, threshold) in INDICATORS.items()
+        },
+        'minimum_convergence': 2
+    }}}
+    env_signatures = detector._get_signatures_for_environment('desert')
+
+    desert = environment(EnvironmentType.DESERT)
+    rasters, confidences = synthetic_rasters()
+    with contextlib.redirect_stdout(io.StringIO()):
+        grid = detector.detect_grid(*BOUNDS, rasters, api_confidence=confidences, env_context=desert)
+        cells = {
+            (row, col): await per_cell(detector, integrator, desert, env_signatures,
+                                       rasters, confidences, row, col)
+            for row in range(SHAPE[0]) for col in range(SHAPE[1])
+        }
+
+    expected = np.array([[cells[r, c][0].archaeological_probability for c in range(SHAPE[1])]
+                         for r in range(SHAPE[0])])
+    check(np.allclose(grid.probability, expected, atol=1e-6) and expected.max() > expected.min(),
+          f"probabilidad por celda = flujo por celda (rango {expected.min():.3f}-{expected.max():.3f})")
+    check(np.allclose(grid.convergence_score,
+                      [[cells[r, c][1] for c in range(SHAPE[1])] for r in range(SHAPE[0])], atol=1e-6),
+          "score de convergencia por celda")
+    check(all(grid.instruments_exceeding[cell] == result.instruments_converging
+              and grid.anomaly[cell] == result.anomaly_detected
+              and GRID_CONFIDENCE_LEVELS[grid.confidence_level[cell]] == result.confidence_level
+              for cell, (result, _) in cells.items()),
+          "instrumentos que exceden, anomalía y confianza por celda")
+    levels = {result.confidence_level for result, _ in cells.values()}
+    check(len(levels) >= 2 and grid.anomaly.any(),
+          f"raster con celdas anómalas y varios niveles de confianza ({', '.join(sorted(levels))})")
+    nan_cells = [cell for cell in cells if any(np.isnan(r[cell]) for r in rasters.values())]
+    check(len(nan_cells) > 1 and len(cells[0, 0][0].measurements) == 4 - sum(
+              np.isnan(r[0, 0]) for r in rasters.values()),
+          f"celdas NaN sin medición ({len(nan_cells)} celdas con huecos)")
+
+    # shallow_sea: early exit de detect_anomaly
+    shallow = environment(EnvironmentType.SHALLOW_SEA)
+    detector.environment_classifier = StubClassifier(shallow)
+    with contextlib.redirect_stdout(io.StringIO()):
+        grid = detector.detect_grid(*BOUNDS, rasters, env_context=shallow)
+        quick = await detector.detect_anomaly(24.2, 10.25, *BOUNDS)
+    check(np.allclose(grid.probability, quick.archaeological_probability)
+          and not grid.anomaly.any() and not quick.anomaly_detected
+          and all(GRID_CONFIDENCE_LEVELS[c] == quick.confidence_level for c in grid.confidence_level.ravel())
+          and grid.environment_type == quick.environment_type,
+          "shallow_sea: raster constante igual al análisis rápido")
+
+
+def run_grid_detection() -> bool:
+    print("🧪 detect_grid vs flujo por celda")
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    # El flujo por celda escribe instrument_diagnostics.log en el cwd
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            asyncio.run(run_checks(check))
+        finally:
+            os.chdir(cwd)
+    return ok
+
+
+def test_grid_detection():
+    assert run_grid_detection(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_grid_detection()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test del servidor HRM residente (inferencia por lotes en CPU)
+
+Verifica:
+- Los pesos se cargan una sola vez aunque lleguen muchos pedidos
+- Pedidos concurrentes se agrupan en pocos forward pass (max_batch_size)
+- Cada pregunta recibe su propia activación, sin depender del lote
+- Métricas: cola vacía al final, tamaño medio de lote, percentiles de latencia
+- Si la carga falla, los pedidos fallan rápido con RuntimeError
+- Con torch instalado: el resultado por lotes coincide con el camino de a uno
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import os
+import sys
+import time
+
+import numpy as np
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from hrm.hrm_server import HRMInferenceServer
+
+FORWARD_DELAY = 0.05
+
+
+class StubRunner:
+    """Imita la API por lotes de hrm_runner sin torch (activación = hash de la pregunta)"""
+
+    def __init__(self):
+        self.forward_batches = []
+
+    def build_hrm_batch(self, questions):
+        return list(questions)
+
+    def run_hrm_batch(self, model, inputs):
+        time.sleep(FORWARD_DELAY)
+        self.forward_batches.append(len(inputs))
+        return [activation(q) for q in inputs]
+
+    def extract_activity(self, carry, index=0):
+        return carry[index]
+
+
+def activation(question: str) -> np.ndarray:
+    seed = int(hashlib.sha256(question.encode('utf-8')).hexdigest(), 16) % (2**32)
+    return np.random.default_rng(seed).random(512)
+
+
+class StubServer(HRMInferenceServer):
+    def __init__(self, fail_load: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_load = fail_load
+        self.loads = 0
+
+    def _load(self):
+        self.loads += 1
+        if self.fail_load:
+            raise SystemExit(1)
+        self._runner = StubRunner()
+        self._model = object()
+
+
+async def run_concurrent(server: HRMInferenceServer, questions):
+    return await asyncio.gather(*(server.infer(q) for q in questions))
+
+
+def run_hrm_server() -> bool:
+    print("🧪 Servidor HRM residente")
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    server = StubServer(max_batch_size=8, max_wait_ms=50).start()
+    check(server.wait_ready(5), "modelo cargado en el worker")
+
+    questions = [f"Analizar coherencia territorial #{i}" for i in range(12)]
+    results = asyncio.run(run_concurrent(server, questions))
+    results += asyncio.run(run_concurrent(server, questions[:3]))
+    batches = server._runner.forward_batches
+    stats = server.get_stats()
+
+    check(server.loads == 1, "pesos cargados una sola vez")
+    check(batches == [8, 4, 3], f"15 pedidos en {len(batches)} forward pass {batches}")
+    check(all(np.array_equal(r['activity'], activation(q)) for r, q in zip(results, questions + questions[:3])),
+          "cada pregunta recibe su activación")
+    check(stats['queue_depth'] == 0 and stats['completed'] == 15 and stats['avg_batch_size'] == 5.0,
+          f"métricas: cola {stats['queue_depth']}, lote medio {stats['avg_batch_size']}")
+    check(stats['latency_ms'].get('p95', 0) >= FORWARD_DELAY * 1000 and results[0]['batch_size'] == 8,
+          f"latencia p50 {stats['latency_ms'].get('p50')}ms / p95 {stats['latency_ms'].get('p95')}ms")
+    server.close()
+    check(server._thread is None, "worker detenido")
+
+    broken = StubServer(fail_load=True).start()
+    broken.wait_ready(5)
+    try:
+        broken.submit("x")
+        failed_fast = False
+    except RuntimeError:
+        failed_fast = True
+    check(failed_fast and not broken.available and broken.get_stats()['status'] == 'failed',
+          "carga fallida → RuntimeError inmediato")
+    broken.close()
+
+    if importlib.util.find_spec("torch") is None:
+        print("   ⚠️ torch no instalado: se omite la comparación con el modelo real")
+        return ok
+
+    from hrm import hrm_runner
+
+    real = HRMInferenceServer(max_batch_size=4, max_wait_ms=50).start()
+    check(real.wait_ready(120), "HRM real cargado (CPU)")
+    batched = asyncio.run(run_concurrent(real, questions[:4]))
+    single = [hrm_runner.extract_activity(hrm_runner.run_hrm_batch(real._model, hrm_runner.build_hrm_inputs(q)))
+              for q in questions[:4]]
+    check(all(np.allclose(b['activity'], s, atol=1e-4) for b, s in zip(batched, single)),
+          "lote de 4 = 4 forward pass individuales")
+    real.close()
+
+    return ok
+
+
+def test_hrm_server():
+    assert run_hrm_server(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_hrm_server()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test del transporte HTTP compartido de conectores contra un servidor stub local
+
+Verifica (sin salir a internet):
+- Reutilización de conexiones (un pool por host)
+- Coalescencia de GETs idénticos en vuelo
+- Reintentos con backoff en 503 / 429 + Retry-After
+- POST no se reintenta tras recibir respuesta
+- Límite de concurrencia por host
+- Executor compartido: timeout sin bloquear el event loop
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from satellite_connectors.http_transport import BlockingSourceSaturated, ConnectorTransport, HostPolicy
+
+
+class StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = {}
+        self.client_ports = set()
+        self.active = 0
+        self.max_active = 0
+
+    def hit(self, path: str) -> int:
+        with self.lock:
+            self.hits[path] = self.hits.get(path, 0) + 1
+            return self.hits[path]
+
+
+STATE = StubState()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: bytes = b"ok", headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        STATE.client_ports.add(self.client_address[1])
+        path = self.path.split("?")[0]
+        count = STATE.hit(self.path)
+
+        if path == "/ok":
+            self._reply(200)
+        elif path == "/slow":
+            with STATE.lock:
+                STATE.active += 1
+                STATE.max_active = max(STATE.max_active, STATE.active)
+            time.sleep(0.2)
+            with STATE.lock:
+                STATE.active -= 1
+            self._reply(200, b"slow")
+        elif path == "/flaky":
+            self._reply(503 if count <= 2 else 200, b"flaky")
+        elif path == "/throttled":
+            if count == 1:
+                self._reply(429, b"wait", {"Retry-After": "0"})
+            else:
+                self._reply(200, b"done")
+        else:
+            self._reply(404, b"missing")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        STATE.hit("POST " + self.path)
+        self._reply(503, b"busy")
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+async def run_checks(base_url: str) -> bool:
+    transport = ConnectorTransport(
+        default_policy=HostPolicy(max_concurrency=3, max_connections=3,
+                                  max_retries=3, backoff_base=0.01, backoff_max=0.05),
+        host_policies={}
+    )
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    # 1. Pool: peticiones secuenciales reutilizan la misma conexión
+    for i in range(20):
+        response = await transport.get(f"{base_url}/ok", params={"i": i})
+        assert response.status_code == 200
+    check(transport.stats['clients_created'] == 1, "un único cliente por host")
+    check(len(STATE.client_ports) <= 2, f"conexiones TCP reutilizadas ({len(STATE.client_ports)} para 20 GETs)")
+
+    # 2. Coalescencia: 10 GETs idénticos concurrentes → 1 petición real
+    responses = await asyncio.gather(*[transport.get(f"{base_url}/slow?same=1") for _ in range(10)])
+    check(all(r.text == "slow" for r in responses), "todas las respuestas coalescidas son válidas")
+    check(STATE.hits.get("/slow?same=1") == 1, f"coalescencia ({STATE.hits.get('/slow?same=1')} petición real)")
+
+    # 3. Reintentos: 503 x2 y luego 200
+    response = await transport.get(f"{base_url}/flaky")
+    check(response.status_code == 200 and STATE.hits["/flaky"] == 3, "reintento con backoff tras 503")
+
+    # 4. 429 + Retry-After
+    response = await transport.get(f"{base_url}/throttled")
+    check(response.status_code == 200, "reintento respetando Retry-After")
+
+    # 5. POST no idempotente: no se reintenta si hubo respuesta
+    response = await transport.post(f"{base_url}/submit", json={"x": 1})
+    check(response.status_code == 503 and STATE.hits["POST /submit"] == 1, "POST sin reintentos")
+
+    # 6. Límite por host
+    STATE.max_active = 0
+    await asyncio.gather(*[transport.get(f"{base_url}/slow", params={"i": i}) for i in range(9)])
+    check(STATE.max_active <= 3, f"concurrencia por host limitada (máx {STATE.max_active})")
+
+    # 7. Executor por fuente: timeout no bloquea el loop
+    started = time.perf_counter()
+    try:
+        await transport.run_blocking(time.sleep, 1.0, timeout=0.1)
+        timed_out = False
+    except asyncio.TimeoutError:
+        timed_out = True
+    check(timed_out and time.perf_counter() - started < 0.5, "timeout de run_blocking sin bloquear")
+
+    # 8. Llamadas colgadas: solo saturan su fuente y se rechazan sin encolar
+    blocking = ConnectorTransport(host_policies={}, blocking_workers=2)
+    release = threading.Event()
+    for _ in range(2):
+        try:
+            await blocking.run_blocking(release.wait, 5.0, timeout=0.05, source="cds")
+        except asyncio.TimeoutError:
+            pass
+    started = time.perf_counter()
+    try:
+        await blocking.run_blocking(lambda: "tarde", timeout=5.0, source="cds")
+        rejected = False
+    except BlockingSourceSaturated:
+        rejected = True
+    check(rejected and time.perf_counter() - started < 0.1 and blocking.get_stats()['blocking_stuck'] == {'cds': 2},
+          "fuente con todos los hilos colgados: rechazo inmediato")
+    check(await blocking.run_blocking(lambda: "ok", timeout=1.0, source="earthdata") == "ok",
+          "otras fuentes siguen atendidas")
+    release.set()
+    await asyncio.sleep(0.1)
+    check(await blocking.run_blocking(lambda: "ok", timeout=1.0, source="cds") == "ok"
+          and blocking.get_stats()['blocking_stuck'] == {'cds': 0}, "la fuente se recupera al liberarse los hilos")
+    await blocking.aclose()
+
+    print(f"   📊 Stats: {transport.get_stats()}")
+    await transport.aclose()
+    return ok
+
+
+async def open_client(transport: ConnectorTransport, base_url: str):
+    await transport.get(f"{base_url}/ok")
+
+
+def run_http_transport() -> bool:
+    print("\n" + "=" * 80)
+    print("🧪 TEST TRANSPORTE HTTP DE CONECTORES (servidor stub local)")
+    print("=" * 80 + "\n")
+
+    server, base_url = start_stub_server()
+    try:
+        ok = asyncio.run(run_checks(base_url))
+
+        # 9. Cambio de loop (scripts con varios asyncio.run): la fuga de pools se registra
+        transport = ConnectorTransport(host_policies={})
+        asyncio.run(open_client(transport, base_url))
+        asyncio.run(open_client(transport, base_url))
+        leaked = transport.stats['leaked_clients'] == 1 and transport.stats['clients_created'] == 2
+        print(f"   {'✅' if leaked else '❌'} pools del loop anterior contabilizados como fuga")
+        return ok and leaked
+    finally:
+        server.shutdown()
+
+
+def test_http_transport():
+    assert run_http_transport(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_http_transport()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test de arranque en frío de la API
+
+Verifica:
+- `import api.main` en un proceso limpio cabe en el presupuesto de tiempo
+  (ARCHEOSCOPE_IMPORT_BUDGET_S, por defecto 5s)
+- Importar la API no arrastra librerías pesadas (rasterio, torch, trimesh...)
+- Los componentes quedan registrados pero sin construir (pending/disabled)
+- ComponentRegistry construye una sola vez aunque lo pidan muchos hilos
+- get_shared_pool crea un único pool aunque lo pidan varias corrutinas
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Agregar path del backend
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+IMPORT_BUDGET_S = float(os.getenv("ARCHEOSCOPE_IMPORT_BUDGET_S", "5.0"))
+
+HEAVY_MODULES = ("rasterio", "torch", "trimesh", "xarray", "stackstac",
+                 "pystac_client", "planetary_computer", "matplotlib")
+
+# Se ejecuta en un intérprete nuevo: mide solo el import de la API
+PROBE = f"""
+import json, sys, time
+sys.path.insert(0, {BACKEND_DIR!r})
+started = time.perf_counter()
+import api.main
+elapsed = time.perf_counter() - started
+from component_registry import components
+print("@@PROBE@@" + json.dumps({{
+    "elapsed_s": elapsed,
+    "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+    "status": components.status(),
+}}))
+"""
+
+
+def probe_cold_import() -> dict:
+    # cwd temporal: las instancias globales crean cache/ relativo
+    with tempfile.TemporaryDirectory() as workdir:
+        proc = subprocess.run([sys.executable, "-c", PROBE], cwd=workdir,
+                              capture_output=True, text=True, timeout=120)
+    for line in proc.stdout.splitlines():
+        if line.startswith("@@PROBE@@"):
+            return json.loads(line[len("@@PROBE@@"):])
+    raise RuntimeError(f"import api.main falló:\n{proc.stderr[-2000:]}")
+
+
+def check_registry_thread_safety(check):
+    from component_registry import ComponentRegistry
+
+    registry = ComponentRegistry()
+    builds = []
+
+    def factory():
+        time.sleep(0.05)
+        builds.append(1)
+        return object()
+
+    registry.register('slow', factory)
+    registry.register('slow', lambda: None)   # el primer registro gana
+    registry.register('off', None)
+    registry.register('broken', lambda: 1 / 0)
+
+    check(registry.peek('slow') is None and not builds, "peek() no construye")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('slow'))) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    check(len(builds) == 1, f"16 hilos → 1 construcción (fueron {len(builds)})")
+    check(len({id(r) for r in results}) == 1, "todos los hilos reciben la misma instancia")
+    check(registry.get('off') is None and registry.get('broken') is None,
+          "deshabilitado y fallido valen None")
+
+    status = registry.status()
+    check(status['slow']['state'] == 'loaded' and status['off']['state'] == 'disabled'
+          and status['broken']['state'] == 'failed' and 'ZeroDivisionError' in status['broken']['error'],
+          "status() refleja loaded/disabled/failed")
+
+    registry.reset('slow')
+    check(not registry.is_loaded('slow') and asyncio.run(registry.aget('slow')) is not None
+          and len(builds) == 2, "reset() + aget() reconstruye")
+
+
+def check_shared_pool(check):
+    import asyncpg
+    from database import pool as shared_pool
+
+    created = []
+
+    class FakePool:
+        async def close(self):
+            pass
+
+    async def fake_create_pool(*args, **kwargs):
+        await asyncio.sleep(0.05)
+        created.append(kwargs)
+        return FakePool()
+
+    async def run():
+        first = await asyncio.gather(*(shared_pool.get_shared_pool() for _ in range(10)))
+        await shared_pool.close_shared_pool()
+        return first, shared_pool.peek_shared_pool()
+
+    original_create, original_url = asyncpg.create_pool, os.environ.get("DATABASE_URL")
+    asyncpg.create_pool = fake_create_pool
+    os.environ["DATABASE_URL"] = "postgresql://stub/archeoscope"
+    try:
+        pools, after_close = asyncio.run(run())
+    finally:
+        asyncpg.create_pool = original_create
+        if original_url is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = original_url
+
+    check(len(created) == 1 and len({id(p) for p in pools}) == 1,
+          f"10 corrutinas → 1 pool (creados {len(created)})")
+    check(after_close is None, "close_shared_pool() libera el pool")
+
+
+def run_import_time() -> bool:
+    print("🧪 Arranque en frío de la API")
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    probe = probe_cold_import()
+    elapsed = probe["elapsed_s"]
+    check(elapsed <= IMPORT_BUDGET_S, f"import api.main {elapsed:.2f}s (presupuesto {IMPORT_BUDGET_S:.1f}s)")
+    check(not probe["heavy"], f"sin librerías pesadas al importar {probe['heavy'] or ''}")
+
+    states = {name: entry["state"] for name, entry in probe["status"].items()}
+    check(bool(states) and all(state in ("pending", "disabled") for state in states.values()),
+          f"componentes sin construir: {states}")
+
+    print("🧪 ComponentRegistry")
+    check_registry_thread_safety(check)
+
+    print("🧪 Pool de BD compartido")
+    check_shared_pool(check)
+
+    return ok
+
+
+def test_import_time():
+    assert run_import_time(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_import_time()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test del planificador adaptativo de instrumentos
+
+Verifica (fetch stub, sin red):
+- Presupuesto por fuente: una fuente lenta con max_concurrency=1 no
+  bloquea a otra fuente
+- Deadline: el fetch recibe el deadline del perfil; un timeout se cuenta y
+  la latencia queda censurada al deadline
+- Hedge: tras p95 sin respuesta se lanza un segundo intento y gana el primero
+  que responde; el intento perdedor se cancela
+- Fuentes de trabajos remotos (remote_job) nunca se hedgean
+- Salida temprana por coverage: el resto queda diferido explícitamente
+"""
+
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from satellite_connectors.instrument_scheduler import AdaptiveInstrumentScheduler, SourceProfile
+
+
+def result(name: str, status: str = 'SUCCESS', measurement_type: str = 'stub'):
+    return SimpleNamespace(instrument_name=name, status=SimpleNamespace(value=status),
+                           measurement_type=measurement_type)
+
+
+class StubFetch:
+    """fetch(nombre, timeout) con latencias por intento y registro de concurrencia"""
+
+    def __init__(self, delays):
+        self.delays = delays  # nombre → lista de latencias por intento
+        self.attempts = {}
+        self.timeouts = []
+        self.cancelled = 0
+        self.active = {}
+        self.max_active = {}
+
+    async def __call__(self, name: str, timeout_s: float):
+        source = name.split(':')[0]
+        attempt = self.attempts.get(name, 0)
+        self.attempts[name] = attempt + 1
+        self.timeouts.append(timeout_s)
+        self.active[source] = self.active.get(source, 0) + 1
+        self.max_active[source] = max(self.max_active.get(source, 0), self.active[source])
+        try:
+            delays = self.delays.get(name, [0.01])
+            await asyncio.wait_for(asyncio.sleep(delays[min(attempt, len(delays) - 1)]), timeout_s)
+            return result(name)
+        except asyncio.TimeoutError:
+            return result(name, 'FAILED', 'timeout')
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active[source] -= 1
+
+
+def warm(scheduler: AdaptiveInstrumentScheduler, source: str, seconds: float = 0.05):
+    for _ in range(10):
+        scheduler.histogram_for(source).observe(seconds)
+
+
+async def run_checks(check):
+    profiles = {
+        'slow': SourceProfile(max_concurrency=1, expected_latency_s=1.0, deadline_s=5.0),
+        'fast': SourceProfile(max_concurrency=3, expected_latency_s=0.1, deadline_s=5.0),
+        'tight': SourceProfile(max_concurrency=1, expected_latency_s=0.1, deadline_s=0.1),
+        'hedged': SourceProfile(max_concurrency=2, expected_latency_s=0.05, deadline_s=5.0, hedge=True),
+        'cds': SourceProfile(max_concurrency=2, expected_latency_s=0.05, deadline_s=5.0,
+                             hedge=True, remote_job=True),
+    }
+
+    # Presupuestos por fuente
+    scheduler = AdaptiveInstrumentScheduler(source_profiles=profiles)
+    fetch = StubFetch({f'slow:{i}': [0.1] for i in range(3)})
+    jobs = [(f'slow:{i}', 'slow') for i in range(3)] + [(f'fast:{i}', 'fast') for i in range(3)]
+    results = []
+    summary = await scheduler.run(jobs, fetch, results.append)
+    check(fetch.max_active['slow'] == 1 and fetch.max_active['fast'] > 1 and len(results) == 6,
+          f"presupuesto por fuente (slow ≤1, fast {fetch.max_active['fast']} en paralelo)")
+    check(summary['order'][:3] == ['slow:0', 'slow:1', 'slow:2'], "fuente más lenta planificada primero")
+
+    # Deadline
+    scheduler = AdaptiveInstrumentScheduler(source_profiles=profiles)
+    fetch = StubFetch({'tight:0': [1.0]})
+    results = []
+    await scheduler.run([('tight:0', 'tight')], fetch, results.append)
+    histogram = scheduler.histogram_for('tight')
+    check(fetch.timeouts == [0.1] and results[0].measurement_type == 'timeout'
+          and scheduler.stats['deadline_exceeded'] == 1 and histogram.counts.sum() == 1,
+          "deadline del perfil aplicado y contado")
+
+    # Hedge: primer intento colgado, el segundo responde
+    scheduler = AdaptiveInstrumentScheduler(source_profiles=profiles)
+    warm(scheduler, 'hedged')
+    fetch = StubFetch({'hedged:0': [2.0, 0.01]})
+    results = []
+    started = time.perf_counter()
+    summary = await scheduler.run([('hedged:0', 'hedged')], fetch, results.append)
+    await asyncio.sleep(0.05)  # entregar la cancelación al perdedor
+    check(fetch.attempts['hedged:0'] == 2 and scheduler.stats['hedges_won'] == 1
+          and time.perf_counter() - started < 1.0 and results[0].status.value == 'SUCCESS',
+          "hedge tras p95: gana el segundo intento")
+    check(fetch.cancelled == 1 and summary['hedges_used'] == 1, "intento perdedor cancelado")
+
+    # Fuente de trabajos remotos: sin hedge aunque esté habilitado
+    scheduler = AdaptiveInstrumentScheduler(source_profiles=profiles)
+    warm(scheduler, 'cds')
+    fetch = StubFetch({'cds:0': [0.5]})
+    await scheduler.run([('cds:0', 'cds')], fetch, lambda r: None)
+    check(fetch.attempts['cds:0'] == 1 and scheduler.stats['hedges_launched'] == 0,
+          "remote_job: un solo job aunque tarde más que p95")
+
+    # Salida temprana por coverage
+    scheduler = AdaptiveInstrumentScheduler(source_profiles=profiles)
+    fetch = StubFetch({'slow:0': [3.0]})
+    results = []
+    done = lambda: sum(r.status.value == 'SUCCESS' for r in results) / 4
+    summary = await scheduler.run(
+        [('slow:0', 'slow')] + [(f'fast:{i}', 'fast') for i in range(3)], fetch, results.append,
+        coverage_fn=done, coverage_target=0.75, min_instruments=2,
+        make_deferred=lambda name: result(name, 'FAILED', 'deferred')
+    )
+    check(summary['early_exit'] and summary['deferred_instruments'] == ['slow:0']
+          and results[-1].measurement_type == 'deferred', "coverage alcanzado: lento diferido explícitamente")
+
+
+def run_instrument_scheduler() -> bool:
+    print("🧪 Planificador adaptativo de instrumentos")
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    asyncio.run(run_checks(check))
+    return ok
+
+
+def test_instrument_scheduler():
+    assert run_instrument_scheduler(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_instrument_scheduler()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test de la transmisión binaria del modelo 3D LIDAR
+
+Verifica:
+- describe_3d_model: resumen JSON sin vértices, caras ni atributos por vértice
+- stream_3d_model GLB: cabecera y chunks válidos, posiciones e índices iguales
+  a la malla generada
+- stream_3d_model PLY: cabecera con el número de vértices y caras
+"""
+
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from volumetric.lidar_fusion_engine import FusionResult, LidarFusionEngine, VolumetricAnalysis
+
+
+def synthetic_model(engine: LidarFusionEngine, size: int = 24):
+    y, x = np.mgrid[:size, :size].astype(np.float64)
+    dtm = 100.0 + 0.05 * x + 2.0 * np.exp(-((x - size / 2) ** 2 + (y - size / 2) ** 2) / 20.0)
+    field = dtm - dtm.mean()
+    analysis = VolumetricAnalysis(
+        positive_volume_m3=1.0, negative_volume_m3=0.5, local_slope_degrees=field, microtopographic_roughness=field,
+        curvature=field, dtm=dtm, dsm=dtm + 1.0, elevation_model=field, processing_metadata={}
+    )
+    probability = np.clip(field / np.abs(field).max(), 0, 1)
+    fusion = FusionResult(
+        anthropic_probability_final=probability, lidar_contribution=probability,
+        archeoscope_contribution=1 - probability, confidence_level=probability,
+        dominant_source=np.zeros_like(probability), fusion_metadata={}
+    )
+    return engine.generate_3d_model(analysis, fusion, 'gltf')
+
+
+def parse_glb(data: bytes):
+    magic, version, total = struct.unpack_from("<III", data, 0)
+    json_length, _ = struct.unpack_from("<II", data, 12)
+    document = json.loads(data[20:20 + json_length])
+    bin_length, _ = struct.unpack_from("<II", data, 20 + json_length)
+    binary = data[28 + json_length:]
+    return magic, version, total, document, bin_length, binary
+
+
+def run_lidar_model_stream() -> bool:
+    print("🧪 Modelo 3D LIDAR: resumen JSON + geometría binaria")
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    engine = LidarFusionEngine()
+    model = synthetic_model(engine)
+    vertices, faces = model['vertices'], model['faces']
+
+    summary = engine.describe_3d_model(model)
+    encoded = json.dumps(summary, default=str)
+    check(len(encoded) < 4096 and summary['metadata']['total_vertices'] == len(vertices)
+          and 'anthropic_probability' in summary['vertex_attributes']
+          and summary['activatable_layers']['geometry_pure']['attributes'] == ['elevation']
+          and 'vertices' not in summary['activatable_layers']['geometry_pure'],
+          f"resumen JSON sin geometría ({len(encoded)} bytes)")
+
+    glb = b"".join(engine.stream_3d_model(model, 'glb'))
+    magic, version, total, document, bin_length, binary = parse_glb(glb)
+    check(magic == 0x46546C67 and version == 2 and total == len(glb) and len(binary) == bin_length,
+          f"GLB válido ({len(glb) / 1024:.0f} KB)")
+    views = document['bufferViews']
+    positions = np.frombuffer(binary, np.float32, len(vertices) * 3, views[0]['byteOffset']).reshape(-1, 3)
+    indices = np.frombuffer(binary, np.uint32, faces.size, views[1]['byteOffset']).reshape(-1, 3)
+    check(np.array_equal(positions, vertices.astype(np.float32)) and np.array_equal(indices, faces),
+          "posiciones e índices = malla generada")
+    primitive = document['meshes'][0]['primitives'][0]['attributes']
+    check('_ANTHROPIC_PROBABILITY' in primitive and len(primitive) == 1 + len(model['vertex_attributes']),
+          "atributos por vértice como accessors")
+
+    ply = b"".join(engine.stream_3d_model(model, 'ply'))
+    header = ply[:ply.index(b"end_header")].decode('ascii')
+    check(f"element vertex {len(vertices)}" in header and f"element face {len(faces)}" in header
+          and "binary_little_endian" in header, "PLY binario con conteos correctos")
+
+    try:
+        engine.stream_3d_model(model, 'obj')
+        rejected = False
+    except ValueError:
+        rejected = True
+    check(rejected, "formato no soportado → ValueError")
+    return ok
+
+
+def test_lidar_model_stream():
+    assert run_lidar_model_stream(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_lidar_model_stream()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
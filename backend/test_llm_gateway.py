@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Test del LLM gateway asíncrono contra un servidor stub local (OpenRouter/Ollama/OpenCode)
+
+Verifica (sin salir a internet):
+- Las generaciones no bloquean el event loop y la concurrencia queda acotada
+- Caché direccionada por contenido: mismo prompt+modelo → sin nueva petición,
+  otro modelo → nueva petición
+- Prompts idénticos en vuelo comparten una única generación
+- Errores HTTP no se cachean
+- TTL, límite de entradas y persistencia de la caché
+- batch_validate_anomalies envía el lote en paralelo (prompts repetidos una vez)
+- OpenCodeValidator reutiliza la caché del gateway
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+GENERATION_DELAY = 0.2
+
+VALIDATION_TEXT = (
+    "COHERENCIA: SÍ\n"
+    "CONFIANZA: 0.8\n"
+    "INCONSISTENCIAS:\n"
+    "AJUSTE_SCORE: +0.05\n"
+    "RIESGO_FP: 0.2\n"
+    "RAZONAMIENTO: señales convergentes"
+)
+
+
+class StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = {}
+        self.active = 0
+        self.max_active = 0
+
+    def hit(self, key: str) -> int:
+        with self.lock:
+            self.hits[key] = self.hits.get(key, 0) + 1
+            return self.hits[key]
+
+    def total(self, prefix: str) -> int:
+        with self.lock:
+            return sum(count for key, count in self.hits.items() if key.startswith(prefix))
+
+
+STATE = StubState()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _generate(self):
+        """Simular una generación lenta (el servidor atiende en paralelo)"""
+        with STATE.lock:
+            STATE.active += 1
+            STATE.max_active = max(STATE.max_active, STATE.active)
+        time.sleep(GENERATION_DELAY)
+        with STATE.lock:
+            STATE.active -= 1
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._reply(200, {"models": [{"name": "stub-model"}]})
+        elif self.path == "/health":
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"error": "missing"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        STATE.hit(f"{self.path} {json.dumps(body, sort_keys=True)}")
+
+        if self.path == "/api/v1/chat/completions":
+            if body.get("model") == "broken":
+                self._reply(500, {"error": "model crashed"})
+                return
+            self._generate()
+            prompt = body["messages"][-1]["content"]
+            self._reply(200, {"choices": [{"message": {"content": f"{body['model']}:{prompt}"}}]})
+        elif self.path == "/api/generate":
+            self._generate()
+            self._reply(200, {"response": VALIDATION_TEXT})
+        elif self.path == "/analyze":
+            self._reply(200, {"is_coherent": True, "confidence": 0.9, "reasoning": "stub",
+                              "inconsistencies": [], "recommendations": [], "false_positive_risk": 0.1})
+        else:
+            self._reply(404, {"error": "missing"})
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+async def heartbeat(stop: asyncio.Event, gaps: list):
+    """Mide la mayor pausa del event loop mientras hay generaciones en vuelo"""
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+async def run_checks(base_url: str, cache_dir: str, validation_assistant, opencode) -> bool:
+    from ai.llm_gateway import LLMGateway, LLMGatewayError, LLMResponseCache
+
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    gateway = validation_assistant.base_assistant.gateway
+    chat_url = f"{base_url}/api/v1/chat/completions"
+
+    async def chat(prompt: str, model: str = "stub-model", target: LLMGateway = gateway) -> str:
+        return await target.openrouter_chat([{"role": "user", "content": prompt}], model, "test-key", url=chat_url)
+
+    # 1. Generaciones concurrentes sin bloquear el loop, concurrencia acotada (2)
+    await chat("warmup")  # crear el pool (contexto SSL de httpx) fuera de la medición
+    stop, gaps = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, gaps))
+    started = time.perf_counter()
+    texts = await asyncio.gather(*[chat(f"prompt {i}") for i in range(6)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    check(texts == [f"stub-model:prompt {i}" for i in range(6)], "respuestas en orden")
+    check(STATE.max_active <= 2, f"concurrencia acotada (máx {STATE.max_active} en vuelo)")
+    check(max(gaps) < 0.1, f"event loop libre durante {elapsed:.2f}s (pausa máx {max(gaps) * 1000:.0f} ms)")
+
+    # 2. Caché por contenido: mismo prompt+modelo → hit; otro modelo → miss
+    before = STATE.total("/api/v1/chat")
+    again = await chat("prompt 0")
+    check(again == "stub-model:prompt 0" and STATE.total("/api/v1/chat") == before, "mismo prompt+modelo desde caché")
+    await chat("prompt 0", model="other-model")
+    check(STATE.total("/api/v1/chat") == before + 1, "otro modelo → nueva generación")
+
+    # 3. Coalescencia de prompts idénticos en vuelo
+    before = STATE.total("/api/v1/chat")
+    texts = await asyncio.gather(*[chat("same prompt") for _ in range(5)])
+    check(len(set(texts)) == 1 and STATE.total("/api/v1/chat") == before + 1,
+          f"5 prompts idénticos → {STATE.total('/api/v1/chat') - before} generación")
+
+    # 4. Errores HTTP no se cachean
+    failures = 0
+    for _ in range(2):
+        try:
+            await chat("fail", model="broken")
+        except LLMGatewayError as e:
+            failures += e.status_code == 500
+    check(failures == 2 and STATE.total('/api/v1/chat/completions {"max_tokens": 300, "messages": '
+                                        '[{"content": "fail"') == 2, "HTTP 500 → LLMGatewayError sin cachear")
+
+    # 5. TTL y límite de entradas
+    short = LLMGateway(cache=LLMResponseCache(os.path.join(cache_dir, "ttl.sqlite"), ttl_seconds=0.2),
+                       transport=gateway.transport)
+    await chat("ttl prompt", target=short)
+    await asyncio.sleep(0.3)
+    before = STATE.total("/api/v1/chat")
+    await chat("ttl prompt", target=short)
+    check(STATE.total("/api/v1/chat") == before + 1, "entrada vencida (TTL) → nueva generación")
+
+    bounded = LLMGateway(cache=LLMResponseCache(os.path.join(cache_dir, "bounded.sqlite"), max_entries=3),
+                         transport=gateway.transport)
+    for i in range(5):
+        await chat(f"bounded {i}", target=bounded)
+    before = STATE.total("/api/v1/chat")
+    await chat("bounded 4", target=bounded)
+    await chat("bounded 0", target=bounded)
+    check(len(bounded.cache) == 3 and STATE.total("/api/v1/chat") == before + 1,
+          f"límite de entradas ({len(bounded.cache)}) con desalojo de las más antiguas")
+
+    # 6. Persistencia: otra instancia sobre el mismo archivo
+    reopened = LLMGateway(cache=LLMResponseCache(gateway.cache.path), transport=gateway.transport)
+    before = STATE.total("/api/v1/chat")
+    await chat("prompt 3", target=reopened)
+    check(STATE.total("/api/v1/chat") == before, "caché persistente entre instancias")
+
+    # 7. Validación en lote: prompts en paralelo, repetidos una sola vez
+    from ai.anomaly_validation_assistant import InstrumentalFeatures
+    features = [
+        InstrumentalFeatures(tile_id=f"tile_{i % 3}", terrain_type="desert",
+                             signals={"sar": 0.8, "thermal": 0.6}, geometry_score=0.7,
+                             temporal_persistence=0.6, historical_proximity=0.4,
+                             convergence_count=2, environment_confidence=0.8)
+        for i in range(6)
+    ]
+    started = time.perf_counter()
+    results = await validation_assistant.batch_validate_anomalies([(f, 0.7) for f in features], {})
+    elapsed = time.perf_counter() - started
+    check(len(results) == 6 and all(r.is_coherent and r.confidence_score == 0.8 for r in results),
+          "lote validado con respuestas parseadas")
+    check(STATE.total("/api/generate") == 3, f"6 anomalías → {STATE.total('/api/generate')} generaciones únicas")
+    check(elapsed < 3 * GENERATION_DELAY, f"lote en paralelo ({elapsed:.2f}s)")
+
+    # 8. OpenCodeValidator sobre la caché del gateway
+    candidate = {"archaeological_probability": 0.9, "evidence_layers": [{"type": "sar", "value": 0.8}]}
+    first = await opencode.validate_candidate(candidate)
+    second = await opencode.validate_candidate(candidate)
+    check(first is not None and second is not None and second.is_coherent and STATE.total("/analyze") == 1,
+          "OpenCode: candidato repetido resuelto desde caché")
+
+    print(f"   📊 Stats: { {k: v for k, v in gateway.get_stats().items() if k not in ('cache', 'transport')} }")
+    await gateway.aclose()
+    return ok
+
+
+def run_llm_gateway() -> bool:
+    print("\n" + "=" * 80)
+    print("🧪 TEST LLM GATEWAY ASÍNCRONO (servidor stub local)")
+    print("=" * 80 + "\n")
+
+    server, base_url = start_stub_server()
+    os.environ.update({
+        "OPENROUTER_ENABLED": "false",
+        "OLLAMA_ENABLED": "true",
+        "OLLAMA_URL": base_url,
+        "OLLAMA_MODEL2": "stub-model",
+        "OPENCODE_ENABLED": "true",
+        "OPENCODE_API_URL": base_url,
+    })
+
+    from ai.anomaly_validation_assistant import AnomalyValidationAssistant
+    from ai.archaeological_assistant import ArchaeologicalAssistant
+    from ai.llm_gateway import LLMGateway, LLMResponseCache
+    from ai.opencode_validator import OpenCodeValidator
+    from satellite_connectors.http_transport import ConnectorTransport, HostPolicy
+
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            gateway = LLMGateway(
+                cache=LLMResponseCache(os.path.join(cache_dir, "llm.sqlite")),
+                max_concurrency=2,
+                transport=ConnectorTransport(default_policy=HostPolicy(max_concurrency=8, max_connections=8),
+                                             host_policies={})
+            )
+            validation_assistant = AnomalyValidationAssistant(ArchaeologicalAssistant(gateway=gateway))
+            opencode = OpenCodeValidator(gateway=gateway)
+            return asyncio.run(run_checks(base_url, cache_dir, validation_assistant, opencode))
+    finally:
+        server.shutdown()
+
+
+def test_llm_gateway():
+    assert run_llm_gateway(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_llm_gateway()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test del logger de mediciones (write-behind con spill por proceso)
+
+Verifica (pool falso, sin PostgreSQL):
+- measurement_timestamp en UTC timezone-aware
+- get_measurements_for_region mezcla filas de la BD (naive) y pendientes
+  (aware) sin TypeError y en orden
+- BD caída: los lotes van al spill de este proceso; al volver se re-escriben
+- Spill de un worker muerto se adopta al arrancar
+- close_measurements_loggers vacía el buffer (shutdown de la API)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.measurements_logger import MEASUREMENT_COLUMNS, MeasurementsLogger, close_measurements_loggers
+from database.write_behind import dumps
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def copy_records_to_table(self, table, records, columns):
+        if self.pool.down:
+            raise ConnectionError("BD caída")
+        self.pool.rows.extend(dict(zip(columns, record)) for record in records)
+
+
+class FakePool:
+    def __init__(self):
+        self.rows = []
+        self.down = False
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+    async def fetch(self, query, lat_min, lat_max, lon_min, lon_max, limit):
+        # Columna sin zona horaria: asyncpg devuelve datetimes naive
+        return [{**row, 'measurement_timestamp': row['measurement_timestamp'].replace(tzinfo=None)}
+                for row in self.rows if lat_min <= row['latitude'] <= lat_max]
+
+
+async def log(measurements: MeasurementsLogger, value: float, latitude: float = -13.16):
+    return await measurements.log_measurement(
+        instrument_name='sentinel_2_ndvi', measurement_type='ndvi', value=value, unit='NDVI',
+        latitude=latitude, longitude=-72.54, source='Sentinel-2', data_mode='REAL', confidence=0.9
+    )
+
+
+async def run_checks(workdir: Path, check):
+    spill_path = str(workdir / 'measurements_spill.jsonl')
+
+    # Spill de un worker muerto (lock libre) con un lote pendiente
+    dead_spill = workdir / 'measurements_spill.999999003.jsonl'
+    dead_row = {column: None for column in MEASUREMENT_COLUMNS}
+    dead_row.update(id='dead-row', measurement_timestamp=datetime.now(timezone.utc) - timedelta(hours=1),
+                    latitude=-13.16, longitude=-72.54, instrument_name='icesat2', value=1.0)
+    dead_spill.write_text(dumps({'op': 'put', 'id': 'dead-batch', 'kind': 'measurements',
+                                 'payload': {'rows': [dead_row]}}) + '\n', encoding='utf-8')
+
+    pool = FakePool()
+    measurements = MeasurementsLogger(pool, batch_size=50, flush_interval=0.05,
+                                      spill_path=spill_path, replay_interval=0.05)
+    check(measurements._spilled_batches == 1 and not dead_spill.exists(),
+          "spill de worker muerto adoptado al arrancar")
+
+    await log(measurements, 0.4)
+    await measurements.flush()
+    stamp = pool.rows[-1]['measurement_timestamp']
+    check(stamp.tzinfo is not None and stamp.utcoffset() == timedelta(0), "timestamp UTC timezone-aware")
+
+    # BD caída: al spill de este proceso
+    pool.down = True
+    await log(measurements, 0.5)
+    await measurements.flush()
+    own_spill = measurements.spill.path
+    check(own_spill.name == f'measurements_spill.{os.getpid()}.jsonl' and measurements._spilled_batches == 2,
+          "BD caída: lote al spill por proceso")
+
+    await log(measurements, 0.6)
+    region = await measurements.get_measurements_for_region(-14, -13, -73, -72)
+    stamps = [row['measurement_timestamp'] for row in region]
+    check([row['value'] for row in region] == [0.6, 0.5, 0.4, 1.0]
+          and any(s.tzinfo is None for s in stamps) and any(s.tzinfo is not None for s in stamps),
+          "región: filas naive de la BD y pendientes aware ordenadas")
+
+    # BD de vuelta: el flusher re-escribe el spill
+    pool.down = False
+    await asyncio.sleep(0.2)
+    check(measurements._spilled_batches == 0 and sorted(r['value'] for r in pool.rows) == [0.4, 0.5, 0.6, 1.0],
+          "BD de vuelta: spill re-escrito")
+
+    await log(measurements, 0.7)
+    await close_measurements_loggers()
+    check(measurements._flusher is None and pool.rows[-1]['value'] == 0.7,
+          "close_measurements_loggers vacía el buffer")
+
+
+def run_measurements_logger() -> bool:
+    print("🧪 Logger de mediciones (write-behind)")
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    with tempfile.TemporaryDirectory() as workdir:
+        asyncio.run(run_checks(Path(workdir), check))
+    return ok
+
+
+def test_measurements_logger():
+    assert run_measurements_logger(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_measurements_logger()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Test de regresión de los kernels SAR vectorizados
+
+Compara contra la implementación original con ndimage.generic_filter y
+callbacks Python (np.var, max-min, z-score del pixel central):
+- Mapas locales (varianza, rango, z-score) equivalentes numéricamente
+- Métricas agregadas de calculate_sar_texture / calculate_sar_local_anomalies
+- Stacks multibanda = bandas procesadas por separado
+- Pixel NaN (nodata): solo las ventanas que lo contienen salen NaN
+- GLCM contra conteo explícito de pares
+- Speedup de los kernels (extrapolado por pixel a un tile 2048²): informativo;
+  con ARCHEOSCOPE_BENCH_SAR=1 se exige ≥ 100×
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import ndimage
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sar_enhanced_processing import (
+    calculate_sar_texture,
+    calculate_sar_local_anomalies,
+    calculate_sar_features_stack,
+    despeckle_sar,
+    glcm_statistics,
+    local_range_map,
+    local_variance_map,
+    local_zscore_map,
+)
+
+# El speedup solo es un gate con ARCHEOSCOPE_BENCH_SAR=1 (máquina sin carga)
+BENCH_SAR = os.getenv("ARCHEOSCOPE_BENCH_SAR", "0").lower() in ("1", "true", "yes")
+
+
+# ============================================================================
+# IMPLEMENTACIÓN DE REFERENCIA (generic_filter con callbacks)
+# ============================================================================
+
+def reference_variance(data, window_size):
+    return ndimage.generic_filter(data, np.var, size=window_size)
+
+
+def reference_range(data, window_size):
+    return ndimage.generic_filter(data, lambda w: np.max(w) - np.min(w), size=window_size)
+
+
+def reference_zscore(data, window_size):
+    def local_zscore(window):
+        center = window[len(window) // 2]
+        std = np.std(window)
+        if std == 0:
+            return 0
+        return (center - np.mean(window)) / std
+    return ndimage.generic_filter(data, local_zscore, size=window_size)
+
+
+def reference_texture(data, window_size=3):
+    variance_map = reference_variance(data, window_size)
+    range_map = reference_range(data, window_size)
+    texture_variance = float(np.mean(variance_map))
+    texture_contrast = float(np.mean(range_map))
+    return {
+        'texture_variance': texture_variance,
+        'texture_contrast': texture_contrast,
+        'texture_homogeneity': float(1.0 / (1.0 + texture_variance)),
+        'high_texture_fraction': float(np.sum(variance_map > np.percentile(variance_map, 75)) / variance_map.size),
+        'texture_index': texture_variance * texture_contrast
+    }
+
+
+def reference_anomalies(data, window_size=5):
+    zscore_map = reference_zscore(data, window_size)
+    anomalies = np.abs(zscore_map) > 2
+    anomaly_fraction = float(np.sum(anomalies) / anomalies.size)
+    anomaly_mean_zscore = float(np.mean(np.abs(zscore_map[anomalies]))) if np.any(anomalies) else 0.0
+    return {
+        'anomaly_fraction': anomaly_fraction,
+        'anomaly_mean_zscore': anomaly_mean_zscore,
+        'anomaly_clusters': float(ndimage.label(anomalies)[1]),
+        'anomaly_index': anomaly_fraction * anomaly_mean_zscore
+    }
+
+
+def reference_glcm_counts(data, levels):
+    lo, hi = data.min(), data.max()
+    q = np.clip(((data - lo) / (hi - lo) * levels).astype(int), 0, levels - 1)
+    counts = np.zeros((levels, levels))
+    h, w = q.shape
+    for y in range(h):
+        for x in range(w):
+            for dy, dx in ((0, 1), (-1, 1), (-1, 0), (-1, -1)):
+                yy, xx = y + dy, x + dx
+                if 0 <= yy < h and 0 <= xx < w:
+                    counts[q[y, x], q[yy, xx]] += 1
+                    counts[q[yy, xx], q[y, x]] += 1
+    return counts / counts.sum()
+
+
+# ============================================================================
+# CHECKS
+# ============================================================================
+
+def synthetic_chip(shape, seed=0):
+    """Backscatter en dB con speckle y una estructura rectangular"""
+    rng = np.random.default_rng(seed)
+    chip = rng.normal(-12, 3, shape)
+    h, w = shape
+    chip[h // 3:h // 2, w // 3:w // 2] += 5
+    return chip
+
+
+def run_sar_kernels() -> bool:
+    print("\n" + "=" * 80)
+    print("🧪 TEST KERNELS SAR VECTORIZADOS (regresión vs generic_filter)")
+    print("=" * 80 + "\n")
+
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    chip = synthetic_chip((96, 80))
+    clean = despeckle_sar(chip)
+
+    # 1. Mapas locales
+    for window in (3, 5, 7):
+        check(np.allclose(local_variance_map(clean, window), reference_variance(clean, window), rtol=1e-9, atol=1e-9),
+              f"varianza local w={window}")
+        check(np.allclose(local_range_map(clean, window), reference_range(clean, window), rtol=0, atol=1e-12),
+              f"rango local w={window}")
+        check(np.allclose(local_zscore_map(chip, window), reference_zscore(chip, window), rtol=1e-7, atol=1e-7),
+              f"z-score local w={window}")
+
+    # Ventanas constantes → z = 0 (como el callback con std == 0)
+    flat = np.full((20, 20), -10.0)
+    flat[5, 5] = -4.0
+    check(np.allclose(local_zscore_map(flat, 3), reference_zscore(flat, 3), atol=1e-9),
+          "z-score con ventanas constantes")
+
+    # Nodata: NaN confinado a las ventanas que lo contienen (como generic_filter)
+    holed = chip.copy()
+    holed[40, 30] = np.nan
+    for window in (3, 5):
+        half = window // 2
+        touched = np.zeros(holed.shape, dtype=bool)
+        touched[40 - half:40 + half + 1, 30 - half:30 + half + 1] = True
+        variance = local_variance_map(holed, window)
+        zscores = local_zscore_map(holed, window)
+        check(np.array_equal(np.isnan(variance), touched) and np.array_equal(np.isnan(zscores), touched)
+              and np.allclose(variance[~touched], reference_variance(holed, window)[~touched], rtol=1e-9, atol=1e-9)
+              and np.allclose(zscores[~touched], reference_zscore(holed, window)[~touched], rtol=1e-7, atol=1e-7),
+              f"pixel NaN solo afecta su vecindad w={window}")
+
+    # 2. Métricas agregadas
+    texture = calculate_sar_texture(clean)
+    expected = reference_texture(clean)
+    check(all(np.isclose(texture[k], expected[k], rtol=1e-9) for k in expected),
+          "calculate_sar_texture equivalente")
+    anomalies = calculate_sar_local_anomalies(chip)
+    expected = reference_anomalies(chip)
+    check(all(np.isclose(anomalies[k], expected[k], rtol=1e-7) for k in expected),
+          "calculate_sar_local_anomalies equivalente")
+
+    # 3. Stack multibanda
+    stack = np.stack([clean, synthetic_chip((96, 80), seed=1), chip])
+    features = calculate_sar_features_stack(stack)
+    per_band = all(
+        np.isclose(band['texture']['texture_index'], calculate_sar_texture(stack[i])['texture_index'], rtol=1e-9)
+        and np.isclose(band['anomalies']['anomaly_index'], calculate_sar_local_anomalies(stack[i])['anomaly_index'], rtol=1e-9)
+        for i, band in enumerate(features['bands'])
+    )
+    check(len(features['bands']) == 3 and per_band, "stack (3, H, W) = bandas por separado")
+
+    # 4. GLCM contra conteo explícito
+    small = synthetic_chip((24, 20), seed=2)
+    p = reference_glcm_counts(small, 8)
+    i, j = np.indices(p.shape)
+    glcm = glcm_statistics(small, levels=8)
+    check(np.isclose(glcm['glcm_contrast'], np.sum((i - j) ** 2 * p))
+          and np.isclose(glcm['glcm_energy'], np.sum(p ** 2)),
+          f"GLCM (contraste={glcm['glcm_contrast']:.3f}, energía={glcm['glcm_energy']:.4f})")
+
+    # 5. Speedup de los kernels (referencia medida en un recorte, extrapolada por pixel)
+    tile = synthetic_chip((2048, 2048), seed=3)
+    started = time.perf_counter()
+    local_variance_map(tile, 3)
+    local_range_map(tile, 3)
+    local_zscore_map(tile, 5)
+    fast_s = time.perf_counter() - started
+
+    crop = tile[:128, :128]
+    started = time.perf_counter()
+    reference_variance(crop, 3)
+    reference_range(crop, 3)
+    reference_zscore(crop, 5)
+    reference_s = (time.perf_counter() - started) * (tile.size / crop.size)
+
+    speedup = reference_s / fast_s
+    label = f"tile 2048²: {fast_s:.2f}s vs ~{reference_s:.0f}s referencia ({speedup:.0f}×)"
+    if BENCH_SAR:
+        check(speedup >= 100, label)
+    else:
+        # Depende de la carga de la máquina: solo informativo (la equivalencia es el gate)
+        print(f"   ⏱️ {label}")
+
+    return ok
+
+
+def test_sar_kernels():
+    assert run_sar_kernels(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_sar_kernels()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
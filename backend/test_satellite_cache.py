@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test de la caché satelital de dos niveles (L1 memoria + L2 disco)
+
+Verifica:
+- Hit en L1 y en L2 devuelven cached=True y un objeto nuevo cada vez
+- Mutar lo devuelto (o el objeto original tras set) no altera la caché
+- delete con error hace ROLLBACK: la conexión del hilo sigue usable
+- Total de bytes en disco mantenido por triggers (set, reemplazo, delete)
+- Lector con entrada rota no borra la versión que otro worker acaba de publicar
+- Eviction por presupuesto de disco
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from satellite_cache import SatelliteCache
+from satellite_connectors.base_connector import SatelliteData
+
+BBOX = (-13.17, -13.15, -72.55, -72.53)
+
+
+def make_data(value: float, shape=(64, 64)) -> SatelliteData:
+    return SatelliteData(
+        source='sentinel-2', acquisition_date=datetime(2026, 1, 10), cloud_cover=5.0, resolution_m=10.0,
+        lat_min=BBOX[0], lat_max=BBOX[1], lon_min=BBOX[2], lon_max=BBOX[3],
+        bands={'red': np.full(shape, value, dtype=np.float32), 'nir': np.full(shape, value * 2, dtype=np.float32)},
+        indices={'ndvi': 0.4}, anomaly_score=0.1, anomaly_type='none', confidence=0.8, processing_time_s=0.5
+    )
+
+
+class FailingDeleteConnection:
+    """Proxy de la conexión SQLite que falla en el DELETE (dentro de la transacción)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, *args):
+        if sql.startswith("DELETE"):
+            raise RuntimeError("fallo simulado")
+        return self.conn.execute(sql, *args)
+
+
+def indexed_bytes(cache: SatelliteCache) -> int:
+    return cache._connect().execute("SELECT COALESCE(SUM(size_bytes), 0) FROM entries").fetchone()[0]
+
+
+def run_satellite_cache() -> bool:
+    print("🧪 Caché satelital L1/L2")
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = SatelliteCache(cache_dir=workdir, memory_budget_mb=16, disk_budget_mb=1)
+        original = make_data(1.0)
+        cache.set(*BBOX, 'multispectral', original)
+
+        # L1
+        first = cache.get(*BBOX, 'multispectral')
+        check(first is not None and first.cached and first is not original, "hit L1: cached=True y objeto nuevo")
+        original.bands['red'][:] = 99.0
+        first.indices['ndvi'] = -1.0
+        first.bands['nir'] = None
+        try:
+            first.bands['red'][0, 0] = 42.0
+            writable = True
+        except ValueError:
+            writable = False
+        second = cache.get(*BBOX, 'multispectral')
+        check(not writable and second is not first and float(second.bands['red'][0, 0]) == 1.0
+              and second.bands['nir'] is not None and second.indices['ndvi'] == 0.4,
+              "mutar el original o lo devuelto no altera la entrada")
+
+        # L2 (L1 vacío)
+        cache.memory = type(cache.memory)(max_bytes=cache.memory.max_bytes)
+        from_disk = cache.get(*BBOX, 'multispectral')
+        check(from_disk is not None and from_disk.cached and float(from_disk.bands['nir'][0, 0]) == 2.0,
+              "hit L2: cached=True")
+
+        # Total mantenido por triggers
+        entry_bytes = 2 * 64 * 64 * 4
+        cache.set(*BBOX, 'multispectral', make_data(3.0))
+        cache.set(*BBOX, 'sar', make_data(4.0))
+        check(cache._disk_bytes(cache._connect()) == indexed_bytes(cache) == 2 * entry_bytes,
+              "total en disco = suma del índice (tras reemplazo)")
+
+        # delete con error → ROLLBACK
+        real_conn = cache._connect()
+        cache._local.conn = FailingDeleteConnection(real_conn)
+        key = cache._generate_key(*BBOX, 'sar')
+        cache.delete(key)
+        cache._local.conn = real_conn
+        check(not real_conn.in_transaction, "delete fallido deja la conexión fuera de la transacción")
+        cache.delete(key)
+        check(cache.get(*BBOX, 'sar') is None and cache._disk_bytes(real_conn) == entry_bytes,
+              "delete posterior funciona y descuenta bytes")
+
+        # Carrera: otro worker publica una versión nueva mientras este lee la vieja
+        other_worker = SatelliteCache(cache_dir=workdir, memory_budget_mb=16, disk_budget_mb=1)
+        cache.memory = type(cache.memory)(max_bytes=cache.memory.max_bytes)
+        key = cache._generate_key(*BBOX, 'multispectral')
+        read_entry_dir = cache._read_entry_dir
+
+        def racing_read(entry_dir):
+            other_worker.set(*BBOX, 'multispectral', make_data(7.0))
+            raise OSError("directorio reemplazado durante la lectura")
+
+        cache._read_entry_dir = racing_read
+        lost = cache.get(*BBOX, 'multispectral')
+        cache._read_entry_dir = read_entry_dir
+        fresh = cache.get_by_key(key)
+        check(lost is None and fresh is not None and float(fresh.bands['red'][0, 0]) == 7.0,
+              "lectura fallida no borra la versión nueva de otro worker")
+
+        # Eviction: 1 MB de presupuesto, entradas de 256 KB
+        for i in range(6):
+            cache.set(BBOX[0] + i, BBOX[1] + i, BBOX[2], BBOX[3], 'multispectral', make_data(float(i), (256, 256)))
+        total = cache._disk_bytes(real_conn)
+        check(total <= cache.disk_budget_bytes and total == indexed_bytes(cache),
+              f"eviction dentro del presupuesto ({total / 1024:.0f} KB)")
+
+    return ok
+
+
+def test_satellite_cache():
+    assert run_satellite_cache(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_satellite_cache()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test de la caché por teselas (tile pyramid)
+
+Verifica:
+- Mosaico: el bbox pedido se ensambla desde teselas en la posición correcta
+- bbox solapado: solo se descargan las teselas faltantes
+- Key: otros parámetros de descarga (end_date, max_cloud_cover) no reciben
+  teselas descargadas bajo los anteriores; los mismos sí
+- Las escrituras de teselas no corren en el hilo del event loop
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+import numpy as np
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import satellite_tile_cache as tile_module
+from satellite_cache import SatelliteCache
+from satellite_connectors.base_connector import SatelliteData
+from satellite_tile_cache import SatelliteTileCache, TileLevel
+
+LEVEL = TileLevel('multispectral', tile_deg=0.01, resolution_m=50.0)  # 22 px por tesela
+START = datetime(2026, 1, 1)
+
+
+class StubSource:
+    """Descarga sintética: banda 'lon' = longitud del píxel, banda 'tag' = umbral de nubes"""
+
+    def __init__(self):
+        self.calls = []
+
+    def fetcher(self, max_cloud_cover: float):
+        async def fetch(lat_min, lat_max, lon_min, lon_max):
+            self.calls.append((lat_min, lat_max, lon_min, lon_max))
+            rows = int(round((lat_max - lat_min) * 2000))
+            cols = int(round((lon_max - lon_min) * 2000))
+            lon = lon_min + (np.arange(cols) + 0.5) / cols * (lon_max - lon_min)
+            return SatelliteData(
+                source='stub', acquisition_date=START, cloud_cover=1.0, resolution_m=5.0,
+                lat_min=lat_min, lat_max=lat_max, lon_min=lon_min, lon_max=lon_max,
+                bands={'lon': np.tile(lon, (rows, 1)), 'tag': np.full((rows, cols), max_cloud_cover)},
+                indices={}, anomaly_score=0.0, anomaly_type='none', confidence=1.0, processing_time_s=0.0
+            )
+        return fetch
+
+
+def summarize(bands):
+    return {'tag': float(np.mean(bands['tag']))}, 0.0, 'none', 1.0
+
+
+class ThreadRecordingCache(SatelliteCache):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writer_threads = set()
+
+    def set_by_key(self, *args, **kwargs):
+        self.writer_threads.add(threading.get_ident())
+        return super().set_by_key(*args, **kwargs)
+
+
+async def run_checks(tiles: SatelliteTileCache, cache: ThreadRecordingCache, check):
+    source = StubSource()
+    loop_thread = threading.get_ident()
+
+    async def fetch(bbox, cloud=20.0, end_date=None):
+        return await tiles.fetch('multispectral', *bbox, fetch_fn=source.fetcher(cloud), summarize_fn=summarize,
+                                 date=START, params={'end_date': end_date, 'max_cloud_cover': cloud})
+
+    bbox = (10.0005, 10.0195, 20.0025, 20.0275)  # 2 x 3 teselas
+    result = await fetch(bbox)
+    lon = result.bands['lon']
+    pixel = LEVEL.tile_deg / LEVEL.tile_px
+    check(len(source.calls) == 1 and np.allclose(source.calls[0], (10.0, 10.02, 20.0, 20.03)),
+          "una descarga alineada a la grilla")
+    check(abs(lon[0, 0] - bbox[2]) <= 1.5 * pixel and abs(lon[0, -1] - bbox[3]) <= 1.5 * pixel
+          and np.all(np.diff(lon[0]) > 0), "mosaico: columnas en orden y recortadas al bbox")
+    check(result.indices['tag'] == 20.0 and not result.cached, "índices recalculados desde el mosaico")
+    check(loop_thread not in cache.writer_threads and cache.writer_threads, "escrituras fuera del event loop")
+
+    again = await fetch(bbox)
+    check(len(source.calls) == 1 and again.cached, "mismo bbox y parámetros: todo desde caché")
+
+    await fetch((10.0005, 10.0195, 20.0125, 20.0375))
+    check(len(source.calls) == 2 and np.allclose(source.calls[1], (10.0, 10.02, 20.03, 20.04)),
+          "bbox solapado: solo la columna de teselas faltante")
+
+    cloudier = await fetch(bbox, cloud=50.0)
+    check(len(source.calls) == 3 and cloudier.indices['tag'] == 50.0,
+          "otro max_cloud_cover: nueva descarga, no teselas ajenas")
+    later = await fetch(bbox, end_date=datetime(2026, 2, 1))
+    check(len(source.calls) == 4 and later is not None, "otro end_date: nueva descarga")
+    await fetch(bbox, end_date=datetime(2026, 2, 1, 18, 30))
+    check(len(source.calls) == 4, "mismo día de end_date: reutiliza teselas")
+
+
+def run_satellite_tile_cache() -> bool:
+    print("🧪 Caché por teselas")
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    original_cache = tile_module.satellite_cache
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = ThreadRecordingCache(cache_dir=workdir)
+        tile_module.satellite_cache = cache
+        try:
+            asyncio.run(run_checks(SatelliteTileCache(levels={'multispectral': LEVEL}), cache, check))
+        finally:
+            tile_module.satellite_cache = original_cache
+
+    return ok
+
+
+def test_satellite_tile_cache():
+    assert run_satellite_tile_cache(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_satellite_tile_cache()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test de la cola write-behind y su journal por proceso
+
+Verifica (pool falso, sin PostgreSQL):
+- submit → handler(pool, payload) con tipos del journal (datetime, UUID)
+- Error transitorio: reintento; error permanente: dead-letter
+- Journal por proceso ({journal}.{pid}.jsonl): compactar no toca el journal
+  de otro proceso vivo y el replay no re-encola sus trabajos
+- Journals de procesos muertos y el journal sin sufijo se adoptan una vez
+"""
+
+import asyncio
+import fcntl
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID, uuid4
+
+# Agregar path del backend
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database.write_behind import WriteBehindQueue, WriteJournal, dumps
+
+
+def write_foreign_journal(path: Path, jobs):
+    with open(path, 'w', encoding='utf-8') as f:
+        for job_id, payload in jobs:
+            f.write(dumps({'op': 'put', 'id': job_id, 'kind': 'row', 'payload': payload}) + '\n')
+
+
+async def run_checks(workdir: Path, check):
+    base = workdir / 'timt.jsonl'
+    written = []
+    failures = {'transient': 1}
+
+    async def handler(pool, payload):
+        if payload.get('mode') == 'transient' and failures['transient']:
+            failures['transient'] -= 1
+            raise ConnectionError("BD reiniciando")
+        if payload.get('mode') == 'invalid':
+            raise ValueError("dato inválido")
+        written.append((pool, payload))
+
+    # Otro worker vivo (lock tomado) con un trabajo pendiente
+    alive_pid = 999999001
+    alive_journal = base.with_name(f'timt.{alive_pid}.jsonl')
+    write_foreign_journal(alive_journal, [('alive-job', {'n': -1})])
+    alive_lock = open(base.with_name(f'timt.{alive_pid}.lock'), 'a+')
+    fcntl.flock(alive_lock.fileno(), fcntl.LOCK_EX)
+
+    # Worker muerto (lock libre) y journal de la versión anterior
+    write_foreign_journal(base.with_name('timt.999999002.jsonl'), [('dead-job', {'n': -2})])
+    write_foreign_journal(base, [('legacy-job', {'n': -3})])
+
+    queue = WriteBehindQueue("test", str(base), workers=2, retry_base=0.01, fsync=False)
+    queue.register('row', handler)
+    pool = object()
+    queue.attach(pool)
+    await queue.drain(5)
+
+    replayed = sorted(p['n'] for _, p in written)
+    check(replayed == [-3, -2], f"adopta journals muertos y legado, no el vivo ({replayed})")
+    check(queue.journal.path.name == f'timt.{os.getpid()}.jsonl', "journal con sufijo pid")
+    check(alive_journal.exists() and queue.journal.stats['adopted_journals'] == 2
+          and not base.exists() and not base.with_name('timt.999999002.jsonl').exists(),
+          "journal del proceso vivo intacto; los adoptados se eliminan")
+
+    written.clear()
+    acquired = datetime(2026, 3, 1, 12, 30)
+    site = uuid4()
+    await queue.submit('row', {'n': 1, 'acquired': acquired, 'site': site})
+    await queue.submit('row', {'n': 2, 'mode': 'transient'})
+    await queue.submit('row', {'n': 3, 'mode': 'invalid'})
+    await queue.drain(5)
+    payloads = {p['n']: p for _, p in written}
+    check(all(p is pool for p, _ in written) and set(payloads) == {1, 2},
+          "handler(pool, payload) para los trabajos válidos")
+    check(payloads[1]['acquired'] == acquired and isinstance(payloads[1]['site'], UUID),
+          "datetime y UUID intactos")
+    check(queue.stats['retries'] == 1 and queue.stats['dead_lettered'] == 1
+          and 'dato inválido' in queue.journal.failed_path.read_text(encoding='utf-8'),
+          "transitorio reintentado, permanente a dead-letter")
+
+    await queue.close(5)
+    check(queue.journal.pending() == [] and queue.journal.path.read_text(encoding='utf-8') == ''
+          and 'alive-job' in alive_journal.read_text(encoding='utf-8'),
+          "compactar vacía el journal propio sin tocar el ajeno")
+
+    # Segundo attach: el vivo sigue sin adoptarse; al morir (lock libre) sí
+    queue.attach(object())
+    await queue.drain(5)
+    check(not any(p['n'] == -1 for _, p in written), "replay no re-encola trabajos de otro proceso vivo")
+    alive_lock.close()
+    journal = WriteJournal(str(base), fsync=False)
+    check(journal.adopt_orphans() == 1 and [job[0] for job in journal.pending()] == ['alive-job'],
+          "proceso terminado: su journal se adopta")
+    await queue.close(5)
+
+
+def run_write_behind() -> bool:
+    print("🧪 Write-behind con journal por proceso")
+    ok = True
+
+    def check(condition: bool, label: str):
+        nonlocal ok
+        print(f"   {'✅' if condition else '❌'} {label}")
+        ok = ok and condition
+
+    with tempfile.TemporaryDirectory() as workdir:
+        asyncio.run(run_checks(Path(workdir), check))
+    return ok
+
+
+def test_write_behind():
+    assert run_write_behind(), "HAY CHECKS FALLIDOS"
+
+
+if __name__ == "__main__":
+    success = run_write_behind()
+    print("\n" + ("✅ TODOS LOS CHECKS OK" if success else "❌ HAY CHECKS FALLIDOS"))
+    sys.exit(0 if success else 1)
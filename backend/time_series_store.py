@@ -0,0 +1,290 @@
+"""
+Almacén Columnar de Series Temporales (memory-mapped)
+Series largas (MODIS LST, NDVI, SAR) por punto, sin re-descargas
+
+Problema:
+- La caché JSON por (lat, lon, años) guardaba listas de floats Python:
+  cualquier cambio de ventana (un día más, otro número de años) invalidaba
+  el archivo y la serie completa se volvía a descargar.
+
+Solución:
+- Grilla fija de celdas (0.01° ≈ píxel MODIS de 1 km); las celdas se agrupan
+  en teselas de `tile_cells × tile_cells`
+- Un bloque por (variable, tesela, año): arrays .npy `values` (float32,
+  NaN = sin dato) y `quality` (float32, 0-1) de forma (celdas, 366),
+  fila = celda, columna = día del año → la serie de un punto es contigua
+- Lectura por rango con memory-map: sólo se tocan los años pedidos
+- Append incremental: se escriben sólo las fechas nuevas, in situ
+- Reutilización de vecinos: los huecos de una celda se pueden completar con
+  las celdas cercanas de la misma tesela (mismo bloque ya mapeado)
+
+Un solo escritor por proceso (lock); los bloques nuevos se crean en un
+archivo temporal y se publican con os.replace.
+"""
+
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Días por bloque anual (año bisiesto; el último día queda vacío en años normales)
+DAYS_PER_BLOCK = 366
+
+# Calidad de observación (0-1): 1 = dato real, 0 = estimación de modelo
+QUALITY_REAL = 1.0
+QUALITY_ESTIMATED = 0.0
+
+
+def _as_days(dates: Iterable[Any]) -> np.ndarray:
+    """Fechas (date, datetime, str ISO o datetime64) → datetime64[D]"""
+    if isinstance(dates, np.ndarray) and dates.dtype.kind == 'M':
+        return dates.astype('datetime64[D]')
+    return np.array([np.datetime64(d, 'D') if not isinstance(d, str) else np.datetime64(d[:10], 'D')
+                     for d in dates], dtype='datetime64[D]')
+
+
+def _year_and_day(days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(año, día del año 0-based) para un array datetime64[D]"""
+    year_start = days.astype('datetime64[Y]')
+    return year_start.astype(np.int64) + 1970, (days - year_start.astype('datetime64[D]')).astype(np.int64)
+
+
+@dataclass
+class SeriesWindow:
+    """Ventana de una serie: una fila por fecha pedida"""
+
+    dates: np.ndarray      # datetime64[D]
+    values: np.ndarray     # float32, NaN = sin dato
+    quality: np.ndarray    # float32 0-1 (NaN donde no hay dato)
+    reused: np.ndarray     # bool: valor tomado de una celda vecina
+
+    @property
+    def coverage(self) -> float:
+        """Fracción de fechas con dato"""
+        return float(np.mean(~np.isnan(self.values))) if len(self.values) else 0.0
+
+    @property
+    def missing_dates(self) -> np.ndarray:
+        return self.dates[np.isnan(self.values)]
+
+
+class TimeSeriesStore:
+    """
+    Almacén de series temporales por celda, en bloques anuales .npy
+
+    Layout:
+        {root}/{variable}/{tile_y}_{tile_x}/{year}.values.npy
+        {root}/{variable}/{tile_y}_{tile_x}/{year}.quality.npy
+    """
+
+    def __init__(
+        self,
+        root: str = "cache/time_series",
+        cell_deg: float = 0.01,
+        tile_cells: int = 16
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.cell_deg = cell_deg
+        self.tile_cells = tile_cells
+        self._write_lock = threading.Lock()
+
+        logger.info(
+            f"✅ Time series store initialized at {self.root} "
+            f"(celda {cell_deg}°, teselas {tile_cells}×{tile_cells})"
+        )
+
+    # ------------------------------------------------------------------
+    # Grilla y bloques
+    # ------------------------------------------------------------------
+
+    def _cell_index(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Índice global (fila, columna) de la celda que contiene el punto"""
+        eps = 1e-9
+        return (int(np.floor((lat + 90.0) / self.cell_deg + eps)),
+                int(np.floor((lon + 180.0) / self.cell_deg + eps)))
+
+    def locate(self, lat: float, lon: float) -> Tuple[Tuple[int, int], int]:
+        """(tesela (ty, tx), celda dentro del bloque)"""
+        iy, ix = self._cell_index(lat, lon)
+        tile = (iy // self.tile_cells, ix // self.tile_cells)
+        return tile, (iy % self.tile_cells) * self.tile_cells + (ix % self.tile_cells)
+
+    def _block_paths(self, variable: str, tile: Tuple[int, int], year: int) -> Tuple[Path, Path]:
+        tile_dir = self.root / variable / f"{tile[0]}_{tile[1]}"
+        return tile_dir / f"{year}.values.npy", tile_dir / f"{year}.quality.npy"
+
+    def _open_block(self, variable: str, tile: Tuple[int, int], year: int,
+                    writable: bool = False) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Mapear (values, quality) de un bloque; None si no existe y no se escribe"""
+        values_path, quality_path = self._block_paths(variable, tile, year)
+        if not values_path.exists():
+            if not writable:
+                return None
+            self._create_block(values_path, quality_path)
+        mode = 'r+' if writable else 'r'
+        return (np.load(values_path, mmap_mode=mode, allow_pickle=False),
+                np.load(quality_path, mmap_mode=mode, allow_pickle=False))
+
+    def _create_block(self, values_path: Path, quality_path: Path):
+        """Crear un bloque vacío (NaN) y publicarlo atómicamente"""
+        values_path.parent.mkdir(parents=True, exist_ok=True)
+        shape = (self.tile_cells * self.tile_cells, DAYS_PER_BLOCK)
+        token = uuid.uuid4().hex[:8]
+        # quality primero: un bloque es visible cuando existe values
+        for path in (quality_path, values_path):
+            tmp = path.with_name(f".{path.name}.{token}.tmp")
+            block = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=shape)
+            block[:] = np.nan
+            block.flush()
+            del block
+            os.replace(tmp, path)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def append(self, variable: str, lat: float, lon: float,
+               dates: Iterable[Any], values: Iterable[float],
+               quality: Any = QUALITY_REAL) -> int:
+        """
+        Escribir (o sobrescribir) valores de un punto en las fechas dadas
+
+        Args:
+            quality: escalar o un valor por fecha (0-1)
+
+        Returns:
+            Número de fechas escritas
+        """
+        days = _as_days(dates)
+        values = np.asarray(values, dtype=np.float32).reshape(-1)
+        quality = np.broadcast_to(np.asarray(quality, dtype=np.float32), values.shape)
+        if len(days) != len(values):
+            raise ValueError(f"{len(days)} fechas para {len(values)} valores")
+        if len(days) == 0:
+            return 0
+
+        tile, cell = self.locate(lat, lon)
+        years, rows = _year_and_day(days)
+        with self._write_lock:
+            for year in np.unique(years):
+                in_year = years == year
+                block_values, block_quality = self._open_block(variable, tile, int(year), writable=True)
+                block_values[cell, rows[in_year]] = values[in_year]
+                block_quality[cell, rows[in_year]] = quality[in_year]
+                block_values.flush()
+                block_quality.flush()
+        return int(len(days))
+
+    def read_dates(self, variable: str, lat: float, lon: float,
+                   dates: Iterable[Any], neighbor_radius: int = 0) -> SeriesWindow:
+        """
+        Leer un punto en fechas arbitrarias (sólo los bloques anuales implicados)
+
+        Args:
+            neighbor_radius: si > 0, los huecos se completan con la celda más
+                cercana de la misma tesela (distancia en celdas) que tenga dato
+        """
+        days = _as_days(dates)
+        values = np.full(len(days), np.nan, dtype=np.float32)
+        quality = np.full(len(days), np.nan, dtype=np.float32)
+        reused = np.zeros(len(days), dtype=bool)
+        if len(days) == 0:
+            return SeriesWindow(days, values, quality, reused)
+
+        tile, cell = self.locate(lat, lon)
+        neighbors = self._neighbor_cells(cell, neighbor_radius)
+        years, rows = _year_and_day(days)
+        for year in np.unique(years):
+            block = self._open_block(variable, tile, int(year))
+            if block is None:
+                continue
+            block_values, block_quality = block
+            in_year = np.flatnonzero(years == year)
+            year_rows = rows[in_year]
+            values[in_year] = block_values[cell, year_rows]
+            quality[in_year] = block_quality[cell, year_rows]
+
+            for neighbor in neighbors:
+                gaps = in_year[np.isnan(values[in_year])]
+                if len(gaps) == 0:
+                    break
+                candidate = block_values[neighbor, rows[gaps]]
+                found = ~np.isnan(candidate)
+                values[gaps[found]] = candidate[found]
+                quality[gaps[found]] = block_quality[neighbor, rows[gaps[found]]]
+                reused[gaps[found]] = True
+
+        return SeriesWindow(days, values, quality, reused)
+
+    def read_range(self, variable: str, lat: float, lon: float,
+                   start: Any, end: Any, neighbor_radius: int = 0) -> SeriesWindow:
+        """Leer un punto día a día en [start, end] (ambos inclusive)"""
+        start_day = np.datetime64(start, 'D')
+        end_day = np.datetime64(end, 'D')
+        days = np.arange(start_day, end_day + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+        return self.read_dates(variable, lat, lon, days, neighbor_radius=neighbor_radius)
+
+    def missing_dates(self, variable: str, lat: float, lon: float,
+                      dates: Iterable[Any], neighbor_radius: int = 0) -> np.ndarray:
+        """Fechas (datetime64[D]) sin dato para el punto"""
+        return self.read_dates(variable, lat, lon, dates, neighbor_radius).missing_dates
+
+    def _neighbor_cells(self, cell: int, radius: int) -> np.ndarray:
+        """Celdas de la misma tesela a ≤ radius celdas, ordenadas por distancia"""
+        if radius <= 0:
+            return np.zeros(0, dtype=np.int64)
+        row, col = divmod(cell, self.tile_cells)
+        offsets = [(dy, dx) for dy in range(-radius, radius + 1) for dx in range(-radius, radius + 1)
+                   if (dy or dx) and 0 <= row + dy < self.tile_cells and 0 <= col + dx < self.tile_cells]
+        offsets.sort(key=lambda o: o[0] ** 2 + o[1] ** 2)
+        return np.array([(row + dy) * self.tile_cells + (col + dx) for dy, dx in offsets], dtype=np.int64)
+
+    def stats(self) -> Dict[str, Any]:
+        """Bloques y tamaño en disco por variable"""
+        by_variable = {}
+        total_size = 0
+        for variable_dir in sorted(p for p in self.root.iterdir() if p.is_dir()):
+            blocks = list(variable_dir.glob("*/*.values.npy"))
+            size = sum(p.stat().st_size for p in variable_dir.glob("*/*.npy"))
+            by_variable[variable_dir.name] = {'blocks': len(blocks), 'size_mb': round(size / (1024 * 1024), 2)}
+            total_size += size
+        return {
+            'root': str(self.root),
+            'cell_deg': self.cell_deg,
+            'tile_cells': self.tile_cells,
+            'by_variable': by_variable,
+            'total_size_mb': round(total_size / (1024 * 1024), 2)
+        }
+
+
+def modis_composite_dates(start: date, end: date) -> np.ndarray:
+    """
+    Fechas de inicio de los compuestos de 8 días (MOD11A2) que cubren [start, end]
+
+    Los compuestos empiezan en los días del año 1, 9, 17, ... de cada año,
+    así la grilla temporal es la misma sea cual sea la ventana pedida.
+    """
+    dates = []
+    for year in range(start.year, end.year + 1):
+        for doy in range(0, 366, 8):
+            composite = date(year, 1, 1) + timedelta(days=doy)
+            if composite.year != year or composite > end:
+                break
+            dates.append(composite)
+    dates = np.array(dates, dtype='datetime64[D]')
+    # Incluir el compuesto que contiene `start`
+    first = max(int(np.searchsorted(dates, np.datetime64(start, 'D'), side='right')) - 1, 0)
+    return dates[first:]
+
+
+# Instancia global
+time_series_store = TimeSeriesStore()
@@ -12,6 +12,11 @@ from dataclasses import dataclass
 import numpy as np
 from datetime import datetime
 
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from spatial_site_index import known_site_index
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -26,6 +31,20 @@ class ArchaeologicalSite:
     source: str  # Database source
     data_available: List[str]  # LIDAR, satellite, excavation reports
     public_api_url: Optional[str] = None
+    
+    @classmethod
+    def from_db_row(cls, row: Dict[str, Any]) -> 'ArchaeologicalSite':
+        """Sitio de la tabla archaeological_sites (índice espacial compartido)"""
+        return cls(
+            name=row.get('name') or 'Unknown Site',
+            coordinates=(float(row['latitude']), float(row['longitude'])),
+            site_type=row.get('site_type') or 'unknown',
+            period=row.get('period') or 'unknown',
+            area_km2=0.0,
+            confidence_level=str(row.get('confidence_level') or 'possible').lower(),
+            source="ArcheoScope DB (archaeological_sites)",
+            data_available=[]
+        )
 
 @dataclass
 class DataTransparency:
@@ -50,6 +69,10 @@ class RealArchaeologicalValidator:
         
         # Initialize known sites database
         self.known_sites = self._load_known_sites()
+        
+        # Índice espacial compartido (los sitios de BD se agregan en el startup)
+        self.site_index = known_site_index
+        self.site_index.register('calibration', self.known_sites)
         logger.info(f"RealArchaeologicalValidator inicializado con {len(self.known_sites)} sitios verificados")
     
     def _load_known_sites(self) -> List[ArchaeologicalSite]:
@@ -212,40 +235,28 @@ class RealArchaeologicalValidator:
                 "data_availability": {"marine_data": True}
             }
         
-        # OPTIMIZACIÓN 2: Spatial filtering rápido - solo bbox cercano
-        expanded_lat_min = lat_min - 0.5  # Reducido de 1.0 a 0.5
-        expanded_lat_max = lat_max + 0.5
-        expanded_lon_min = lon_min - 0.5
-        expanded_lon_max = lon_max + 0.5
-        
-        # Filtrar sitios rápidamente por bbox expandido
-        candidate_sites = []
-        for site in self.known_sites:
-            site_lat, site_lon = site.coordinates
-            if (expanded_lat_min <= site_lat <= expanded_lat_max and 
-                  expanded_lon_min <= site_lon <= expanded_lon_max):
-                candidate_sites.append(site)
+        # OPTIMIZACIÓN 2: Spatial filtering con índice espacial - bbox expandido ±0.5°
+        # (retorna candidatos ordenados por distancia de gran círculo al centro)
+        candidate_sites = self.site_index.query_bbox(
+            max(-90.0, lat_min - 0.5), min(90.0, lat_max + 0.5),
+            max(-180.0, lon_min - 0.5), min(180.0, lon_max + 0.5)
+        )
         
         # OPTIMIZACIÓN 3: Limitar a máximo 3 sitios (en vez de todos)
-        if len(candidate_sites) > 3:
-            candidate_sites.sort(key=lambda s: self._fast_distance(center_lat, center_lon, s.coordinates[0], s.coordinates[1]))
-            candidate_sites = candidate_sites[:3]
+        candidate_sites = candidate_sites[:3]
         
         # Find overlapping sites (solo en candidatos)
         overlapping_sites = []
-        for site in candidate_sites:
+        for site, _ in candidate_sites:
             site_lat, site_lon = site.coordinates
             if (lat_min <= site_lat <= lat_max and lon_min <= site_lon <= lon_max):
                 overlapping_sites.append(site)
         
-        # Find nearby sites (máximo 2, distancia rápida)
+        # Find nearby sites (máximo 2)
         nearby_sites = []
-        for site in candidate_sites:
+        for site, distance_km in candidate_sites:
             if site in overlapping_sites:
                 continue
-                
-            site_lat, site_lon = site.coordinates
-            distance_km = self._fast_distance(center_lat, center_lon, site_lat, site_lon)
             
             if distance_km <= 50:
                 nearby_sites.append((site, distance_km))
@@ -398,6 +409,15 @@ class RealArchaeologicalValidator:
             confidence_assessment=validation["validation_confidence"]
         )
     
+    def find_nearest_sites(self, lat: float, lon: float, k: int = 5,
+                           max_distance_km: Optional[float] = None) -> List[Tuple[ArchaeologicalSite, float]]:
+        """k sitios conocidos más cercanos (calibración + BD) con distancia en km"""
+        return self.site_index.query_knn(lat, lon, k=k, max_distance_km=max_distance_km)
+    
+    def find_sites_within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[ArchaeologicalSite, float]]:
+        """Sitios conocidos a menos de radius_km, ordenados por distancia"""
+        return self.site_index.query_radius(lat, lon, radius_km)
+    
     def get_site_by_name(self, name: str) -> Optional[ArchaeologicalSite]:
         """Get archaeological site by name"""
         for site in self.known_sites:
@@ -0,0 +1,333 @@
+"""
+ArcheoScope - Mallas de DTM array-native
+Construcción de mallas de terreno, muestreo de atributos por vértice y
+exportación binaria (glTF/GLB y PLY) sin listas Python intermedias.
+
+- Grilla regular: caras int32 por aritmética de índices
+- RTIN (Right-Triangulated Irregular Network, esquema "Martini"): malla
+  adaptativa sin grietas; en terreno plano reduce drásticamente las caras.
+  Los errores se calculan por nivel del árbol de triángulos, vectorizados.
+- Muestreo bilineal de grillas en los vértices con map_coordinates
+- Exportadores que emiten chunks de bytes (aptos para StreamingResponse)
+
+Convención de vértices: (x = columna, y = fila, z = elevación)
+"""
+
+import json
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy.ndimage import map_coordinates
+
+
+# ============================================================================
+# MALLA REGULAR
+# ============================================================================
+
+def build_grid_mesh(dtm: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Malla regular de 2 triángulos por celda
+
+    Returns:
+        (vertices float32 (H*W, 3), faces int32 (2*(H-1)*(W-1), 3))
+    """
+    height, width = dtm.shape
+    rows, cols = np.mgrid[0:height, 0:width]
+    vertices = np.column_stack([
+        cols.ravel(), rows.ravel(), np.asarray(dtm, dtype=np.float32).ravel()
+    ]).astype(np.float32)
+
+    # v0 = esquina superior izquierda de cada celda
+    v0 = (np.arange(height - 1, dtype=np.int32)[:, None] * width
+          + np.arange(width - 1, dtype=np.int32)[None, :]).ravel()
+    v1 = v0 + 1
+    v2 = v0 + width
+    v3 = v2 + 1
+
+    faces = np.empty((2 * v0.size, 3), dtype=np.int32)
+    faces[0::2] = np.column_stack([v0, v1, v2])
+    faces[1::2] = np.column_stack([v1, v3, v2])
+    return vertices, faces
+
+
+# ============================================================================
+# RTIN ADAPTATIVO
+# ============================================================================
+
+def _scatter_max(target: np.ndarray, index: np.ndarray, values: np.ndarray):
+    """
+    target[index] = max(target[index], values) con índices repetidos
+
+    En un nivel RTIN una hipotenusa la comparten a lo sumo 2 triángulos:
+    dos pasadas en órdenes opuestos bastan (más rápido que np.maximum.at).
+    """
+    target[index] = np.maximum(target[index], values)
+    target[index[::-1]] = np.maximum(target[index[::-1]], values[::-1])
+
+class RTINMesher:
+    """
+    Triangulación adaptativa RTIN sobre un DTM
+
+    La grilla se extiende (replicando bordes) a 2^k + 1; los puntos del borde
+    original se fuerzan a resolución completa, así ningún triángulo cruza el
+    borde y los de la extensión se descartan sin dejar huecos.
+    """
+
+    def __init__(self, dtm: np.ndarray):
+        self.dtm = np.asarray(dtm, dtype=np.float64)
+        self.height, self.width = self.dtm.shape
+        tile = 1
+        while tile < max(self.height, self.width) - 1:
+            tile *= 2
+        self.tile_size = tile
+        self.grid_size = tile + 1
+        self.terrain = np.pad(
+            self.dtm,
+            ((0, self.grid_size - self.height), (0, self.grid_size - self.width)),
+            mode='edge'
+        ).ravel()
+        self.errors = self._compute_errors()
+
+    def _triangle_levels(self, max_depth: int) -> List[np.ndarray]:
+        """
+        Triángulos (ax, ay, bx, by, cx, cy) por profundidad, de las 2 raíces a las hojas
+
+        Cada nivel se deriva del anterior: hijos (c, a, m) y (b, c, m) con
+        m = punto medio de la hipotenusa a-b.
+        """
+        tile = self.tile_size
+        level = np.array([[0, 0, tile, tile, tile, 0],
+                          [tile, tile, 0, 0, 0, tile]], dtype=np.int32)
+        levels = [level]
+        for _ in range(max_depth - 1):
+            ax, ay, bx, by, cx, cy = level.T
+            mx, my = (ax + bx) >> 1, (ay + by) >> 1
+            level = np.concatenate([
+                np.column_stack([cx, cy, ax, ay, mx, my]),
+                np.column_stack([bx, by, cx, cy, mx, my])
+            ])
+            levels.append(level)
+        return levels
+
+    def _compute_errors(self) -> np.ndarray:
+        gs = self.grid_size
+        terrain = self.terrain
+        errors = np.zeros(gs * gs, dtype=np.float64)
+        if self.tile_size < 2:
+            return errors
+
+        # Niveles del árbol: raíces (2 triángulos) ... hojas de lado 1; de abajo hacia arriba
+        max_depth = 2 * int(np.log2(self.tile_size))
+        levels = self._triangle_levels(max_depth)
+        for depth in range(max_depth, 0, -1):
+            ax, ay, bx, by, cx, cy = levels.pop().T.astype(np.int64)
+            mx = (ax + bx) >> 1
+            my = (ay + by) >> 1
+            middle = my * gs + mx
+            interpolated = (terrain[ay * gs + ax] + terrain[by * gs + bx]) / 2
+            middle_error = np.abs(interpolated - terrain[middle])
+            if depth < max_depth:
+                left_child = ((ay + cy) >> 1) * gs + ((ax + cx) >> 1)
+                right_child = ((by + cy) >> 1) * gs + ((bx + cx) >> 1)
+                middle_error = np.maximum(middle_error, np.maximum(errors[left_child], errors[right_child]))
+            _scatter_max(errors, middle, middle_error)
+            if depth == max_depth:
+                self._force_border(errors)
+        return errors
+
+    def _force_border(self, errors: np.ndarray):
+        """Resolución completa sobre el último row/col del DTM original"""
+        gs = self.grid_size
+        grid = errors.reshape(gs, gs)
+        if self.height < gs:
+            grid[self.height - 1, :self.width] = np.inf
+        if self.width < gs:
+            grid[:self.height, self.width - 1] = np.inf
+
+    def mesh(self, max_error: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Malla con error vertical ≤ max_error (unidades de elevación)
+
+        Returns:
+            (vertices float32 (N, 3), faces int32 (M, 3))
+        """
+        gs, tile = self.grid_size, self.tile_size
+        if tile < 2:
+            return build_grid_mesh(self.dtm)
+
+        # Recorrido por niveles: (ax, ay, bx, by, cx, cy)
+        active = np.array([[0, 0, tile, tile, tile, 0],
+                           [tile, tile, 0, 0, 0, tile]], dtype=np.int64)
+        emitted = []
+        while len(active):
+            ax, ay, bx, by, cx, cy = active.T
+            mx = (ax + bx) >> 1
+            my = (ay + by) >> 1
+            splittable = (np.abs(ax - cx) + np.abs(ay - cy)) > 1
+            split = splittable & (self.errors[my * gs + mx] > max_error)
+            leaf = active[~split]
+            if len(leaf):
+                emitted.append(leaf)
+            s = active[split]
+            if not len(s):
+                break
+            sax, say, sbx, sby, scx, scy = s.T
+            smx, smy = (sax + sbx) >> 1, (say + sby) >> 1
+            active = np.concatenate([
+                np.column_stack([scx, scy, sax, say, smx, smy]),
+                np.column_stack([sbx, sby, scx, scy, smx, smy])
+            ])
+
+        triangles = np.concatenate(emitted)
+        xs = triangles[:, 0::2]
+        ys = triangles[:, 1::2]
+        inside = np.all((xs < self.width) & (ys < self.height), axis=1)
+        xs, ys = xs[inside], ys[inside]
+
+        # Orientación consistente con build_grid_mesh (misma normal que la grilla)
+        grid_ids = ys * gs + xs
+        cross = ((xs[:, 1] - xs[:, 0]) * (ys[:, 2] - ys[:, 0])
+                 - (ys[:, 1] - ys[:, 0]) * (xs[:, 2] - xs[:, 0]))
+        flip = cross < 0
+        grid_ids[flip] = grid_ids[flip][:, [0, 2, 1]]
+
+        used, faces = np.unique(grid_ids, return_inverse=True)
+        vx = used % gs
+        vy = used // gs
+        vertices = np.column_stack([vx, vy, self.dtm[vy, vx]]).astype(np.float32)
+        return vertices, faces.reshape(-1, 3).astype(np.int32)
+
+
+# ============================================================================
+# MUESTREO DE ATRIBUTOS
+# ============================================================================
+
+def sample_grid_at_vertices(grid: np.ndarray, vertices: np.ndarray,
+                            mesh_shape: Optional[Tuple[int, int]] = None,
+                            order: int = 1) -> np.ndarray:
+    """
+    Muestrear una grilla 2D en los vértices (bilineal por defecto)
+
+    Si la grilla no tiene la forma del DTM (`mesh_shape`), las coordenadas se
+    reescalan al rango de la grilla.
+    """
+    grid = np.asarray(grid, dtype=np.float64)
+    cols = vertices[:, 0].astype(np.float64)
+    rows = vertices[:, 1].astype(np.float64)
+    if mesh_shape is not None and mesh_shape != grid.shape:
+        mesh_h, mesh_w = mesh_shape
+        rows = rows * (grid.shape[0] - 1) / max(mesh_h - 1, 1)
+        cols = cols * (grid.shape[1] - 1) / max(mesh_w - 1, 1)
+    return map_coordinates(grid, [rows, cols], order=order, mode='nearest').astype(np.float32)
+
+
+# ============================================================================
+# EXPORTACIÓN BINARIA
+# ============================================================================
+
+_GLB_MAGIC = 0x46546C67
+_CHUNK_JSON = 0x4E4F534A
+_CHUNK_BIN = 0x004E4942
+_FLOAT = 5126
+_UNSIGNED_INT = 5125
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+
+
+def _gltf_attribute_name(name: str) -> str:
+    # Atributos no estándar de glTF deben empezar con "_"
+    return "_" + name.upper()
+
+
+def iter_glb(vertices: np.ndarray, faces: np.ndarray,
+             attributes: Optional[Dict[str, np.ndarray]] = None,
+             extras: Optional[Dict] = None) -> Iterator[bytes]:
+    """
+    Emitir la malla como GLB (glTF 2.0 binario) en chunks
+
+    Los atributos por vértice se exportan como accessors SCALAR float32
+    (`_LOCAL_VOLUME`, `_ANTHROPIC_PROBABILITY`, ...).
+    """
+    positions = np.ascontiguousarray(vertices, dtype=np.float32)
+    indices = np.ascontiguousarray(faces, dtype=np.uint32).ravel()
+    blobs = [(positions, _ARRAY_BUFFER), (indices, _ELEMENT_ARRAY_BUFFER)]
+    attribute_blobs = {
+        name: np.ascontiguousarray(values, dtype=np.float32)
+        for name, values in (attributes or {}).items()
+    }
+    blobs.extend((values, _ARRAY_BUFFER) for values in attribute_blobs.values())
+
+    buffer_views, offset = [], 0
+    for blob, target in blobs:
+        buffer_views.append({"buffer": 0, "byteOffset": offset,
+                             "byteLength": blob.nbytes, "target": target})
+        offset += blob.nbytes  # float32/uint32: siempre alineado a 4 bytes
+    bin_length = offset
+
+    accessors = [
+        {"bufferView": 0, "componentType": _FLOAT, "count": len(positions), "type": "VEC3",
+         "min": positions.min(axis=0).tolist() if len(positions) else [0, 0, 0],
+         "max": positions.max(axis=0).tolist() if len(positions) else [0, 0, 0]},
+        {"bufferView": 1, "componentType": _UNSIGNED_INT, "count": int(indices.size), "type": "SCALAR"}
+    ]
+    primitive_attributes = {"POSITION": 0}
+    for i, (name, values) in enumerate(attribute_blobs.items()):
+        accessors.append({"bufferView": 2 + i, "componentType": _FLOAT,
+                          "count": int(values.size), "type": "SCALAR"})
+        primitive_attributes[_gltf_attribute_name(name)] = 2 + i
+
+    document = {
+        "asset": {"version": "2.0", "generator": "ArcheoScope LidarFusionEngine"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": primitive_attributes, "indices": 1, "mode": 4}],
+                    "extras": extras or {}}],
+        "buffers": [{"byteLength": bin_length}],
+        "bufferViews": buffer_views,
+        "accessors": accessors
+    }
+    json_bytes = json.dumps(document, separators=(",", ":")).encode("utf-8")
+    json_bytes += b" " * (-len(json_bytes) % 4)
+
+    total = 12 + 8 + len(json_bytes) + 8 + bin_length
+    yield struct.pack("<III", _GLB_MAGIC, 2, total)
+    yield struct.pack("<II", len(json_bytes), _CHUNK_JSON) + json_bytes
+    yield struct.pack("<II", bin_length, _CHUNK_BIN)
+    for blob, _ in blobs:
+        yield blob.tobytes()
+
+
+def iter_ply(vertices: np.ndarray, faces: np.ndarray,
+             attributes: Optional[Dict[str, np.ndarray]] = None) -> Iterator[bytes]:
+    """Emitir la malla como PLY binario little-endian en chunks"""
+    attributes = attributes or {}
+    names = list(attributes)
+    header = [
+        "ply",
+        "format binary_little_endian 1.0",
+        "comment ArcheoScope LidarFusionEngine",
+        f"element vertex {len(vertices)}",
+        "property float x",
+        "property float y",
+        "property float z",
+        *[f"property float {name}" for name in names],
+        f"element face {len(faces)}",
+        "property list uchar int vertex_indices",
+        "end_header"
+    ]
+    yield ("\n".join(header) + "\n").encode("ascii")
+
+    vertex_dtype = np.dtype([("x", "<f4"), ("y", "<f4"), ("z", "<f4")]
+                            + [(name, "<f4") for name in names])
+    vertex_records = np.empty(len(vertices), dtype=vertex_dtype)
+    vertex_records["x"], vertex_records["y"], vertex_records["z"] = np.asarray(vertices, dtype=np.float32).T
+    for name in names:
+        vertex_records[name] = attributes[name]
+    yield vertex_records.tobytes()
+
+    face_records = np.empty(len(faces), dtype=np.dtype([("n", "u1"), ("v", "<i4", (3,))]))
+    face_records["n"] = 3
+    face_records["v"] = faces
+    yield face_records.tobytes()
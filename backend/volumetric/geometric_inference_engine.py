@@ -21,6 +21,8 @@ from dataclasses import dataclass
 from enum import Enum
 import logging
 
+from .iso_surface import extract_iso_surface, mesh_surface_area, is_watertight
+
 logger = logging.getLogger(__name__)
 
 class MorphologicalClass(Enum):
@@ -104,10 +106,12 @@ class GeometricInferenceEngine:
     5. Metadatos y validación
     """
     
-    def __init__(self, voxel_resolution_m: float = 2.0, confidence_threshold: float = 0.65, inference_level: InferenceLevel = InferenceLevel.LEVEL_II):
+    def __init__(self, voxel_resolution_m: float = 2.0, confidence_threshold: float = 0.65, inference_level: InferenceLevel = InferenceLevel.LEVEL_II,
+                 max_mesh_faces: Optional[int] = 20000):
         self.inference_level = inference_level
         self.voxel_resolution_m = voxel_resolution_m  # Resolución volumétrica configurable
         self.confidence_threshold = confidence_threshold  # Umbral configurable
+        self.max_mesh_faces = max_mesh_faces  # Presupuesto de caras low-poly (None = sin decimar)
         
         logger.info(f"GeometricInferenceEngine inicializado - Nivel {inference_level.value}, resolución {voxel_resolution_m}m")
     
@@ -411,11 +415,14 @@ class GeometricInferenceEngine:
         
         return volumetric_field
     
-    def extract_geometric_model(self, volumetric_field: VolumetricField, iso_threshold: Optional[float] = None) -> GeometricModel:
+    def extract_geometric_model(self, volumetric_field: VolumetricField, iso_threshold: Optional[float] = None,
+                                target_faces: Optional[int] = None) -> GeometricModel:
         """
         ETAPA 4: Reconstrucción geométrica mínima.
         
-        Extrae modelo 3D low-poly del campo volumétrico.
+        Extrae modelo 3D low-poly del campo volumétrico con Surface Nets
+        vectorizado (ver iso_surface.py): malla cerrada con vértices
+        compartidos, decimada a `target_faces` (default: max_mesh_faces).
         """
         
         # Umbral de iso-superficie adaptativo
@@ -426,65 +433,27 @@ class GeometricInferenceEngine:
         
         logger.info(f"Usando umbral iso-superficie adaptativo: {iso_threshold:.3f}")
         
-        # Extraer iso-superficie usando marching cubes (simplificado)
-        prob_vol = volumetric_field.probability_volume
-        nx, ny, nz = prob_vol.shape
-        
-        vertices = []
-        faces = []
-        
-        # Algoritmo simplificado de extracción de superficie
-        vertex_map = {}
-        vertex_count = 0
-        
-        for i in range(nx-1):
-            for j in range(ny-1):
-                for k in range(nz-1):
-                    
-                    # Verificar si el voxel cruza el umbral
-                    values = [
-                        prob_vol[i, j, k],
-                        prob_vol[i+1, j, k],
-                        prob_vol[i, j+1, k],
-                        prob_vol[i, j, k+1]
-                    ]
-                    
-                    if min(values) < iso_threshold < max(values):
-                        # Crear vértice en el centro del voxel
-                        vertex_pos = (
-                            i * volumetric_field.voxel_size_m,
-                            j * volumetric_field.voxel_size_m,
-                            k * volumetric_field.voxel_size_m
-                        )
-                        
-                        vertex_key = (i, j, k)
-                        if vertex_key not in vertex_map:
-                            vertices.append(vertex_pos)
-                            vertex_map[vertex_key] = vertex_count
-                            vertex_count += 1
-        
-        # Generar caras triangulares (simplificado)
-        for i in range(0, len(vertices)-2, 3):
-            if i+2 < len(vertices):
-                faces.append([i, i+1, i+2])
+        if target_faces is None:
+            target_faces = self.max_mesh_faces
         
-        vertices = np.array(vertices) if vertices else np.zeros((0, 3))
-        faces = np.array(faces) if faces else np.zeros((0, 3), dtype=int)
+        # Extraer iso-superficie (coordenadas en índices de voxel)
+        prob_vol = volumetric_field.probability_volume
+        voxel_size = volumetric_field.voxel_size_m
+        grid_vertices, faces = extract_iso_surface(prob_vol, iso_threshold, target_faces=target_faces)
+        watertight = is_watertight(faces)
+        vertices = grid_vertices * voxel_size
         
         # Calcular propiedades geométricas
         if len(vertices) > 0:
-            estimated_volume_m3 = np.sum(prob_vol > iso_threshold) * (volumetric_field.voxel_size_m ** 3)
-            max_height_m = np.max(vertices[:, 2]) if len(vertices) > 0 else 0
+            estimated_volume_m3 = np.sum(prob_vol > iso_threshold) * (voxel_size ** 3)
+            max_height_m = float(np.max(vertices[:, 2]))
             
             # Proyección 2D para área de huella
-            if len(vertices) > 0:
-                x_range = np.max(vertices[:, 0]) - np.min(vertices[:, 0])
-                y_range = np.max(vertices[:, 1]) - np.min(vertices[:, 1])
-                footprint_area_m2 = x_range * y_range
-            else:
-                footprint_area_m2 = 0
-                
-            surface_area_m2 = len(faces) * (volumetric_field.voxel_size_m ** 2) * 2  # Aproximación
+            x_range = np.max(vertices[:, 0]) - np.min(vertices[:, 0])
+            y_range = np.max(vertices[:, 1]) - np.min(vertices[:, 1])
+            footprint_area_m2 = float(x_range * y_range)
+            
+            surface_area_m2 = mesh_surface_area(vertices, faces)
         else:
             estimated_volume_m3 = 0
             surface_area_m2 = 0
@@ -497,12 +466,8 @@ class GeometricInferenceEngine:
                                                    MorphologicalClass.STEPPED_PLATFORM]:
             symmetries_detected.append("bilateral_approximate")
         
-        # Zonas de confianza basadas en probabilidad
-        confidence_zones = {
-            'high_confidence': list(range(len(vertices) // 3)),
-            'medium_confidence': list(range(len(vertices) // 3, 2 * len(vertices) // 3)),
-            'low_confidence': list(range(2 * len(vertices) // 3, len(vertices)))
-        }
+        # Zonas de confianza: incertidumbre del voxel más cercano a cada vértice
+        confidence_zones = self._vertex_confidence_zones(volumetric_field, grid_vertices)
         
         geometric_model = GeometricModel(
             vertices=vertices,
@@ -512,16 +477,33 @@ class GeometricInferenceEngine:
             surface_area_m2=surface_area_m2,
             max_height_m=max_height_m,
             footprint_area_m2=footprint_area_m2,
-            reconstruction_method="probabilistic_iso_surface",
+            reconstruction_method="probabilistic_iso_surface_surface_nets",
             iso_surface_threshold=iso_threshold,
             smoothing_applied=True,
             symmetries_detected=symmetries_detected
         )
         
-        logger.info(f"Modelo geométrico extraído: {len(vertices)} vértices, volumen estimado: {estimated_volume_m3:.1f} m³")
+        logger.info(f"Modelo geométrico extraído: {len(vertices)} vértices, {len(faces)} caras "
+                    f"(cerrada: {watertight}), volumen estimado: {estimated_volume_m3:.1f} m³")
         
         return geometric_model
     
+    def _vertex_confidence_zones(self, volumetric_field: VolumetricField,
+                                 grid_vertices: np.ndarray) -> Dict[str, List[int]]:
+        """Clasificar vértices por confianza (1 - incertidumbre del voxel)"""
+        if len(grid_vertices) == 0:
+            return {'high_confidence': [], 'medium_confidence': [], 'low_confidence': []}
+        
+        uncertainty = volumetric_field.uncertainty_field
+        idx = np.clip(np.rint(grid_vertices).astype(int), 0, np.array(uncertainty.shape) - 1)
+        confidence = 1.0 - uncertainty[idx[:, 0], idx[:, 1], idx[:, 2]]
+        
+        return {
+            'high_confidence': np.flatnonzero(confidence >= 0.6).tolist(),
+            'medium_confidence': np.flatnonzero((confidence >= 0.3) & (confidence < 0.6)).tolist(),
+            'low_confidence': np.flatnonzero(confidence < 0.3).tolist()
+        }
+    
     def generate_metadata_report(self, 
                                signature: SpatialSignature,
                                volumetric_field: VolumetricField,
@@ -5,12 +5,14 @@ Integración científica de datos LIDAR públicos con análisis ArcheoScope mult
 
 import numpy as np
 import json
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Iterator
 from dataclasses import dataclass
 from enum import Enum
 import logging
 from pathlib import Path
 
+from .dtm_mesh import RTINMesher, build_grid_mesh, sample_grid_at_vertices, iter_glb, iter_ply
+
 logger = logging.getLogger(__name__)
 
 class LidarType(Enum):
@@ -370,7 +372,8 @@ class LidarFusionEngine:
     def generate_3d_model(self, 
                          volumetric_analysis: VolumetricAnalysis,
                          fusion_result: FusionResult,
-                         output_format: str = 'gltf') -> Dict[str, Any]:
+                         output_format: str = 'gltf',
+                         mesh_max_error_m: Optional[float] = None) -> Dict[str, Any]:
         """
         Generar modelo 3D interpretado
         
@@ -379,21 +382,29 @@ class LidarFusionEngine:
         - Volumen local
         - Probabilidad antrópica
         - Fuente dominante (LIDAR / espectral / temporal)
+        
+        Vértices, caras y atributos se devuelven como arrays numpy
+        (float32 / int32); para transmitir usar stream_3d_model (GLB o PLY).
+        
+        Args:
+            mesh_max_error_m: Error vertical máximo para la malla adaptativa
+                RTIN. None = grilla regular completa.
         """
         try:
             logger.info(f"Generando modelo 3D en formato {output_format}")
             
             # Generar malla 3D
-            vertices, faces = self._generate_3d_mesh(volumetric_analysis.dtm)
+            dtm_shape = volumetric_analysis.dtm.shape
+            vertices, faces = self._generate_3d_mesh(volumetric_analysis.dtm, mesh_max_error_m)
             
-            # Atributos por vértice
+            # Atributos por vértice (muestreo bilineal)
             vertex_attributes = {
-                'local_volume': self._interpolate_to_vertices(volumetric_analysis.elevation_model, vertices),
-                'anthropic_probability': self._interpolate_to_vertices(fusion_result.anthropic_probability_final, vertices),
-                'dominant_source': self._interpolate_to_vertices(fusion_result.dominant_source, vertices),
-                'confidence_level': self._interpolate_to_vertices(fusion_result.confidence_level, vertices),
-                'lidar_contribution': self._interpolate_to_vertices(fusion_result.lidar_contribution, vertices),
-                'archeoscope_contribution': self._interpolate_to_vertices(fusion_result.archeoscope_contribution, vertices)
+                'local_volume': self._interpolate_to_vertices(volumetric_analysis.elevation_model, vertices, dtm_shape),
+                'anthropic_probability': self._interpolate_to_vertices(fusion_result.anthropic_probability_final, vertices, dtm_shape),
+                'dominant_source': self._interpolate_to_vertices(fusion_result.dominant_source, vertices, dtm_shape),
+                'confidence_level': self._interpolate_to_vertices(fusion_result.confidence_level, vertices, dtm_shape),
+                'lidar_contribution': self._interpolate_to_vertices(fusion_result.lidar_contribution, vertices, dtm_shape),
+                'archeoscope_contribution': self._interpolate_to_vertices(fusion_result.archeoscope_contribution, vertices, dtm_shape)
             }
             
             # Capas activables
@@ -438,14 +449,17 @@ class LidarFusionEngine:
             # Modelo 3D completo
             model_3d = {
                 'format': output_format,
-                'vertices': vertices.tolist(),
-                'faces': faces.tolist(),
-                'vertex_attributes': {k: v.tolist() for k, v in vertex_attributes.items()},
+                'vertices': vertices,
+                'faces': faces,
+                'vertex_attributes': vertex_attributes,
                 'activatable_layers': activatable_layers,
                 'metadata': {
                     'generation_timestamp': np.datetime64('now').astype(str),
                     'total_vertices': len(vertices),
                     'total_faces': len(faces),
+                    'mesh_type': 'rtin_adaptive' if mesh_max_error_m is not None else 'regular_grid',
+                    'mesh_max_error_m': mesh_max_error_m,
+                    'binary_formats': ['glb', 'ply'],
                     'coordinate_system': 'WGS84',
                     'elevation_unit': 'meters',
                     'probability_range': [0.0, 1.0]
@@ -471,6 +485,52 @@ class LidarFusionEngine:
             logger.error(f"Error generando modelo 3D: {e}")
             raise
     
+    def stream_3d_model(self, model_3d: Dict[str, Any], binary_format: str = 'glb') -> Iterator[bytes]:
+        """
+        Serializar un modelo de generate_3d_model como binario en chunks
+        
+        Args:
+            model_3d: Resultado de generate_3d_model
+            binary_format: 'glb' (glTF 2.0 binario) o 'ply' (binario little-endian)
+        
+        Returns:
+            Iterador de bytes (p.ej. para StreamingResponse)
+        """
+        vertices = model_3d['vertices']
+        faces = model_3d['faces']
+        attributes = model_3d.get('vertex_attributes', {})
+        
+        if binary_format == 'glb':
+            return iter_glb(vertices, faces, attributes, extras={
+                'metadata': {k: v for k, v in model_3d.get('metadata', {}).items()
+                             if isinstance(v, (str, int, float, list, type(None)))}
+            })
+        if binary_format == 'ply':
+            return iter_ply(vertices, faces, attributes)
+        raise ValueError(f"Formato binario no soportado: {binary_format}")
+    
+    def describe_3d_model(self, model_3d: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Resumen JSON de un modelo (sin vértices, caras ni atributos por vértice)
+        
+        La geometría se transmite aparte con stream_3d_model; las capas
+        activables solo listan los nombres de sus atributos.
+        """
+        layers = {
+            layer_id: {
+                **{k: v for k, v in layer.items() if k not in ('vertices', 'faces', 'attributes')},
+                'attributes': list(layer.get('attributes', {}))
+            }
+            for layer_id, layer in model_3d.get('activatable_layers', {}).items()
+        }
+        return {
+            'format': model_3d.get('format'),
+            'metadata': dict(model_3d.get('metadata', {})),
+            'vertex_attributes': list(model_3d.get('vertex_attributes', {})),
+            'activatable_layers': layers,
+            'scientific_indicators': model_3d.get('scientific_indicators', {})
+        }
+    
     # Métodos auxiliares privados
     
     def _generate_dtm(self, lidar_data: np.ndarray, site: LidarSite) -> np.ndarray:
@@ -684,44 +744,28 @@ class LidarFusionEngine:
         archeoscope_ratio = archeoscope_contribution / total_contribution
         return archeoscope_ratio
     
-    def _generate_3d_mesh(self, dtm: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
-        """Generar malla 3D a partir del DTM"""
-        height, width = dtm.shape
-        
-        # Generar vértices
-        x, y = np.meshgrid(np.arange(width), np.arange(height))
-        vertices = np.column_stack([
-            x.ravel(),
-            y.ravel(),
-            dtm.ravel()
-        ])
-        
-        # Generar caras (triángulos)
-        faces = []
-        for i in range(height - 1):
-            for j in range(width - 1):
-                # Índices de los vértices del cuadrado
-                v0 = i * width + j
-                v1 = i * width + (j + 1)
-                v2 = (i + 1) * width + j
-                v3 = (i + 1) * width + (j + 1)
-                
-                # Dos triángulos por cuadrado
-                faces.append([v0, v1, v2])
-                faces.append([v1, v3, v2])
-        
-        return vertices, np.array(faces)
+    def _generate_3d_mesh(self, dtm: np.ndarray,
+                          max_error_m: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Generar malla 3D a partir del DTM
+        
+        Grilla regular (2 triángulos por celda) o, con max_error_m, malla
+        adaptativa RTIN sin grietas. Caras int32, vértices float32 (x=col, y=fila, z).
+        """
+        if max_error_m is None:
+            return build_grid_mesh(dtm)
+        
+        vertices, faces = RTINMesher(dtm).mesh(max_error_m)
+        full_faces = 2 * (dtm.shape[0] - 1) * (dtm.shape[1] - 1)
+        logger.info(f"Malla RTIN (error ≤ {max_error_m} m): {len(faces)} caras "
+                    f"({len(faces) / max(full_faces, 1):.1%} de la grilla completa)")
+        return vertices, faces
     
-    def _interpolate_to_vertices(self, grid_data: np.ndarray, vertices: np.ndarray) -> np.ndarray:
-        """Interpolar datos de grilla a vértices"""
-        # Simplificación: usar valores directos (en implementación real usaría interpolación)
-        height, width = grid_data.shape
-        vertex_values = []
-        
-        for vertex in vertices:
-            x, y = int(vertex[0]), int(vertex[1])
-            x = np.clip(x, 0, width - 1)
-            y = np.clip(y, 0, height - 1)
-            vertex_values.append(grid_data[y, x])
-        
-        return np.array(vertex_values)
\ No newline at end of file
+    def _interpolate_to_vertices(self, grid_data: np.ndarray, vertices: np.ndarray,
+                                 mesh_shape: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        Interpolar datos de grilla a vértices (bilineal, map_coordinates)
+        
+        Si la grilla difiere del DTM se reescala a su extensión.
+        """
+        return sample_grid_at_vertices(grid_data, vertices, mesh_shape)